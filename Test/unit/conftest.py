@@ -0,0 +1,8 @@
+"""
+Unit tests of the forcing engine core modules, on small synthetic grids.
+Run from the top of the repository with: python -m pytest Test/unit
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
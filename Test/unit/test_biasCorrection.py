@@ -0,0 +1,274 @@
+"""
+Tests of the vectorized CFSv2/NLDAS CDF bias correction against the
+per-cell loop it replaced, on synthetic parameter files.
+"""
+import datetime
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip('mpi4py')
+netCDF4 = pytest.importorskip('netCDF4')
+
+from core import bias_correction
+
+NDV = -999999.0
+NY = 6
+NX = 8
+SRC_WINDOW = (slice(100, 100 + NY), slice(200, 200 + NX))
+
+# Variable of the CFSv2 parameter file names, by force_num.
+CFS_VARS = {0: 'tmp2m', 1: 'q2m', 4: 'prate', 5: 'dswsfc'}
+NLDAS_VARS = {0: 'T2M', 1: 'Q2M', 4: 'PRATE', 5: 'SW'}
+VALS = {
+    0: np.linspace(200.0, 330.0, 1300),
+    1: np.linspace(0.01, 40.0, 1000),
+    4: np.linspace(0.01, 100.0, 2000),
+}
+
+
+def to_param_grid(local, fill):
+    """
+    Full parameter grid, y-mirrored as in the parameter files, holding the local
+    grid in the source window.
+    """
+    grid = np.full((bias_correction.PARAM_NY, bias_correction.PARAM_NX), fill)
+    grid[SRC_WINDOW] = local
+    return grid[::-1, :]
+
+
+def write_params(path, variables, fill=None):
+    """
+    Write a synthetic parameter file on the [lat_0, lon_0] parameter grid.
+    """
+    with netCDF4.Dataset(path, 'w') as id_out:
+        id_out.createDimension('lat_0', bias_correction.PARAM_NY)
+        id_out.createDimension('lon_0', bias_correction.PARAM_NX)
+        for var_name, local in variables.items():
+            var = id_out.createVariable(var_name, 'f8', ('lat_0', 'lon_0'), fill_value=fill)
+            var[:, :] = to_param_grid(local, 0.0)
+
+
+def synthetic_case(rng, force_num):
+    """
+    Forecast values and CFSv2/NLDAS parameters of the local CFSv2 grid cells.
+    """
+    shape = (NY, NX)
+    case = {}
+    if force_num == 0:
+        case['fcst1'] = rng.uniform(265.0, 300.0, shape)
+        case['fcst2'] = rng.uniform(265.0, 300.0, shape)
+        case['cfs_p1'] = [rng.uniform(275.0, 290.0, shape) for _ in range(2)]
+        case['cfs_p2'] = [rng.uniform(3.0, 8.0, shape) for _ in range(2)]
+        case['nldas_p1'] = rng.uniform(275.0, 290.0, shape)
+        case['nldas_p2'] = rng.uniform(3.0, 8.0, shape)
+    elif force_num == 1:
+        case['fcst1'] = rng.uniform(0.002, 0.015, shape)
+        case['fcst2'] = rng.uniform(0.002, 0.015, shape)
+        case['cfs_p1'] = [rng.uniform(5.0, 10.0, shape) for _ in range(2)]
+        case['cfs_p2'] = [rng.uniform(1.5, 3.0, shape) for _ in range(2)]
+        case['nldas_p1'] = rng.uniform(5.0, 10.0, shape)
+        case['nldas_p2'] = rng.uniform(1.5, 3.0, shape)
+    elif force_num == 4:
+        fcst = rng.uniform(1.0e-5, 1.0e-3, (2,) + shape)
+        # Cells without precipitation in the forecast.
+        fcst[:, 1, :3] = 0.0
+        case['fcst1'], case['fcst2'] = fcst
+        case['cfs_p1'] = [rng.uniform(0.5, 3.0, shape) for _ in range(2)]
+        case['cfs_p2'] = [rng.uniform(0.6, 1.2, shape) for _ in range(2)]
+        case['nldas_p1'] = rng.uniform(0.5, 3.0, shape)
+        case['nldas_p2'] = rng.uniform(0.6, 1.2, shape)
+        # Mix of cells where the CFSv2 forecast is drier and wetter than NLDAS.
+        case['cfs_zero'] = [rng.uniform(0.2, 0.9, shape) for _ in range(2)]
+        case['nldas_zero'] = rng.uniform(0.2, 0.9, shape)
+        # NLDAS distributions without width, and without precipitation.
+        case['nldas_p2'][2, 0] = 0.0
+        case['nldas_zero'][2, 1] = 1.0
+    else:
+        case['fcst1'] = rng.uniform(0.0, 900.0, shape)
+        case['fcst2'] = rng.uniform(0.0, 900.0, shape)
+        case['fcst1'][0, :2] = 1.0
+        case['fcst2'][0, :2] = 1.0
+        case['cfs_p1'] = [rng.uniform(100.0, 400.0, shape) for _ in range(2)]
+        case['cfs_p2'] = [np.zeros(shape) for _ in range(2)]
+        case['nldas_p1'] = rng.uniform(100.0, 400.0, shape)
+        case['nldas_p2'] = np.zeros(shape)
+    return case
+
+
+def run_vectorized(tmp_path, force_num, case, output_date, fcst_date1, fcst_date2):
+    """
+    Run cfsv2_nldas_nwm_bias_correct on a single processor, with the parameter grids
+    written to synthetic parameter files and an identity regridding.
+    """
+    param_dir = tmp_path / "params"
+    (param_dir / "NLDAS_Climo").mkdir(parents=True)
+    (param_dir / "CFSv2_Climo").mkdir(parents=True)
+
+    nldas = {NLDAS_VARS[force_num] + '_PARAM_1': case['nldas_p1'], NLDAS_VARS[force_num] + '_PARAM_2': case['nldas_p2']}
+    if force_num == 4:
+        nldas['ZERO_PRECIP_PROB'] = case['nldas_zero']
+    write_params(str(param_dir / "NLDAS_Climo" / ("nldas2_" + output_date.strftime('%m%d%H') + "_dist_params.nc")),
+                 nldas, fill=-9999.0)
+    for index, fcst_date in enumerate((fcst_date1, fcst_date2)):
+        cfs = {'DISTRIBUTION_PARAM_1': case['cfs_p1'][index], 'DISTRIBUTION_PARAM_2': case['cfs_p2'][index]}
+        if force_num == 4:
+            cfs['ZERO_PRECIP_PROB'] = case['cfs_zero'][index]
+        write_params(str(param_dir / "CFSv2_Climo" / ("cfs_" + CFS_VARS[force_num] + "_" + fcst_date.strftime('%m%d') +
+                                                      "_" + fcst_date.strftime('%H') + "_dist_params.nc")), cfs)
+
+    config = SimpleNamespace(globalNdv=NDV, current_output_date=output_date, statusMsg=None, errMsg=None,
+                             errFlag=0, errTraceback=None, logHandle=None)
+    mpi = SimpleNamespace(rank=0, scatter_array=lambda forcing, grid, options: np.array(grid))
+    forcing = SimpleNamespace(productName="CFSv2_6Hr_Global_GRIB2", netcdf_var_names={force_num: 'synthetic'},
+                              paramDir=str(param_dir), src_window=SRC_WINDOW,
+                              fcst_date1=fcst_date1, fcst_date2=fcst_date2,
+                              input_map_output={force_num: 0},
+                              coarse_input_forcings1=case['fcst1'][np.newaxis],
+                              coarse_input_forcings2=case['fcst2'][np.newaxis],
+                              esmf_field_in=SimpleNamespace(data=np.empty((NY, NX))), esmf_field_out=None,
+                              regridObj=lambda field_in, field_out: SimpleNamespace(data=field_in.data.copy()),
+                              mask_plan=SimpleNamespace(fill=lambda data, ndv: None),
+                              final_forcings=np.full((1, NY, NX), NDV))
+
+    bias_correction.cfsv2_nldas_nwm_bias_correct(forcing, config, mpi, force_num)
+    assert not config.errFlag
+    return forcing.final_forcings[0]
+
+
+def reference_loop(force_num, case, output_date, fcst_date1, fcst_date2, rng):
+    """
+    Per-cell CDF/PDF matching of the loop the vectorized routine replaced. The random
+    draws of the precipitation generation come from rng, one per cell with precipitation
+    in row-major order, the order the vectorized routine draws them in.
+    """
+    vals = np.linspace(*{0: (200.0, 330.0, 1300), 1: (0.01, 40.0, 1000), 4: (0.01, 100.0, 2000),
+                         5: (0.0, 0.0, 0)}[force_num])
+    hr_from_previous = (output_date - fcst_date1).total_seconds() / 3600.0
+    interp_factor1 = float(1 - (hr_from_previous / 6.0))
+    interp_factor2 = float(hr_from_previous / 6.0)
+
+    cfs_data = np.empty((NY, NX))
+    for y_local in range(NY):
+        for x_local in range(NX):
+            cell = (y_local, x_local)
+            params = [case['cfs_p1'][0], case['cfs_p1'][1], case['cfs_p2'][0], case['cfs_p2'][1],
+                      case['nldas_p1'], case['nldas_p2']]
+            if force_num == 4:
+                params += [case['cfs_zero'][1], case['cfs_zero'][1], case['nldas_zero']]
+            correct_flag = all(param[cell] != -9999.0 for param in params)
+
+            cfs_param_1_interp = case['cfs_p1'][0][cell] * interp_factor1 + case['cfs_p1'][1][cell] * interp_factor2
+            cfs_param_2_interp = case['cfs_p2'][0][cell] * interp_factor1 + case['cfs_p2'][1][cell] * interp_factor2
+            cfs_interp_fcst = case['fcst1'][cell] * interp_factor1 + case['fcst2'][cell] * interp_factor2
+            nldas_nearest_1 = case['nldas_p1'][cell]
+            nldas_nearest_2 = case['nldas_p2'][cell]
+
+            if not correct_flag:
+                cfs_data[cell] = cfs_interp_fcst
+            elif force_num == 0:
+                pts = (vals - cfs_param_1_interp) / cfs_param_2_interp
+                spacing = (vals[2] - vals[1]) / cfs_param_2_interp
+                cfs_cdf = np.cumsum((np.exp(-0.5 * (np.power(pts, 2))) / math.sqrt(2 * 3.141592)) * spacing)
+                pts = (vals - nldas_nearest_1) / nldas_nearest_2
+                spacing = (vals[2] - vals[1]) / nldas_nearest_2
+                nldas_cdf = np.cumsum((np.exp(-0.5 * (np.power(pts, 2))) / math.sqrt(2 * 3.141592)) * spacing)
+                cfs_cdf_val = cfs_cdf[np.argmin(np.absolute(vals - cfs_interp_fcst))]
+                cfs_data[cell] = vals[np.argmin(np.absolute(cfs_cdf_val - nldas_cdf))]
+            elif force_num == 5:
+                if cfs_interp_fcst > 2.0 and cfs_param_1_interp > 2.0:
+                    cfs_data[cell] = cfs_interp_fcst * (nldas_nearest_1 / cfs_param_1_interp)
+                else:
+                    cfs_data[cell] = 0.0
+            elif force_num == 1:
+                cfs_interp_fcst = cfs_interp_fcst * 1000.0
+                cfs_cdf = 1 - np.exp(-(np.power((vals / cfs_param_1_interp), cfs_param_2_interp)))
+                nldas_cdf = 1 - np.exp(-(np.power((vals / nldas_nearest_1), nldas_nearest_2)))
+                cfs_cdf_val = cfs_cdf[np.argmin(np.absolute(vals - cfs_interp_fcst))]
+                cfs_data[cell] = vals[np.argmin(np.absolute(cfs_cdf_val - nldas_cdf))] / 1000.0
+                if np.isnan(nldas_cdf).any() or cfs_data[cell] == 0:
+                    # The loop stored the value still in g/kg here; the fallback is in kg/kg.
+                    cfs_data[cell] = cfs_interp_fcst / 1000.0
+            else:
+                # Both zero precipitation probabilities are read from the CFSv2 parameter
+                # file of the next forecast date.
+                cfs_zero_pcp_interp = case['cfs_zero'][1][cell] * interp_factor1 + \
+                                      case['cfs_zero'][1][cell] * interp_factor2
+                cfs_cdf = 1 - np.exp(-(np.power((vals / cfs_param_1_interp), cfs_param_2_interp)))
+                nldas_nearest_zero_pcp = case['nldas_zero'][cell]
+                if nldas_nearest_2 == 0.0:
+                    nldas_cdf = np.ones(vals.size)
+                    nldas_nearest_zero_pcp = 1.0
+                else:
+                    nldas_cdf = 1 - np.exp(-(np.power((vals / nldas_nearest_1), nldas_nearest_2)))
+
+                if cfs_interp_fcst == 0.0 or nldas_nearest_zero_pcp == 1.0:
+                    cfs_data[cell] = 0.0
+                    continue
+
+                cfs_cdf_val = cfs_cdf[np.argmin(np.absolute(vals - (cfs_interp_fcst * 3600.0)))]
+                cfs_nldas_ind = np.argmin(np.absolute(cfs_cdf_val - nldas_cdf))
+                pcp_pop_diff = nldas_nearest_zero_pcp - cfs_zero_pcp_interp
+                randn = rng.uniform(0.0, abs(pcp_pop_diff))
+                if cfs_zero_pcp_interp <= nldas_nearest_zero_pcp:
+                    if cfs_cdf_val <= pcp_pop_diff:
+                        cfs_data[cell] = 0.0
+                    else:
+                        cfs_data[cell] = vals[cfs_nldas_ind] / 3600.0
+                        if (cfs_data[cell] / cfs_interp_fcst) >= 3.0:
+                            cfs_data[cell] = cfs_interp_fcst
+                else:
+                    if cfs_cdf_val <= abs(pcp_pop_diff):
+                        new_nldas_ind = np.argmin(np.absolute(randn - nldas_cdf))
+                        cfs_data[cell] = vals[new_nldas_ind] / 3600.0
+                    else:
+                        cfs_data[cell] = vals[cfs_nldas_ind] / 3600.0
+                    if (cfs_data[cell] / cfs_interp_fcst) >= 3.0:
+                        cfs_data[cell] = cfs_interp_fcst
+    return cfs_data
+
+
+@pytest.mark.parametrize('force_num', [0, 1, 4, 5])
+def test_vectorized_matches_cell_loop(tmp_path, force_num):
+    rng = np.random.default_rng(force_num)
+    case = synthetic_case(rng, force_num)
+    # A cell with a missing parameter keeps the interpolated CFSv2 value.
+    case['nldas_p1'][3, 5] = -9999.0
+
+    output_date = datetime.datetime(2021, 7, 1, 2)
+    fcst_date1 = datetime.datetime(2021, 7, 1, 0)
+    fcst_date2 = datetime.datetime(2021, 7, 1, 6)
+
+    corrected = run_vectorized(tmp_path, force_num, case, output_date, fcst_date1, fcst_date2)
+    draws = np.random.default_rng([int(output_date.strftime('%Y%m%d%H%M')), 0, force_num])
+    expected = reference_loop(force_num, case, output_date, fcst_date1, fcst_date2, draws)
+
+    np.testing.assert_allclose(corrected, expected, rtol=1.0e-12, atol=0.0)
+    np.testing.assert_allclose(corrected[3, 5], (case['fcst1'][3, 5] * 2.0 + case['fcst2'][3, 5]) / 3.0,
+                               rtol=1.0e-12)
+    if force_num == 4:
+        # No precipitation in the forecast, or in the NLDAS distribution, stays dry.
+        assert np.all(corrected[1, :3] == 0.0)
+        assert corrected[2, 0] == 0.0 and corrected[2, 1] == 0.0
+
+
+@pytest.mark.filterwarnings('ignore:invalid value encountered in power')
+def test_invalid_q2d_parameter_keeps_forecast_in_kg_per_kg(tmp_path):
+    rng = np.random.default_rng(11)
+    case = synthetic_case(rng, 1)
+    # A negative NLDAS scale parameter gives an undefined Weibull CDF.
+    case['nldas_p1'][2, 4] = -5.0
+
+    output_date = datetime.datetime(2021, 7, 1, 2)
+    fcst_date1 = datetime.datetime(2021, 7, 1, 0)
+    fcst_date2 = datetime.datetime(2021, 7, 1, 6)
+
+    corrected = run_vectorized(tmp_path, 1, case, output_date, fcst_date1, fcst_date2)
+    expected = reference_loop(1, case, output_date, fcst_date1, fcst_date2, None)
+
+    np.testing.assert_allclose(corrected, expected, rtol=1.0e-12, atol=0.0)
+    np.testing.assert_allclose(corrected[2, 4], (case['fcst1'][2, 4] * 2.0 + case['fcst2'][2, 4]) / 3.0,
+                               rtol=1.0e-12)
+    assert corrected[2, 4] < 0.1
@@ -0,0 +1,121 @@
+"""
+Tests of the in-process eccodes GRIB2 decoding backend on synthetic GRIB2
+messages, compared against wgrib2 when it is installed.
+"""
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+eccodes = pytest.importorskip('eccodes')
+
+from core import gribDecoder
+
+NY = 3
+NX = 4
+
+
+def write_message(grib_out, param, level_type, level, time_unit, forecast_time, values, accum_length=None):
+    """
+    Append a synthetic GRIB2 message on a small regular lat/lon grid.
+    """
+    gid = eccodes.codes_grib_new_from_samples('GRIB2')
+    try:
+        if accum_length is not None:
+            eccodes.codes_set(gid, 'productDefinitionTemplateNumber', 8)
+        eccodes.codes_set(gid, 'discipline', param[0])
+        eccodes.codes_set(gid, 'parameterCategory', param[1])
+        eccodes.codes_set(gid, 'parameterNumber', param[2])
+        eccodes.codes_set(gid, 'typeOfFirstFixedSurface', level_type)
+        if level_type == 103:
+            eccodes.codes_set(gid, 'scaleFactorOfFirstFixedSurface', 0)
+            eccodes.codes_set(gid, 'scaledValueOfFirstFixedSurface', level)
+        eccodes.codes_set(gid, 'indicatorOfUnitOfTimeRange', time_unit)
+        eccodes.codes_set(gid, 'forecastTime', forecast_time)
+        if accum_length is not None:
+            eccodes.codes_set(gid, 'typeOfStatisticalProcessing', 1)
+            eccodes.codes_set(gid, 'indicatorOfUnitForTimeRange', time_unit)
+            eccodes.codes_set(gid, 'lengthOfTimeRange', accum_length)
+        eccodes.codes_set(gid, 'Ni', NX)
+        eccodes.codes_set(gid, 'Nj', NY)
+        eccodes.codes_set(gid, 'latitudeOfFirstGridPointInDegrees', 42.0)
+        eccodes.codes_set(gid, 'latitudeOfLastGridPointInDegrees', 40.0)
+        eccodes.codes_set(gid, 'longitudeOfFirstGridPointInDegrees', 250.0)
+        eccodes.codes_set(gid, 'longitudeOfLastGridPointInDegrees', 253.0)
+        eccodes.codes_set(gid, 'iDirectionIncrementInDegrees', 1.0)
+        eccodes.codes_set(gid, 'jDirectionIncrementInDegrees', 1.0)
+        eccodes.codes_set_values(gid, values.ravel())
+        eccodes.codes_write(gid, grib_out)
+    finally:
+        eccodes.codes_release(gid)
+
+
+@pytest.fixture
+def grib_file(tmp_path):
+    """
+    GRIB2 file with a temperature message in minutes, a pressure message in hours
+    and a precipitation accumulation in hours. Values are written north to south.
+    """
+    path = str(tmp_path / "synthetic.grib2")
+    values = np.arange(NY * NX, dtype=np.float64).reshape(NY, NX)
+    with open(path, 'wb') as grib_out:
+        write_message(grib_out, (0, 0, 0), 103, 2, 0, 60, 280.0 + values)
+        write_message(grib_out, (0, 3, 0), 1, 0, 1, 1, 100000.0 + values)
+        write_message(grib_out, (0, 1, 8), 1, 0, 1, 0, values, accum_length=1)
+    return path
+
+
+def inventory(grib_file):
+    """
+    Variable, level and time fields of the eccodes inventory lines.
+    """
+    lines = []
+    with open(grib_file, 'rb') as grib_in:
+        while True:
+            gid = eccodes.codes_grib_new_from_file(grib_in)
+            if gid is None:
+                break
+            try:
+                param = (eccodes.codes_get(gid, 'discipline'), eccodes.codes_get(gid, 'parameterCategory'),
+                         eccodes.codes_get(gid, 'parameterNumber'))
+                lines.append(":{}:{}:{}:".format(gribDecoder.WGRIB2_NAMES[param], gribDecoder.level_string(gid),
+                                                 gribDecoder.time_string(gid)))
+            finally:
+                eccodes.codes_release(gid)
+    return lines
+
+
+def test_inventory_keeps_message_time_units(grib_file):
+    assert inventory(grib_file) == [":TMP:2 m above ground:60 min fcst:",
+                                    ":PRES:surface:1 hour fcst:",
+                                    ":APCP:surface:0-1 hour acc fcst:"]
+
+
+def test_decode_matching_messages(grib_file):
+    dataset = gribDecoder.decode_grib2([grib_file], [":TMP:2 m above ground:60 min fcst:",
+                                                     ":APCP:surface:0-1 hour acc fcst:"])
+    assert sorted(dataset.variables) == ['APCP_surface', 'TMP_2maboveground', 'latitude', 'longitude']
+
+    expected = np.arange(NY * NX, dtype=np.float64).reshape(NY, NX)[::-1, :]
+    tmp = dataset.variables['TMP_2maboveground'][0, :, :]
+    np.testing.assert_allclose(tmp, 280.0 + expected, atol=1.0e-3)
+    np.testing.assert_allclose(dataset.variables['latitude'][:], [40.0, 41.0, 42.0])
+    np.testing.assert_allclose(dataset.variables['longitude'][:], [250.0, 251.0, 252.0, 253.0])
+
+
+@pytest.mark.skipif(shutil.which('wgrib2') is None, reason="wgrib2 is not installed")
+def test_backends_agree_with_wgrib2(grib_file, tmp_path):
+    netCDF4 = pytest.importorskip('netCDF4')
+    wgrib2_lines = subprocess.run(['wgrib2', grib_file], check=True, capture_output=True,
+                                  text=True).stdout.splitlines()
+    wgrib2_inventory = [':' + ':'.join(line.split(':')[3:6]) + ':' for line in wgrib2_lines]
+    assert inventory(grib_file) == wgrib2_inventory
+
+    nc_file = str(tmp_path / "synthetic.nc")
+    subprocess.run(['wgrib2', grib_file, '-netcdf', nc_file], check=True, capture_output=True)
+    dataset = gribDecoder.decode_grib2([grib_file], ['.'])
+    with netCDF4.Dataset(nc_file) as id_nc:
+        for var_name in ('TMP_2maboveground', 'PRES_surface', 'APCP_surface', 'latitude', 'longitude'):
+            np.testing.assert_allclose(dataset.variables[var_name][:], id_nc.variables[var_name][:],
+                                       rtol=1.0e-6)
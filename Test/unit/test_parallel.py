@@ -0,0 +1,27 @@
+"""
+Tests of the numpy to MPI data type mapping of the parallel module.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('mpi4py')
+from mpi4py.util import dtlib
+
+from core import parallel
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64, np.int32, np.int64, np.uint8, np.bool_])
+def test_mpi_datatype_matches_item_size(dtype):
+    assert parallel.mpi_datatype(dtype).Get_size() == np.dtype(dtype).itemsize
+
+
+def test_mpi_datatype_of_float_grids():
+    assert dtlib.to_numpy_dtype(parallel.mpi_datatype(np.float32)) == np.float32
+    assert dtlib.to_numpy_dtype(parallel.mpi_datatype(np.float64)) == np.float64
+    assert parallel.mpi_datatype(np.float32) is parallel.mpi_datatype('f4')
+
+
+@pytest.mark.parametrize('dtype', ['U4', 'S8', object, [('a', 'f4'), ('b', 'i4')]])
+def test_mpi_datatype_rejects_unsupported_types(dtype):
+    with pytest.raises(TypeError):
+        parallel.mpi_datatype(dtype)
@@ -0,0 +1,99 @@
+"""
+Comparison of LDASIN files written with parallel NetCDF ([Output] parallelOutput = 1)
+against files written by the master processor after gathering the output grids.
+Needs netCDF4 built against a parallel HDF5. Also runs under mpiexec, with the
+output grid split in row slabs across the processors.
+"""
+import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip('mpi4py')
+netCDF4 = pytest.importorskip('netCDF4')
+
+from mpi4py import MPI
+
+from core import ioMod
+from core import parallel
+
+pytestmark = pytest.mark.skipif(not netCDF4.__has_parallel4_support__,
+                                reason="netCDF4 is not built with parallel HDF5 support")
+
+NDV = -999999.0
+NY = 37
+NX = 23
+
+
+def mpi_config():
+    """
+    MpiConfig on COMM_WORLD.
+    """
+    mpi = parallel.MpiConfig()
+    mpi.comm = MPI.COMM_WORLD
+    mpi.rank = mpi.comm.Get_rank()
+    mpi.size = mpi.comm.Get_size()
+    return mpi
+
+
+def write_ldasin(out_path, parallel_output, use_floats, mpi):
+    """
+    Write an LDASIN file of synthetic output grids, each processor holding a row slab.
+    """
+    y_lower = mpi.rank * NY // mpi.size
+    y_upper = (mpi.rank + 1) * NY // mpi.size
+    config = SimpleNamespace(include_lqfrac=True, working_dtype=np.float64, regrid_opt=[1], ana_flag=0,
+                             current_fcst_cycle=datetime.datetime(2020, 1, 1), output_freq=60, nwmVersion=None,
+                             nwmConfig='short_range', actual_output_steps=18, spatial_meta=None, useCompression=1,
+                             useFloats=use_floats, globalNdv=NDV, outputWriters=0, parallelOutput=parallel_output,
+                             errMsg=None, errFlag=0, logHandle=None)
+    geo = SimpleNamespace(ny_global=NY, nx_global=NX, ny_local=y_upper - y_lower, nx_local=NX,
+                          y_lower_bound=y_lower, y_upper_bound=y_upper, x_lower_bound=0, x_upper_bound=NX)
+
+    output = ioMod.OutputObj(config, geo)
+    output.outPath = out_path
+    output.outDate = datetime.datetime(2020, 1, 1, 3)
+    rng = np.random.default_rng(7)
+    low = np.array([-20.0, -20.0, 150.0, 0.0, 250.0, 0.001, 70000.0, 0.0, 0.0])
+    high = np.array([20.0, 20.0, 450.0, 0.005, 310.0, 0.02, 102000.0, 1000.0, 100.0])
+    grids = low[:, None, None] + (high - low)[:, None, None] * rng.random((9, NY, NX))
+    grids[:, 0, :5] = NDV
+    output.output_local[:, :, :] = grids[:, y_lower:y_upper, :]
+    output.output_final_ldasin(config, geo, mpi)
+
+
+@pytest.mark.filterwarnings('ignore:invalid value encountered in cast')
+@pytest.mark.parametrize('use_floats', [0, 1])
+def test_parallel_output_matches_gathered_output(tmp_path, use_floats):
+    mpi = mpi_config()
+    out_dir = mpi.comm.bcast(str(tmp_path), root=0)
+    gathered_path = out_dir + "/gathered.LDASIN_DOMAIN1"
+    parallel_path = out_dir + "/parallel.LDASIN_DOMAIN1"
+    write_ldasin(gathered_path, 0, use_floats, mpi)
+    write_ldasin(parallel_path, 1, use_floats, mpi)
+    mpi.comm.barrier()
+    if mpi.rank != 0:
+        return
+
+    with netCDF4.Dataset(gathered_path) as gathered, netCDF4.Dataset(parallel_path) as written:
+        assert gathered.ncattrs() == written.ncattrs()
+        for att in gathered.ncattrs():
+            assert gathered.getncattr(att) == written.getncattr(att)
+        assert {name: len(dim) for name, dim in gathered.dimensions.items()} == \
+               {name: len(dim) for name, dim in written.dimensions.items()}
+        assert list(gathered.variables) == list(written.variables)
+
+        for var_name, var_gathered in gathered.variables.items():
+            var_written = written.variables[var_name]
+            assert var_gathered.dtype == var_written.dtype
+            assert var_gathered.dimensions == var_written.dimensions
+            assert var_gathered.filters() == var_written.filters()
+            assert var_gathered.chunking() == var_written.chunking()
+            assert var_gathered.ncattrs() == var_written.ncattrs()
+            for att in var_gathered.ncattrs():
+                np.testing.assert_array_equal(var_gathered.getncattr(att), var_written.getncattr(att))
+            # Compare the values as stored in the files, before unpacking.
+            var_gathered.set_auto_maskandscale(False)
+            var_written.set_auto_maskandscale(False)
+            np.testing.assert_array_equal(var_gathered[:], var_written[:])
@@ -0,0 +1,42 @@
+"""
+Tests of the bounded queue of inputs decoded ahead by the prefetcher.
+"""
+from core import prefetch
+
+
+def test_decoded_inputs_are_taken_once():
+    prefetcher = prefetch.Prefetcher(2)
+    prefetcher.decode('a', lambda: 'decoded a')
+    assert prefetcher.take_decoded('a') == 'decoded a'
+    assert prefetcher.take_decoded('a') is None
+    assert prefetcher.take_decoded('b') is None
+
+
+def test_decode_queue_is_bounded():
+    prefetcher = prefetch.Prefetcher(2)
+    for key in ('a', 'b', 'c'):
+        prefetcher.decode(key, lambda key=key: 'decoded ' + key)
+    assert sorted(prefetcher.decoded) == ['a', 'b']
+    assert prefetcher.take_decoded('c') is None
+
+
+def test_discard_keeps_inputs_of_the_next_step():
+    released = []
+    prefetcher = prefetch.Prefetcher(2)
+    prefetcher.decode('next', lambda: 'decoded next', cleanup=released.append)
+    prefetcher.executor.shutdown(wait=True)
+
+    # Inputs queued during a step are kept at the end of that step ...
+    prefetcher.discard()
+    assert 'next' in prefetcher.decoded
+    # ... and released at the end of the next step if they were not taken.
+    prefetcher.discard()
+    assert prefetcher.decoded == {}
+    assert released == ['decoded next']
+
+
+def test_remember_patterns():
+    prefetcher = prefetch.Prefetcher(1)
+    assert prefetcher.patterns_of('file.grib2') is None
+    prefetcher.remember('file.grib2', (':TMP:2 m above ground:',))
+    assert prefetcher.patterns_of('file.grib2') == [':TMP:2 m above ground:']
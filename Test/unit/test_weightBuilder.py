@@ -0,0 +1,152 @@
+"""
+Tests of the ESMF-free regridding weight builder on small synthetic grids.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+pytest.importorskip('netCDF4')
+
+from core import weightBuilder
+
+
+def regular_grid(lat0, lon0, ny, nx, spacing):
+    """
+    Regular lat/lon grid of cell centers.
+    """
+    lats = lat0 + spacing * np.arange(ny)
+    lons = lon0 + spacing * np.arange(nx)
+    lon_grid, lat_grid = np.meshgrid(lons, lats)
+    return lat_grid, lon_grid
+
+
+def weight_matrix(rows, cols, weights, src_shape, dst_shape):
+    """
+    Dense [n_dst, n_src] matrix of weights, on row-major flat indices.
+    """
+    matrix = np.zeros((int(np.prod(dst_shape)), int(np.prod(src_shape))))
+    dst_y = (rows - 1) % dst_shape[0]
+    dst_x = (rows - 1) // dst_shape[0]
+    src_y = (cols - 1) % src_shape[0]
+    src_x = (cols - 1) // src_shape[0]
+    np.add.at(matrix, (dst_y * dst_shape[1] + dst_x, src_y * src_shape[1] + src_x), weights)
+    return matrix
+
+
+def test_sequence_index_is_one_based_and_y_fastest():
+    shape = (3, 4)
+    flat = np.arange(12)
+    seq = weightBuilder.sequence_index(flat, shape)
+    # (y, x) = (0, 0) is 1, stepping y first, then x.
+    assert seq[0] == 1
+    assert seq[1 * 4 + 0] == 2
+    assert seq[2 * 4 + 0] == 3
+    assert seq[0 * 4 + 1] == 4
+    assert seq[2 * 4 + 3] == 12
+    assert sorted(seq) == list(range(1, 13))
+
+
+def test_nearest_weights_pick_closest_unmasked_cell():
+    src_lat, src_lon = regular_grid(30.0, -100.0, 5, 6, 1.0)
+    valid = np.ones(src_lat.shape, dtype=bool)
+    valid[2, 3] = False
+    dst_lat = np.array([[32.1, 34.0]])
+    dst_lon = np.array([[-97.1, -100.2]])
+
+    rows, cols, weights = weightBuilder.nearest_weights(src_lat, src_lon, valid, dst_lat, dst_lon)
+    matrix = weight_matrix(rows, cols, weights, src_lat.shape, dst_lat.shape)
+
+    np.testing.assert_array_equal(matrix.sum(axis=1), 1.0)
+    # The closest cell (2, 3) is masked, so one of its unmasked neighbors is used.
+    assert matrix[0, 2 * 6 + 3] == 0.0
+    assert np.flatnonzero(matrix[0])[0] in (1 * 6 + 3, 2 * 6 + 2)
+    assert matrix[1, 4 * 6 + 0] == 1.0
+
+
+def test_bilinear_weights_sum_to_one_and_reproduce_fields():
+    src_lat, src_lon = regular_grid(35.0, -105.0, 8, 10, 0.5)
+    valid = np.ones(src_lat.shape, dtype=bool)
+    dst_lat, dst_lon = regular_grid(35.3, -104.6, 6, 7, 0.37)
+
+    rows, cols, weights = weightBuilder.bilinear_weights(src_lat, src_lon, valid, dst_lat, dst_lon)
+    matrix = weight_matrix(rows, cols, weights, src_lat.shape, dst_lat.shape)
+
+    np.testing.assert_allclose(matrix.sum(axis=1), 1.0, atol=1.0e-12)
+    assert np.all(weights > 0.0)
+    assert np.all(weights <= 1.0 + 1.0e-12)
+
+    # A field linear in lat/lon is reproduced up to the small distortion of the
+    # gnomonic projection over half degree cells.
+    field = 2.0 * src_lat + 3.0 * src_lon
+    expected = 2.0 * dst_lat + 3.0 * dst_lon
+    np.testing.assert_allclose(matrix @ field.ravel(), expected.ravel(), atol=1.0e-2)
+
+
+def test_bilinear_weights_on_source_cells_and_outside():
+    src_lat, src_lon = regular_grid(35.0, -105.0, 4, 5, 1.0)
+    valid = np.ones(src_lat.shape, dtype=bool)
+    dst_lat = np.array([[36.0, 50.0]])
+    dst_lon = np.array([[-103.0, -103.0]])
+
+    rows, cols, weights = weightBuilder.bilinear_weights(src_lat, src_lon, valid, dst_lat, dst_lon)
+    matrix = weight_matrix(rows, cols, weights, src_lat.shape, dst_lat.shape)
+
+    # A destination cell on a source cell center takes that cell only.
+    np.testing.assert_allclose(matrix[0, 1 * 5 + 2], 1.0, atol=1.0e-9)
+    np.testing.assert_allclose(matrix[0].sum(), 1.0, atol=1.0e-12)
+    # Destination cells outside the source grid get no weights.
+    assert not np.any(matrix[1])
+
+
+def test_bilinear_weights_skip_masked_quadrilaterals():
+    src_lat, src_lon = regular_grid(35.0, -105.0, 4, 4, 1.0)
+    valid = np.ones(src_lat.shape, dtype=bool)
+    valid[1, 1] = False
+    # Inside the quadrilateral (1, 1)-(2, 2), which has a masked corner, and inside
+    # the unmasked quadrilateral (2, 2)-(3, 3).
+    dst_lat = np.array([[36.5, 37.5]])
+    dst_lon = np.array([[-103.5, -102.5]])
+
+    rows, cols, weights = weightBuilder.bilinear_weights(src_lat, src_lon, valid, dst_lat, dst_lon)
+    matrix = weight_matrix(rows, cols, weights, src_lat.shape, dst_lat.shape)
+
+    assert not np.any(matrix[0])
+    np.testing.assert_allclose(matrix[1].sum(), 1.0, atol=1.0e-12)
+    np.testing.assert_allclose(matrix[1, [2 * 4 + 2, 2 * 4 + 3, 3 * 4 + 3, 3 * 4 + 2]], 0.25, atol=1.0e-3)
+
+
+def test_inverse_bilinear_unit_square():
+    corners_x = np.array([[-0.25], [0.75], [0.75], [-0.25]])
+    corners_y = np.array([[-0.6], [-0.6], [0.4], [0.4]])
+    u, v = weightBuilder.inverse_bilinear(corners_x, corners_y)
+    np.testing.assert_allclose(u, 0.25)
+    np.testing.assert_allclose(v, 0.6)
+
+
+def test_weight_file_round_trip_through_sparse_regrid(tmp_path):
+    pytest.importorskip('mpi4py')
+    from mpi4py import MPI
+    from core import parallel
+    from core import sparseRegrid
+
+    src_lat, src_lon = regular_grid(35.0, -105.0, 6, 7, 0.5)
+    valid = np.ones(src_lat.shape, dtype=bool)
+    dst_lat, dst_lon = regular_grid(35.2, -104.8, 5, 4, 0.55)
+
+    rows, cols, weights = weightBuilder.bilinear_weights(src_lat, src_lon, valid, dst_lat, dst_lon)
+    weight_file = str(tmp_path / "weights.nc")
+    weightBuilder.write_weight_file(weight_file, rows, cols, weights, src_lat.shape, dst_lat.shape)
+
+    ny_src, nx_src = src_lat.shape
+    src_plan = parallel.ScatterPlan(None, ny_src, nx_src, np.array([[0, 0, nx_src, ny_src]]), 0)
+    regridder = sparseRegrid.SparseRegrid(weight_file, src_plan, dst_lat.shape, (0, dst_lat.shape[0], 0,
+                                                                                 dst_lat.shape[1]))
+    regridder.exchange(MPI.COMM_SELF)
+
+    fields = np.stack([src_lat, 2.0 * src_lon, np.ones(src_lat.shape)])
+    regridded = regridder.apply(fields)
+
+    expected = weight_matrix(rows, cols, weights, src_lat.shape, dst_lat.shape) @ fields.reshape(3, -1).T
+    np.testing.assert_allclose(regridded.reshape(3, -1).T, expected, rtol=1.0e-12)
+    np.testing.assert_allclose(regridded[0], dst_lat, atol=1.0e-2)
+    np.testing.assert_allclose(regridded[2], 1.0, atol=1.0e-12)
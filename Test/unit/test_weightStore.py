@@ -0,0 +1,61 @@
+"""
+Tests of the least-recently-used eviction of the ESMF weight store.
+"""
+import os
+
+import pytest
+
+pytest.importorskip('netCDF4')
+
+from core import weightStore
+
+
+def add_file(store, key, size):
+    """
+    Add a weight file of the given size to the store.
+    """
+    tmp_file = store.new_file('product', key)
+    with open(tmp_file, 'wb') as file_out:
+        file_out.write(b'\0' * size)
+    return store.add(key, tmp_file, 'product')
+
+
+def age_entries(store, seconds):
+    """
+    Move the last use of all entries of the store back in time.
+    """
+    with store.locked_index() as index:
+        for entry in index.values():
+            entry['last_used'] -= seconds
+
+
+def test_evict_least_recently_used_files(tmp_path):
+    store = weightStore.WeightStore(str(tmp_path), max_size=250)
+    first = add_file(store, 'a' * 64, 100)
+    second = add_file(store, 'b' * 64, 100)
+    age_entries(store, 2 * store.EVICTION_GRACE)
+    # Using the first file makes the second one the least recently used.
+    assert store.lookup('a' * 64) == first
+    age_entries(store, 2 * store.EVICTION_GRACE)
+
+    third = add_file(store, 'c' * 64, 100)
+    assert os.path.isfile(first)
+    assert not os.path.isfile(second)
+    assert os.path.isfile(third)
+    assert store.lookup('b' * 64) is None
+
+
+def test_evict_keeps_files_within_grace_period(tmp_path):
+    store = weightStore.WeightStore(str(tmp_path), max_size=150)
+    first = add_file(store, 'a' * 64, 100)
+    second = add_file(store, 'b' * 64, 100)
+    # Both files were just used, the store stays over its limit.
+    assert os.path.isfile(first)
+    assert os.path.isfile(second)
+
+    age_entries(store, 2 * store.EVICTION_GRACE)
+    store.lookup('b' * 64)
+    third = add_file(store, 'c' * 64, 100)
+    assert not os.path.isfile(first)
+    assert os.path.isfile(second)
+    assert os.path.isfile(third)
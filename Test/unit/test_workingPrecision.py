@@ -0,0 +1,137 @@
+"""
+Bound on how far LDASIN output computed with a single precision working
+precision ([Output] workingPrecision = 32) differs from the default double
+precision, running the temporal interpolation and downscaling routines on
+synthetic regridded forcings and writing the results with the LDASIN writer.
+"""
+import datetime
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip('mpi4py')
+netCDF4 = pytest.importorskip('netCDF4')
+
+from mpi4py import MPI
+
+from core import downscale
+from core import ioMod
+from core import parallel
+from core import timeInterpMod
+
+NDV = -999999.0
+NY = 40
+NX = 50
+
+
+def synthetic_forcings(rng):
+    """
+    Regridded forcings of an input window, in single precision as in the engine.
+    """
+    low = np.array([-20.0, -20.0, 150.0, 0.0, 250.0, 0.001, 70000.0, 0.0, 0.0])
+    high = np.array([20.0, 20.0, 450.0, 0.005, 310.0, 0.02, 102000.0, 1000.0, 1.0])
+    fields = low[:, None, None] + (high - low)[:, None, None] * rng.random((9, NY, NX))
+    fields[:, 0, :3] = NDV
+    return fields.astype(np.float32)
+
+
+def run_step(dtype, forcings1, forcings2, input_height, domain_height):
+    """
+    Final forcings of an output step between two input steps, with lapse rate,
+    pressure and specific humidity downscaling, in the given working precision.
+    """
+    config = SimpleNamespace(globalNdv=NDV, runCfsNldasBiasCorrect=False,
+                             current_output_date=datetime.datetime(2020, 1, 1, 1, 20))
+    mpi = SimpleNamespace(rank=1)
+    geo = SimpleNamespace(height=domain_height)
+    forcing = SimpleNamespace(regridded_forcings1=forcings1, regridded_forcings2=forcings2,
+                              final_forcings=np.full((9, NY, NX), NDV, dtype),
+                              fcst_date1=datetime.datetime(2020, 1, 1, 1), fcst_date2=datetime.datetime(2020, 1, 1, 2),
+                              outFreq=60, productName='synthetic', height=input_height, q2dDownscaleOpt=1,
+                              t2dTmp=np.empty((NY, NX), dtype), psfcTmp=np.empty((NY, NX), dtype))
+
+    timeInterpMod.weighted_average(forcing, config, mpi)
+    downscale.simple_lapse(forcing, config, geo, mpi)
+    downscale.pressure_down_classic(forcing, config, geo, mpi)
+    downscale.q2_down_classic(forcing, config, geo, mpi)
+    return forcing.final_forcings
+
+
+def mpi_config():
+    """
+    MpiConfig of a single processor.
+    """
+    mpi = parallel.MpiConfig()
+    mpi.comm = MPI.COMM_SELF
+    mpi.rank = 0
+    mpi.size = 1
+    return mpi
+
+
+def write_ldasin(path, final_forcings, use_floats):
+    """
+    Write an LDASIN file of the final forcings through output_final_ldasin, returning
+    the values stored in the file, before unpacking, and the quantization step of the
+    floating point variables written with a number of significant digits.
+    """
+    config = SimpleNamespace(include_lqfrac=True, working_dtype=final_forcings.dtype, regrid_opt=[1], ana_flag=0,
+                             current_fcst_cycle=datetime.datetime(2020, 1, 1), output_freq=60, nwmVersion=None,
+                             nwmConfig='short_range', actual_output_steps=18, spatial_meta=None, useCompression=1,
+                             useFloats=use_floats, globalNdv=NDV, outputWriters=0, parallelOutput=0,
+                             errMsg=None, errFlag=0, logHandle=None)
+    geo = SimpleNamespace(ny_global=NY, nx_global=NX, ny_local=NY, nx_local=NX,
+                          y_lower_bound=0, y_upper_bound=NY, x_lower_bound=0, x_upper_bound=NX)
+
+    output = ioMod.OutputObj(config, geo)
+    output.outPath = path
+    output.outDate = datetime.datetime(2020, 1, 1, 1, 20)
+    output.output_local[:, :, :] = final_forcings
+    output.output_final_ldasin(config, geo, mpi_config())
+    assert not config.errFlag
+
+    stored = {}
+    steps = {}
+    with netCDF4.Dataset(path, 'r') as id_in:
+        for var_name, var in id_in.variables.items():
+            if var.dimensions == ('time', 'y', 'x'):
+                var.set_auto_maskandscale(False)
+                stored[var_name] = var[0, :, :]
+                steps[var_name] = 0.0
+                if 'least_significant_digit' in var.ncattrs():
+                    steps[var_name] = 2.0 ** -math.ceil(math.log2(10.0 ** var.least_significant_digit))
+    return stored, steps
+
+
+# Packing the -999999 missing value into the integer variables overflows, as in the engine.
+@pytest.mark.filterwarnings('ignore:invalid value encountered in cast')
+@pytest.mark.parametrize('use_floats', [False, True])
+def test_single_precision_ldasin_deviation(tmp_path, use_floats):
+    rng = np.random.default_rng(25)
+    forcings1 = synthetic_forcings(rng)
+    forcings2 = synthetic_forcings(rng)
+    input_height = (3000.0 * rng.random((NY, NX))).astype(np.float32)
+    domain_height = (input_height + rng.uniform(-200.0, 200.0, (NY, NX))).astype(np.float32)
+
+    final64 = run_step(np.float64, forcings1, forcings2, input_height, domain_height)
+    final32 = run_step(np.float32, forcings1, forcings2, input_height, domain_height)
+    out64, steps = write_ldasin(str(tmp_path / "double.LDASIN_DOMAIN1"), final64, use_floats)
+    out32, _ = write_ldasin(str(tmp_path / "single.LDASIN_DOMAIN1"), final32, use_floats)
+
+    assert list(out32) == list(out64)
+    for var_name in out64:
+        # Missing values stay missing.
+        missing = out64[var_name] == out64[var_name][0, 0]
+        np.testing.assert_array_equal(out32[var_name] == out64[var_name][0, 0], missing)
+        valid = ~missing
+        if use_floats:
+            # Stored values are within a relative 5e-6 (specific humidity, through the
+            # exponentials of the saturation vapor pressure, deviates the most), or one
+            # step of the quantization to the significant digits of the variable.
+            np.testing.assert_allclose(out32[var_name][valid], out64[var_name][valid], rtol=5.0e-6,
+                                       atol=steps[var_name], err_msg=var_name)
+        else:
+            # Packed integers differ by at most one step of the scale factor.
+            deviation = np.abs(out32[var_name][valid].astype(np.int64) - out64[var_name][valid])
+            assert deviation.max() <= 1, var_name
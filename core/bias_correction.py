@@ -6,7 +6,6 @@ options.
 import math
 from math import tau as TWO_PI
 import os
-import random
 import time
 
 import numpy as np
@@ -17,6 +16,10 @@ from core import err_handler
 PARAM_NX = 384
 PARAM_NY = 190
 
+# Maximum number of elements in a [cells, bins] CDF table built at once
+# by the CFSv2 bias correction.
+CDF_CHUNK_SIZE = 2 ** 20
+
 NumpyExceptions = (IndexError, ValueError, AttributeError, ArithmeticError)
 
 # These come from the netCDF4 module, but they're not exported via __all__ so we put them here:
@@ -1013,6 +1016,12 @@ def cfsv2_nldas_nwm_bias_correct(input_forcings, config_options, mpi_config, for
         if nldas_zero_pcp is not None:
             nldas_zero_pcp = np.flip(nldas_zero_pcp, axis=0)
 
+        # Limit the parameters to the window the CFSv2 source grid was cropped to.
+        nldas_param_1 = nldas_param_1[input_forcings.src_window]
+        nldas_param_2 = nldas_param_2[input_forcings.src_window]
+        if nldas_zero_pcp is not None:
+            nldas_zero_pcp = nldas_zero_pcp[input_forcings.src_window]
+
     else:
         nldas_param_1 = None
         nldas_param_2 = None
@@ -1176,6 +1185,15 @@ def cfsv2_nldas_nwm_bias_correct(input_forcings, config_options, mpi_config, for
             zero_pcp = np.flip(zero_pcp, axis=0)
             prev_zero_pcp = np.flip(prev_zero_pcp, axis=0)
 
+        # Limit the parameters to the window the CFSv2 source grid was cropped to.
+        param_1 = param_1[input_forcings.src_window]
+        param_2 = param_2[input_forcings.src_window]
+        prev_param_1 = prev_param_1[input_forcings.src_window]
+        prev_param_2 = prev_param_2[input_forcings.src_window]
+        if force_num == 4:
+            zero_pcp = zero_pcp[input_forcings.src_window]
+            prev_zero_pcp = prev_zero_pcp[input_forcings.src_window]
+
     else:
         param_1 = None
         param_2 = None
@@ -1243,214 +1261,175 @@ def cfsv2_nldas_nwm_bias_correct(input_forcings, config_options, mpi_config, for
     if mpi_config.rank == 0:
         config_options.statusMsg = "Creating local CFS CDF arrays."
         err_handler.log_msg(config_options, mpi_config)
-    # Establish local arrays of data.
-    cfs_data = np.empty([input_forcings.ny_local, input_forcings.nx_local], np.float64)
 
     # Establish parameters of the CDF matching.
     vals = np.linspace(val_range1[force_num], val_range2[force_num], val_bins[force_num])
 
+    # Interpolate the two CFS values (and parameters) in time.
+    # Since this is only for CFSv2 6-hour data, we will assume 6-hour intervals.
+    # This is already checked at the beginning of this routine for the product name.
+    dt_from_previous = config_options.current_output_date - input_forcings.fcst_date1
+    hr_from_previous = dt_from_previous.total_seconds() / 3600.0
+    interp_factor1 = float(1 - (hr_from_previous / 6.0))
+    interp_factor2 = float(hr_from_previous / 6.0)
+
+    cfs_prev_tmp = input_forcings.coarse_input_forcings1[input_forcings.input_map_output[force_num], :, :]
+    cfs_next_tmp = input_forcings.coarse_input_forcings2[input_forcings.input_map_output[force_num], :, :]
+    cfs_interp_fcst = (cfs_prev_tmp.astype(np.float64) * interp_factor1 +
+                       cfs_next_tmp.astype(np.float64) * interp_factor2)
+    cfs_param_1_interp = (cfs_prev_param_1_sub.astype(np.float64) * interp_factor1 +
+                          cfs_param_1_sub.astype(np.float64) * interp_factor2)
+    cfs_param_2_interp = (cfs_prev_param_2_sub.astype(np.float64) * interp_factor1 +
+                          cfs_param_2_sub.astype(np.float64) * interp_factor2)
+
+    # Check for any missing parameter values. Pixel cells with missing values are
+    # not corrected; they simply keep the interpolated CFS value.
+    param_grids = [cfs_param_1_sub, cfs_param_2_sub, cfs_prev_param_1_sub, cfs_prev_param_2_sub,
+                   nldas_param_1_sub, nldas_param_2_sub]
+    if force_num == 4:
+        param_grids += [cfs_prev_zero_pcp_sub, cfs_zero_pcp_sub, nldas_zero_pcp_sub]
+    correct_flag = np.ones(cfs_interp_fcst.shape, dtype=bool)
+    for param_grid in param_grids:
+        correct_flag &= (param_grid != config_options.globalNdv)
+
+    # Establish local arrays of data. Everything below works on 1-D arrays of the
+    # pixel cells that have a full set of valid parameters.
+    cfs_data = cfs_interp_fcst.copy()
+    fcst = cfs_interp_fcst[correct_flag]
+    cfs_p1 = cfs_param_1_interp[correct_flag]
+    cfs_p2 = cfs_param_2_interp[correct_flag]
+    nldas_p1 = nldas_param_1_sub[correct_flag].astype(np.float64)
+    nldas_p2 = nldas_param_2_sub[correct_flag].astype(np.float64)
+
     if mpi_config.rank == 0:
-        config_options.statusMsg = "Looping over local arrays to calculate bias corrections."
+        config_options.statusMsg = "Calculating bias corrections over local arrays."
         err_handler.log_msg(config_options, mpi_config)
-    # Process each of the pixel cells for this local processor on the CFS grid.
-    for x_local in range(0, input_forcings.nx_local):
-        for y_local in range(0, input_forcings.ny_local):
-            cfs_prev_tmp = input_forcings.coarse_input_forcings1[input_forcings.input_map_output[force_num],
-                                                                 y_local, x_local]
-            cfs_next_tmp = input_forcings.coarse_input_forcings2[input_forcings.input_map_output[force_num],
-                                                                 y_local, x_local]
-
-            # Check for any missing parameter values. If any missing values exist,
-            # set this flag to False. Further down, if it's False, we will simply
-            # set the local CFS adjusted value to the interpolated value.
-            correct_flag = True
-            if cfs_param_1_sub[y_local, x_local] == config_options.globalNdv:
-                correct_flag = False
-            if cfs_param_2_sub[y_local, x_local] == config_options.globalNdv:
-                correct_flag = False
-            if cfs_prev_param_1_sub[y_local, x_local] == config_options.globalNdv:
-                correct_flag = False
-            if cfs_prev_param_2_sub[y_local, x_local] == config_options.globalNdv:
-                correct_flag = False
-            if nldas_param_1_sub[y_local, x_local] == config_options.globalNdv:
-                correct_flag = False
-            if nldas_param_2_sub[y_local, x_local] == config_options.globalNdv:
-                correct_flag = False
-            if force_num == 4:
-                if cfs_prev_zero_pcp_sub[y_local, x_local] == config_options.globalNdv:
-                    correct_flag = False
-                if cfs_zero_pcp_sub[y_local, x_local] == config_options.globalNdv:
-                    correct_flag = False
-                if nldas_zero_pcp_sub[y_local, x_local] == config_options.globalNdv:
-                    correct_flag = False
-
-            # Interpolate the two CFS values (and parameters) in time.
-            dt_from_previous = config_options.current_output_date - input_forcings.fcst_date1
-            hr_from_previous = dt_from_previous.total_seconds() / 3600.0
-            interp_factor1 = float(1 - (hr_from_previous / 6.0))
-            interp_factor2 = float(hr_from_previous / 6.0)
-
-            # Since this is only for CFSv2 6-hour data, we will assume 6-hour intervals.
-            # This is already checked at the beginning of this routine for the product name.
-            cfs_param_1_interp = (cfs_prev_param_1_sub[y_local, x_local] * interp_factor1 +
-                                  cfs_param_1_sub[y_local, x_local] * interp_factor2)
-            cfs_param_2_interp = (cfs_prev_param_2_sub[y_local, x_local] * interp_factor1 +
-                                  cfs_param_2_sub[y_local, x_local] * interp_factor2)
-            cfs_interp_fcst = cfs_prev_tmp * interp_factor1 + cfs_next_tmp * interp_factor2
-            nldas_nearest_1 = nldas_param_1_sub[y_local, x_local]
-            nldas_nearest_2 = nldas_param_2_sub[y_local, x_local]
-
-            if correct_flag:
-                if force_num != 4 and force_num != 5 and force_num != 1:
-                    # Not incoming shortwave or precip or specific humidity
-                    pts = (vals - cfs_param_1_interp) / cfs_param_2_interp
-                    spacing = (vals[2] - vals[1]) / cfs_param_2_interp
-                    cfs_pdf = (np.exp(-0.5 * (np.power(pts, 2))) / math.sqrt(2 * 3.141592)) * spacing
-                    cfs_cdf = np.cumsum(cfs_pdf)
-
-                    pts = (vals - nldas_nearest_1) / nldas_nearest_2
-                    spacing = (vals[2] - vals[1]) / nldas_nearest_2
-                    nldas_pdf = (np.exp(-0.5 * (np.power(pts, 2))) / math.sqrt(2 * 3.141592)) * spacing
-                    nldas_cdf = np.cumsum(nldas_pdf)
-
-                    # compute adjusted value now using the CFSv2 forecast value and the two CDFs
-                    # find index in vals array
-                    diff_tmp = np.absolute(vals - cfs_interp_fcst)
-                    cfs_ind = np.where(diff_tmp == diff_tmp.min())[0][0]
-                    cfs_cdf_val = cfs_cdf[cfs_ind]
-
-                    # now whats the index of the closest cdf value in the nldas array?
-                    diff_tmp = np.absolute(cfs_cdf_val - nldas_cdf)
-                    cfs_nldas_ind = np.where(diff_tmp == diff_tmp.min())[0][0]
-
-                    # Adjust the CFS data
-                    cfs_data[y_local, x_local] = vals[cfs_nldas_ind]
-
-                if force_num == 5:
-                    # Incoming shortwave radiation flux.
-                    # find nearest nldas grid point and then calculate nldas cdf
-                    nldas_nearest_1 = nldas_param_1_sub[y_local, x_local]
-
-                    if cfs_interp_fcst > 2.0 and cfs_param_1_interp > 2.0:
-                        factor = nldas_nearest_1 / cfs_param_1_interp
-                        cfs_data[y_local, x_local] = cfs_interp_fcst * factor
-                    else:
-                        cfs_data[y_local, x_local] = 0.0
-                if force_num == 1:
-                    # Specific humidity
-                    # spacing = vals[2] - vals[1]
-                    cfs_interp_fcst = cfs_interp_fcst * 1000.0  # units are now g/kg
-                    cfs_cdf = 1 - np.exp(-(np.power((vals / cfs_param_1_interp), cfs_param_2_interp)))
-
-                    nldas_cdf = 1 - np.exp(-(np.power((vals / nldas_nearest_1), nldas_nearest_2)))
-
-                    # compute adjusted value now using the CFSv2 forecast value and the two CDFs
-                    # find index in vals array
-                    diff_tmp = np.absolute(vals - cfs_interp_fcst)
-                    cfs_ind = np.argmin(diff_tmp)
-                    cfs_cdf_val = cfs_cdf[cfs_ind]
-
-                    # now whats the index of the closest cdf value in the nldas array?
-                    diff_tmp = np.absolute(cfs_cdf_val - nldas_cdf)
-                    cfs_nldas_ind = np.argmin(diff_tmp)
-
-                    # Adjust the CFS data
-                    cfs_data[y_local, x_local] = vals[cfs_nldas_ind] / 1000.0  # convert back to kg/kg
-                    if cfs_data[y_local, x_local] == 0:
-                        config_options.statusMsg = "Invalid Q2D bias correction parameter; using original value"
-                        err_handler.log_msg(config_options, mpi_config)
-                        cfs_data[y_local, x_local] = cfs_interp_fcst
-
-                if force_num == 4:
-                    # Precipitation
-                    # precipitation is estimated using a Weibull distribution
-                    # valid values range from 3e-6 mm/s (0.01 mm/hr) up to 100 mm/hr
-                    # spacing = vals[2] - vals[1]
-                    cfs_zero_pcp_interp = cfs_prev_zero_pcp_sub[y_local, x_local] * interp_factor1 + \
-                                          cfs_zero_pcp_sub[y_local, x_local] * interp_factor2
-
-                    cfs_cdf = 1 - np.exp(-(np.power((vals / cfs_param_1_interp), cfs_param_2_interp)))
-                    # cfs_cdf_scaled = ((1 - cfs_zero_pcp_interp) + cfs_cdf) / \
-                    #                  (cfs_cdf.max() + (1 - cfs_zero_pcp_interp))
-
-                    nldas_nearest_zero_pcp = nldas_zero_pcp_sub[y_local, x_local]
-
-                    if nldas_nearest_2 == 0.0:
-                        # if second Weibull parameter is zero, the
-                        # distribution has no width, no precipitation outside first bin
-                        nldas_cdf = np.empty([2000], np.float64)
-                        nldas_cdf[:] = 1.0
-                        nldas_nearest_zero_pcp = 1.0
-                    else:
-                        # valid point, see if we need to adjust cfsv2 precip
-                        nldas_cdf = 1 - np.exp(-(np.power((vals / nldas_nearest_1), nldas_nearest_2)))
-
-                    if cfs_interp_fcst == 0.0 or nldas_nearest_zero_pcp == 1.0:
-                        # if no rain in cfsv2, no rain in bias corrected field
-                        cfs_data[y_local, x_local] = 0.0
-                    else:
-                        # else there is rain in cfs forecast, so adjust it in some manner
-
-                        # compute adjusted value now using the CFSv2 forecast value and the two CDFs
-                        # find index in vals array
-                        try:
-                            diff_tmp = np.absolute(vals - (cfs_interp_fcst * 3600.0))
-                            cfs_ind = np.where(diff_tmp == diff_tmp.min())[0][0]
-                            cfs_cdf_val = cfs_cdf[cfs_ind]
-
-                            # now whats the index of the closest cdf value in the nldas array?
-                            diff_tmp = np.absolute(cfs_cdf_val - nldas_cdf)
-                            cfs_nldas_ind = np.where(diff_tmp == diff_tmp.min())[0][0]
-                        except IndexError:
-                            # something's wrong with the parameters, so log it and keep on keeping on...
-                            config_options.statusMsg = "Invalid input data for bias correction, continuing..."
-                            err_handler.log_msg(config_options, mpi_config)
-                            continue
-
-                        pcp_pop_diff = nldas_nearest_zero_pcp - cfs_zero_pcp_interp
-                        if cfs_zero_pcp_interp <= nldas_nearest_zero_pcp:
-                            # if cfsv2 zero precip probability is less than nldas,
-                            # then do one adjustment
-                            if cfs_cdf_val <= pcp_pop_diff:
-                                # if cfsv2 precip cdf is still less than pop
-                                # difference, set precip to zero
-                                cfs_data[y_local, x_local] = 0.0
-                            else:
-                                # cfsv2 precip cdf > nldas zero precip probability,
-                                # so adjust cfsv2 to nldas2 precip
-                                cfs_data[y_local, x_local] = vals[cfs_nldas_ind] / 3600.0  # convert back to mm/s
-
-                                # check for unreasonable corrections of cfs rainfall
-                                # ad-hoc setting that cfsv2 precipitation should not be corrected by more than 3x
-                                # if it is, this indicated nldas2 distribution is unrealistic
-                                # and default back to cfsv2 forecast value
-                                if (cfs_data[y_local, x_local] / cfs_interp_fcst) >= 3.0:
-                                    cfs_data[y_local, x_local] = cfs_interp_fcst
-                        else:
-                            if cfs_cdf_val <= abs(pcp_pop_diff):
-                                # if cfsv2 cdf value less than pop difference, need to randomly
-                                # generate precip, since we're in the zero portion of the nldas
-                                # zero precip prob still
-                                randn = random.uniform(0.0, abs(pcp_pop_diff))
-                                diff_tmp = np.absolute(randn - nldas_cdf)
-                                new_nldas_ind = np.where(diff_tmp == diff_tmp.min())[0][0]
-                                cfs_data[y_local, x_local] = vals[new_nldas_ind] / 3600.0
-
-                                # ad-hoc setting that cfsv2 precipitation should not be corrected by more than 3x
-                                # if it is, this indicated nldas2 distribution is unrealistic
-                                # and default back to cfsv2 forecast value
-                                if (cfs_data[y_local, x_local] / cfs_interp_fcst) >= 3.0:
-                                    cfs_data[y_local, x_local] = cfs_interp_fcst
-                            else:
-                                cfs_data[y_local, x_local] = vals[cfs_nldas_ind] / 3600.0  # convert back to mm/s
-                                # ad-hoc setting that cfsv2 precipitation should not be corrected by more than 3x
-                                # if it is, this indicated nldas2 distribution is unrealistic
-                                # and default back to cfsv2 forecast value
-                                if (cfs_data[y_local, x_local] / cfs_interp_fcst) >= 3.0:
-                                    cfs_data[y_local, x_local] = cfs_interp_fcst
-            else:
-                # No adjustment for this CFS pixel cell as we have missing parameter values.
-                cfs_data[y_local, x_local] = cfs_interp_fcst
+
+    if force_num == 5:
+        # Incoming shortwave radiation flux.
+        corrected = np.zeros_like(fcst)
+        adjust = (fcst > 2.0) & (cfs_p1 > 2.0)
+        corrected[adjust] = fcst[adjust] * (nldas_p1[adjust] / cfs_p1[adjust])
+
+    elif force_num == 1:
+        # Specific humidity, estimated using a Weibull distribution.
+        fcst_g = fcst * 1000.0  # units are now g/kg
+
+        # compute adjusted value now using the CFSv2 forecast value and the two CDFs
+        # find index in vals array
+        cfs_ind = _nearest_bin(vals, fcst_g)
+        cfs_cdf_val = _weibull_cdf(vals[cfs_ind], cfs_p1, cfs_p2)
+
+        # now whats the index of the closest cdf value in the nldas array?
+        corrected = np.empty_like(fcst)
+        invalid = np.zeros(fcst.shape, dtype=bool)
+        for cells in _cell_chunks(fcst.size, vals.size):
+            nldas_cdf = _weibull_cdf(vals, nldas_p1[cells, np.newaxis], nldas_p2[cells, np.newaxis])
+            nldas_ind, invalid[cells] = _closest_cdf_index(nldas_cdf, cfs_cdf_val[cells])
+            corrected[cells] = vals[nldas_ind] / 1000.0  # convert back to kg/kg
+
+        no_adjust = (corrected == 0) | invalid
+        if np.any(no_adjust):
+            config_options.statusMsg = "Invalid Q2D bias correction parameter; using original value for " + \
+                                       str(np.count_nonzero(no_adjust)) + " pixel cells"
+            err_handler.log_msg(config_options, mpi_config)
+            corrected[no_adjust] = fcst[no_adjust]
+
+    elif force_num == 4:
+        # Precipitation
+        # precipitation is estimated using a Weibull distribution
+        # valid values range from 3e-6 mm/s (0.01 mm/hr) up to 100 mm/hr
+        cfs_zero_pcp_interp = (cfs_prev_zero_pcp_sub.astype(np.float64) * interp_factor1 +
+                               cfs_zero_pcp_sub.astype(np.float64) * interp_factor2)[correct_flag]
+        nldas_zero_pcp = nldas_zero_pcp_sub[correct_flag].astype(np.float64)
+
+        # if second Weibull parameter is zero, the distribution has no width,
+        # no precipitation outside first bin
+        nldas_zero_pcp[nldas_p2 == 0.0] = 1.0
+
+        # if no rain in cfsv2, no rain in bias corrected field
+        corrected = np.zeros_like(fcst)
+        rain = (fcst != 0.0) & (nldas_zero_pcp != 1.0)
+
+        # else there is rain in cfs forecast, so adjust it in some manner
+        fcst_rain = fcst[rain]
+        nldas_zero_rain = nldas_zero_pcp[rain]
+        cfs_zero_rain = cfs_zero_pcp_interp[rain]
+        nldas_p1_rain = nldas_p1[rain]
+        nldas_p2_rain = nldas_p2[rain]
+
+        # compute adjusted value now using the CFSv2 forecast value and the two CDFs
+        # find index in vals array
+        cfs_ind = _nearest_bin(vals, fcst_rain * 3600.0)
+        cfs_cdf_val = _weibull_cdf(vals[cfs_ind], cfs_p1[rain], cfs_p2[rain])
+        pcp_pop_diff = nldas_zero_rain - cfs_zero_rain
+
+        # Random draws used where precipitation needs to be generated in the zero portion
+        # of the NLDAS distribution. The generator is seeded from the output time and rank
+        # so reruns of the same cycle are reproducible.
+        rng = np.random.default_rng([int(config_options.current_output_date.strftime('%Y%m%d%H%M')),
+                                     mpi_config.rank, force_num])
+        randn = rng.uniform(0.0, np.absolute(pcp_pop_diff))
+
+        # now whats the index of the closest cdf value in the nldas array?
+        nldas_ind = np.empty(fcst_rain.shape, dtype=np.intp)
+        new_nldas_ind = np.empty(fcst_rain.shape, dtype=np.intp)
+        invalid = np.zeros(fcst_rain.shape, dtype=bool)
+        for cells in _cell_chunks(fcst_rain.size, vals.size):
+            nldas_cdf = _weibull_cdf(vals, nldas_p1_rain[cells, np.newaxis], nldas_p2_rain[cells, np.newaxis])
+            nldas_ind[cells], invalid[cells] = _closest_cdf_index(nldas_cdf, cfs_cdf_val[cells])
+            new_nldas_ind[cells] = _closest_cdf_index(nldas_cdf, randn[cells])[0]
+
+        # if cfsv2 zero precip probability is less than nldas, cfsv2 cdf values still below
+        # the pop difference are set to zero precip. Otherwise, if the cfsv2 cdf value is less
+        # than the pop difference we are still in the zero portion of the nldas distribution
+        # and need to randomly generate precip.
+        cfs_drier = cfs_zero_rain <= nldas_zero_rain
+        set_zero = cfs_drier & (cfs_cdf_val <= pcp_pop_diff)
+        generate = ~cfs_drier & (cfs_cdf_val <= np.absolute(pcp_pop_diff))
+
+        pcp_adjusted = np.where(generate, vals[new_nldas_ind], vals[nldas_ind]) / 3600.0  # convert back to mm/s
+
+        # ad-hoc setting that cfsv2 precipitation should not be corrected by more than 3x
+        # if it is, this indicated nldas2 distribution is unrealistic
+        # and default back to cfsv2 forecast value
+        pcp_adjusted = np.where((pcp_adjusted / fcst_rain) >= 3.0, fcst_rain, pcp_adjusted)
+        pcp_adjusted[set_zero] = 0.0
+
+        if np.any(invalid):
+            # something's wrong with the parameters, so log it and keep on keeping on...
+            config_options.statusMsg = "Invalid input data for bias correction in " + \
+                                       str(np.count_nonzero(invalid)) + " pixel cells, continuing..."
+            err_handler.log_msg(config_options, mpi_config)
+            pcp_adjusted[invalid] = fcst_rain[invalid]
+        corrected[rain] = pcp_adjusted
+
+    else:
+        # Not incoming shortwave or precip or specific humidity, estimated using
+        # a normal distribution.
+        # compute adjusted value now using the CFSv2 forecast value and the two CDFs
+        # find index in vals array
+        cfs_ind = _nearest_bin(vals, fcst)
+
+        corrected = fcst.copy()
+        invalid = np.zeros(fcst.shape, dtype=bool)
+        for cells in _cell_chunks(fcst.size, vals.size):
+            cfs_cdf = _normal_cdf(vals, cfs_p1[cells], cfs_p2[cells])
+            cfs_cdf_val = cfs_cdf[np.arange(cfs_cdf.shape[0]), cfs_ind[cells]]
+
+            # now whats the index of the closest cdf value in the nldas array?
+            nldas_cdf = _normal_cdf(vals, nldas_p1[cells], nldas_p2[cells])
+            nldas_ind, invalid[cells] = _closest_cdf_index(nldas_cdf, cfs_cdf_val)
+            corrected[cells] = vals[nldas_ind]
+
+        if np.any(invalid):
+            config_options.statusMsg = "Invalid input data for bias correction in " + \
+                                       str(np.count_nonzero(invalid)) + " pixel cells, continuing..."
+            err_handler.log_msg(config_options, mpi_config)
+            corrected[invalid] = fcst[invalid]
+
+    # Adjust the CFS data
+    cfs_data[correct_flag] = corrected
 
     # Regrid the local CFS slab to the output array
     try:
@@ -1471,8 +1450,7 @@ def cfsv2_nldas_nwm_bias_correct(input_forcings, config_options, mpi_config, for
 
     # Set any pixel cells outside the input domain to the global missing value.
     try:
-        input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-            config_options.globalNdv
+        input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
     except NumpyExceptions as npe:
         config_options.errMsg = "Unable to run mask calculation on CFSv2 variable: " + \
                                 input_forcings.netcdf_var_names[force_num] + " (" + str(npe) + ")"
@@ -1486,3 +1464,69 @@ def cfsv2_nldas_nwm_bias_correct(input_forcings, config_options, mpi_config, for
         config_options.errMsg = "Unable to extract ESMF field data for CFSv2: " + str(npe)
         err_handler.log_critical(config_options, mpi_config)
     err_handler.check_program_status(config_options, mpi_config)
+
+
+def _cell_chunks(n_cells, n_bins):
+    """
+    Generator of slices over a 1-D array of pixel cells, sized so that a
+    [cells, bins] CDF table stays under CDF_CHUNK_SIZE elements.
+    :param n_cells:
+    :param n_bins:
+    :return:
+    """
+    step = max(1, CDF_CHUNK_SIZE // max(n_bins, 1))
+    for start in range(0, n_cells, step):
+        yield slice(start, min(start + step, n_cells))
+
+
+def _nearest_bin(vals, target):
+    """
+    Vectorized equivalent of np.argmin(np.absolute(vals - target)) for each
+    element of target, using a binary search on the monotonic bin values.
+    Ties go to the lower bin, as argmin would.
+    :param vals:
+    :param target:
+    :return:
+    """
+    ind = np.clip(np.searchsorted(vals, target), 1, vals.size - 1)
+    lower = (target - vals[ind - 1]) <= (vals[ind] - target)
+    return ind - lower
+
+
+def _closest_cdf_index(cdf, target):
+    """
+    Row-wise index of the CDF bin closest to the target value. Rows containing
+    NaN values are flagged as invalid, matching the cases where the per-cell
+    calculation could not find a minimum.
+    :param cdf: Array of CDF values of shape [cells, bins]
+    :param target: Array of target CDF values of shape [cells]
+    :return: Tuple of bin indices and invalid flags, both of shape [cells]
+    """
+    diff_tmp = np.absolute(cdf - target[:, np.newaxis])
+    return np.argmin(diff_tmp, axis=1), np.isnan(diff_tmp).any(axis=1)
+
+
+def _normal_cdf(vals, mean, std_dev):
+    """
+    Discrete normal CDF tables of shape [cells, bins], accumulated over
+    the bin values the same way for the CFSv2 and NLDAS distributions.
+    :param vals:
+    :param mean:
+    :param std_dev:
+    :return:
+    """
+    pts = (vals - mean[:, np.newaxis]) / std_dev[:, np.newaxis]
+    spacing = (vals[2] - vals[1]) / std_dev
+    pdf = (np.exp(-0.5 * (np.power(pts, 2))) / math.sqrt(2 * 3.141592)) * spacing[:, np.newaxis]
+    return np.cumsum(pdf, axis=1)
+
+
+def _weibull_cdf(vals, scale, shape):
+    """
+    Weibull CDF evaluated at vals (broadcast against the scale and shape parameters).
+    :param vals:
+    :param scale:
+    :param shape:
+    :return:
+    """
+    return 1 - np.exp(-(np.power((vals / scale), shape)))
@@ -30,6 +30,7 @@ class ConfigOptions:
         self.supp_precip_file_types = None
         self.supp_precip_param_dir = None
         self.input_force_mandatory = None
+        self.input_force_distributed_read = None
         self.supp_precip_mandatory = None
         self.supp_pcp_max_hours = None
         self.number_inputs = None
@@ -42,6 +43,10 @@ class ConfigOptions:
         self.scratch_dir = None
         self.useCompression = 0
         self.useFloats = 0
+        self.parallelOutput = 0
+        self.outputWriters = 0
+        self.working_precision = 64
+        self.working_dtype = np.float64
         self.num_output_steps = None
         self.num_supp_output_steps = None
         self.actual_output_steps = None
@@ -49,6 +54,9 @@ class ConfigOptions:
         self.realtime_flag = None
         self.refcst_flag = None
         self.ana_flag = None
+        self.claim_cycles = 0
+        self.claim_timeout = 360
+        self.claim_heartbeat = None
         self.ana_out_dir = None
         self.b_date_proc = None
         self.e_date_proc = None
@@ -67,10 +75,23 @@ class ConfigOptions:
         self.process_window = None
         self.geogrid = None
         self.spatial_meta = None
+        self.shared_static_grids = 0
         self.grid_meta = None
         self.ignored_border_widths = None
         self.regrid_opt = None
         self.weightsDir = None
+        self.weightsMaxSize = 0
+        self.weight_store = None
+        self.fieldCacheDir = None
+        self.fieldCacheMaxSize = 0
+        self.field_cache = None
+        self.regrid_engine = None
+        self.weight_builder = 0
+        self.regrid_registry = None
+        self.grib2_decoder = 'wgrib2'
+        self.grib_partial_read = 0
+        self.prefetch_files = 0
+        self.prefetcher = None
         self.regrid_opt_supp_pcp = None
         self.config_path = config
         self.errMsg = None
@@ -102,6 +123,7 @@ class ConfigOptions:
         self.globalNdv = -999999.0
         self.d_program_init = datetime.datetime.utcnow()
         self.errFlag = 0
+        self.errTraceback = None
         self.nwmVersion = None
         self.nwmConfig = None
         self.include_lqfrac = False
@@ -228,6 +250,50 @@ class ConfigOptions:
                     err_handler.err_out_screen('Invalid InputMandatory chosen in the configuration file. Please'
                                                ' choose a value of 0 or 1 for each corresponding input forcing.')
 
+            # Read in the optional distributed read options for input forcings.
+            try:
+                self.input_force_distributed_read = json.loads(config['Input']['DistributedRead'])
+            except (KeyError, configparser.NoOptionError):
+                # if didn't specify, rank 0 reads all input files
+                self.input_force_distributed_read = [0] * self.number_inputs
+            except json.decoder.JSONDecodeError:
+                err_handler.err_out_screen('Improper DistributedRead options specified in the configuration file.')
+            if len(self.input_force_distributed_read) != self.number_inputs:
+                err_handler.err_out_screen('Please specify DistributedRead values for each corresponding input '
+                                           'forcings in the configuration file.')
+            for readOpt in self.input_force_distributed_read:
+                if readOpt < 0 or readOpt > 1:
+                    err_handler.err_out_screen('Invalid DistributedRead chosen in the configuration file. Please'
+                                               ' choose a value of 0 or 1 for each corresponding input forcing.')
+
+            # Read in the optional number of input files to stage in the background.
+            try:
+                self.prefetch_files = int(config['Input'].get('PrefetchFiles', 0))
+            except ValueError:
+                err_handler.err_out_screen('Improper PrefetchFiles value specified in the configuration file.')
+            if self.prefetch_files < 0:
+                err_handler.err_out_screen('Please choose a PrefetchFiles value of 0 or greater.')
+
+            # Read in the optional GRIB2 decoding backend.
+            self.grib2_decoder = config['Input'].get('Grib2Decoder', 'wgrib2').strip().lower()
+            if self.grib2_decoder not in ('wgrib2', 'eccodes'):
+                err_handler.err_out_screen('Invalid Grib2Decoder chosen in the configuration file. Please choose '
+                                           'wgrib2 or eccodes.')
+            if self.grib2_decoder == 'eccodes':
+                try:
+                    import eccodes
+                except ImportError:
+                    err_handler.err_out_screen('The eccodes Grib2Decoder requires the eccodes Python package '
+                                               'to be installed.')
+
+            # Read in the optional flag for .idx driven partial reads of GRIB2 files.
+            try:
+                self.grib_partial_read = int(config['Input'].get('GribPartialRead', 0))
+            except ValueError:
+                err_handler.err_out_screen('Improper GribPartialRead value specified in the configuration file.')
+            if self.grib_partial_read < 0 or self.grib_partial_read > 1:
+                err_handler.err_out_screen('Please choose a GribPartialRead value of 0 or 1.')
+
         # Read in the output frequency
         try:
             self.output_freq = int(config['Output']['OutputFrequency'])
@@ -344,6 +410,34 @@ class ConfigOptions:
         if self.include_lqfrac < 0 or self.include_lqfrac > 1:
             err_handler.err_out_screen('Please choose an includeLQFrac value of 0 or 1.')
 
+        # Read in parallel output option
+        try:
+            self.parallelOutput = int(config['Output'].get('parallelOutput', 0))
+        except ValueError:
+            err_handler.err_out_screen('Improper parallelOutput value: {}'.format(config['Output']['parallelOutput']))
+        if self.parallelOutput < 0 or self.parallelOutput > 1:
+            err_handler.err_out_screen('Please choose a parallelOutput value of 0 or 1.')
+
+        # Read in number of background output writer processes
+        try:
+            self.outputWriters = int(config['Output'].get('outputWriters', 0))
+        except ValueError:
+            err_handler.err_out_screen('Improper outputWriters value: {}'.format(config['Output']['outputWriters']))
+        if self.outputWriters < 0:
+            err_handler.err_out_screen('Please choose an outputWriters value of 0 or greater.')
+        if self.outputWriters > 0 and self.parallelOutput == 1:
+            err_handler.err_out_screen('outputWriters cannot be combined with parallelOutput.')
+
+        # Read in the floating-point precision of the per-step forcing grids
+        try:
+            self.working_precision = int(config['Output'].get('workingPrecision', 64))
+        except ValueError:
+            err_handler.err_out_screen('Improper workingPrecision value: {}'.format(
+                config['Output']['workingPrecision']))
+        if self.working_precision not in (32, 64):
+            err_handler.err_out_screen('Please choose a workingPrecision value of 32 or 64.')
+        self.working_dtype = np.float32 if self.working_precision == 32 else np.float64
+
         # Read AnA flag option
         try:
             # check both the Forecast section and if it's not there, the old BiasCorrection location
@@ -361,6 +455,23 @@ class ConfigOptions:
         if self.ana_flag < 0 or self.ana_flag > 1:
             err_handler.err_out_screen('Please choose a AnAFlag value of 0 or 1.')
 
+        # Read in the optional cycle claiming options, used to share the forecast
+        # cycles between several instances of the forcing engine.
+        try:
+            self.claim_cycles = int(config['Forecast'].get('ClaimCycles', 0))
+        except ValueError:
+            err_handler.err_out_screen('Improper ClaimCycles value: {}'.format(config['Forecast']['ClaimCycles']))
+        if self.claim_cycles < 0 or self.claim_cycles > 1:
+            err_handler.err_out_screen('Please choose a ClaimCycles value of 0 or 1.')
+        if self.claim_cycles == 1 and self.ana_flag == 1:
+            err_handler.err_out_screen('ClaimCycles cannot be used for AnA runs.')
+        try:
+            self.claim_timeout = int(config['Forecast'].get('ClaimTimeout', 360))
+        except ValueError:
+            err_handler.err_out_screen('Improper ClaimTimeout value: {}'.format(config['Forecast']['ClaimTimeout']))
+        if self.claim_timeout <= 0:
+            err_handler.err_out_screen('Please choose a ClaimTimeout value greater than 0.')
+
         # Read in retrospective options
         try:
             self.retro_flag = int(config['Retrospective']['RetroFlag'])
@@ -714,6 +825,15 @@ class ConfigOptions:
             if not os.path.isfile(self.grid_meta):
                 err_handler.err_out_screen('Unable to locate optional grid metadata file: ' + self.grid_meta)
 
+        # Read in the optional flag to hold static grids in node-level shared memory.
+        try:
+            self.shared_static_grids = int(config['Geospatial'].get('SharedStaticGrids', 0))
+        except ValueError:
+            err_handler.err_out_screen('Improper SharedStaticGrids value: {}'.format(
+                config['Geospatial']['SharedStaticGrids']))
+        if self.shared_static_grids < 0 or self.shared_static_grids > 1:
+            err_handler.err_out_screen('Please choose a SharedStaticGrids value of 0 or 1.')
+
         if self.precip_only_flag == False:
             # Check for the IgnoredBorderWidths
             try:
@@ -761,6 +881,68 @@ class ConfigOptions:
                     err_handler.err_out_screen('ESMF Weights file directory specifed ({}) but does not exist').format(
                         self.weightsDir)
 
+            # Read maximum size of the weight file directory in GB (optional, 0 for no limit)
+            try:
+                self.weightsMaxSize = int(float(config['Regridding'].get('RegridWeightsMaxSize', 0)) * 1024 ** 3)
+            except ValueError:
+                err_handler.err_out_screen('Improper RegridWeightsMaxSize value: {}'.format(
+                    config['Regridding']['RegridWeightsMaxSize']))
+            if self.weightsMaxSize < 0:
+                err_handler.err_out_screen('Please choose a RegridWeightsMaxSize value of 0 or greater.')
+
+            # Read regridded field cache directory (optional)
+            self.fieldCacheDir = config['Regridding'].get('RegriddedCacheDir')
+            if self.fieldCacheDir is not None and not os.path.isdir(self.fieldCacheDir):
+                err_handler.err_out_screen('Regridded field cache directory specified ({}) but does not '
+                                           'exist'.format(self.fieldCacheDir))
+
+            # Read maximum size of the regridded field cache in GB (optional, 0 for no limit)
+            try:
+                self.fieldCacheMaxSize = int(float(config['Regridding'].get('RegriddedCacheMaxSize', 0)) * 1024 ** 3)
+            except ValueError:
+                err_handler.err_out_screen('Improper RegriddedCacheMaxSize value: {}'.format(
+                    config['Regridding']['RegriddedCacheMaxSize']))
+            if self.fieldCacheMaxSize < 0:
+                err_handler.err_out_screen('Please choose a RegriddedCacheMaxSize value of 0 or greater.')
+
+            # Read the regrid engine of each input forcing (optional, ESMF by default)
+            try:
+                self.regrid_engine = json.loads(config['Regridding'].get('RegridEngine', '[]'))
+            except json.decoder.JSONDecodeError:
+                err_handler.err_out_screen('Improper RegridEngine options specified in the configuration file.')
+            if len(self.regrid_engine) == 0:
+                self.regrid_engine = [0] * self.number_inputs
+            if len(self.regrid_engine) != self.number_inputs:
+                err_handler.err_out_screen('Please specify RegridEngine values for each corresponding input '
+                                           'forcings in the configuration file.')
+            for regridEngine in self.regrid_engine:
+                if regridEngine < 0 or regridEngine > 1:
+                    err_handler.err_out_screen('Invalid RegridEngine chosen in the configuration file. Please choose '
+                                               'a value of 0-1 for each corresponding input forcing.')
+            if 1 in self.regrid_engine:
+                if self.weightsDir is None:
+                    err_handler.err_out_screen('The sparse matrix RegridEngine applies stored ESMF weights, please '
+                                               'specify a RegridWeightsDir in the configuration file.')
+                try:
+                    import scipy.sparse
+                except ImportError:
+                    err_handler.err_out_screen('The sparse matrix RegridEngine requires scipy to be installed.')
+
+            # Read the generator of new regridding weights (optional, ESMF by default)
+            try:
+                self.weight_builder = int(config['Regridding'].get('RegridWeightBuilder', 0))
+            except ValueError:
+                err_handler.err_out_screen('Improper RegridWeightBuilder value: {}'.format(
+                    config['Regridding']['RegridWeightBuilder']))
+            if self.weight_builder < 0 or self.weight_builder > 1:
+                err_handler.err_out_screen('Invalid RegridWeightBuilder chosen in the configuration file. Please '
+                                           'choose a value of 0-1.')
+            if self.weight_builder == 1:
+                try:
+                    import scipy.spatial
+                except ImportError:
+                    err_handler.err_out_screen('The NumPy RegridWeightBuilder requires scipy to be installed.')
+
         # Calculate the beginning/ending processing dates if we are running realtime
         if self.realtime_flag:
             time_handling.calculate_lookback_window(self)
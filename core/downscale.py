@@ -110,7 +110,7 @@ def simple_lapse(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
     # Apply single lapse rate value to the input 2-meter
     # temperature values.
     try:
-        indNdv = np.where(input_forcings.final_forcings == ConfigOptions.globalNdv)
+        indNdv = input_forcings.final_forcings == ConfigOptions.globalNdv
     except:
         ConfigOptions.errMsg = "Unable to perform NDV search on input forcings"
         err_handler.log_critical(ConfigOptions, MpiConfig)
@@ -123,7 +123,7 @@ def simple_lapse(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
         err_handler.log_critical(ConfigOptions, MpiConfig)
         return
 
-    input_forcings.final_forcings[indNdv] = ConfigOptions.globalNdv
+    np.putmask(input_forcings.final_forcings, indNdv, ConfigOptions.globalNdv)
 
     # Reset for memory efficiency
     indNdv = None
@@ -155,7 +155,7 @@ def dynamic_lapse(input_forcings, config_options, geo_meta, mpi_config):
         # Apply the local lapse rate grid to our local slab of 2-meter temperature data.
         temperature_grid_tmp = input_forcings.final_forcings[4, :, :]
         try:
-            indNdv = np.where(input_forcings.final_forcings == config_options.globalNdv)
+            indNdv = input_forcings.final_forcings == config_options.globalNdv
         except:
             config_options.errMsg = "Unable to perform NDV search on input " + \
                                     input_forcings.productName + " regridded forcings."
@@ -178,7 +178,7 @@ def dynamic_lapse(input_forcings, config_options, geo_meta, mpi_config):
             return
 
         input_forcings.final_forcings[4,:,:] = temperature_grid_tmp
-        input_forcings.final_forcings[indNdv] = config_options.globalNdv
+        np.putmask(input_forcings.final_forcings, indNdv, config_options.globalNdv)
 
 
 def param_lapse(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
@@ -209,92 +209,29 @@ def param_lapse(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
         # We have not read in our lapse rate file. Read it in, do extensive checks,
         # scatter the lapse rate grid out to individual processors, then apply the
         # lapse rate to the 2-meter temperature grid.
-        if MpiConfig.rank == 0:
-            while (True):
-                # First ensure we have a parameter directory
-                if input_forcings.paramDir == "NONE":
-                    ConfigOptions.errMsg = "User has specified spatial temperature lapse rate " \
-                                           "downscaling while no downscaling parameter directory " \
-                                           "exists."
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                # Compose the path to the lapse rate grid file.
-                lapsePath = input_forcings.paramDir + "/lapse_param.nc"
-                if not os.path.isfile(lapsePath):
-                    ConfigOptions.errMsg = "Expected lapse rate parameter file: " + \
-                                           lapsePath + " does not exist."
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                # Open the lapse rate file. Check for the expected variable, along with
-                # the dimension size to make sure everything matches up.
-                try:
-                    idTmp = Dataset(lapsePath,'r')
-                except:
-                    ConfigOptions.errMsg = "Unable to open parameter file: " + lapsePath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                if not 'lapse' in idTmp.variables.keys():
-                    ConfigOptions.errMsg = "Expected 'lapse' variable not located in parameter " \
-                                           "file: " + lapsePath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                try:
-                    lapseTmp = idTmp.variables['lapse'][:,:]
-                except:
-                    ConfigOptions.errMsg = "Unable to extracte 'lapse' variable from parameter: " \
-                                           "file: " + lapsePath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                # Check dimensions to ensure they match up to the output grid.
-                if lapseTmp.shape[1] != GeoMetaWrfHydro.nx_global:
-                    ConfigOptions.errMsg = "X-Dimension size mismatch between output grid and lapse " \
-                                           "rate from parameter file: " + lapsePath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                if lapseTmp.shape[0] != GeoMetaWrfHydro.ny_global:
-                    ConfigOptions.errMsg = "Y-Dimension size mismatch between output grid and lapse " \
-                                           "rate from parameter file: " + lapsePath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                # Perform a quick search to ensure we don't have radical values.
-                indTmp = np.where(lapseTmp < -10.0)
-                if len(indTmp[0]) > 0:
-                    ConfigOptions.errMsg = "Found anomolous negative values in the lapse rate grid from " \
-                                           "parameter file: " + lapsePath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                indTmp = np.where(lapseTmp > 100.0)
-                if len(indTmp[0]) > 0:
-                    ConfigOptions.errMsg = "Found excessively high values in the lapse rate grid from " \
-                                           "parameter file: " + lapsePath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                # Close the parameter lapse rate file.
-                try:
-                    idTmp.close()
-                except:
-                    ConfigOptions.errMsg = "Unable to close parameter file: " + lapsePath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                break
+        lapsePath = input_forcings.paramDir + "/lapse_param.nc"
+        if ConfigOptions.shared_static_grids:
+            # Each node reads its part of the lapse rate grid into shared memory.
+            input_forcings.lapseGrid = MpiConfig.shared_grid(
+                GeoMetaWrfHydro, (lapsePath, 'lapse'),
+                lambda y_slice, x_slice: read_lapse_param(input_forcings, ConfigOptions, GeoMetaWrfHydro,
+                                                          MpiConfig, y_slice, x_slice),
+                ConfigOptions)
         else:
-            lapseTmp = None
-        err_handler.check_program_status(ConfigOptions, MpiConfig)
+            if MpiConfig.rank == 0:
+                lapseTmp = read_lapse_param(input_forcings, ConfigOptions, GeoMetaWrfHydro, MpiConfig)
+            else:
+                lapseTmp = None
+            err_handler.check_program_status(ConfigOptions, MpiConfig)
 
-        # Scatter the lapse rate grid to the other processors.
-        input_forcings.lapseGrid = MpiConfig.scatter_array(GeoMetaWrfHydro,lapseTmp,ConfigOptions)
+            # Scatter the lapse rate grid to the other processors.
+            input_forcings.lapseGrid = MpiConfig.scatter_array(GeoMetaWrfHydro,lapseTmp,ConfigOptions)
         err_handler.check_program_status(ConfigOptions, MpiConfig)
 
     # Apply the local lapse rate grid to our local slab of 2-meter temperature data.
     temperature_grid_tmp = input_forcings.final_forcings[4, :, :]
     try:
-        indNdv = np.where(input_forcings.final_forcings == ConfigOptions.globalNdv)
+        indNdv = input_forcings.final_forcings == ConfigOptions.globalNdv
     except:
         ConfigOptions.errMsg = "Unable to perform NDV search on input " + \
                                input_forcings.productName + " regridded forcings."
@@ -317,15 +254,108 @@ def param_lapse(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
         return
 
     input_forcings.final_forcings[4,:,:] = temperature_grid_tmp
-    input_forcings.final_forcings[indNdv] = ConfigOptions.globalNdv
+    np.putmask(input_forcings.final_forcings, indNdv, ConfigOptions.globalNdv)
 
     # Reset for memory efficiency
-    indTmp = None
     indNdv = None
     indValid = None
     elevDiff = None
     temperature_grid_tmp = None
 
+def read_lapse_param(input_forcings, ConfigOptions, GeoMetaWrfHydro, MpiConfig,
+                     y_slice=slice(None), x_slice=slice(None)):
+    """
+    Function to read in and check the lapse rate parameter grid on the output
+    WRF-Hydro grid, or the part of it given by the y/x slices.
+    :param input_forcings:
+    :param ConfigOptions:
+    :param GeoMetaWrfHydro:
+    :param MpiConfig:
+    :param y_slice:
+    :param x_slice:
+    :return: Lapse rate grid, or None if an error was logged
+    """
+    lapseTmp = None
+    while (True):
+        # First ensure we have a parameter directory
+        if input_forcings.paramDir == "NONE":
+            ConfigOptions.errMsg = "User has specified spatial temperature lapse rate " \
+                                   "downscaling while no downscaling parameter directory " \
+                                   "exists."
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+
+        # Compose the path to the lapse rate grid file.
+        lapsePath = input_forcings.paramDir + "/lapse_param.nc"
+        if not os.path.isfile(lapsePath):
+            ConfigOptions.errMsg = "Expected lapse rate parameter file: " + \
+                                   lapsePath + " does not exist."
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+
+        # Open the lapse rate file. Check for the expected variable, along with
+        # the dimension size to make sure everything matches up.
+        try:
+            idTmp = Dataset(lapsePath,'r')
+        except:
+            ConfigOptions.errMsg = "Unable to open parameter file: " + lapsePath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+        if not 'lapse' in idTmp.variables.keys():
+            ConfigOptions.errMsg = "Expected 'lapse' variable not located in parameter " \
+                                   "file: " + lapsePath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+
+        # Check dimensions to ensure they match up to the output grid.
+        if idTmp.variables['lapse'].shape[1] != GeoMetaWrfHydro.nx_global:
+            ConfigOptions.errMsg = "X-Dimension size mismatch between output grid and lapse " \
+                                   "rate from parameter file: " + lapsePath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+        if idTmp.variables['lapse'].shape[0] != GeoMetaWrfHydro.ny_global:
+            ConfigOptions.errMsg = "Y-Dimension size mismatch between output grid and lapse " \
+                                   "rate from parameter file: " + lapsePath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+
+        try:
+            lapseTmp = idTmp.variables['lapse'][y_slice,x_slice]
+        except:
+            ConfigOptions.errMsg = "Unable to extracte 'lapse' variable from parameter: " \
+                                   "file: " + lapsePath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+
+        # Perform a quick search to ensure we don't have radical values.
+        indTmp = np.where(lapseTmp < -10.0)
+        if len(indTmp[0]) > 0:
+            ConfigOptions.errMsg = "Found anomolous negative values in the lapse rate grid from " \
+                                   "parameter file: " + lapsePath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+        indTmp = np.where(lapseTmp > 100.0)
+        if len(indTmp[0]) > 0:
+            ConfigOptions.errMsg = "Found excessively high values in the lapse rate grid from " \
+                                   "parameter file: " + lapsePath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+
+        # Close the parameter lapse rate file.
+        try:
+            idTmp.close()
+        except:
+            ConfigOptions.errMsg = "Unable to close parameter file: " + lapsePath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+
+        break
+
+    if ConfigOptions.errFlag:
+        return None
+    return lapseTmp
+
+
 def pressure_down_classic(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
     """
     Generic function to downscale surface pressure to the WRF-Hydro domain.
@@ -351,7 +381,7 @@ def pressure_down_classic(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig
         input_forcings.psfcTmp[:, :] = input_forcings.final_forcings[6, :, :]
 
     try:
-        indNdv = np.where(input_forcings.final_forcings == ConfigOptions.globalNdv)
+        indNdv = input_forcings.final_forcings == ConfigOptions.globalNdv
     except:
         ConfigOptions.errMsg = "Unable to perform NDV search on input forcings"
         err_handler.log_critical(ConfigOptions, MpiConfig)
@@ -365,7 +395,7 @@ def pressure_down_classic(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig
         err_handler.log_critical(ConfigOptions, MpiConfig)
         return
 
-    input_forcings.final_forcings[indNdv] = ConfigOptions.globalNdv
+    np.putmask(input_forcings.final_forcings, indNdv, ConfigOptions.globalNdv)
 
     # Reset for memory efficiency
     indNdv = None
@@ -386,7 +416,7 @@ def q2_down_classic(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
 
     # Establish where we have missing values.
     try:
-        indNdv = np.where(input_forcings.final_forcings == ConfigOptions.globalNdv)
+        indNdv = input_forcings.final_forcings == ConfigOptions.globalNdv
     except:
         ConfigOptions.errMsg = "Unable to perform NDV search on input forcings"
         err_handler.log_critical(ConfigOptions, MpiConfig)
@@ -411,7 +441,7 @@ def q2_down_classic(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
         err_handler.log_critical(ConfigOptions, MpiConfig)
         return
     input_forcings.final_forcings[5,:,:] = q2Tmp
-    input_forcings.final_forcings[indNdv] = ConfigOptions.globalNdv
+    np.putmask(input_forcings.final_forcings, indNdv, ConfigOptions.globalNdv)
     q2Tmp = None
     indNdv = None
 
@@ -449,133 +479,57 @@ def nwm_monthly_PRISM_downscale(input_forcings,ConfigOptions,GeoMetaWrfHydro,Mpi
         initialize_flag = True
         # print('MONTH CHANGE.... NEED TO READ IN NEW PRISM GRIDS.')
     if initialize_flag is True:
-        while (True):
-            # First reset the local PRISM grids to be safe.
-            input_forcings.nwmPRISM_numGrid = None
-            input_forcings.nwmPRISM_denGrid = None
-
-            numeratorPath = input_forcings.paramDir + "/PRISM_Precip_Clim_" + \
-                            ConfigOptions.current_output_date.strftime('%h') + '_NWM_Mtn_Mapper_Numer.nc'
-            denominatorPath = input_forcings.paramDir + "/PRISM_Precip_Clim_" + \
-                              ConfigOptions.current_output_date.strftime('%h') + '_NWM_Mtn_Mapper_Denom.nc'
-
-            # Make sure files exist.
-            if not os.path.isfile(numeratorPath):
-                ConfigOptions.errMsg = "Expected parameter file: " + numeratorPath + \
-                                       " for mountain mapper downscaling of precipitation not found."
-                err_handler.log_critical(ConfigOptions, MpiConfig)
-                break
-
-            if not os.path.isfile(denominatorPath):
-                ConfigOptions.errMsg = "Expected parameter file: " + denominatorPath + \
-                                       " for mountain mapper downscaling of precipitation not found."
-                err_handler.log_critical(ConfigOptions, MpiConfig)
-                break
+        # First reset the local PRISM grids to be safe.
+        if ConfigOptions.shared_static_grids:
+            if input_forcings.nwmPRISM_numGrid is not None:
+                MpiConfig.release_shared_grid(input_forcings.nwmPRISM_numGrid)
+            if input_forcings.nwmPRISM_denGrid is not None:
+                MpiConfig.release_shared_grid(input_forcings.nwmPRISM_denGrid)
+        input_forcings.nwmPRISM_numGrid = None
+        input_forcings.nwmPRISM_denGrid = None
+
+        numeratorPath = input_forcings.paramDir + "/PRISM_Precip_Clim_" + \
+                        ConfigOptions.current_output_date.strftime('%h') + '_NWM_Mtn_Mapper_Numer.nc'
+        denominatorPath = input_forcings.paramDir + "/PRISM_Precip_Clim_" + \
+                          ConfigOptions.current_output_date.strftime('%h') + '_NWM_Mtn_Mapper_Denom.nc'
+
+        # Make sure files exist.
+        if not os.path.isfile(numeratorPath):
+            ConfigOptions.errMsg = "Expected parameter file: " + numeratorPath + \
+                                   " for mountain mapper downscaling of precipitation not found."
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+        elif not os.path.isfile(denominatorPath):
+            ConfigOptions.errMsg = "Expected parameter file: " + denominatorPath + \
+                                   " for mountain mapper downscaling of precipitation not found."
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
 
+        if ConfigOptions.shared_static_grids:
+            # Each node reads its part of the PRISM grids into shared memory.
+            input_forcings.nwmPRISM_numGrid = MpiConfig.shared_grid(
+                GeoMetaWrfHydro, (numeratorPath, 'Data'),
+                lambda y_slice, x_slice: read_mtn_mapper_param(numeratorPath, ConfigOptions, GeoMetaWrfHydro,
+                                                               MpiConfig, y_slice, x_slice),
+                ConfigOptions)
+            input_forcings.nwmPRISM_denGrid = MpiConfig.shared_grid(
+                GeoMetaWrfHydro, (denominatorPath, 'Data'),
+                lambda y_slice, x_slice: read_mtn_mapper_param(denominatorPath, ConfigOptions, GeoMetaWrfHydro,
+                                                               MpiConfig, y_slice, x_slice),
+                ConfigOptions)
+        else:
             if MpiConfig.rank == 0:
-                # Open the NetCDF parameter files. Check to make sure expected dimension
-                # sizes are in place, along with variable names, etc.
-                try:
-                    idNum = Dataset(numeratorPath,'r')
-                except:
-                    ConfigOptions.errMsg = "Unable to open parameter file: " + numeratorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                try:
-                    idDenom = Dataset(denominatorPath,'r')
-                except:
-                    ConfigOptions.errMsg = "Unable to open parameter file: " + denominatorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                # Check to make sure expected names, dimension sizes are present.
-                if 'x' not in idNum.variables.keys():
-                    ConfigOptions.errMsg = "Expected 'x' variable not found in parameter file: " + numeratorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                if 'x' not in idDenom.variables.keys():
-                    ConfigOptions.errMsg = "Expected 'x' variable not found in parameter file: " + denominatorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                if 'y' not in idNum.variables.keys():
-                    ConfigOptions.errMsg = "Expected 'y' variable not found in parameter file: " + numeratorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                if 'y' not in idDenom.variables.keys():
-                    ConfigOptions.errMsg = "Expected 'y' variable not found in parameter file: " + denominatorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                if 'Data' not in idNum.variables.keys():
-                    ConfigOptions.errMsg = "Expected 'Data' variable not found in parameter file: " + numeratorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                if 'Data' not in idDenom.variables.keys():
-                    ConfigOptions.errMsg = "Expected 'Data' variable not found in parameter file: " + denominatorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                if idNum.variables['Data'].shape[0] != GeoMetaWrfHydro.ny_global:
-                    ConfigOptions.errMsg = "Input Y dimension for: " + numeratorPath + \
-                                           " does not match the output WRF-Hydro Y dimension size."
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                if idDenom.variables['Data'].shape[0] != GeoMetaWrfHydro.ny_global:
-                    ConfigOptions.errMsg = "Input Y dimension for: " + denominatorPath + \
-                                           " does not match the output WRF-Hydro Y dimension size."
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                if idNum.variables['Data'].shape[1] != GeoMetaWrfHydro.nx_global:
-                    ConfigOptions.errMsg = "Input X dimension for: " + numeratorPath + \
-                                           " does not match the output WRF-Hydro X dimension size."
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                if idDenom.variables['Data'].shape[1] != GeoMetaWrfHydro.nx_global:
-                    ConfigOptions.errMsg = "Input X dimension for: " + denominatorPath + \
-                                           " does not match the output WRF-Hydro X dimension size."
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                # Read in the PRISM grid on the output grid. Then scatter the array out to the processors.
-                try:
-                    numDataTmp = idNum.variables['Data'][:,:]
-                except:
-                    ConfigOptions.errMsg = "Unable to extract 'Data' from parameter file: " + numeratorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                try:
-                    denDataTmp = idDenom.variables['Data'][:,:]
-                except:
-                    ConfigOptions.errMsg = "Unable to extract 'Data' from parameter file: " + denominatorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-
-                # Close the parameter files.
-                try:
-                    idNum.close()
-                except:
-                    ConfigOptions.errMsg = "Unable to close parameter file: " + numeratorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
-                try:
-                    idDenom.close()
-                except:
-                    ConfigOptions.errMsg = "Unable to close parameter file: " + denominatorPath
-                    err_handler.log_critical(ConfigOptions, MpiConfig)
-                    break
+                # Read in the PRISM grids on the output grid. Then scatter the arrays out to the processors.
+                numDataTmp = read_mtn_mapper_param(numeratorPath, ConfigOptions, GeoMetaWrfHydro, MpiConfig)
+                denDataTmp = read_mtn_mapper_param(denominatorPath, ConfigOptions, GeoMetaWrfHydro, MpiConfig)
             else:
                 numDataTmp = None
                 denDataTmp = None
+            err_handler.check_program_status(ConfigOptions, MpiConfig)
 
-            break
-        err_handler.check_program_status(ConfigOptions, MpiConfig)
-
-        # Scatter the array out to the local processors
-        input_forcings.nwmPRISM_numGrid = MpiConfig.scatter_array(GeoMetaWrfHydro, numDataTmp, ConfigOptions)
-        err_handler.check_program_status(ConfigOptions, MpiConfig)
-        input_forcings.nwmPRISM_denGrid = MpiConfig.scatter_array(GeoMetaWrfHydro, denDataTmp, ConfigOptions)
+            # Scatter the array out to the local processors
+            input_forcings.nwmPRISM_numGrid = MpiConfig.scatter_array(GeoMetaWrfHydro, numDataTmp, ConfigOptions)
+            err_handler.check_program_status(ConfigOptions, MpiConfig)
+            input_forcings.nwmPRISM_denGrid = MpiConfig.scatter_array(GeoMetaWrfHydro, denDataTmp, ConfigOptions)
         err_handler.check_program_status(ConfigOptions, MpiConfig)
 
     # Create temporary grids from the local slabs of params/precip forcings.
@@ -654,12 +608,79 @@ def nwm_monthly_PRISM_downscale(input_forcings,ConfigOptions,GeoMetaWrfHydro,Mpi
     input_forcings.final_forcings[3, :, :] = ratioRainGrid
 
     # Reset variables for memory efficiency
-    idDenom = None
-    idNum = None
     localRainRate = None
     numLocal = None
     denLocal = None
 
+def read_mtn_mapper_param(paramPath, ConfigOptions, GeoMetaWrfHydro, MpiConfig,
+                          y_slice=slice(None), x_slice=slice(None)):
+    """
+    Function to read in and check a PRISM (mountain mapper) parameter grid on the
+    output WRF-Hydro grid, or the part of it given by the y/x slices.
+    :param paramPath:
+    :param ConfigOptions:
+    :param GeoMetaWrfHydro:
+    :param MpiConfig:
+    :param y_slice:
+    :param x_slice:
+    :return: Parameter grid, or None if an error was logged
+    """
+    # Open the NetCDF parameter file. Check to make sure expected dimension
+    # sizes are in place, along with variable names, etc.
+    try:
+        idParam = Dataset(paramPath,'r')
+    except:
+        ConfigOptions.errMsg = "Unable to open parameter file: " + paramPath
+        err_handler.log_critical(ConfigOptions, MpiConfig)
+        return None
+
+    dataTmp = None
+    while (True):
+        # Check to make sure expected names, dimension sizes are present.
+        if 'x' not in idParam.variables.keys():
+            ConfigOptions.errMsg = "Expected 'x' variable not found in parameter file: " + paramPath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+        if 'y' not in idParam.variables.keys():
+            ConfigOptions.errMsg = "Expected 'y' variable not found in parameter file: " + paramPath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+        if 'Data' not in idParam.variables.keys():
+            ConfigOptions.errMsg = "Expected 'Data' variable not found in parameter file: " + paramPath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+
+        if idParam.variables['Data'].shape[0] != GeoMetaWrfHydro.ny_global:
+            ConfigOptions.errMsg = "Input Y dimension for: " + paramPath + \
+                                   " does not match the output WRF-Hydro Y dimension size."
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+        if idParam.variables['Data'].shape[1] != GeoMetaWrfHydro.nx_global:
+            ConfigOptions.errMsg = "Input X dimension for: " + paramPath + \
+                                   " does not match the output WRF-Hydro X dimension size."
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+
+        try:
+            dataTmp = idParam.variables['Data'][y_slice,x_slice]
+        except:
+            ConfigOptions.errMsg = "Unable to extract 'Data' from parameter file: " + paramPath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            break
+        break
+
+    # Close the parameter file.
+    try:
+        idParam.close()
+    except:
+        ConfigOptions.errMsg = "Unable to close parameter file: " + paramPath
+        err_handler.log_critical(ConfigOptions, MpiConfig)
+
+    if ConfigOptions.errFlag:
+        return None
+    return dataTmp
+
+
 def ncar_topo_adj(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
     """
     Topographic adjustment of incoming shortwave radiation fluxes,
@@ -675,7 +696,7 @@ def ncar_topo_adj(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
 
     # Establish where we have missing values.
     try:
-        indNdv = np.where(input_forcings.final_forcings == ConfigOptions.globalNdv)
+        indNdv = input_forcings.final_forcings == ConfigOptions.globalNdv
     except:
         ConfigOptions.errMsg = "Unable to perform NDV search on input forcings"
         err_handler.log_critical(ConfigOptions, MpiConfig)
@@ -710,7 +731,7 @@ def ncar_topo_adj(input_forcings,ConfigOptions,GeoMetaWrfHydro,MpiConfig):
         return
 
     # Assign missing values based on our mask.
-    input_forcings.final_forcings[indNdv] = ConfigOptions.globalNdv
+    np.putmask(input_forcings.final_forcings, indNdv, ConfigOptions.globalNdv)
 
     # Reset variables to free up memory
     DECLIN = None
@@ -780,9 +801,10 @@ def calc_coszen(ConfigOptions,declin,GeoMetaWrfHydro):
            (0.014615 * math.cos(2 * da)) - (0.04089 * math.sin(2 * da))) * 229.18
     xtime = dCurrent.hour * 60.0  # Minutes of day
     xt24 = int(xtime) % 1440 + eot
-    tloctm = GeoMetaWrfHydro.longitude_grid/15.0 + gmt + xt24/60.0
+    # Accumulate in double precision, whatever the precision of the grids.
+    tloctm = np.asarray(GeoMetaWrfHydro.longitude_grid, dtype=np.float64)/15.0 + gmt + xt24/60.0
     hrang = ((tloctm - 12.0) * degrad) * 15.0
-    xxlat = GeoMetaWrfHydro.latitude_grid * degrad
+    xxlat = np.asarray(GeoMetaWrfHydro.latitude_grid, dtype=np.float64) * degrad
     coszen = np.sin(xxlat) * math.sin(declin) + np.cos(xxlat) * math.cos(declin) * np.cos(hrang)
 
     # Reset temporary variables to free up memory.
@@ -41,37 +41,31 @@ def err_out_screen_para(err_msg,MpiConfig):
 
 def check_program_status(ConfigOptions, MpiConfig):
     """
-    Generic function to check the err statuses for each processor in the program.
-    If any flags come back, gracefully exit the program.
+    Generic function to check the err status of this processor in the program.
+    Errors are recorded locally by the logging routines below; no communication
+    takes place here. If the local flag is set, the traceback of the failing
+    processor is printed and the whole program is aborted from this processor.
     :param ConfigOptions:
     :param MpiConfig:
     :return:
     """
-    # Sync up processors to ensure everyone is on the same page.
-    #MpiConfig.comm.barrier()
-
-    # Collect values from each processor.
-    # data = MpiConfig.comm.gather(ConfigOptions.errFlag, root=0)
-    # if MpiConfig.rank == 0:
-    #     for i in range(MpiConfig.size):
-    #         if data[i] != 0:
-    #             MpiConfig.comm.Abort()
-    #             sys.exit(1)
-    # else:
-    #     assert data is None
-
-    # Reduce version:
-    any_error = MpiConfig.comm.reduce(ConfigOptions.errFlag)
-    if MpiConfig.rank == 0:
-        if ConfigOptions.errFlag:
-            # print("any_error: ", any_error, type(any_error), flush=True)
-            stack = traceback.format_stack()[:-1]
-            [print(frame, flush=True, end='') for frame in stack]
-            MpiConfig.comm.Abort()
-            sys.exit(1)
-
-    # Sync up processors.
-    # MpiConfig.comm.barrier()
+    if not ConfigOptions.errFlag:
+        return
+
+    print('ERROR: RANK - ' + str(MpiConfig.rank) + ' : ' + str(ConfigOptions.errMsg), flush=True)
+    stack = ConfigOptions.errTraceback
+    if stack is None:
+        stack = traceback.format_stack()[:-1]
+    [print(frame, flush=True, end='') for frame in stack]
+
+    # Make sure the critical message reaches the log file before aborting.
+    if ConfigOptions.logHandle is not None:
+        try:
+            ConfigOptions.logHandle.flush()
+        except:
+            pass
+    MpiConfig.comm.Abort()
+    sys.exit(1)
 
 def init_log(ConfigOptions,MpiConfig):
     """
@@ -139,6 +133,18 @@ def err_out(ConfigOptions):
     MPI.Finalize()
     sys.exit(1)
 
+def format_error_traceback():
+    """
+    Function to capture the traceback at the point an error is recorded, so the
+    failing processor can report it when the program is aborted later on.
+    Includes the exception currently being handled, if any.
+    :return:
+    """
+    stack = traceback.format_stack()[:-2]
+    if sys.exc_info()[0] is not None:
+        stack += traceback.format_exc().splitlines(keepends=True)
+    return stack
+
 def log_error(ConfigOptions,MpiConfig):
     """
     Function to log an error message to the log file.
@@ -162,6 +168,7 @@ def log_error(ConfigOptions,MpiConfig):
         err_out_screen_para(('Unable to write ERROR message on RANK: ' + str(MpiConfig.rank) +
                              ' for log file: ' + ConfigOptions.logFile),MpiConfig)
     ConfigOptions.errFlag = 1
+    ConfigOptions.errTraceback = format_error_traceback()
 
 def log_critical(ConfigOptions,MpiConfig):
     """
@@ -186,6 +193,7 @@ def log_critical(ConfigOptions,MpiConfig):
         err_out_screen_para(('Unable to write CRITICAL message on RANK: ' + str(MpiConfig.rank) +
                              ' for log file: ' + ConfigOptions.logFile),MpiConfig)
     ConfigOptions.errFlag = 1
+    ConfigOptions.errTraceback = format_error_traceback()
 
 def log_warning(ConfigOptions,MpiConfig):
     """
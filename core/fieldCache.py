@@ -0,0 +1,67 @@
+"""
+Persistent cache of regridded input forcing fields, shared between runs using
+the same cache directory. The regridded WRF-Hydro grids of an input file are
+stored as a float32 [nvar, ny, nx] .npy stack (memory-mapped when read back),
+keyed by a hash of the input file path, modification time and size, the
+product, its variables and forecast times, the regridding options and the
+destination domain. Files already processed by an earlier step or cycle (e.g.
+overlapping AnA lookback windows) are then read back instead of being
+decoded and regridded again. Uses the index, locking and least-recently-used
+eviction of the ESMF weight store. All methods are meant to be called on the
+master processor only.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+from core.weightStore import WeightStore
+
+
+class FieldCache(WeightStore):
+    """
+    Store of regridded input forcing stacks within a cache directory.
+    """
+    DESCRIPTION = "Regridded field cache"
+    FILE_PREFIX = "regridded"
+    FILE_SUFFIX = ".npy"
+    INDEX_FILE = "regridded_index.json"
+    LOCK_FILE = "regridded_index.lock"
+
+    def field_key(self, input_files, geogrid, product_options):
+        """
+        Compute the key of the regridded fields of an input file.
+        :param input_files: Input file(s) the fields are read from
+        :param geogrid: Destination WRF-Hydro geogrid file
+        :param product_options: Product, variables, forecast times and regridding options
+        :return:
+        """
+        hasher = hashlib.sha256()
+        for input_file in input_files:
+            file_stat = os.stat(input_file)
+            hasher.update("{}\0{}\0{}\0".format(os.path.realpath(input_file), file_stat.st_mtime_ns,
+                                                file_stat.st_size).encode())
+        hasher.update(self.destination_hash(geogrid).encode())
+        for item in product_options:
+            hasher.update(b'\0' + str(item).encode())
+        return hasher.hexdigest()
+
+    @staticmethod
+    def read(cache_file):
+        """
+        Memory-map a cached stack of regridded fields.
+        :param cache_file:
+        :return:
+        """
+        return np.load(cache_file, mmap_mode='r', allow_pickle=False)
+
+    @staticmethod
+    def write(tmp_file, field_stack):
+        """
+        Write a stack of regridded fields to a new cache file.
+        :param tmp_file: Path from new_file()
+        :param field_stack:
+        :return:
+        """
+        with open(tmp_file, 'wb') as cache_out:
+            np.save(cache_out, np.ascontiguousarray(field_stack, dtype=np.float32), allow_pickle=False)
@@ -10,6 +10,11 @@ from core import time_handling
 from core import regrid
 from core import timeInterpMod
 
+# Input forcing products (RAP, HRRR and NAM nest) whose regridded fields can be
+# stored in the regridded field cache. GFS is left out, as its instantaneous
+# precipitation rate is derived from the global rates of the previous file.
+CACHED_PRODUCTS = (1, 5, 6, 13, 14, 15, 16, 17, 19, 23)
+
 
 class input_forcings:
     """
@@ -43,6 +48,8 @@ class input_forcings:
         self.x_upper_bound = None
         self.y_lower_bound = None
         self.y_upper_bound = None
+        self.src_shape = None
+        self.src_window = None
         self.cycleFreq = None
         self.outFreq = None
         self.regridOpt = None
@@ -68,8 +75,13 @@ class input_forcings:
         self.esmf_grid_in = None
         self.regridComplete = False
         self.regridObj = None
+        self.regrid_engine = 0
+        self.sparse_regrid = None
+        self.field_cache_key = None
         self.esmf_field_in = None
         self.esmf_field_out = None
+        self.esmf_stack_in = None
+        self.esmf_stack_out = None
         # --------------------------------
         # Only used for CFSv2 bias correction
         # as bias correction needs to take
@@ -82,6 +94,7 @@ class input_forcings:
         self.globalPcpRate1 = None
         self.globalPcpRate2 = None
         self.regridded_mask = None
+        self.mask_plan = None
         self.final_forcings = None
         self.ndv = None
         self.file_in1 = None
@@ -104,6 +117,7 @@ class input_forcings:
         self.regridded_precip1 = None
         self.regridded_precip2 = None
         self.border = None
+        self.distributed_read = False
         self.skip = False
         self.forecast_horizons = None
 
@@ -526,8 +540,17 @@ class input_forcings:
             22: regrid.regrid_ndfd,
             23: regrid.regrid_conus_hrrr
         }
+        # Fields of RAP, HRRR and NAM files regridded before are read back from the
+        # regridded field cache, unless RAP also needs to hand a dynamic lapse rate to HRRR.
+        use_cache = self.keyValue in CACHED_PRODUCTS and self.t2dDownscaleOpt != 3
+        if use_cache and regrid.load_cached_fields(self, ConfigOptions, wrfHyroGeoMeta, MpiConfig):
+            return
+
         regrid_inputs[self.keyValue](self,ConfigOptions,wrfHyroGeoMeta,MpiConfig)
 
+        if use_cache:
+            regrid.store_cached_fields(self, ConfigOptions, wrfHyroGeoMeta, MpiConfig)
+
     def temporal_interpolate_inputs(self,ConfigOptions,MpiConfig):
         """
         Polymorphic function that will run temporal interpolation of
@@ -565,6 +588,7 @@ def initDict(ConfigOptions,GeoMetaWrfHydro):
         InputDict[force_key] = input_forcings()
         InputDict[force_key].keyValue = force_key
         InputDict[force_key].regridOpt = ConfigOptions.regrid_opt[force_tmp]
+        InputDict[force_key].regrid_engine = ConfigOptions.regrid_engine[force_tmp]
         InputDict[force_key].enforce = ConfigOptions.input_force_mandatory[force_tmp]
         InputDict[force_key].timeInterpOpt = ConfigOptions.forceTemoralInterp[force_tmp]
 
@@ -599,6 +623,7 @@ def initDict(ConfigOptions,GeoMetaWrfHydro):
         InputDict[force_key].userCycleOffset = ConfigOptions.fcst_input_offsets[force_tmp]
 
         InputDict[force_key].border = ConfigOptions.ignored_border_widths[force_tmp]
+        InputDict[force_key].distributed_read = bool(ConfigOptions.input_force_distributed_read[force_tmp])
 
         # If we have specified specific humidity downscaling, establish arrays to hold
         # temporary temperature arrays that are un-downscaled.
@@ -621,7 +646,7 @@ def initDict(ConfigOptions,GeoMetaWrfHydro):
 
         InputDict[force_key].final_forcings = np.empty([force_count,GeoMetaWrfHydro.ny_local,
                                                         GeoMetaWrfHydro.nx_local],
-                                                       np.float64)
+                                                       ConfigOptions.working_dtype)
         InputDict[force_key].height = np.empty([GeoMetaWrfHydro.ny_local,
                                                 GeoMetaWrfHydro.nx_local],np.float32)
         InputDict[force_key].regridded_mask = np.empty([GeoMetaWrfHydro.ny_local,
@@ -1,11 +1,17 @@
+import copy
 import datetime
+import logging
 import os
+import threading
+import time
 
 from core import bias_correction
 from core import downscale
 from core import err_handler
 from core import layeringMod
 from core import disaggregateMod
+from core import ioMod
+from core import prefetch
 
 
 def process_forecasts(ConfigOptions, wrfHydroGeoMeta, inputForcingMod, suppPcpMod, MpiConfig, OutputObj):
@@ -36,6 +42,9 @@ def process_forecasts(ConfigOptions, wrfHydroGeoMeta, inputForcingMod, suppPcpMo
 
     disaggregate_fun = disaggregateMod.disaggregate_factory(ConfigOptions)
 
+    if ConfigOptions.prefetch_files > 0 and MpiConfig.rank == 0 and ConfigOptions.prefetcher is None:
+        ConfigOptions.prefetcher = prefetch.Prefetcher(ConfigOptions.prefetch_files)
+
     for fcstCycleNum in range(ConfigOptions.nFcsts):
         ConfigOptions.current_fcst_cycle = ConfigOptions.b_date_proc + datetime.timedelta(
             seconds=ConfigOptions.fcst_freq * 60 * fcstCycleNum)
@@ -69,6 +78,14 @@ def process_forecasts(ConfigOptions, wrfHydroGeoMeta, inputForcingMod, suppPcpMo
             # move on.
             continue
 
+        if ConfigOptions.claim_cycles:
+            if not claim_forecast_cycle(ConfigOptions, MpiConfig, fcstCycleOutDir):
+                ConfigOptions.statusMsg = "Forecast Cycle: " + \
+                                          ConfigOptions.current_fcst_cycle.strftime('%Y-%m-%d %H:%M') + \
+                                          " has been claimed by another instance."
+                err_handler.log_msg(ConfigOptions, MpiConfig)
+                continue
+
         if (not ConfigOptions.ana_flag) or (ConfigOptions.logFile is None):
             if MpiConfig.rank == 0:
                 # If the cycle directory doesn't exist, create it.
@@ -189,12 +206,18 @@ def process_forecasts(ConfigOptions, wrfHydroGeoMeta, inputForcingMod, suppPcpMo
                 else:
                     ConfigOptions.currentForceNum = 0
                     ConfigOptions.currentCustomForceNum = 0
+                    # When prefetching, calculate the neighboring files of all products first, so they
+                    # can be staged in the background while the products before them are processed.
+                    if ConfigOptions.prefetch_files > 0:
+                        prefetch_input_files(ConfigOptions, inputForcingMod, suppPcpMod, OutputObj, MpiConfig)
+
                     # Loop over each of the input forcings specifed.
                     for forceKey in ConfigOptions.input_forcings:
                         input_forcings = inputForcingMod[forceKey]
                         # Calculate the previous and next input cycle files from the inputs.
-                        input_forcings.calc_neighbor_files(ConfigOptions, OutputObj.outDate, MpiConfig)
-                        err_handler.check_program_status(ConfigOptions, MpiConfig)
+                        if ConfigOptions.prefetch_files == 0:
+                            input_forcings.calc_neighbor_files(ConfigOptions, OutputObj.outDate, MpiConfig)
+                            err_handler.check_program_status(ConfigOptions, MpiConfig)
 
                         # break loop if done early
                         if input_forcings.skip is True:
@@ -257,8 +280,10 @@ def process_forecasts(ConfigOptions, wrfHydroGeoMeta, inputForcingMod, suppPcpMo
                         for suppPcpKey in ConfigOptions.supp_precip_forcings:
                             if suppPcpKey != 13:
                             # Like with input forcings, calculate the neighboring files to use.
-                                suppPcpMod[suppPcpKey].calc_neighbor_files(ConfigOptions, OutputObj.outDate, MpiConfig)
-                                err_handler.check_program_status(ConfigOptions, MpiConfig)
+                                if ConfigOptions.prefetch_files == 0:
+                                    suppPcpMod[suppPcpKey].calc_neighbor_files(ConfigOptions, OutputObj.outDate,
+                                                                               MpiConfig)
+                                    err_handler.check_program_status(ConfigOptions, MpiConfig)
 
                                 # Regrid the supplemental precipitation.
                                 suppPcpMod[suppPcpKey].regrid_inputs(ConfigOptions, wrfHydroGeoMeta, MpiConfig)
@@ -289,9 +314,14 @@ def process_forecasts(ConfigOptions, wrfHydroGeoMeta, inputForcingMod, suppPcpMo
                     if ConfigOptions.ana_flag:
                         OutputObj.outDate = file_date
 
+                    err_handler.check_program_status(ConfigOptions, MpiConfig)
                     OutputObj.output_final_ldasin(ConfigOptions, wrfHydroGeoMeta, MpiConfig)
                     err_handler.check_program_status(ConfigOptions, MpiConfig)
 
+                    # Drop any staged input files that were not used in this step.
+                    if ConfigOptions.prefetcher is not None:
+                        ConfigOptions.prefetcher.discard()
+
         if ConfigOptions.customSuppPcpFreq != None:
             for outStep in range(1, ConfigOptions.num_supp_output_steps + 1):
                 # Reset out final grids to missing values.
@@ -363,10 +393,14 @@ def process_forecasts(ConfigOptions, wrfHydroGeoMeta, inputForcingMod, suppPcpMo
                                     err_handler.check_program_status(ConfigOptions, MpiConfig)
                         if ConfigOptions.ana_flag:
                             OutputObj.outDate = file_date
+                        err_handler.check_program_status(ConfigOptions, MpiConfig)
                         OutputObj.output_final_custom_supp_precip(ConfigOptions, wrfHydroGeoMeta, MpiConfig)
                         err_handler.check_program_status(ConfigOptions, MpiConfig)
   
         if (not ConfigOptions.ana_flag) or (fcstCycleNum == (ConfigOptions.nFcsts - 1)):
+            # Make sure all output files have been written before flagging the cycle as complete.
+            OutputObj.flush_output(ConfigOptions, MpiConfig)
+
             if MpiConfig.rank == 0:
                 ConfigOptions.statusMsg = "Forcings complete for forecast cycle: " + \
                                           ConfigOptions.current_fcst_cycle.strftime('%Y-%m-%d %H:%M')
@@ -388,3 +422,192 @@ def process_forecasts(ConfigOptions, wrfHydroGeoMeta, inputForcingMod, suppPcpMo
                 ConfigOptions.errMsg = "Unable to create completion file: " + completeFlag
                 err_handler.log_critical(ConfigOptions, MpiConfig)
             err_handler.check_program_status(ConfigOptions, MpiConfig)
+            release_claim_heartbeat(ConfigOptions)
+
+
+def prefetch_input_files(ConfigOptions, inputForcingMod, suppPcpMod, OutputObj, MpiConfig):
+    """
+    Function to calculate the previous and next input files of all input forcing
+    and supplemental precipitation products for the current output step, and have
+    the master processor stage them in the background. The GRIB2 files the products
+    will need in the next output step are decoded ahead in the background as well,
+    while the current step is processed.
+    :param ConfigOptions:
+    :param inputForcingMod:
+    :param suppPcpMod:
+    :param OutputObj:
+    :param MpiConfig:
+    :return:
+    """
+    next_date = None
+    if ConfigOptions.current_output_step < ConfigOptions.num_output_steps:
+        next_date = OutputObj.outDate + datetime.timedelta(seconds=ConfigOptions.output_freq * 60)
+
+    for forceKey in ConfigOptions.input_forcings:
+        input_forcings = inputForcingMod[forceKey]
+        previous_file = input_forcings.file_in2
+        input_forcings.calc_neighbor_files(ConfigOptions, OutputObj.outDate, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+        # Products after one that is done early are not processed.
+        if input_forcings.skip is True:
+            break
+        if MpiConfig.rank == 0:
+            ConfigOptions.prefetcher.prefetch(input_forcings.file_in2)
+            decode_next_input(ConfigOptions, input_forcings, previous_file, next_date, MpiConfig)
+
+    if ConfigOptions.number_supp_pcp > 0:
+        for suppPcpKey in ConfigOptions.supp_precip_forcings:
+            if suppPcpKey == 13:
+                continue
+            supplemental_precip = suppPcpMod[suppPcpKey]
+            previous_file = supplemental_precip.file_in2
+            supplemental_precip.calc_neighbor_files(ConfigOptions, OutputObj.outDate, MpiConfig)
+            err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+            if MpiConfig.rank == 0:
+                ConfigOptions.prefetcher.prefetch(supplemental_precip.file_in2)
+                if supplemental_precip.rqiMethod == 1:
+                    ConfigOptions.prefetcher.prefetch(supplemental_precip.rqi_file_in2)
+                decode_next_input(ConfigOptions, supplemental_precip, previous_file, next_date, MpiConfig)
+
+
+def decode_next_input(ConfigOptions, forcing, previous_file, next_date, MpiConfig):
+    """
+    Function to have the prefetcher decode the input file of a product for the
+    next output step, if it differs from the file of the current step. The file
+    is found by calculating the neighboring files of a shallow copy of the
+    product for the next output date, as for the first output step, so none of
+    the regridded grids of the product are touched. Only the master processor
+    calls this, and the lookahead is not logged.
+    :param ConfigOptions:
+    :param forcing: Input forcing or supplemental precipitation object
+    :param previous_file: Input file of the product in the previous output step
+    :param next_date: Date of the next output step, None on the last step
+    :param MpiConfig:
+    :return:
+    """
+    if next_date is None or previous_file is None:
+        return
+
+    ahead_options = copy.copy(ConfigOptions)
+    ahead_options.current_output_step = 1
+    ahead = copy.copy(forcing)
+    ahead.enforce = 0
+    for grid in ('regridded_forcings1', 'regridded_forcings2', 'regridded_precip1', 'regridded_precip2',
+                 'globalPcpRate1', 'globalPcpRate2'):
+        if hasattr(ahead, grid):
+            setattr(ahead, grid, None)
+
+    log_obj = logging.getLogger('logForcing')
+    log_obj.disabled = True
+    try:
+        ahead.calc_neighbor_files(ahead_options, next_date, MpiConfig)
+    finally:
+        log_obj.disabled = False
+
+    if getattr(ahead, 'skip', False) is not True and ahead.file_in2 != forcing.file_in2:
+        ioMod.prefetch_grib2(previous_file, ahead.file_in2, ConfigOptions)
+
+
+def claim_forecast_cycle(ConfigOptions, MpiConfig, fcstCycleOutDir):
+    """
+    Function to claim a forecast cycle for this instance of the forcing engine,
+    so several instances with the same configuration can share the cycles of a
+    processing window. The master processor atomically creates a claim file in
+    the cycle output directory. A claim older than ClaimTimeout minutes of a cycle
+    that has not completed is considered abandoned and is taken over. The claim is
+    refreshed in the background until the cycle has completed.
+    :param ConfigOptions:
+    :param MpiConfig:
+    :param fcstCycleOutDir:
+    :return: True if this instance is to process the cycle
+    """
+    claimed = 0
+    if MpiConfig.rank == 0:
+        claimFlag = fcstCycleOutDir + "/WrfHydroForcing.CLAIM"
+        try:
+            os.makedirs(fcstCycleOutDir, exist_ok=True)
+        except OSError:
+            ConfigOptions.errMsg = "Unable to create output directory: " + fcstCycleOutDir
+            err_handler.err_out_screen_para(ConfigOptions.errMsg, MpiConfig)
+
+        # Take over an abandoned claim. Only one instance can succeed in moving it away.
+        claimTimeout = datetime.timedelta(minutes=ConfigOptions.claim_timeout)
+        staleFlag = claimFlag + "." + str(os.getpid())
+        try:
+            if claim_age(claimFlag) > claimTimeout:
+                os.rename(claimFlag, staleFlag)
+                if claim_age(staleFlag) <= claimTimeout:
+                    # Another instance took over the claim in the meantime, put it back.
+                    os.link(staleFlag, claimFlag)
+                os.remove(staleFlag)
+        except (FileNotFoundError, FileExistsError):
+            # There is no claim, or another instance moved or re-created it first.
+            pass
+        except OSError as err:
+            ConfigOptions.statusMsg = "Unable to take over the abandoned claim: " + claimFlag + \
+                                      " (" + str(err) + ")"
+            err_handler.log_warning(ConfigOptions, MpiConfig)
+
+        try:
+            fd = os.open(claimFlag, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, (ConfigOptions.d_program_init.strftime('%Y-%m-%d %H:%M:%S') + " " +
+                          str(os.getpid()) + "\n").encode())
+            os.close(fd)
+            claimed = 1
+            ConfigOptions.claim_heartbeat = claim_heartbeat(claimFlag, claimTimeout)
+        except FileExistsError:
+            claimed = 0
+        except OSError:
+            ConfigOptions.errMsg = "Unable to create claim file: " + claimFlag
+            err_handler.err_out_screen_para(ConfigOptions.errMsg, MpiConfig)
+
+    claimed = MpiConfig.broadcast_parameter(claimed, ConfigOptions, param_type=int)
+    err_handler.check_program_status(ConfigOptions, MpiConfig)
+    return claimed == 1
+
+
+def claim_heartbeat(claimFlag, claimTimeout):
+    """
+    Function to start a background thread on the master processor that touches
+    the claim file of the cycle being processed, so the claim is not taken over
+    by another instance while the cycle takes longer than ClaimTimeout to process.
+    :param claimFlag:
+    :param claimTimeout:
+    :return: Event to set once the cycle has been processed
+    """
+    stop = threading.Event()
+    interval = claimTimeout.total_seconds() / 4.0
+
+    def touch_claim():
+        while not stop.wait(interval):
+            try:
+                os.utime(claimFlag)
+            except OSError as err:
+                logging.getLogger('logForcing').warning("Unable to refresh claim file: " + claimFlag +
+                                                        " (" + str(err) + ")")
+                return
+
+    threading.Thread(target=touch_claim, daemon=True).start()
+    return stop
+
+
+def release_claim_heartbeat(ConfigOptions):
+    """
+    Function to stop refreshing the claim of the cycle that has been processed.
+    :param ConfigOptions:
+    :return:
+    """
+    if ConfigOptions.claim_heartbeat is not None:
+        ConfigOptions.claim_heartbeat.set()
+        ConfigOptions.claim_heartbeat = None
+
+
+def claim_age(claimFlag):
+    """
+    Function to return the time passed since a claim file was created.
+    :param claimFlag:
+    :return:
+    """
+    return datetime.timedelta(seconds=time.time() - os.path.getmtime(claimFlag))
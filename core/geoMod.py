@@ -3,6 +3,8 @@ import math
 from netCDF4 import Dataset
 import numpy as np
 
+from core import err_handler
+
 try:
     import ESMF
 except ImportError:
@@ -135,6 +137,18 @@ class GeoMetaWrfHydro:
         # Obtain the local boundaries for this processor.
         self.get_processor_bounds()
 
+        if ConfigOptions.shared_static_grids:
+            # Read the static grids into node-level shared memory instead of
+            # scattering them from the master processor.
+            if MpiConfig.rank == 0:
+                try:
+                    idTmp.close()
+                except:
+                    ConfigOptions.errMsg = "Unable to close geogrid file: " + ConfigOptions.geogrid
+                    raise Exception
+            self.initialize_shared_grids(ConfigOptions, MpiConfig)
+            return
+
         # Scatter global XLAT_M grid to processors..
         if MpiConfig.rank == 0:
             varTmp = idTmp.variables['XLAT_M'][0,:,:]
@@ -258,6 +272,84 @@ class GeoMetaWrfHydro:
         slp_azi_tmp = None
         varTmp = None
 
+    def initialize_shared_grids(self, ConfigOptions, MpiConfig):
+        """
+        Function to place the static geogrid fields (lat/lon, COSALPHA/SINALPHA,
+        elevation and the derived slope grids) into node-level shared memory.
+        The first processor on each node reads the part of the geogrid fields
+        covering the node, and the local grids of each processor reference
+        their slab of it.
+        :param ConfigOptions:
+        :param MpiConfig:
+        :return:
+        """
+        idTmp = None
+        if MpiConfig.get_node_comm().Get_rank() == 0:
+            try:
+                idTmp = Dataset(ConfigOptions.geogrid, 'r')
+            except:
+                ConfigOptions.errMsg = "Unable to open the WRF-Hydro geogrid file: " + ConfigOptions.geogrid
+                err_handler.log_critical(ConfigOptions, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+        def geogrid_reader(var_name):
+            def read_window(y_slice, x_slice):
+                try:
+                    return idTmp.variables[var_name][0, y_slice, x_slice]
+                except:
+                    ConfigOptions.errMsg = "Unable to extract " + var_name + " from geogrid file: " + \
+                                           ConfigOptions.geogrid
+                    err_handler.log_critical(ConfigOptions, MpiConfig)
+                    return None
+            return read_window
+
+        self.latitude_grid = MpiConfig.shared_grid(self, (ConfigOptions.geogrid, 'XLAT_M'),
+                                                   geogrid_reader('XLAT_M'), ConfigOptions)
+        self.longitude_grid = MpiConfig.shared_grid(self, (ConfigOptions.geogrid, 'XLONG_M'),
+                                                    geogrid_reader('XLONG_M'), ConfigOptions)
+        self.cosa_grid = MpiConfig.shared_grid(self, (ConfigOptions.geogrid, 'COSALPHA'),
+                                               geogrid_reader('COSALPHA'), ConfigOptions)
+        self.sina_grid = MpiConfig.shared_grid(self, (ConfigOptions.geogrid, 'SINALPHA'),
+                                               geogrid_reader('SINALPHA'), ConfigOptions)
+        self.height = MpiConfig.shared_grid(self, (ConfigOptions.geogrid, 'HGT_M'),
+                                            geogrid_reader('HGT_M'), ConfigOptions)
+
+        # The slope grids are calculated once per node on the node's part of the domain.
+        slope_grids = []
+
+        def slope_reader(grid_index):
+            def read_window(y_slice, x_slice):
+                if not slope_grids:
+                    try:
+                        slope_grids.extend(self.calc_slope(idTmp, ConfigOptions, y_slice, x_slice))
+                    except Exception:
+                        err_handler.log_critical(ConfigOptions, MpiConfig)
+                        return None
+                return slope_grids[grid_index]
+            return read_window
+
+        self.slope = MpiConfig.shared_grid(self, (ConfigOptions.geogrid, 'slope'),
+                                           slope_reader(0), ConfigOptions)
+        self.slp_azi = MpiConfig.shared_grid(self, (ConfigOptions.geogrid, 'slp_azi'),
+                                             slope_reader(1), ConfigOptions)
+        slope_grids = None
+
+        try:
+            self.esmf_lat[:, :] = self.latitude_grid
+            self.esmf_lon[:, :] = self.longitude_grid
+        except:
+            ConfigOptions.errMsg = "Unable to place geogrid lat/lon grids into ESMF object"
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+        if idTmp is not None:
+            try:
+                idTmp.close()
+            except:
+                ConfigOptions.errMsg = "Unable to close geogrid file: " + ConfigOptions.geogrid
+                err_handler.log_critical(ConfigOptions, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
+
     def initialize_geospatial_metadata(self,ConfigOptions,MpiConfig):
         """
         Function that will read in crs/x/y geospatial metadata and coordinates
@@ -373,71 +465,86 @@ class GeoMetaWrfHydro:
 
         #MpiConfig.comm.barrier()
 
-    def calc_slope(self,idTmp,ConfigOptions):
+    def calc_slope(self,idTmp,ConfigOptions,y_slice=None,x_slice=None):
         """
         Function to calculate slope grids needed for incoming shortwave radiation downscaling
-        later during the program.
+        later during the program. By default the slope grids are calculated for the whole
+        domain. If y/x slices are given, they are only calculated for that part of the domain,
+        reading a border of one grid cell around it so the results match the global calculation.
         :param idTmp:
         :param ConfigOptions:
+        :param y_slice:
+        :param x_slice:
         :return:
         """
+        if y_slice is None:
+            y_slice = slice(0, self.ny_global)
+        if x_slice is None:
+            x_slice = slice(0, self.nx_global)
+        y_start = max(y_slice.start - 1, 0)
+        y_stop = min(y_slice.stop + 1, self.ny_global)
+        x_start = max(x_slice.start - 1, 0)
+        x_stop = min(x_slice.stop + 1, self.nx_global)
+        ny = y_stop - y_start
+        nx = x_stop - x_start
+
+        # Ensure cosa/sina are correct dimensions
+        for varName in ['SINALPHA', 'COSALPHA', 'HGT_M']:
+            try:
+                varShape = idTmp.variables[varName].shape
+            except:
+                ConfigOptions.errMsg = "Unable to extract " + varName + " from: " + ConfigOptions.geogrid
+                raise
+            if varShape[1] != self.ny_global or varShape[2] != self.nx_global:
+                ConfigOptions.errMsg = varName + " dimensions mismatch in: " + ConfigOptions.geogrid
+                raise Exception
+
         # First extract the sina,cosa, and elevation variables from the geogrid file.
         try:
-            sinaGrid = idTmp.variables['SINALPHA'][0,:,:]
+            sinaGrid = idTmp.variables['SINALPHA'][0,y_start:y_stop,x_start:x_stop]
         except:
             ConfigOptions.errMsg = "Unable to extract SINALPHA from: " + ConfigOptions.geogrid
             raise
 
         try:
-            cosaGrid = idTmp.variables['COSALPHA'][0,:,:]
+            cosaGrid = idTmp.variables['COSALPHA'][0,y_start:y_stop,x_start:x_stop]
         except:
             ConfigOptions.errMsg = "Unable to extract COSALPHA from: " + ConfigOptions.geogrid
             raise
 
         try:
-            heightDest = idTmp.variables['HGT_M'][0,:,:]
+            heightDest = idTmp.variables['HGT_M'][0,y_start:y_stop,x_start:x_stop]
         except:
             ConfigOptions.errMsg = "Unable to extract HGT_M from: " + ConfigOptions.geogrid
             raise
 
-        # Ensure cosa/sina are correct dimensions
-        if sinaGrid.shape[0] != self.ny_global or sinaGrid.shape[1] != self.nx_global:
-            ConfigOptions.errMsg = "SINALPHA dimensions mismatch in: " + ConfigOptions.geogrid
-            raise Exception
-        if cosaGrid.shape[0] != self.ny_global or cosaGrid.shape[1] != self.nx_global:
-            ConfigOptions.errMsg = "COSALPHA dimensions mismatch in: " + ConfigOptions.geogrid
-            raise Exception
-        if heightDest.shape[0] != self.ny_global or heightDest.shape[1] != self.nx_global:
-            ConfigOptions.errMsg = "HGT_M dimension mismatch in: " + ConfigOptions.geogrid
-            raise Exception
-
         # Establish constants
         rdx = 1.0/self.dx_meters
         rdy = 1.0/self.dy_meters
         msftx = 1.0
         msfty = 1.0
 
-        slopeOut = np.empty([self.ny_global,self.nx_global],np.float32)
-        toposlpx = np.empty([self.ny_global,self.nx_global],np.float32)
-        toposlpy = np.empty([self.ny_global,self.nx_global],np.float32)
-        slp_azi = np.empty([self.ny_global, self.nx_global], np.float32)
-        ipDiff = np.empty([self.ny_global, self.nx_global], np.int32)
-        jpDiff = np.empty([self.ny_global, self.nx_global], np.int32)
-        hx = np.empty([self.ny_global,self.nx_global],np.float32)
-        hy = np.empty([self.ny_global,self.nx_global],np.float32)
+        slopeOut = np.empty([ny,nx],np.float32)
+        toposlpx = np.empty([ny,nx],np.float32)
+        toposlpy = np.empty([ny,nx],np.float32)
+        slp_azi = np.empty([ny, nx], np.float32)
+        ipDiff = np.empty([ny, nx], np.int32)
+        jpDiff = np.empty([ny, nx], np.int32)
+        hx = np.empty([ny,nx],np.float32)
+        hy = np.empty([ny,nx],np.float32)
 
         # Create index arrays that will be used to calculate slope.
-        xTmp = np.arange(self.nx_global)
-        yTmp = np.arange(self.ny_global)
-        xGrid = np.tile(xTmp[:], (self.ny_global, 1))
-        yGrid = np.repeat(yTmp[:, np.newaxis], self.nx_global, axis=1)
+        xTmp = np.arange(nx)
+        yTmp = np.arange(ny)
+        xGrid = np.tile(xTmp[:], (ny, 1))
+        yGrid = np.repeat(yTmp[:, np.newaxis], nx, axis=1)
         indOrig = np.where(heightDest == heightDest)
         indIp1 = ((indOrig[0]), (indOrig[1] + 1))
         indIm1 = ((indOrig[0]), (indOrig[1] - 1))
         indJp1 = ((indOrig[0] + 1), (indOrig[1]))
         indJm1 = ((indOrig[0] - 1), (indOrig[1]))
-        indIp1[1][np.where(indIp1[1] >= self.nx_global)] = self.nx_global - 1
-        indJp1[0][np.where(indJp1[0] >= self.ny_global)] = self.ny_global - 1
+        indIp1[1][np.where(indIp1[1] >= nx)] = nx - 1
+        indJp1[0][np.where(indJp1[0] >= ny)] = ny - 1
         indIm1[1][np.where(indIm1[1] < 0)] = 0
         indJm1[0][np.where(indJm1[0] < 0)] = 0
 
@@ -478,6 +585,10 @@ class GeoMetaWrfHydro:
         hx = None
         hy = None
 
-        return slopeOut,slp_azi
+        # Remove the border read around the requested part of the domain.
+        y_crop = slice(y_slice.start - y_start, y_slice.stop - y_start)
+        x_crop = slice(x_slice.start - x_start, x_slice.stop - x_start)
+
+        return slopeOut[y_crop,x_crop],slp_azi[y_crop,x_crop]
 
 
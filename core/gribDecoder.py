@@ -0,0 +1,215 @@
+"""
+In-process GRIB2 decoding backend. Decodes the messages of one or more GRIB2
+files that match a list of wgrib2-style -match patterns straight into NumPy
+arrays, laid out the way wgrib2 -netcdf writes them (variables named
+<VAR>_<level>, shaped [1, ny, nx], south to north, with latitude/longitude
+grids), so the regridding functions can use the result in place of the
+temporary NetCDF file. Only parameters in the NCEP name table below are
+decoded; products with other parameters keep using wgrib2.
+"""
+import re
+
+import numpy as np
+
+try:
+    import eccodes
+except ImportError:
+    eccodes = None
+
+if eccodes is not None:
+    CodesError = eccodes.CodesInternalError
+else:
+    CodesError = OSError
+
+# wgrib2 (NCEP) names of GRIB2 parameters, by (discipline, category, number).
+WGRIB2_NAMES = {
+    (0, 0, 0): 'TMP',
+    (0, 1, 0): 'SPFH',
+    (0, 1, 1): 'RH',
+    (0, 1, 7): 'PRATE',
+    (0, 1, 8): 'APCP',
+    (0, 1, 39): 'CPOFP',
+    (0, 1, 192): 'CRAIN',
+    (0, 1, 193): 'CFRZR',
+    (0, 1, 194): 'CICEP',
+    (0, 1, 195): 'CSNOW',
+    (0, 2, 0): 'WDIR',
+    (0, 2, 1): 'WIND',
+    (0, 2, 2): 'UGRD',
+    (0, 2, 3): 'VGRD',
+    (0, 3, 0): 'PRES',
+    (0, 3, 5): 'HGT',
+    (0, 4, 7): 'DSWRF',
+    (0, 5, 3): 'DLWRF',
+}
+
+# eccodes step units and wgrib2 names of the GRIB2 time units, by code (table 4.4).
+TIME_UNITS = {
+    0: ('m', 'min'),
+    1: ('h', 'hour'),
+    2: ('D', 'day'),
+}
+
+# Fill value of the decoded grids, as written by wgrib2 -netcdf.
+FILL_VALUE = 9.999e20
+
+
+class GribVariable:
+    """
+    Decoded [1, ny, nx] (or [n] / [ny, nx] for coordinates) grid. Indexing
+    returns a masked copy, like a netCDF4 variable.
+    """
+    def __init__(self, data):
+        self.data = data
+        self.shape = data.shape
+        self.dtype = data.dtype
+
+    def __getitem__(self, key):
+        return np.ma.masked_equal(self.data[key], FILL_VALUE, copy=True)
+
+
+class GribDataset:
+    """
+    Decoded GRIB2 messages, with the parts of the netCDF4 Dataset interface
+    used by the regridding functions.
+    """
+    def __init__(self, variables):
+        self.variables = variables
+
+    def __getitem__(self, var_name):
+        return self.variables[var_name]
+
+    def close(self):
+        self.variables = {}
+
+
+def level_string(gid):
+    """
+    wgrib2 description of the level of a GRIB2 message.
+    :param gid: eccodes message handle
+    :return:
+    """
+    level_type = eccodes.codes_get(gid, 'typeOfFirstFixedSurface', ktype=int)
+    level = eccodes.codes_get(gid, 'level', ktype=int)
+    if level_type == 1:
+        return "surface"
+    if level_type == 100:
+        return "{} mb".format(level)
+    if level_type == 101:
+        return "mean sea level"
+    if level_type == 103:
+        return "{} m above ground".format(level)
+    if level_type == 105:
+        return "{} hybrid level".format(level)
+    return "level type {} {}".format(level_type, level)
+
+
+def time_string(gid):
+    """
+    wgrib2 description of the forecast time of a GRIB2 message, in the time
+    units of the message (e.g. "60 min fcst" for a message in minutes).
+    :param gid: eccodes message handle
+    :return:
+    """
+    unit_code = eccodes.codes_get(gid, 'indicatorOfUnitOfTimeRange', ktype=int)
+    step_units, units = TIME_UNITS.get(unit_code, ('m', 'min'))
+    eccodes.codes_set(gid, 'stepUnits', step_units)
+    start = eccodes.codes_get(gid, 'startStep', ktype=int)
+    end = eccodes.codes_get(gid, 'endStep', ktype=int)
+    step_type = eccodes.codes_get(gid, 'stepType')
+    if step_type == 'accum':
+        return "{}-{} {} acc fcst".format(start, end, units)
+    if step_type == 'avg':
+        return "{}-{} {} ave fcst".format(start, end, units)
+    if end == 0:
+        return "anl"
+    return "{} {} fcst".format(end, units)
+
+
+def message_grids(gid):
+    """
+    Values and lat/lon grids of a GRIB2 message, ordered west to east and
+    south to north like wgrib2 -netcdf output.
+    :param gid: eccodes message handle
+    :return: values [ny, nx], latitude, longitude ([ny] / [nx] for regular grids, else [ny, nx])
+    """
+    nx = eccodes.codes_get(gid, 'Ni')
+    ny = eccodes.codes_get(gid, 'Nj')
+    eccodes.codes_set(gid, 'missingValue', FILL_VALUE)
+    values = eccodes.codes_get_values(gid).reshape(ny, nx)
+    lats = eccodes.codes_get_array(gid, 'latitudes').reshape(ny, nx)
+    lons = eccodes.codes_get_array(gid, 'longitudes').reshape(ny, nx) % 360.0
+    if eccodes.codes_get(gid, 'jScansPositively') == 0:
+        values, lats, lons = values[::-1, :], lats[::-1, :], lons[::-1, :]
+    if eccodes.codes_get(gid, 'iScansNegatively') == 1:
+        values, lats, lons = values[:, ::-1], lats[:, ::-1], lons[:, ::-1]
+    if eccodes.codes_get(gid, 'gridType') in ('regular_ll', 'regular_gg'):
+        lats = lats[:, 0]
+        lons = lons[0, :]
+    return values, np.ascontiguousarray(lats), np.ascontiguousarray(lons)
+
+
+def decode_grib2(grib_files, match_patterns):
+    """
+    Decode the messages of GRIB2 files whose wgrib2-style inventory line matches
+    any of the patterns. Like wgrib2 -netcdf, a later message with the same
+    variable name replaces an earlier one.
+    :param grib_files: List of GRIB2 files
+    :param match_patterns: List of wgrib2 -match regular expressions
+    :return: GribDataset
+    """
+    if eccodes is None:
+        raise OSError("The eccodes GRIB2 decoder is not installed")
+
+    match = re.compile('|'.join('(?:' + pattern + ')' for pattern in match_patterns))
+    variables = {}
+    for grib_file in grib_files:
+        with open(grib_file, 'rb') as grib_in:
+            msg_num = 0
+            while True:
+                gid = eccodes.codes_grib_new_from_file(grib_in)
+                if gid is None:
+                    break
+                msg_num += 1
+                try:
+                    param = (eccodes.codes_get(gid, 'discipline'), eccodes.codes_get(gid, 'parameterCategory'),
+                             eccodes.codes_get(gid, 'parameterNumber'))
+                    var_name = WGRIB2_NAMES.get(param)
+                    if var_name is None:
+                        continue
+                    level = level_string(gid)
+                    inventory = "{}:d={}{:02d}:{}:{}:{}:".format(msg_num, eccodes.codes_get(gid, 'dataDate'),
+                                                                 eccodes.codes_get(gid, 'hour'), var_name,
+                                                                 level, time_string(gid))
+                    if not match.search(inventory):
+                        continue
+                    values, lats, lons = message_grids(gid)
+                    nc_name = var_name + '_' + re.sub('[^0-9A-Za-z_]', '_', level.replace(' ', ''))
+                    variables[nc_name] = GribVariable(values[np.newaxis, :, :])
+                    if 'latitude' not in variables:
+                        variables['latitude'] = GribVariable(lats)
+                        variables['longitude'] = GribVariable(lons)
+                finally:
+                    eccodes.codes_release(gid)
+    return GribDataset(variables)
+
+
+def decode_message(message, var_name):
+    """
+    Decode a single GRIB2 message held in memory, such as the contents of a
+    decompressed MRMS file, as the given variable.
+    :param message: GRIB2 message bytes
+    :param var_name: Name of the decoded variable
+    :return: GribDataset
+    """
+    if eccodes is None:
+        raise OSError("The eccodes GRIB2 decoder is not installed")
+
+    gid = eccodes.codes_new_from_message(message)
+    try:
+        values, lats, lons = message_grids(gid)
+    finally:
+        eccodes.codes_release(gid)
+    return GribDataset({var_name: GribVariable(values[np.newaxis, :, :]),
+                        'latitude': GribVariable(lats),
+                        'longitude': GribVariable(lons)})
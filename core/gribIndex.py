@@ -0,0 +1,262 @@
+"""
+Partial reads of local GRIB2 files through wgrib2-style inventories (.idx
+files). The inventory of a GRIB2 file is taken from an up to date <file>.idx
+next to it (as distributed by NOMADS and the cloud archives, or written by
+wgrib2 -s), or built once by scanning the message headers only (skipping
+over the packed data) and cached in the scratch directory. The inventory
+lines matching the wgrib2 -match patterns of an input product give the byte
+ranges of the needed messages, which are copied to a small GRIB2 file, the
+same way Util/pull_s3_grib_vars.py pulls variables from S3. Only parameters
+in the NCEP name table of the eccodes decoder are named in built inventories.
+"""
+import hashlib
+import os
+import re
+import struct
+import uuid
+
+from core.gribDecoder import WGRIB2_NAMES
+
+# Subdirectory of the scratch directory holding the built inventories.
+INDEX_DIR = "grib_index"
+
+# Size of the reads used to copy the matching messages.
+COPY_CHUNK = 8 * 1024 * 1024
+
+# wgrib2 names of the GRIB2 time units and statistical processes.
+TIME_UNITS = {0: 'min', 1: 'hour', 2: 'day', 3: 'month', 4: 'year', 13: 'sec'}
+STAT_PROCESSES = {0: 'ave', 1: 'acc', 2: 'max', 3: 'min'}
+
+# Offset of the statistical processing octets of product definition templates
+# 4.8 (statistically processed), 4.11 (ensemble member) and 4.12 (derived ensemble).
+STAT_TEMPLATE_OFFSETS = {8: 0, 11: 3, 12: 2}
+
+
+def grib_int(octets):
+    """
+    Signed GRIB2 integer (sign and magnitude, most significant bit first).
+    :param octets:
+    :return:
+    """
+    value = int.from_bytes(octets, 'big')
+    sign_bit = 1 << (8 * len(octets) - 1)
+    if value & sign_bit:
+        return -(value & (sign_bit - 1))
+    return value
+
+
+def level_string(section4):
+    """
+    wgrib2 description of the level in a product definition section.
+    :param section4:
+    :return:
+    """
+    level_type = section4[22]
+    scale = grib_int(section4[23:24])
+    level = grib_int(section4[24:28]) * 10.0 ** -scale
+    if level_type == 1:
+        return "surface"
+    if level_type == 100:
+        return "{:g} mb".format(level / 100.0)
+    if level_type == 101:
+        return "mean sea level"
+    if level_type == 103:
+        return "{:g} m above ground".format(level)
+    if level_type == 105:
+        return "{:g} hybrid level".format(level)
+    return "level type {} {:g}".format(level_type, level)
+
+
+def time_string(section4, template):
+    """
+    wgrib2 description of the forecast time in a product definition section.
+    :param section4:
+    :param template: Product definition template number
+    :return:
+    """
+    units = section4[17]
+    start = grib_int(section4[18:22])
+    unit_name = TIME_UNITS.get(units, "unit {}".format(units))
+    offset = STAT_TEMPLATE_OFFSETS.get(template)
+    if offset is None or len(section4) < 53 + offset:
+        if start == 0:
+            return "anl"
+        return "{} {} fcst".format(start, unit_name)
+
+    stat_process = section4[46 + offset]
+    range_units = section4[48 + offset]
+    length = grib_int(section4[49 + offset:53 + offset])
+    if range_units != units and units in (0, 1) and range_units in (0, 1):
+        length = length * 60 if range_units == 1 else length // 60
+    return "{}-{} {} {} fcst".format(start, start + length, unit_name,
+                                     STAT_PROCESSES.get(stat_process, "stat {}".format(stat_process)))
+
+
+def build_index(grib_file):
+    """
+    Build the wgrib2 inventory of a GRIB2 file from its message headers,
+    seeking over the local use, grid, bitmap and data sections.
+    :param grib_file:
+    :return: List of inventory lines
+    """
+    lines = []
+    with open(grib_file, 'rb', buffering=0) as grib_in:
+        msg_num = 0
+        msg_start = 0
+        while True:
+            grib_in.seek(msg_start)
+            section0 = grib_in.read(16)
+            if len(section0) < 16:
+                break
+            if section0[:4] != b'GRIB' or section0[7] != 2:
+                raise ValueError("No GRIB2 message at byte {} of {}".format(msg_start, grib_file))
+            msg_num += 1
+            discipline = section0[6]
+            msg_length = struct.unpack('>Q', section0[8:16])[0]
+            msg_end = msg_start + msg_length
+
+            # Walk the sections, with one field per product definition section.
+            date = None
+            master_table = None
+            fields = []
+            position = msg_start + 16
+            while position < msg_end - 4:
+                header = grib_in.read(5)
+                if len(header) < 5 or header[:4] == b'7777':
+                    break
+                sec_length = struct.unpack('>I', header[:4])[0]
+                sec_num = header[4]
+                if sec_num in (1, 4):
+                    section = header + grib_in.read(sec_length - 5)
+                    if sec_num == 1:
+                        master_table = section[9]
+                        year = struct.unpack('>H', section[12:14])[0]
+                        date = "{:04d}{:02d}{:02d}{:02d}".format(year, section[14], section[15], section[16])
+                    else:
+                        template = struct.unpack('>H', section[7:9])[0]
+                        param = (discipline, section[9], section[10])
+                        var_name = WGRIB2_NAMES.get(param)
+                        if var_name is None:
+                            var_name = "var discipline={} master_table={} parmcat={} parm={}".format(
+                                discipline, master_table, section[9], section[10])
+                        fields.append("{}:{}:{}".format(var_name, level_string(section),
+                                                        time_string(section, template)))
+                else:
+                    grib_in.seek(sec_length - 5, os.SEEK_CUR)
+                position += sec_length
+
+            for field_num, field in enumerate(fields, 1):
+                record = str(msg_num) if len(fields) == 1 else "{}.{}".format(msg_num, field_num)
+                lines.append("{}:{}:d={}:{}:".format(record, msg_start, date, field))
+            msg_start = msg_end
+    return lines
+
+
+def index_cache_file(grib_file, scratch_dir):
+    """
+    Path of the cached inventory of a GRIB2 file, keyed by the file path,
+    modification time and size.
+    :param grib_file:
+    :param scratch_dir:
+    :return:
+    """
+    file_stat = os.stat(grib_file)
+    key = hashlib.sha256("{}\0{}\0{}".format(os.path.realpath(grib_file), file_stat.st_mtime_ns,
+                                             file_stat.st_size).encode()).hexdigest()
+    return os.path.join(scratch_dir, INDEX_DIR, key + ".idx")
+
+
+def read_index(grib_file, scratch_dir):
+    """
+    Return the inventory of a GRIB2 file: its .idx file if that is at least as
+    new as the GRIB2 file, else the cached inventory, which is built if needed.
+    :param grib_file:
+    :param scratch_dir:
+    :return: List of inventory lines
+    """
+    for idx_file in (grib_file + ".idx", index_cache_file(grib_file, scratch_dir)):
+        if os.path.isfile(idx_file) and os.path.getmtime(idx_file) >= os.path.getmtime(grib_file):
+            with open(idx_file, 'r') as idx_in:
+                lines = [line.rstrip() for line in idx_in if line.strip()]
+            if lines:
+                return lines
+
+    lines = build_index(grib_file)
+    cache_file = index_cache_file(grib_file, scratch_dir)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp_file = "{}.{}.tmp".format(cache_file, uuid.uuid4().hex)
+    with open(tmp_file, 'w') as idx_out:
+        idx_out.write("\n".join(lines) + "\n")
+    os.replace(tmp_file, cache_file)
+    return lines
+
+
+def message_ranges(lines, match_patterns, file_size):
+    """
+    Byte ranges of the messages whose inventory lines match any of the patterns.
+    Fields sharing a message (n.1, n.2, ...) share its offset. Adjacent ranges
+    are merged.
+    :param lines: Inventory lines
+    :param match_patterns: List of wgrib2 -match regular expressions
+    :param file_size: Size of the GRIB2 file
+    :return: List of (start, end) byte ranges, and the set of the patterns that matched
+    """
+    patterns = [re.compile(pattern) for pattern in match_patterns]
+    offsets = sorted(set(int(line.split(':')[1]) for line in lines))
+    ends = dict(zip(offsets, offsets[1:] + [file_size]))
+
+    starts = set()
+    matched = set()
+    for line in lines:
+        for pattern_num, pattern in enumerate(patterns):
+            if pattern.search(line):
+                starts.add(int(line.split(':')[1]))
+                matched.add(pattern_num)
+
+    ranges = []
+    for start in sorted(starts):
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], ends[start])
+        else:
+            ranges.append((start, ends[start]))
+    return ranges, matched
+
+
+def extract_messages(grib_files, match_patterns, subset_file, scratch_dir):
+    """
+    Copy the messages of GRIB2 files matching any of the patterns to a new
+    GRIB2 file, reading only their byte ranges.
+    :param grib_files: List of GRIB2 files
+    :param match_patterns: List of wgrib2 -match regular expressions
+    :param subset_file: GRIB2 file to write
+    :param scratch_dir: Scratch directory holding the built inventories
+    :return: Bytes read, total size of the GRIB2 files, or None if a pattern matches none of the inventory lines
+    """
+    file_ranges = []
+    matched = set()
+    total_size = 0
+    for grib_file in grib_files:
+        file_size = os.path.getsize(grib_file)
+        ranges, file_matched = message_ranges(read_index(grib_file, scratch_dir), match_patterns, file_size)
+        if ranges and ranges[-1][1] > file_size:
+            raise ValueError("Inventory of " + grib_file + " does not match the file")
+        file_ranges.append((grib_file, ranges))
+        matched.update(file_matched)
+        total_size += file_size
+    if len(matched) < len(match_patterns):
+        return None
+
+    bytes_read = 0
+    with open(subset_file, 'wb') as subset_out:
+        for grib_file, ranges in file_ranges:
+            with open(grib_file, 'rb') as grib_in:
+                for start, end in ranges:
+                    grib_in.seek(start)
+                    while start < end:
+                        chunk = grib_in.read(min(COPY_CHUNK, end - start))
+                        if not chunk:
+                            raise ValueError("Unexpected end of " + grib_file)
+                        subset_out.write(chunk)
+                        start += len(chunk)
+                        bytes_read += len(chunk)
+    return bytes_read, total_size
@@ -4,17 +4,27 @@ Module file to handle both reading in input files:
 2.) NetCDF format
 Also, creating output files.
 """
+from concurrent.futures import ThreadPoolExecutor
 import datetime
 import gzip
+import json
 import math
 import os
 import shutil
 import subprocess
+import sys
+import zlib
 
 import numpy as np
 from netCDF4 import Dataset
 
 from core import err_handler
+from core import gribDecoder
+from core import gribIndex
+
+# GRIB2 decoding backends.
+WGRIB2_DECODER = 'wgrib2'
+ECCODES_DECODER = 'eccodes'
 
 
 class OutputObj:
@@ -29,13 +39,16 @@ class OutputObj:
         self.outDate = None
         self.out_ndv = -999999
         self.suppOutPath = None
+        self.pending_writes = []
 
         # Create local "slabs" to hold final output grids. These
         # will be collected during the output routine below.
         force_count = 9 if ConfigOptions.include_lqfrac else 8
-        self.output_local = np.empty([force_count, GeoMetaWrfHydro.ny_local, GeoMetaWrfHydro.nx_local])
+        self.output_local = np.empty([force_count, GeoMetaWrfHydro.ny_local, GeoMetaWrfHydro.nx_local],
+                                     ConfigOptions.working_dtype)
         #self.output_local[:,:,:] = self.out_ndv
-        self.output_supp_local = np.empty([1, GeoMetaWrfHydro.ny_local, GeoMetaWrfHydro.nx_local])
+        self.output_supp_local = np.empty([1, GeoMetaWrfHydro.ny_local, GeoMetaWrfHydro.nx_local],
+                                          ConfigOptions.working_dtype)
 
     def output_final_ldasin(self, ConfigOptions, geoMetaWrfHydro, MpiConfig):
         """
@@ -430,41 +443,39 @@ class OutputObj:
 
         err_handler.check_program_status(ConfigOptions, MpiConfig)
 
-        # Now loop through each variable, collect the data (call on each processor), assemble into the final
-        # output grid, and place into the output file (if on processor 0).
-        for varTmp in output_variable_attribute_dict:
-            # First run a check for missing values. There should be none at this point.
-            # err_handler.check_missing_final(self.outPath, ConfigOptions, self.output_local[output_variable_attribute_dict[varTmp][0], :, :],
-            #                                 varTmp, MpiConfig)
-            # if ConfigOptions.errFlag == 1:
-            #     continue
+        if ConfigOptions.parallelOutput:
+            # Every processor writes its own slab of the final grids into the file.
+            self.write_slabs_parallel(idOut, self.outPath, self.output_local, output_variable_attribute_dict,
+                                      ConfigOptions, geoMetaWrfHydro, MpiConfig)
+            return
 
-            # Collect data from the various processors, and place into the output file.
-            try:
-                # TODO change communication call from comm.gather() to comm.Gather for efficency
-                # final = MpiConfig.comm.gather(self.output_local[output_variable_attribute_dict[varTmp][0],:,:],root=0)
+        # Collect the final grids of all variables from the various processors in a single
+        # gather, then place them into the output file (if on processor 0).
+        try:
+            dataOutStack = MpiConfig.gather_stack(geoMetaWrfHydro, self.output_local, ConfigOptions)
+        except Exception as e:
+            ConfigOptions.errMsg = "Unable to gather final grids for: " + self.outPath + " (" + str(e) + ")"
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            dataOutStack = None
 
-                # Use gatherv to merge the data slabs
-                dataOutTmp = MpiConfig.merge_slabs_gatherv(self.output_local[output_variable_attribute_dict[varTmp][0],:,:], ConfigOptions)
-            except Exception as e:
-                print(e)
-                ConfigOptions.errMsg = "Unable to gather final grids for: " + varTmp
-                err_handler.log_critical(ConfigOptions, MpiConfig)
-                continue
+        if ConfigOptions.outputWriters > 0:
+            # Hand the final grids to a background writer process and move on.
+            if MpiConfig.rank == 0 and dataOutStack is not None:
+                self.write_async(idOut, self.outPath, dataOutStack, output_variable_attribute_dict,
+                                 ConfigOptions, MpiConfig)
+            err_handler.check_program_status(ConfigOptions, MpiConfig)
+            return
 
-            if MpiConfig.rank == 0:
+        if MpiConfig.rank == 0 and dataOutStack is not None:
+            for varTmp in output_variable_attribute_dict:
                 try:
-                    idOut.variables[varTmp][0, :, :] = dataOutTmp
+                    idOut.variables[varTmp][0, :, :] = dataOutStack[output_variable_attribute_dict[varTmp][0], :, :]
                 except (ValueError, IOError):
                     ConfigOptions.errMsg = "Unable to place final output grid for: " + varTmp
                     err_handler.log_critical(ConfigOptions, MpiConfig)
-                # Reset temporary data objects to keep memory usage down.
-                del dataOutTmp
-
-            # Reset temporary data objects to keep memory usage down.
-            final = None
+                    break
 
-            err_handler.check_program_status(ConfigOptions, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
 
         if MpiConfig.rank == 0:
             while (True):
@@ -673,31 +684,38 @@ class OutputObj:
                 break
         err_handler.check_program_status(ConfigOptions, MpiConfig)
 
-        # Now loop through each variable, collect the data (call on each processor), assemble into the final
-        # output grid, and place into the output file (if on processor 0).
-        for varTmp in output_variable_attribute_dict:
-            try:
-                # TODO change communication call from comm.gather() to comm.Gather for efficency
-                # final = MpiConfig.comm.gather(self.output_local[output_variable_attribute_dict[varTmp][0],:,:],roo
-                # Use gatherv to merge the data slabs
-                dataOutTmp = MpiConfig.merge_slabs_gatherv(self.output_supp_local[output_variable_attribute_dict[varTmp][0],:,:], ConfigOptions)
-            except Exception as e:
-                print(e)
-                ConfigOptions.errMsg = "Unable to gather final grids for: " + varTmp
-                err_handler.log_critical(ConfigOptions, MpiConfig)
-                continue
+        if ConfigOptions.parallelOutput:
+            # Every processor writes its own slab of the final grids into the file.
+            self.write_slabs_parallel(idOut, self.suppOutPath, self.output_supp_local,
+                                      output_variable_attribute_dict, ConfigOptions, geoMetaWrfHydro, MpiConfig)
+            return
 
-            if MpiConfig.rank == 0:
+        # Collect the final grids from the various processors in a single gather, then
+        # place them into the output file (if on processor 0).
+        try:
+            dataOutStack = MpiConfig.gather_stack(geoMetaWrfHydro, self.output_supp_local, ConfigOptions)
+        except Exception as e:
+            ConfigOptions.errMsg = "Unable to gather final grids for: " + self.suppOutPath + " (" + str(e) + ")"
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            dataOutStack = None
+
+        if ConfigOptions.outputWriters > 0:
+            # Hand the final grids to a background writer process and move on.
+            if MpiConfig.rank == 0 and dataOutStack is not None:
+                self.write_async(idOut, self.suppOutPath, dataOutStack, output_variable_attribute_dict,
+                                 ConfigOptions, MpiConfig)
+            err_handler.check_program_status(ConfigOptions, MpiConfig)
+            return
+
+        if MpiConfig.rank == 0 and dataOutStack is not None:
+            for varTmp in output_variable_attribute_dict:
                 try:
-                    idOut.variables[varTmp][0, :, :] = dataOutTmp
+                    idOut.variables[varTmp][0, :, :] = dataOutStack[output_variable_attribute_dict[varTmp][0], :, :]
                 except (ValueError, IOError):
                     ConfigOptions.errMsg = "Unable to place final output grid for: " + varTmp
                     err_handler.log_critical(ConfigOptions, MpiConfig)
-                # Reset temporary data objects to keep memory usage down.
-                del dataOutTmp
-            # Reset temporary data objects to keep memory usage down.
-            final = None
-            err_handler.check_program_status(ConfigOptions, MpiConfig)
+                    break
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
 
         if MpiConfig.rank == 0:
             while (True):
@@ -711,17 +729,183 @@ class OutputObj:
                 break
         err_handler.check_program_status(ConfigOptions, MpiConfig)
 
+    def write_async(self, idOut, outPath, dataOutStack, output_variable_attribute_dict, ConfigOptions, MpiConfig):
+        """
+        Output routine to write the gathered final output grids into an output file
+        in a background writer process (see outputWriter.py), so the processors can
+        move on to the next output step while the (compressed) data is written. The
+        file header has already been created on the master processor; it is closed
+        here and the grids are streamed to the writer, which appends them to the file.
+        At most outputWriters writers run at the same time. Only called on processor 0.
+        :param idOut: File handle with the completed header
+        :param outPath:
+        :param dataOutStack: Global [nvar, ny, nx] stack of final output grids
+        :param output_variable_attribute_dict:
+        :param ConfigOptions:
+        :param MpiConfig:
+        :return:
+        """
+        try:
+            idOut.close()
+        except (ValueError, IOError):
+            ConfigOptions.errMsg = "Unable to close output file: " + outPath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            return
+
+        # Keep the number of writers (and the memory they hold) bounded.
+        while len(self.pending_writes) >= ConfigOptions.outputWriters:
+            self.wait_for_write(self.pending_writes.pop(0), ConfigOptions, MpiConfig)
+
+        grid_meta = {'shape': dataOutStack.shape,
+                     'dtype': dataOutStack.dtype.str,
+                     'variables': {varTmp: output_variable_attribute_dict[varTmp][0]
+                                   for varTmp in output_variable_attribute_dict}}
+        writer_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'outputWriter.py')
+        try:
+            writer = subprocess.Popen([sys.executable, writer_path, outPath, json.dumps(grid_meta)],
+                                      stdin=subprocess.PIPE)
+            writer.stdin.write(memoryview(np.ascontiguousarray(dataOutStack)).cast('B'))
+            writer.stdin.close()
+        except (OSError, ValueError) as e:
+            ConfigOptions.errMsg = "Unable to start output writer for: " + outPath + " (" + str(e) + ")"
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            return
+        self.pending_writes.append((writer, outPath))
+
+    def wait_for_write(self, pending_write, ConfigOptions, MpiConfig):
+        """
+        Wait for a background writer process to finish its output file.
+        :param pending_write: Tuple of the writer process and its output file
+        :param ConfigOptions:
+        :param MpiConfig:
+        :return:
+        """
+        writer, outPath = pending_write
+        if writer.wait() != 0:
+            ConfigOptions.errMsg = "Output writer failed to write: " + outPath + \
+                                   " (exit code " + str(writer.returncode) + ")"
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+
+    def flush_output(self, ConfigOptions, MpiConfig):
+        """
+        Wait for all background writer processes to finish their output files.
+        Needs to be called before output is flagged as complete.
+        :param ConfigOptions:
+        :param MpiConfig:
+        :return:
+        """
+        if MpiConfig.rank == 0:
+            while self.pending_writes:
+                self.wait_for_write(self.pending_writes.pop(0), ConfigOptions, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+    def write_slabs_parallel(self, idOut, outPath, local_stack, output_variable_attribute_dict,
+                             ConfigOptions, geoMetaWrfHydro, MpiConfig):
+        """
+        Output routine to place the local "slabs" of the final output grids into
+        an output file with parallel NetCDF (MPI-IO), as an alternative to gathering
+        the grids on the master processor. The file header (dimensions, attributes,
+        time and coordinate variables) has already been created on the master
+        processor, exactly as for serial output, so the files are identical. The
+        header is closed here and the file re-opened for parallel access on all
+        processors, which then write their slabs of each variable collectively.
+        :param idOut: File handle with the completed header on processor 0
+        :param outPath:
+        :param local_stack: Local [nvar, ny_local, nx_local] output grids
+        :param output_variable_attribute_dict:
+        :param ConfigOptions:
+        :param geoMetaWrfHydro:
+        :param MpiConfig:
+        :return:
+        """
+        if MpiConfig.rank == 0:
+            try:
+                idOut.close()
+            except (ValueError, IOError):
+                ConfigOptions.errMsg = "Unable to close output file: " + outPath
+                err_handler.log_critical(ConfigOptions, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+        # The header has to be on disk before the other processors open the file.
+        MpiConfig.comm.barrier()
+
+        # Opening, writing and closing are collective, a processor failing in any of
+        # them would leave the others waiting, so it aborts the job straight away.
+        try:
+            idPar = Dataset(outPath, 'a', parallel=True, comm=MpiConfig.comm)
+        except Exception as e:
+            ConfigOptions.errMsg = "Unable to open output file: " + outPath + " for parallel output: " + str(e)
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            MpiConfig.comm.Abort()
+
+        y_slice = slice(geoMetaWrfHydro.y_lower_bound, geoMetaWrfHydro.y_upper_bound)
+        x_slice = slice(geoMetaWrfHydro.x_lower_bound, geoMetaWrfHydro.x_upper_bound)
+        for varTmp in output_variable_attribute_dict:
+            try:
+                # Collective access is required for compressed variables.
+                idPar.variables[varTmp].set_collective(True)
+                idPar.variables[varTmp][0, y_slice, x_slice] = \
+                    local_stack[output_variable_attribute_dict[varTmp][0], :, :]
+            except Exception as e:
+                ConfigOptions.errMsg = "Unable to place final output grid for: " + varTmp + \
+                                       " in: " + outPath + " (" + str(e) + ")"
+                err_handler.log_critical(ConfigOptions, MpiConfig)
+                MpiConfig.comm.Abort()
+
+        try:
+            idPar.close()
+        except Exception as e:
+            ConfigOptions.errMsg = "Unable to close output file: " + outPath + " (" + str(e) + ")"
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            MpiConfig.comm.Abort()
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+
 def open_grib2(GribFileIn,NetCdfFileOut,Wgrib2Cmd,ConfigOptions,MpiConfig,
-               inputVar, aux_message=""):
+               inputVar, aux_message="", open_on_all_procs=False, match=None, grib_files=None,
+               grib_data=None):
     """
     Generic function to convert a GRIB2 file into a NetCDF file. Function
     will also open the NetCDF file, and ensure all necessary inputs are
-    in file.
+    in file. If the in-process GRIB2 decoder is selected and the wgrib2 -match
+    patterns are given, the matching messages are decoded in memory instead,
+    and no NetCDF file is written. With partial GRIB2 reads enabled, only the
+    byte ranges of the matching messages are read from the GRIB2 file(s).
     :param GribFileIn:
     :param NetCdfFileOut:
     :param ConfigOptions:
+    :param open_on_all_procs: Also open the converted file on the other processors,
+                              for reading their own patches of the input grid.
+    :param match: List of the wgrib2 -match patterns in Wgrib2Cmd
+    :param grib_files: GRIB2 files piped into Wgrib2Cmd, if not just GribFileIn
+    :param grib_data: Contents of GribFileIn held in memory, piped into Wgrib2Cmd
     :return:
     """
+    # Use the file decoded ahead in the background, if it was prefetched during the
+    # previous output step.
+    staged = None
+    if ConfigOptions.prefetcher is not None and match is not None and not open_on_all_procs and \
+            grib_data is None and grib_files in (None, [GribFileIn]):
+        staged = ConfigOptions.prefetcher.take_decoded((GribFileIn, tuple(match)))
+        ConfigOptions.prefetcher.remember(GribFileIn, match)
+
+    subset_file = None
+    if match is not None:
+        grib_files = grib_files if grib_files is not None else [GribFileIn]
+        if ConfigOptions.grib_partial_read and staged is None:
+            subset_file = extract_grib2_messages(grib_files, os.path.splitext(NetCdfFileOut)[0] + "_subset.grib2",
+                                                 ConfigOptions, MpiConfig, match, open_on_all_procs)
+            if subset_file is not None:
+                grib_files = [subset_file]
+                Wgrib2Cmd = '$WGRIB2 -match "(' + '|'.join(match) + ')" ' + subset_file + \
+                            " -netcdf " + NetCdfFileOut
+        if ConfigOptions.grib2_decoder == ECCODES_DECODER:
+            idTmp = decode_grib2(grib_files, ConfigOptions, MpiConfig, inputVar, match,
+                                 aux_message=aux_message, open_on_all_procs=open_on_all_procs, decoded=staged)
+            if subset_file is not None and not open_on_all_procs:
+                remove_subset_file(subset_file, ConfigOptions, MpiConfig)
+            return idTmp
+
     # Ensure all processors are synced up before outputting.
     # MpiConfig.comm.barrier()
 
@@ -751,7 +935,14 @@ def open_grib2(GribFileIn,NetCdfFileOut,Wgrib2Cmd,ConfigOptions,MpiConfig,
                     )
                 os.environ['GRIB2TABLE'] = g2path
 
-            exitcode = subprocess.call(Wgrib2Cmd, shell=True)
+            if staged is not None:
+                ConfigOptions.statusMsg = "Using GRIB2 file converted in the background: " + GribFileIn
+                err_handler.log_msg(ConfigOptions, MpiConfig)
+                os.replace(staged, NetCdfFileOut)
+            elif grib_data is not None:
+                exitcode = subprocess.run(Wgrib2Cmd, shell=True, input=grib_data).returncode
+            else:
+                exitcode = subprocess.call(Wgrib2Cmd, shell=True)
 
             #print("exitcode: " + str(exitcode))
             # Call WGRIB2 with subprocess.Popen
@@ -771,6 +962,9 @@ def open_grib2(GribFileIn,NetCdfFileOut,Wgrib2Cmd,ConfigOptions,MpiConfig,
         err = None
         exitcode = None
 
+        if subset_file is not None:
+            remove_subset_file(subset_file, ConfigOptions, MpiConfig)
+
         # Ensure file exists.
         if not os.path.isfile(NetCdfFileOut):
             ConfigOptions.errMsg = "Expected NetCDF file: " + NetCdfFileOut + \
@@ -823,10 +1017,258 @@ def open_grib2(GribFileIn,NetCdfFileOut,Wgrib2Cmd,ConfigOptions,MpiConfig,
 
     err_handler.check_program_status(ConfigOptions, MpiConfig)
 
+    if open_on_all_procs:
+        # The reduce in check_program_status does not hold the other processors
+        # back until rank 0 has finished writing the file.
+        MpiConfig.comm.barrier()
+        if MpiConfig.rank != 0:
+            try:
+                idTmp = Dataset(NetCdfFileOut, 'r')
+            except OSError:
+                ConfigOptions.errMsg = "Unable to open input NetCDF file: " + \
+                                       NetCdfFileOut
+                err_handler.log_critical(ConfigOptions, MpiConfig)
+                idTmp = None
+
     # Return the NetCDF file handle back to the user.
     return idTmp
 
 
+def extract_grib2_messages(GribFiles, SubsetFile, ConfigOptions, MpiConfig, match, open_on_all_procs=False):
+    """
+    Function to copy the GRIB2 messages matching wgrib2 -match patterns to a
+    smaller GRIB2 file, reading only their byte ranges as listed in the .idx
+    inventories of the input files. Falls back to the full input files if an
+    inventory cannot be read or built, or does not list all expected messages.
+    :param GribFiles:
+    :param SubsetFile:
+    :param ConfigOptions:
+    :param MpiConfig:
+    :param match: List of wgrib2 -match patterns
+    :param open_on_all_procs: Return the file to the other processors as well.
+    :return: SubsetFile, or None to read the full input files.
+    """
+    subset_file = None
+    if MpiConfig.rank == 0:
+        try:
+            sizes = gribIndex.extract_messages(GribFiles, match, SubsetFile, ConfigOptions.scratch_dir)
+        except (OSError, ValueError, IndexError) as err:
+            ConfigOptions.statusMsg = "Unable to read the GRIB2 inventory of: " + ", ".join(GribFiles) + \
+                                      " (" + str(err) + "). Reading the full file."
+            err_handler.log_warning(ConfigOptions, MpiConfig)
+            sizes = None
+        else:
+            if sizes is None:
+                ConfigOptions.statusMsg = "Not all expected GRIB2 messages listed in the inventory of: " + \
+                                          ", ".join(GribFiles) + ". Reading the full file."
+                err_handler.log_warning(ConfigOptions, MpiConfig)
+        if sizes is not None:
+            ConfigOptions.statusMsg = "Read {:.1f} of {:.1f} MB from: {}".format(
+                sizes[0] / 1.0e6, sizes[1] / 1.0e6, ", ".join(GribFiles))
+            err_handler.log_msg(ConfigOptions, MpiConfig)
+            subset_file = SubsetFile
+
+    if open_on_all_procs:
+        subset_file = MpiConfig.comm.bcast(subset_file, root=0)
+
+    return subset_file
+
+
+def remove_subset_file(SubsetFile, ConfigOptions, MpiConfig):
+    """
+    Remove the GRIB2 file of the matching messages once it has been decoded.
+    Files still read by the other processors are overwritten by the next read instead.
+    :param SubsetFile:
+    :param ConfigOptions:
+    :param MpiConfig:
+    :return:
+    """
+    if MpiConfig.rank == 0 and os.path.isfile(SubsetFile):
+        try:
+            os.remove(SubsetFile)
+        except OSError:
+            ConfigOptions.statusMsg = "Unable to remove temporary file: " + SubsetFile
+            err_handler.log_warning(ConfigOptions, MpiConfig)
+
+
+def open_grib2_data(GribFileIn, GribData, NetCdfFileOut, ConfigOptions, MpiConfig, inputVar):
+    """
+    Function to open a single-message GRIB2 file whose contents are held in
+    memory (e.g. a decompressed MRMS file), without writing it to the scratch
+    directory. The contents are decoded in memory as inputVar by the in-process
+    GRIB2 decoder, or piped into wgrib2 to convert them to a NetCDF file.
+    :param GribFileIn: File the contents were read from
+    :param GribData: Contents on the master processor, None elsewhere
+    :param NetCdfFileOut:
+    :param ConfigOptions:
+    :param MpiConfig:
+    :param inputVar:
+    :return:
+    """
+    if ConfigOptions.grib2_decoder != ECCODES_DECODER:
+        cmd = "$WGRIB2 - -netcdf " + NetCdfFileOut
+        return open_grib2(GribFileIn, NetCdfFileOut, cmd, ConfigOptions, MpiConfig, inputVar, grib_data=GribData)
+
+    idTmp = None
+    if MpiConfig.rank == 0:
+        ConfigOptions.statusMsg = "Decoding GRIB2 file: " + GribFileIn
+        err_handler.log_msg(ConfigOptions, MpiConfig)
+        try:
+            idTmp = gribDecoder.decode_message(GribData, inputVar)
+        except (OSError, ValueError, KeyError, gribDecoder.CodesError) as err:
+            ConfigOptions.errMsg = "Unable to decode GRIB2 file: " + GribFileIn + " (" + str(err) + ")"
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+    err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+    return idTmp
+
+
+def decode_grib2(GribFiles, ConfigOptions, MpiConfig, inputVar, match, aux_message="", open_on_all_procs=False,
+                 decoded=None):
+    """
+    Function to decode the GRIB2 messages matching wgrib2 -match patterns in
+    memory, with the same variable names and layout as the NetCDF files
+    written by wgrib2.
+    :param GribFiles:
+    :param ConfigOptions:
+    :param MpiConfig:
+    :param inputVar:
+    :param match: List of wgrib2 -match patterns
+    :param open_on_all_procs: Also decode the files on the other processors,
+                              for reading their own patches of the input grid.
+    :param decoded: Messages already decoded in the background on the master processor
+    :return:
+    """
+    idTmp = None
+    if MpiConfig.rank == 0 or open_on_all_procs:
+        if MpiConfig.rank == 0:
+            if decoded is not None:
+                ConfigOptions.statusMsg = "Using GRIB2 file decoded in the background: " + ", ".join(GribFiles)
+            else:
+                ConfigOptions.statusMsg = "Decoding GRIB2 file: " + ", ".join(GribFiles)
+            err_handler.log_msg(ConfigOptions, MpiConfig)
+        try:
+            idTmp = decoded if decoded is not None else gribDecoder.decode_grib2(GribFiles, match)
+        except (OSError, ValueError, KeyError, gribDecoder.CodesError) as err:
+            ConfigOptions.errMsg = "Unable to decode GRIB2 file: " + ", ".join(GribFiles) + " (" + str(err) + ")"
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+
+        if idTmp is not None and len(idTmp.variables) == 0:
+            ConfigOptions.errMsg = "No GRIB2 messages matching the expected variables found in: " + \
+                                   ", ".join(GribFiles) + "."
+            if aux_message is not None:
+                ConfigOptions.errMsg += " " + aux_message.format(in_file=GribFiles[0])
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            idTmp = None
+
+        if idTmp is not None and inputVar is not None and inputVar not in idTmp.variables.keys():
+            ConfigOptions.errMsg = "Unable to locate expected variable: " + inputVar + " in: " + \
+                                   ", ".join(GribFiles)
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+            idTmp = None
+    err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+    return idTmp
+
+
+def prefetch_grib2(GribFileIn, NextFileIn, ConfigOptions):
+    """
+    Function to have the prefetcher decode the GRIB2 file of a product for the
+    next output step in the background, with the wgrib2 -match patterns the
+    file of the product for the previous step was decoded with by open_grib2.
+    The in-process decoder keeps the messages in memory; wgrib2 converts them
+    to a temporary NetCDF file in the scratch directory.
+    :param GribFileIn: GRIB2 file of the product decoded in the previous output step
+    :param NextFileIn: GRIB2 file of the product for the next output step
+    :param ConfigOptions:
+    :return:
+    """
+    match = ConfigOptions.prefetcher.patterns_of(GribFileIn)
+    if match is None or NextFileIn is None or not os.path.isfile(NextFileIn):
+        return
+
+    prefix = ConfigOptions.scratch_dir + "/PREFETCH_" + os.path.basename(NextFileIn)
+    subset_file = prefix + "_subset.grib2" if ConfigOptions.grib_partial_read else None
+    key = (NextFileIn, tuple(match))
+    if ConfigOptions.grib2_decoder == ECCODES_DECODER:
+        ConfigOptions.prefetcher.decode(key, lambda: decode_grib2_ahead(NextFileIn, match, subset_file,
+                                                                        ConfigOptions.scratch_dir))
+    else:
+        ConfigOptions.prefetcher.decode(key, lambda: convert_grib2_ahead(NextFileIn, match, subset_file,
+                                                                         ConfigOptions.scratch_dir,
+                                                                         prefix + ".nc"),
+                                        cleanup=os.remove)
+
+
+def read_grib2_ahead(GribFileIn, match, SubsetFile, scratch_dir):
+    """
+    Return the GRIB2 files to decode in the background: the matching messages
+    copied to SubsetFile with partial reads, or the full input file.
+    :param GribFileIn:
+    :param match:
+    :param SubsetFile: GRIB2 file of the matching messages, None to read the full file
+    :param scratch_dir:
+    :return:
+    """
+    if SubsetFile is not None:
+        try:
+            if gribIndex.extract_messages([GribFileIn], match, SubsetFile, scratch_dir) is not None:
+                return [SubsetFile]
+        except (OSError, ValueError, IndexError):
+            pass
+    return [GribFileIn]
+
+
+def decode_grib2_ahead(GribFileIn, match, SubsetFile, scratch_dir):
+    """
+    Background task decoding the matching messages of a GRIB2 file in memory.
+    Failures are left to be reported when the file is decoded in its own step.
+    :param GribFileIn:
+    :param match:
+    :param SubsetFile:
+    :param scratch_dir:
+    :return: Decoded messages, or None if decoding failed
+    """
+    grib_files = read_grib2_ahead(GribFileIn, match, SubsetFile, scratch_dir)
+    try:
+        idTmp = gribDecoder.decode_grib2(grib_files, match)
+    except (OSError, ValueError, KeyError, gribDecoder.CodesError):
+        idTmp = None
+    finally:
+        if grib_files[0] == SubsetFile and os.path.isfile(SubsetFile):
+            os.remove(SubsetFile)
+    return idTmp
+
+
+def convert_grib2_ahead(GribFileIn, match, SubsetFile, scratch_dir, NetCdfFileOut):
+    """
+    Background task converting the matching messages of a GRIB2 file to a
+    temporary NetCDF file with wgrib2.
+    Failures are left to be reported when the file is converted in its own step.
+    :param GribFileIn:
+    :param match:
+    :param SubsetFile:
+    :param scratch_dir:
+    :param NetCdfFileOut:
+    :return: NetCdfFileOut, or None if the conversion failed
+    """
+    grib_files = read_grib2_ahead(GribFileIn, match, SubsetFile, scratch_dir)
+    cmd = '$WGRIB2 -match "(' + '|'.join(match) + ')" ' + grib_files[0] + " -netcdf " + NetCdfFileOut
+    try:
+        exitcode = subprocess.call(cmd, shell=True, stdout=subprocess.DEVNULL)
+    except OSError:
+        exitcode = None
+    finally:
+        if grib_files[0] == SubsetFile and os.path.isfile(SubsetFile):
+            os.remove(SubsetFile)
+
+    if exitcode != 0 or not os.path.isfile(NetCdfFileOut):
+        if os.path.isfile(NetCdfFileOut):
+            os.remove(NetCdfFileOut)
+        return None
+    return NetCdfFileOut
+
+
 def open_netcdf_forcing(NetCdfFileIn, ConfigOptions, MpiConfig, open_on_all_procs=False, lat_var="latitude", lon_var="longitude"):
     """
     Generic function to convert a NetCDF forcing file given a list of input forcing
@@ -839,6 +1281,11 @@ def open_netcdf_forcing(NetCdfFileIn, ConfigOptions, MpiConfig, open_on_all_proc
     # Ensure all processors are synced up before outputting.
     #MpiConfig.comm.barrier()
 
+    # Files staged by rank 0 (links, converted files) need to be in place before
+    # the other processors open them.
+    if open_on_all_procs:
+        MpiConfig.comm.barrier()
+
     # Open the NetCDF file on the master processor and read in data.
     if MpiConfig.rank == 0 or open_on_all_procs:
         # Ensure file exists.
@@ -895,9 +1342,17 @@ def unzip_file(GzFileIn,FileOut,ConfigOptions,MpiConfig):
         try:
             ConfigOptions.statusMsg = f"Unzipping file: {GzFileIn}"
             err_handler.log_msg(ConfigOptions, MpiConfig)
-            with gzip.open(GzFileIn, 'rb') as fTmpGz:
+            # Use the contents decompressed in the background, if the file was prefetched.
+            staged = None
+            if ConfigOptions.prefetcher is not None:
+                staged = ConfigOptions.prefetcher.take(GzFileIn)
+            if staged is not None:
                 with open(FileOut, 'wb') as fTmp:
-                    shutil.copyfileobj(fTmpGz, fTmp)
+                    fTmp.write(staged)
+            else:
+                with gzip.open(GzFileIn, 'rb') as fTmpGz:
+                    with open(FileOut, 'wb') as fTmp:
+                        shutil.copyfileobj(fTmpGz, fTmp)
         except:
             ConfigOptions.errMsg = f"Unable to unzip: {GzFileIn} to {FileOut}"
             err_handler.log_critical(ConfigOptions, MpiConfig)
@@ -910,6 +1365,50 @@ def unzip_file(GzFileIn,FileOut,ConfigOptions,MpiConfig):
     else:
         return
 
+def read_gz_file(GzFileIn):
+    """
+    Decompress a .gz file into memory.
+    :param GzFileIn:
+    :return:
+    """
+    with gzip.open(GzFileIn, 'rb') as fTmpGz:
+        return fTmpGz.read()
+
+
+def unzip_files(GzFilesIn, ConfigOptions, MpiConfig):
+    """
+    Generic I/O function to decompress .gz files into memory on the master
+    processor, in parallel threads. Contents already decompressed in the
+    background by the prefetcher are used as they are.
+    :param GzFilesIn:
+    :param ConfigOptions:
+    :param MpiConfig:
+    :return: List of the decompressed contents on the master processor, of None elsewhere.
+    """
+    contents = [None] * len(GzFilesIn)
+    if MpiConfig.rank != 0:
+        return contents
+
+    ConfigOptions.statusMsg = "Unzipping file(s): " + ", ".join(GzFilesIn)
+    err_handler.log_msg(ConfigOptions, MpiConfig)
+    if ConfigOptions.prefetcher is not None:
+        contents = [ConfigOptions.prefetcher.take(GzFileIn) for GzFileIn in GzFilesIn]
+
+    with ThreadPoolExecutor(max_workers=len(GzFilesIn)) as pool:
+        pending = [pool.submit(read_gz_file, GzFileIn) if content is None else None
+                   for GzFileIn, content in zip(GzFilesIn, contents)]
+        for file_num, future in enumerate(pending):
+            if future is None:
+                continue
+            try:
+                contents[file_num] = future.result()
+            except (OSError, EOFError, zlib.error) as err:
+                ConfigOptions.errMsg = f"Unable to unzip: {GzFilesIn[file_num]} ({err})"
+                err_handler.log_critical(ConfigOptions, MpiConfig)
+
+    return contents
+
+
 def read_rqi_monthly_climo(ConfigOptions, MpiConfig, supplemental_precip, GeoMetaWrfHydro):
     """
     Function to read in monthly RQI grids on the NWM grid. This is an NWM ONLY
@@ -929,6 +1428,22 @@ def read_rqi_monthly_climo(ConfigOptions, MpiConfig, supplemental_precip, GeoMet
     rqiPath = ConfigOptions.supp_precip_param_dir + "/MRMS_WGT_RQI0.9_m" + \
               supplemental_precip.pcp_date2.strftime('%m') + '_v1.1_geosmth.nc'
 
+    if ConfigOptions.shared_static_grids:
+        # Read the RQI grid through node-level shared memory instead of scattering it.
+        if len(indTmp[0]) == 0 or supplemental_precip.pcp_date2.month != supplemental_precip.pcp_date1.month:
+            if MpiConfig.rank == 0:
+                ConfigOptions.statusMsg = "Reading in RQI Parameter File: " + rqiPath
+                err_handler.log_msg(ConfigOptions, MpiConfig)
+            rqiLocal = MpiConfig.shared_grid(
+                GeoMetaWrfHydro, (rqiPath, 'POP_0mabovemeansealevel'),
+                lambda y_slice, x_slice: read_rqi_window(rqiPath, ConfigOptions, MpiConfig, GeoMetaWrfHydro,
+                                                         y_slice, x_slice),
+                ConfigOptions)
+            err_handler.check_program_status(ConfigOptions, MpiConfig)
+            supplemental_precip.regridded_rqi2[:, :] = rqiLocal
+            MpiConfig.release_shared_grid(rqiLocal)
+        return
+
     if len(indTmp[0]) == 0:
         # We haven't initialized the RQI fields. We need to do this.....
         if MpiConfig.rank == 0:
@@ -1046,3 +1561,54 @@ def read_rqi_monthly_climo(ConfigOptions, MpiConfig, supplemental_precip, GeoMet
                 pass
         err_handler.check_program_status(ConfigOptions, MpiConfig)
 
+
+def read_rqi_window(rqiPath, ConfigOptions, MpiConfig, GeoMetaWrfHydro, y_slice, x_slice):
+    """
+    Function to read the part of a monthly RQI grid on the NWM grid given by
+    the y/x slices.
+    :param rqiPath:
+    :param ConfigOptions:
+    :param MpiConfig:
+    :param GeoMetaWrfHydro:
+    :param y_slice:
+    :param x_slice:
+    :return: RQI grid, or None if an error was logged
+    """
+    # First make sure the RQI file exists.
+    if not os.path.isfile(rqiPath):
+        ConfigOptions.errMsg = "Expected RQI parameter file: " + rqiPath + " not found."
+        err_handler.log_critical(ConfigOptions, MpiConfig)
+        return None
+
+    # Open the Parameter file.
+    try:
+        idTmp = Dataset(rqiPath, 'r')
+    except:
+        ConfigOptions.errMsg = "Unable to open parameter file: " + rqiPath
+        err_handler.log_critical(ConfigOptions, MpiConfig)
+        return None
+
+    # Sanity checking on grid size, then extract out the RQI grid.
+    varTmp = None
+    try:
+        varShape = idTmp.variables['POP_0mabovemeansealevel'].shape
+        if varShape[1] != GeoMetaWrfHydro.ny_global or varShape[2] != GeoMetaWrfHydro.nx_global:
+            ConfigOptions.errMsg = "Improper dimension sizes for POP_0mabovemeansealevel " \
+                                   "in parameter file: " + rqiPath
+            err_handler.log_critical(ConfigOptions, MpiConfig)
+        else:
+            varTmp = idTmp.variables['POP_0mabovemeansealevel'][0, y_slice, x_slice]
+    except:
+        ConfigOptions.errMsg = "Unable to extract POP_0mabovemeansealevel from parameter file: " + rqiPath
+        err_handler.log_critical(ConfigOptions, MpiConfig)
+
+    # Close the RQI NetCDF file
+    try:
+        idTmp.close()
+    except:
+        ConfigOptions.errMsg = "Unable to close parameter file: " + rqiPath
+        err_handler.log_critical(ConfigOptions, MpiConfig)
+
+    if ConfigOptions.errFlag:
+        return None
+    return varTmp
@@ -35,11 +35,10 @@ def layer_final_forcings(OutputObj,input_forcings,ConfigOptions,MpiConfig):
         if force_idx in input_forcings.input_map_output:
             outLayerCurrent = OutputObj.output_local[force_idx,:,:]
             layerIn = input_forcings.final_forcings[force_idx,:,:]
-            indSet = np.where(layerIn != ConfigOptions.globalNdv)
-            outLayerCurrent[indSet] = layerIn[indSet]
+            np.copyto(outLayerCurrent, layerIn, where=layerIn != ConfigOptions.globalNdv)
             if force_idx == 8:
-                indSet = np.where(np.logical_or(layerIn < 0, layerIn > 1))
-                outLayerCurrent[indSet] =  np.where(OutputObj.output_local[4,:,:] >= 273.15+2.2, 1.0, 0.0)[indSet] # 2.2C threshold for rain/snow
+                indSet = np.logical_or(layerIn < 0, layerIn > 1)
+                np.copyto(outLayerCurrent, OutputObj.output_local[4,:,:] >= 273.15+2.2, where=indSet) # 2.2C threshold for rain/snow
             OutputObj.output_local[force_idx, :, :] = outLayerCurrent
             # Reset for next iteration and memory efficiency.
             indSet = None
@@ -56,7 +55,7 @@ def layer_supplemental_forcing(OutputObj, supplemental_precip, ConfigOptions, Mp
     :param MpiConfig:
     :return:
     """
-    indSet = np.where(supplemental_precip.final_supp_precip != ConfigOptions.globalNdv)
+    indSet = supplemental_precip.final_supp_precip != ConfigOptions.globalNdv
     layerIn = supplemental_precip.final_supp_precip
     layerOut = OutputObj.output_local[supplemental_precip.output_var_idx, :, :]
 
@@ -66,8 +65,8 @@ def layer_supplemental_forcing(OutputObj, supplemental_precip, ConfigOptions, Mp
     #    ConfigOptions.statusMsg = "Performing ExtAnA calculation"
     #    err_handler.log_msg(ConfigOptions, MpiConfig)
 
-    if len(indSet[0]) != 0:
-        layerOut[indSet] = layerIn[indSet]
+    if indSet.any():
+        np.copyto(layerOut, layerIn, where=indSet)
     else:
         # We have all missing data for the supplemental precip for this step.
         layerOut = layerOut
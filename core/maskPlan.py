@@ -0,0 +1,43 @@
+"""
+Precomputed plan of the destination cells without valid input data. The
+regridded mask of an input product only changes when its weights are
+(re)calculated, so the cells to set to missing after every regridded field
+are found once, instead of building np.where index tuples (one int64 array
+per dimension) for every variable of every step.
+"""
+import numpy as np
+
+# Masked fractions below which masked cells are set through their flat index.
+SPARSE_FRACTION = 0.1
+
+
+class MaskPlan:
+    """
+    Boolean mask, compressed flat index and valid cell count of the local
+    destination cells a regridded input product does not cover.
+    """
+    def __init__(self, regridded_mask):
+        """
+        :param regridded_mask: Local regridded mask (0 where there is no valid input data)
+        """
+        self.mask = np.asarray(regridded_mask) == 0
+        self.shape = self.mask.shape
+        index_type = np.int32 if self.mask.size < np.iinfo(np.int32).max else np.int64
+        self.flat_index = np.flatnonzero(self.mask).astype(index_type)
+        self.n_masked = self.flat_index.size
+        self.n_valid = self.mask.size - self.n_masked
+
+    def fill(self, field, value):
+        """
+        Set the masked cells of a local field, or of each field of a stack, in place.
+        :param field: [ny, nx] or [..., ny, nx] array on the destination grid
+        :param value: Scalar value, or array broadcastable to the field
+        :return:
+        """
+        if self.n_masked == 0:
+            return
+        if np.ndim(value) == 0 and field.shape == self.shape and field.flags.c_contiguous and \
+                self.n_masked < SPARSE_FRACTION * self.mask.size:
+            np.put(field, self.flat_index, value)
+        else:
+            np.copyto(field, value, where=self.mask)
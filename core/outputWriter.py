@@ -0,0 +1,40 @@
+"""
+Stand-alone writer process placing the gathered final output grids into an
+output file whose header has already been created by the forcing engine.
+Called as:
+
+    python outputWriter.py <output file> <JSON description of the grids>
+
+with the raw [nvar, ny, nx] stack of output grids on standard input. This
+module deliberately does not import MPI, so it can run next to the MPI
+processes of the forcing engine while they move on to the next output step.
+"""
+import json
+import sys
+
+import numpy as np
+from netCDF4 import Dataset
+
+
+def write_output_data(out_path, data_stack, var_indices):
+    """
+    Function to place final output grids into an existing output file.
+    :param out_path: Output file with a complete header
+    :param data_stack: Global [nvar, ny, nx] stack of output grids
+    :param var_indices: Dictionary mapping output variable names to their index in the stack
+    :return:
+    """
+    with Dataset(out_path, 'a') as id_out:
+        for var_name, var_idx in var_indices.items():
+            id_out.variables[var_name][0, :, :] = data_stack[var_idx, :, :]
+
+
+def main():
+    out_path = sys.argv[1]
+    grid_meta = json.loads(sys.argv[2])
+    data_stack = np.frombuffer(sys.stdin.buffer.read(), dtype=grid_meta['dtype']).reshape(grid_meta['shape'])
+    write_output_data(out_path, data_stack, grid_meta['variables'])
+
+
+if __name__ == '__main__':
+    main()
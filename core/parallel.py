@@ -2,9 +2,164 @@ import numpy as np
 import mpi4py
 mpi4py.rc.threaded = False
 from mpi4py import MPI
+from mpi4py.util import dtlib
 
 from core import err_handler
 
+# Data types that can be scattered without the caller specifying the dtype.
+# The index into this tuple is broadcast from rank 0 to the other processors.
+SCATTER_DTYPES = (np.float32, np.float64, np.bool_, np.int32)
+
+# Message tag used for point-to-point scatter/gather of non row-aligned slabs.
+SCATTER_TAG = 4231
+
+# MPI data types already built for numpy data types, keyed on the numpy data type.
+# They are kept for the length of the run, the same as the predefined MPI types.
+_MPI_DATATYPES = {}
+
+
+def mpi_datatype(dtype):
+    """
+    Map a numpy data type onto the matching MPI data type.
+    :param dtype:
+    :return:
+    """
+    dtype = np.dtype(dtype)
+    mpi_type = _MPI_DATATYPES.get(dtype)
+    if mpi_type is None:
+        if dtype.kind not in 'biufc':
+            raise TypeError("No MPI data type matches numpy data type: " + str(dtype))
+        try:
+            mpi_type = dtlib.from_numpy_dtype(dtype)
+        except (ValueError, KeyError):
+            raise TypeError("No MPI data type matches numpy data type: " + str(dtype))
+        _MPI_DATATYPES[dtype] = mpi_type
+    return mpi_type
+
+
+class ScatterPlan:
+    """
+    Precomputed layout of a global [ny, nx] grid decomposed over the
+    processors. Built once per grid (one Allgather of the local bounds)
+    and reused for every scatter and gather on that grid.
+    """
+    def __init__(self, key, ny_global, nx_global, global_bounds, rank):
+        """
+        :param key: Tuple identifying the grid dimensions and local bounds the plan was built for
+        :param ny_global:
+        :param nx_global:
+        :param global_bounds: Array of shape [size, 4] holding x_lower, y_lower, x_upper, y_upper per rank
+        :param rank:
+        """
+        self.key = key
+        self.ny_global = int(ny_global)
+        self.nx_global = int(nx_global)
+        self.x_lower = global_bounds[:, 0].astype(np.int64)
+        self.y_lower = global_bounds[:, 1].astype(np.int64)
+        self.x_upper = global_bounds[:, 2].astype(np.int64)
+        self.y_upper = global_bounds[:, 3].astype(np.int64)
+        self.rows = self.y_upper - self.y_lower
+        self.cols = self.x_upper - self.x_lower
+        self.local_shape = (int(self.rows[rank]), int(self.cols[rank]))
+
+        # ESMF decomposes the grids into full-width row slabs in rank order, in
+        # which case every slab is contiguous in the C-ordered global array and
+        # the global array itself can be used as the Scatterv/Gatherv buffer.
+        self.row_slabs = bool(np.all(self.x_lower == 0) and np.all(self.x_upper == self.nx_global) and
+                              self.y_lower[0] == 0 and self.y_upper[-1] == self.ny_global and
+                              np.all(self.y_lower[1:] == self.y_upper[:-1]))
+
+        self.counts = self.rows * self.cols
+        if self.row_slabs:
+            self.offsets = self.y_lower * self.nx_global
+        else:
+            self.offsets = np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+
+        self._block_types = {}
+        self._row_types = {}
+        self._stack_buffers = {}
+
+    def block_types(self, dtype):
+        """
+        Committed MPI subarray data types describing each rank's slab within
+        the global array, so non row-aligned slabs are sent and received in
+        place without packing.
+        :param dtype: numpy data type of the global array
+        :return:
+        """
+        key = np.dtype(dtype).str
+        types = self._block_types.get(key)
+        if types is None:
+            mpi_type = mpi_datatype(dtype)
+            types = [mpi_type.Create_subarray([self.ny_global, self.nx_global],
+                                              [int(self.rows[i]), int(self.cols[i])],
+                                              [int(self.y_lower[i]), int(self.x_lower[i])]).Commit()
+                     for i in range(len(self.counts))]
+            self._block_types[key] = types
+        return types
+
+    def stack_row_type(self, dtype, nvar):
+        """
+        Committed MPI data type selecting one grid row from each of the nvar
+        arrays of a global [nvar, ny, nx] stack. The type is resized to the
+        length of a single row, so counts and displacements of a row-slab
+        Scatterv/Gatherv are simply the number of rows and the first row of
+        each rank, and each rank exchanges its rows as a [ny_local, nvar, nx]
+        block without any packing on rank 0.
+        :param dtype: numpy data type of the stack
+        :param nvar: number of arrays in the stack
+        :return:
+        """
+        key = (np.dtype(dtype).str, nvar)
+        row_type = self._row_types.get(key)
+        if row_type is None:
+            mpi_type = mpi_datatype(dtype)
+            extent = mpi_type.Get_extent()[1]
+            vector_type = mpi_type.Create_vector(nvar, self.nx_global, self.ny_global * self.nx_global)
+            row_type = vector_type.Create_resized(0, self.nx_global * extent).Commit()
+            vector_type.Free()
+            self._row_types[key] = row_type
+        return row_type
+
+    def stack_buffer(self, dtype, nvar):
+        """
+        Global [nvar, ny, nx] receive buffer for stack gathers on rank 0.
+        The buffer is allocated once and reused by every gather of a stack
+        with the same data type and number of arrays.
+        :param dtype: numpy data type of the stack
+        :param nvar: number of arrays in the stack
+        :return:
+        """
+        key = (np.dtype(dtype).str, nvar)
+        buffer = self._stack_buffers.get(key)
+        if buffer is None:
+            buffer = np.empty([nvar, self.ny_global, self.nx_global], dtype)
+            self._stack_buffers[key] = buffer
+        return buffer
+
+    def local_block(self, global_array, rank):
+        """
+        View of a rank's slab within the global array.
+        :param global_array:
+        :param rank:
+        :return:
+        """
+        return global_array[self.y_lower[rank]:self.y_upper[rank], self.x_lower[rank]:self.x_upper[rank]]
+
+    def free(self):
+        """
+        Release the MPI data types held by the plan.
+        :return:
+        """
+        for types in self._block_types.values():
+            for block_type in types:
+                block_type.Free()
+        for row_type in self._row_types.values():
+            row_type.Free()
+        self._block_types = {}
+        self._row_types = {}
+        self._stack_buffers = {}
+
 
 class MpiConfig:
     """
@@ -20,6 +175,10 @@ class MpiConfig:
         self.comm = None
         self.rank = None
         self.size = None
+        self.scatter_plans = {}
+        self.node_comm = None
+        self.node_bounds = {}
+        self.shared_grids = {}
 
     def initialize_comm(self, config_options):
         """
@@ -222,10 +381,277 @@ class MpiConfig:
         subarray = np.reshape(recvbuf,[y_upper[self.rank] -y_lower[self.rank],x_upper[self.rank]- x_lower[self.rank]]).copy()
         return subarray
 
+    def broadcast_dtype(self, src_array, ConfigOptions):
+        """
+        Broadcast the numpy data type of an array on rank 0 to the
+        other processors.
+        :param src_array:
+        :param ConfigOptions:
+        :return:
+        """
+        if self.rank == 0:
+            data_type_buffer = np.array([-1], np.int32)
+            for flag, dtype in enumerate(SCATTER_DTYPES):
+                if src_array.dtype == dtype:
+                    data_type_buffer[0] = flag
+        else:
+            data_type_buffer = np.empty(1, np.int32)
+
+        try:
+            self.comm.Bcast(data_type_buffer, root=0)
+        except MPI.Exception:
+            ConfigOptions.errMsg = "Unable to broadcast numpy datatype value from rank 0"
+            err_handler.log_critical(ConfigOptions, self)
+            return None
+
+        if data_type_buffer[0] < 0:
+            # Anything else is scattered as double precision, as before.
+            return np.dtype(np.float64)
+        return np.dtype(SCATTER_DTYPES[data_type_buffer[0]])
+
+    def get_scatter_plan(self, geoMeta, ConfigOptions):
+        """
+        Return the cached scatter/gather plan for a grid, building it
+        (one Allgather of the local bounds) the first time the grid is seen
+        or after its decomposition has changed.
+        :param geoMeta: GeoMetaWrfHydro or input forcing object with global dimensions and local bounds
+        :param ConfigOptions:
+        :return:
+        """
+        key = (geoMeta.ny_global, geoMeta.nx_global,
+               geoMeta.x_lower_bound, geoMeta.y_lower_bound, geoMeta.x_upper_bound, geoMeta.y_upper_bound)
+        plan = self.scatter_plans.get(id(geoMeta))
+        if plan is not None and plan.key == key:
+            return plan
+
+        bounds = np.array([geoMeta.x_lower_bound, geoMeta.y_lower_bound,
+                           geoMeta.x_upper_bound, geoMeta.y_upper_bound], np.int32)
+        global_bounds = np.zeros((self.size, 4), np.int32)
+        try:
+            self.comm.Allgather([bounds, MPI.INT], [global_bounds, MPI.INT])
+        except MPI.Exception:
+            ConfigOptions.errMsg = "Failed all gathering global bounds at rank " + str(self.rank)
+            err_handler.log_critical(ConfigOptions, self)
+            return None
+
+        if plan is not None:
+            plan.free()
+        plan = ScatterPlan(key, geoMeta.ny_global, geoMeta.nx_global, global_bounds, self.rank)
+        self.scatter_plans[id(geoMeta)] = plan
+        return plan
+
+    def scatter_array_scatterv_plan(self, geoMeta, src_array, ConfigOptions, dtype=None):
+        """
+        Scatter a global [ny, nx] array on rank 0 to the local slabs of the
+        processors, using the cached plan for the grid.
+        :param geoMeta: GeoMetaWrfHydro or input forcing object the array is defined on
+        :param src_array: Global array on rank 0, ignored on the other processors
+        :param ConfigOptions:
+        :param dtype: Optional numpy data type. When given, rank 0 casts the array to it
+                      and the data type broadcast is skipped.
+        :return:
+        """
+        if dtype is None:
+            dtype = self.broadcast_dtype(src_array, ConfigOptions)
+            if dtype is None:
+                return None
+        dtype = np.dtype(dtype)
+
+        plan = self.get_scatter_plan(geoMeta, ConfigOptions)
+        if plan is None:
+            return None
+        data_type = mpi_datatype(dtype)
+
+        recvbuf = np.empty(plan.local_shape, dtype)
+        if self.rank == 0:
+            # Only copies when the array isn't already contiguous or of the right type.
+            sendbuf = np.ascontiguousarray(src_array, dtype=dtype)
+            if sendbuf.shape != (plan.ny_global, plan.nx_global):
+                ConfigOptions.errMsg = "Unable to scatter array of shape " + str(sendbuf.shape) + \
+                                       " onto a grid of shape " + str((plan.ny_global, plan.nx_global))
+                err_handler.log_critical(ConfigOptions, self)
+                err_handler.check_program_status(ConfigOptions, self)
+        else:
+            sendbuf = None
+
+        try:
+            if plan.row_slabs:
+                self.comm.Scatterv([sendbuf, plan.counts, plan.offsets, data_type], recvbuf, root=0)
+            elif self.rank == 0:
+                block_types = plan.block_types(dtype)
+                requests = [self.comm.Isend([sendbuf, 1, block_types[i]], dest=i, tag=SCATTER_TAG)
+                            for i in range(1, self.size)]
+                recvbuf[:, :] = plan.local_block(sendbuf, 0)
+                MPI.Request.Waitall(requests)
+            else:
+                self.comm.Recv([recvbuf, data_type], source=0, tag=SCATTER_TAG)
+        except MPI.Exception:
+            ConfigOptions.errMsg = "Failed Scatterv from rank 0"
+            err_handler.log_critical(ConfigOptions, self)
+            return None
+
+        return recvbuf
+
     # use scatterv based scatter_array
-    scatter_array = scatter_array_scatterv_no_cache
+    scatter_array = scatter_array_scatterv_plan
+
+    def scatter_stack(self, geoMeta, src_stack, nvar, ConfigOptions, dtype=None):
+        """
+        Scatter a global [nvar, ny, nx] stack of arrays on rank 0 to the local
+        slabs of the processors in a single collective.
+        :param geoMeta: GeoMetaWrfHydro or input forcing object the arrays are defined on
+        :param src_stack: Global stack on rank 0, ignored on the other processors
+        :param nvar: Number of arrays in the stack (needed on all processors)
+        :param ConfigOptions:
+        :param dtype: Optional numpy data type. When given, rank 0 casts the stack to it
+                      and the data type broadcast is skipped.
+        :return: Local stack of shape [nvar, ny_local, nx_local]
+        """
+        if dtype is None:
+            dtype = self.broadcast_dtype(src_stack, ConfigOptions)
+            if dtype is None:
+                return None
+        dtype = np.dtype(dtype)
+
+        plan = self.get_scatter_plan(geoMeta, ConfigOptions)
+        if plan is None:
+            return None
+        data_type = mpi_datatype(dtype)
+        ny_local, nx_local = plan.local_shape
+
+        sendbuf = None
+        if self.rank == 0:
+            sendbuf = np.ascontiguousarray(src_stack, dtype=dtype)
+            if sendbuf.shape != (nvar, plan.ny_global, plan.nx_global):
+                ConfigOptions.errMsg = "Unable to scatter stack of shape " + str(sendbuf.shape) + \
+                                       " onto a grid of shape " + str((nvar, plan.ny_global, plan.nx_global))
+                err_handler.log_critical(ConfigOptions, self)
+                err_handler.check_program_status(ConfigOptions, self)
+
+        try:
+            if plan.row_slabs:
+                recvbuf = np.empty([ny_local, nvar, nx_local], dtype)
+                self.comm.Scatterv([sendbuf, plan.rows, plan.y_lower, plan.stack_row_type(dtype, nvar)],
+                                   [recvbuf, data_type], root=0)
+                recvbuf = np.ascontiguousarray(recvbuf.transpose(1, 0, 2))
+            else:
+                # Pack each rank's [nvar, rows, cols] block contiguously on rank 0.
+                packed = None
+                if self.rank == 0:
+                    packed = np.empty(sendbuf.size, dtype)
+                    for i in range(self.size):
+                        start = plan.offsets[i] * nvar
+                        packed[start:start + plan.counts[i] * nvar] = \
+                            sendbuf[:, plan.y_lower[i]:plan.y_upper[i], plan.x_lower[i]:plan.x_upper[i]].ravel()
+                recvbuf = np.empty([nvar, ny_local, nx_local], dtype)
+                self.comm.Scatterv([packed, plan.counts * nvar, plan.offsets * nvar, data_type],
+                                   [recvbuf, data_type], root=0)
+        except MPI.Exception:
+            ConfigOptions.errMsg = "Failed Scatterv of variable stack from rank 0"
+            err_handler.log_critical(ConfigOptions, self)
+            return None
+
+        return recvbuf
+
+    def gather_array(self, geoMeta, local_slab, options):
+        """
+        Gather the local slabs of a grid into a global [ny, nx] array
+        on rank 0, using the cached plan for the grid.
+        :param geoMeta: GeoMetaWrfHydro or input forcing object the slabs are defined on
+        :param local_slab:
+        :param options:
+        :return: Global array on rank 0, None on the other processors
+        """
+        plan = self.get_scatter_plan(geoMeta, options)
+        if plan is None:
+            return None
+        data_type = mpi_datatype(local_slab.dtype)
+        sendbuf = np.ascontiguousarray(local_slab)
+
+        if self.rank == 0:
+            recvbuf = np.empty([plan.ny_global, plan.nx_global], local_slab.dtype)
+        else:
+            recvbuf = None
+
+        try:
+            if plan.row_slabs:
+                self.comm.Gatherv(sendbuf=sendbuf, recvbuf=[recvbuf, plan.counts, plan.offsets, data_type], root=0)
+            elif self.rank == 0:
+                block_types = plan.block_types(local_slab.dtype)
+                requests = [self.comm.Irecv([recvbuf, 1, block_types[i]], source=i, tag=SCATTER_TAG)
+                            for i in range(1, self.size)]
+                plan.local_block(recvbuf, 0)[:, :] = sendbuf
+                MPI.Request.Waitall(requests)
+            else:
+                self.comm.Send([sendbuf, data_type], dest=0, tag=SCATTER_TAG)
+        except MPI.Exception:
+            options.errMsg = "Failed to Gatherv to rank 0 from rank " + str(self.rank)
+            err_handler.log_critical(options, self)
+            return None
+
+        return recvbuf
+
+    def gather_stack(self, geoMeta, local_stack, options):
+        """
+        Gather the local [nvar, ny_local, nx_local] stacks of a grid into a
+        global [nvar, ny, nx] stack on rank 0 in a single collective, using
+        the cached plan for the grid. The global stack is a buffer held by
+        the plan and is overwritten by the next gather of a stack with the
+        same data type and number of arrays.
+        :param geoMeta: GeoMetaWrfHydro or input forcing object the stacks are defined on
+        :param local_stack:
+        :param options:
+        :return: Global stack on rank 0, None on the other processors
+        """
+        plan = self.get_scatter_plan(geoMeta, options)
+        if plan is None:
+            return None
+        nvar = local_stack.shape[0]
+        dtype = local_stack.dtype
+        data_type = mpi_datatype(dtype)
+
+        if self.rank == 0:
+            recvbuf = plan.stack_buffer(dtype, nvar)
+        else:
+            recvbuf = None
+
+        try:
+            if plan.row_slabs:
+                # Send the local rows as a [ny_local, nvar, nx] block, rank 0 places
+                # them straight into the global stack with the row data type.
+                sendbuf = np.ascontiguousarray(local_stack.transpose(1, 0, 2))
+                self.comm.Gatherv(sendbuf=[sendbuf, data_type],
+                                  recvbuf=[recvbuf, plan.rows, plan.y_lower, plan.stack_row_type(dtype, nvar)],
+                                  root=0)
+            else:
+                sendbuf = np.ascontiguousarray(local_stack)
+                packed = np.empty(nvar * plan.ny_global * plan.nx_global, dtype) if self.rank == 0 else None
+                self.comm.Gatherv(sendbuf=[sendbuf, data_type],
+                                  recvbuf=[packed, plan.counts * nvar, plan.offsets * nvar, data_type], root=0)
+                if self.rank == 0:
+                    for i in range(self.size):
+                        start = plan.offsets[i] * nvar
+                        recvbuf[:, plan.y_lower[i]:plan.y_upper[i], plan.x_lower[i]:plan.x_upper[i]] = \
+                            packed[start:start + plan.counts[i] * nvar].reshape(nvar, plan.rows[i], plan.cols[i])
+        except MPI.Exception:
+            options.errMsg = "Failed to Gatherv variable stack to rank 0 from rank " + str(self.rank)
+            err_handler.log_critical(options, self)
+            return None
 
-    def merge_slabs_gatherv(self, local_slab, options):
+        return recvbuf
+
+    def merge_slabs_gatherv(self, local_slab, options, geoMeta=None):
+        """
+        Gather the local slabs into a global array on rank 0. When the
+        grid object is given, the cached plan for it is used; otherwise
+        the layout is derived from the slab shapes on every call.
+        :param local_slab:
+        :param options:
+        :param geoMeta:
+        :return:
+        """
+        if geoMeta is not None:
+            return self.gather_array(geoMeta, local_slab, options)
 
         # gather buffer offsets and bounds to rank 0
         shapes = np.array([np.int32(local_slab.shape[0]), np.int32(local_slab.shape[1])])
@@ -279,7 +705,7 @@ class MpiConfig:
             data_type = MPI.FLOAT
         elif local_slab.dtype == np.float64:
             data_type = MPI.DOUBLE
-        elif data_type == np.int32:
+        elif local_slab.dtype == np.int32:
             data_type = MPI.INT
 
         # get the data with Gatherv
@@ -295,3 +721,104 @@ class MpiConfig:
 
         return recvbuf
 
+    def get_node_comm(self):
+        """
+        Return the communicator of the processors sharing memory on this
+        node, creating it the first time it is needed.
+        :return:
+        """
+        if self.node_comm is None:
+            self.node_comm = self.comm.Split_type(MPI.COMM_TYPE_SHARED, key=self.rank)
+        return self.node_comm
+
+    def get_node_bounds(self, geoMeta):
+        """
+        Return the bounds (y_lower, y_upper, x_lower, x_upper) of the part of
+        a global grid that covers the local slabs of all processors on this node.
+        :param geoMeta:
+        :return:
+        """
+        key = (geoMeta.ny_global, geoMeta.nx_global,
+               geoMeta.x_lower_bound, geoMeta.y_lower_bound, geoMeta.x_upper_bound, geoMeta.y_upper_bound)
+        node_bounds = self.node_bounds.get(id(geoMeta))
+        if node_bounds is not None and node_bounds[0] == key:
+            return node_bounds[1]
+
+        bounds = np.array([geoMeta.y_lower_bound, geoMeta.y_upper_bound,
+                           geoMeta.x_lower_bound, geoMeta.x_upper_bound], np.int32)
+        node_comm = self.get_node_comm()
+        all_bounds = np.zeros((node_comm.Get_size(), 4), np.int32)
+        node_comm.Allgather([bounds, MPI.INT], [all_bounds, MPI.INT])
+        window = (int(all_bounds[:, 0].min()), int(all_bounds[:, 1].max()),
+                  int(all_bounds[:, 2].min()), int(all_bounds[:, 3].max()))
+        self.node_bounds[id(geoMeta)] = (key, window)
+        return window
+
+    def shared_grid(self, geoMeta, key, read_window, ConfigOptions, dtype=np.float32):
+        """
+        Return the local slab of a static grid on the destination domain, held
+        in node-level shared memory (MPI-3 shared memory window). The first
+        processor on each node reads the part of the grid covering all local
+        slabs on the node, and every processor references its own slab in place.
+        Grids are cached by key, so objects asking for the same grid share it.
+        The returned slab is read-only.
+        :param geoMeta: GeoMetaWrfHydro object with global dimensions and local bounds
+        :param key: Hashable identifier of the grid (e.g. file path and variable name)
+        :param read_window: Function called on the first processor of every node with the
+                            y and x slices to read from the global grid. Returns the grid values,
+                            or None after logging an error.
+        :param ConfigOptions:
+        :param dtype: numpy data type of the grid
+        :return:
+        """
+        shared = self.shared_grids.get(key)
+        if shared is not None:
+            shared[2] += 1
+            return shared[1]
+
+        node_comm = self.get_node_comm()
+        y_lower, y_upper, x_lower, x_upper = self.get_node_bounds(geoMeta)
+        node_shape = (y_upper - y_lower, x_upper - x_lower)
+        itemsize = np.dtype(dtype).itemsize
+        if node_comm.Get_rank() == 0:
+            nbytes = node_shape[0] * node_shape[1] * itemsize
+        else:
+            nbytes = 0
+
+        try:
+            win = MPI.Win.Allocate_shared(nbytes, itemsize, comm=node_comm)
+            buf, _ = win.Shared_query(0)
+        except MPI.Exception:
+            ConfigOptions.errMsg = "Unable to allocate shared memory window on rank " + str(self.rank)
+            err_handler.log_critical(ConfigOptions, self)
+            return None
+        node_grid = np.ndarray(buffer=buf, dtype=dtype, shape=node_shape)
+
+        if node_comm.Get_rank() == 0:
+            window_data = read_window(slice(y_lower, y_upper), slice(x_lower, x_upper))
+            if window_data is not None:
+                node_grid[:, :] = window_data
+        err_handler.check_program_status(ConfigOptions, self)
+        node_comm.Barrier()
+
+        local_grid = node_grid[geoMeta.y_lower_bound - y_lower:geoMeta.y_upper_bound - y_lower,
+                               geoMeta.x_lower_bound - x_lower:geoMeta.x_upper_bound - x_lower]
+        local_grid.flags.writeable = False
+        self.shared_grids[key] = [win, local_grid, 1]
+        return local_grid
+
+    def release_shared_grid(self, local_grid):
+        """
+        Release a grid obtained from shared_grid. The shared memory window is
+        freed once every object using the grid has released it. Must be
+        called on all processors.
+        :param local_grid:
+        :return:
+        """
+        for key, shared in self.shared_grids.items():
+            if shared[1] is local_grid:
+                shared[2] -= 1
+                if shared[2] == 0:
+                    del self.shared_grids[key]
+                    shared[0].Free()
+                return
@@ -0,0 +1,145 @@
+"""
+Background staging of input files on the master processor. Once the input
+files of all products for an output step are known, a worker thread reads
+them ahead (and decompresses gzipped MRMS files into memory), while the
+products before them are still being regridded, bias corrected and
+downscaled. At most a fixed number of files is staged at a time.
+
+The worker also decodes the GRIB2 inputs of the next output step ahead, while
+the current step is processed, so products that need a new input file every
+step (including configurations with a single product) overlap their decoding
+with the regridding and output of the step before. The decoded inputs are
+kept in a bounded queue until the regridding routines take them.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import os
+import zlib
+
+# Size of the reads used to stage an input file.
+READ_CHUNK = 8 * 1024 * 1024
+
+
+def stage_file(path):
+    """
+    Stage an input file: decompress a gzipped file into memory, or read any
+    other file through once, so it is in the page cache when it is decoded.
+    :param path:
+    :return: Decompressed contents of a gzipped file, None otherwise
+    """
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rb') as gz_in:
+            return gz_in.read()
+    with open(path, 'rb') as file_in:
+        while file_in.read(READ_CHUNK):
+            pass
+    return None
+
+
+class Prefetcher:
+    """
+    Bounded set of input files staged by a background worker thread.
+    """
+    def __init__(self, max_files):
+        """
+        :param max_files: Maximum number of files staged at a time
+        """
+        self.max_files = max_files
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.staged = {}
+        # Inputs decoded ahead: key -> (future, output step it was queued in, cleanup function).
+        self.decoded = {}
+        # wgrib2 -match patterns the GRIB2 files were last decoded with, by file.
+        self.patterns = {}
+        self.generation = 0
+
+    def prefetch(self, path):
+        """
+        Queue an input file for staging, unless it is already queued, does not
+        exist, or the maximum number of staged files has been reached.
+        :param path:
+        :return:
+        """
+        if path is None or path in self.staged or len(self.staged) >= self.max_files:
+            return
+        if not os.path.isfile(path):
+            return
+        self.staged[path] = self.executor.submit(stage_file, path)
+
+    def take(self, path):
+        """
+        Return the decompressed contents of a staged gzipped file, waiting for
+        the worker if it is still staging it.
+        :param path:
+        :return: Decompressed contents, or None if the file was not staged or staging failed
+        """
+        future = self.staged.pop(path, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except (OSError, EOFError, zlib.error):
+            return None
+
+    def remember(self, path, match):
+        """
+        Record the wgrib2 -match patterns a GRIB2 file was decoded with, so the file
+        of the same product for the next output step can be decoded the same way.
+        :param path:
+        :param match:
+        :return:
+        """
+        self.patterns[path] = list(match)
+
+    def patterns_of(self, path):
+        """
+        Return the wgrib2 -match patterns a GRIB2 file was last decoded with.
+        :param path:
+        :return: List of patterns, or None if the file was not decoded
+        """
+        return self.patterns.get(path)
+
+    def decode(self, key, task, cleanup=None):
+        """
+        Queue an input to be decoded ahead by the worker, unless it is already
+        queued or the queue is full.
+        :param key: Key the decoded input is taken with
+        :param task: Function decoding the input, returning None if it fails
+        :param cleanup: Function releasing a decoded input that is not taken
+        :return:
+        """
+        if key in self.decoded or len(self.decoded) >= self.max_files:
+            return
+        self.decoded[key] = (self.executor.submit(task), self.generation, cleanup)
+
+    def take_decoded(self, key):
+        """
+        Return an input decoded ahead, waiting for the worker if it is still decoding it.
+        :param key:
+        :return: Decoded input, or None if it was not queued or decoding failed
+        """
+        entry = self.decoded.pop(key, None)
+        if entry is None:
+            return None
+        return entry[0].result()
+
+    def discard(self):
+        """
+        Drop the files that were staged but not used, at the end of an output step,
+        along with the inputs decoded ahead for this step that were not taken.
+        Inputs decoded ahead for the next step are kept.
+        :return:
+        """
+        for future in self.staged.values():
+            future.cancel()
+        self.staged = {}
+
+        for key, (future, generation, cleanup) in list(self.decoded.items()):
+            if generation == self.generation:
+                continue
+            del self.decoded[key]
+            if not future.cancel() and cleanup is not None:
+                result = future.result()
+                if result is not None:
+                    cleanup(result)
+        self.generation += 1
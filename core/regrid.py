@@ -7,6 +7,7 @@ import os
 import sys
 import traceback
 import time
+import uuid
 
 try:
     import ESMF
@@ -15,14 +16,33 @@ except ImportError:
 
 import numpy as np
 import numpy.ma as ma
+from mpi4py import MPI
+from netCDF4 import Dataset
 
 from core import err_handler
+from core import fieldCache
 from core import ioMod
+from core import maskPlan
+from core import regridRegistry
+from core import sparseRegrid
 from core import timeInterpMod
+from core import weightBuilder
+from core import weightStore
 
 NETCDF = "NETCDF"
 GRIB2 = "GRIB2"
 
+# Regrid engines selectable per input forcing product.
+ESMF_REGRID_ENGINE = 0
+SPARSE_REGRID_ENGINE = 1
+
+# Halo of source cells kept around the WRF-Hydro domain when cropping global source grids.
+CROP_HALO = 3
+
+# Generators of new regridding weights (RegridWeightBuilder).
+ESMF_WEIGHT_BUILDER = 0
+NUMPY_WEIGHT_BUILDER = 1
+
 next_file_number = 0
 
 
@@ -54,6 +74,86 @@ def create_link(name, input_file, tmpFile, config_options, mpi_config):
     err_handler.check_program_status(config_options, mpi_config)
 
 
+def get_read_window(input_forcings, mpi_config):
+    """
+    Function to return the index window of the global input grid this processor
+    reads input variables from. With a distributed read every processor reads its
+    own patch of the input grid, otherwise rank 0 reads the full grid (or the
+    window of it the source grid was cropped to).
+    :param input_forcings:
+    :param mpi_config:
+    :return: Tuple of (y, x) slices, or None if this processor reads nothing.
+    """
+    y_offset = 0
+    x_offset = 0
+    if input_forcings.src_window is not None:
+        y_offset = input_forcings.src_window[0].start
+        x_offset = input_forcings.src_window[1].start
+    if input_forcings.distributed_read:
+        return (slice(y_offset + input_forcings.y_lower_bound, y_offset + input_forcings.y_upper_bound),
+                slice(x_offset + input_forcings.x_lower_bound, x_offset + input_forcings.x_upper_bound))
+    if mpi_config.rank == 0:
+        return (slice(y_offset, y_offset + input_forcings.ny_global),
+                slice(x_offset, x_offset + input_forcings.nx_global))
+    return None
+
+
+def new_read_stack(window, nvar, dtype=np.float32):
+    """
+    Function to allocate an array holding nvar input variables read over a window.
+    :param window:
+    :param nvar:
+    :param dtype:
+    :return:
+    """
+    return np.empty([nvar, window[0].stop - window[0].start, window[1].stop - window[1].start], dtype)
+
+
+def scatter_input_stack(input_forcings, var_stack, nvar, config_options, mpi_config, dtype=None):
+    """
+    Function to hand a stack of input variables read over get_read_window to the
+    local processors. Stacks read by rank 0 are scattered in a single collective,
+    stacks from a distributed read already hold the local patch.
+    :param input_forcings:
+    :param var_stack:
+    :param nvar:
+    :param config_options:
+    :param mpi_config:
+    :param dtype:
+    :return: Local stack of shape [nvar, ny_local, nx_local]
+    """
+    if not input_forcings.distributed_read:
+        return mpi_config.scatter_stack(input_forcings, var_stack, nvar, config_options, dtype=dtype)
+
+    # A processor that failed to read its own patch brings the job down itself.
+    err_handler.check_program_status(config_options, mpi_config)
+    if dtype is not None:
+        var_stack = var_stack.astype(dtype, copy=False)
+    return var_stack
+
+
+def release_input_file(id_tmp, input_forcings, config_options, mpi_config):
+    """
+    Function to close the input file on the processors other than rank 0 after a
+    distributed read, and to make sure they are all done with it before rank 0
+    closes and removes it.
+    :param id_tmp:
+    :param input_forcings:
+    :param config_options:
+    :param mpi_config:
+    :return:
+    """
+    if not input_forcings.distributed_read:
+        return
+    if mpi_config.rank != 0 and id_tmp is not None:
+        try:
+            id_tmp.close()
+        except OSError:
+            config_options.errMsg = "Unable to close NetCDF file: " + input_forcings.tmpFile
+            err_handler.log_critical(config_options, mpi_config)
+    mpi_config.comm.barrier()
+
+
 def regrid_ak_ext_ana(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config):
     """
     Function for handling regridding of Alaska ExtAna data. Data was already regridded in the prior run of the AnA stage so just read data in.
@@ -270,8 +370,7 @@ def _regrid_ak_ext_ana_pcp_stage4(supplemental_precip, config_options, wrf_hydro
 
     # Set any pixel cells outside the input domain to the global missing value.
     try:
-        supplemental_precip.esmf_field_out.data[np.where(supplemental_precip.regridded_mask == 0)] = \
-            config_options.globalNdv
+        supplemental_precip.mask_plan.fill(supplemental_precip.esmf_field_out.data, config_options.globalNdv)
     except (ValueError, ArithmeticError) as npe:
         config_options.errMsg = "Unable to run mask search on STAGE IV supplemental precipitation: " + str(npe)
         err_handler.log_critical(config_options, mpi_config)
@@ -405,131 +504,145 @@ def regrid_conus_hrrr(input_forcings, config_options, wrf_hydro_geo_meta, mpi_co
         cmd = '$WGRIB2 -match "(' + '|'.join(fields) + ')" ' + input_forcings.file_in2 + \
               " -netcdf " + input_forcings.tmpFile
         id_tmp = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFile, cmd,
-                                  config_options, mpi_config, inputVar=None)
+                                  config_options, mpi_config, inputVar=None,
+                                  open_on_all_procs=input_forcings.distributed_read, match=fields)
         err_handler.check_program_status(config_options, mpi_config)
     else:
         create_link("HRRR", input_forcings.file_in2, input_forcings.tmpFile, config_options, mpi_config)
-        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config)
+        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config,
+                                           open_on_all_procs=input_forcings.distributed_read)
 
-    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+    calc_regrid_flag = check_regrid_status(id_tmp, 0, input_forcings,
+                                           config_options, wrf_hydro_geo_meta, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    if calc_regrid_flag:
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Processing HRRR Variable: " + grib_var
+            config_options.statusMsg = "Calculating HRRR regridding weights."
             err_handler.log_msg(config_options, mpi_config)
-
-        calc_regrid_flag = check_regrid_status(id_tmp, force_count, input_forcings,
-                                               config_options, wrf_hydro_geo_meta, mpi_config)
+        calculate_weights(id_tmp, 0, input_forcings, config_options, mpi_config)
         err_handler.check_program_status(config_options, mpi_config)
 
-        if calc_regrid_flag:
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Calculating HRRR regridding weights."
-                err_handler.log_msg(config_options, mpi_config)
-            calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            # # Read in the HRRR height field, which is used for downscaling purposes.
-            # if mpi_config.rank == 0:
-            #     config_options.statusMsg = "Reading in HRRR elevation data."
-            #     err_handler.log_msg(config_options, mpi_config)
-            # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
-            #       "\":(HGT):(surface):\" " + \
-            #       " -netcdf " + input_forcings.tmpFileHeight
-            # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
-            #                                  cmd, config_options, mpi_config, 'HGT_surface')
-            # err_handler.check_program_status(config_options, mpi_config)
-
-            # Regrid the height variable.
-            var_tmp = None
-            if mpi_config.rank == 0:
-                try:
-                    if 0 < input_forcings.cycleFreq < 60:
-                        var_tmp = id_tmp.variables['HGT_surface'][sub_id]
-                    else:
-                        var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
-
-                except (ValueError, KeyError, AttributeError) as err:
-                    config_options.errMsg = "Unable to extract HRRR elevation from " + \
-                                input_forcings.tmpFile + ": " + str(err)
-
-            err_handler.check_program_status(config_options, mpi_config)
-
-            var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-            err_handler.check_program_status(config_options, mpi_config)
-
+        # # Read in the HRRR height field, which is used for downscaling purposes.
+        # if mpi_config.rank == 0:
+        #     config_options.statusMsg = "Reading in HRRR elevation data."
+        #     err_handler.log_msg(config_options, mpi_config)
+        # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
+        #       "\":(HGT):(surface):\" " + \
+        #       " -netcdf " + input_forcings.tmpFileHeight
+        # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
+        #                                  cmd, config_options, mpi_config, 'HGT_surface')
+        # err_handler.check_program_status(config_options, mpi_config)
+
+        # Regrid the height variable.
+        var_tmp = None
+        if mpi_config.rank == 0:
             try:
-                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to place input NetCDF HRRR data into the ESMF field object: " + str(err)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+                if 0 < input_forcings.cycleFreq < 60:
+                    var_tmp = id_tmp.variables['HGT_surface'][sub_id]
+                else:
+                    var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
 
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Regridding HRRR surface elevation data to the WRF-Hydro domain."
-                err_handler.log_msg(config_options, mpi_config)
-            try:
-                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                         input_forcings.esmf_field_out)
-            except ValueError as ve:
-                config_options.errMsg = "Unable to regrid HRRR surface elevation using ESMF: " + str(ve)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+            except (ValueError, KeyError, AttributeError) as err:
+                config_options.errMsg = "Unable to extract HRRR elevation from " + \
+                            input_forcings.tmpFile + ": " + str(err)
 
-            # Set any pixel cells outside the input domain to the global missing value.
-            try:
-                input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                    config_options.globalNdv
-            except (ValueError, ArithmeticError) as npe:
-                config_options.errMsg = "Unable to perform HRRR mask search on elevation data: " + str(npe)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            try:
-                input_forcings.height[:, :] = input_forcings.esmf_field_out.data
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to extract regridded HRRR elevation data from ESMF: " + str(err)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            # Close the temporary NetCDF file and remove it.
-            # if mpi_config.rank == 0:
-            #     try:
-            #         id_tmp_height.close()
-            #     except OSError:
-            #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
-            #
-            #     try:
-            #         os.remove(input_forcings.tmpFileHeight)
-            #     except OSError:
-            #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to place input NetCDF HRRR data into the ESMF field object: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
         err_handler.check_program_status(config_options, mpi_config)
 
-        # Regrid the input variables.
-        var_tmp = None
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Processing input HRRR variable: " + \
-                                       input_forcings.netcdf_var_names[force_count]
+            config_options.statusMsg = "Regridding HRRR surface elevation data to the WRF-Hydro domain."
             err_handler.log_msg(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                     input_forcings.esmf_field_out)
+        except ValueError as ve:
+            config_options.errMsg = "Unable to regrid HRRR surface elevation using ESMF: " + str(ve)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
+
+        # Set any pixel cells outside the input domain to the global missing value.
+        try:
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
+        except (ValueError, ArithmeticError) as npe:
+            config_options.errMsg = "Unable to perform HRRR mask search on elevation data: " + str(npe)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
+
+        try:
+            input_forcings.height[:, :] = input_forcings.esmf_field_out.data
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to extract regridded HRRR elevation data from ESMF: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
+
+        # Close the temporary NetCDF file and remove it.
+        # if mpi_config.rank == 0:
+        #     try:
+        #         id_tmp_height.close()
+        #     except OSError:
+        #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+        #
+        #     try:
+        #         os.remove(input_forcings.tmpFileHeight)
+        #     except OSError:
+        #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    # Read all of the input variables. Either rank 0 reads the full grids and scatters them
+    # to the local processors in a single collective, or, for a distributed read, every
+    # processor reads its own patch of the input grid directly from the file.
+    window = get_read_window(input_forcings, mpi_config)
+    var_stack = None
+    if window is not None:
+        var_stack = new_read_stack(window, len(input_forcings.grib_vars))
+        for force_count, grib_var in enumerate(input_forcings.grib_vars):
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Processing input HRRR variable: " + \
+                                           input_forcings.netcdf_var_names[force_count]
+                err_handler.log_msg(config_options, mpi_config)
             try:
-                if 0 < input_forcings.cycleFreq < 60:
-                    var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][sub_id, :, :]
-                else:
-                    var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, :, :]
+                time_index = sub_id if 0 < input_forcings.cycleFreq < 60 else 0
+                var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][time_index,
+                                                                                        window[0], window[1]]
 
                 if grib_var == "APCP":
                     var_tmp /= 3600     # convert hourly accumulated precip to instantaneous rate
                 if grib_var == 'CPOFP':
                     var_tmp[var_tmp >=0] = (100 - var_tmp[var_tmp >=0]) / 100  # convert frozen fraction to liquid fraction
                     var_tmp[var_tmp < 0] = -1.0                                # flag as missing so we use temperature partitioning
+                var_stack[force_count, :, :] = var_tmp
             except (ValueError, KeyError, AttributeError) as err:
                 config_options.errMsg = "Unable to extract: " + input_forcings.netcdf_var_names[force_count] + \
                                         " from: " + input_forcings.tmpFile + " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+                break
+    err_handler.check_program_status(config_options, mpi_config)
 
-        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-        err_handler.check_program_status(config_options, mpi_config)
+    var_sub_stack = scatter_input_stack(input_forcings, var_stack, len(input_forcings.grib_vars),
+                                        config_options, mpi_config, dtype=np.float32)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    # Regrid all variables at once.
+    regridded_stack = regrid_input_stack(input_forcings, var_sub_stack, config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Processing HRRR Variable: " + grib_var
+            err_handler.log_msg(config_options, mpi_config)
+        var_sub_tmp = var_sub_stack[force_count, :, :]
 
         if grib_var == 'TMP' and input_forcings.t2dDownscaleOpt == 3:         # dynamic lapse rate from RAP
             # if input_forcings.lapseGrid is None:
@@ -550,29 +663,31 @@ def regrid_conus_hrrr(input_forcings, config_options, wrf_hydro_geo_meta, mpi_co
                 err_handler.log_critical(config_options, mpi_config)
             err_handler.check_program_status(config_options, mpi_config)
 
-        try:
-            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+        if regridded_stack is None:
+            try:
+                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
 
-        except (ValueError, KeyError, AttributeError) as err:
-            config_options.errMsg = "Unable to place input HRRR data into ESMF field: " + str(err)
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+            except (ValueError, KeyError, AttributeError) as err:
+                config_options.errMsg = "Unable to place input HRRR data into ESMF field: " + str(err)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
 
-        if mpi_config.rank == 0:
-            config_options.statusMsg = "Regridding Input HRRR Field: " + input_forcings.netcdf_var_names[force_count]
-            err_handler.log_msg(config_options, mpi_config)
-        try:
-            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                     input_forcings.esmf_field_out)
-        except ValueError as ve:
-            config_options.errMsg = "Unable to regrid input HRRR forcing data: " + str(ve)
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Regridding Input HRRR Field: " + input_forcings.netcdf_var_names[force_count]
+                err_handler.log_msg(config_options, mpi_config)
+            try:
+                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                         input_forcings.esmf_field_out)
+            except ValueError as ve:
+                config_options.errMsg = "Unable to regrid input HRRR forcing data: " + str(ve)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+        else:
+            input_forcings.esmf_field_out.data[:, :] = regridded_stack[force_count, :, :]
 
         # Set any pixel cells outside the input domain to the global missing value.
         try:
-            input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                config_options.globalNdv
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
         except (ValueError, ArithmeticError) as npe:
             config_options.errMsg = "Unable to perform mask test on regridded HRRR forcings: " + str(npe)
             err_handler.log_critical(config_options, mpi_config)
@@ -593,6 +708,8 @@ def regrid_conus_hrrr(input_forcings, config_options, wrf_hydro_geo_meta, mpi_co
                 input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :]
         # mpi_config.comm.barrier()
 
+    release_input_file(id_tmp, input_forcings, config_options, mpi_config)
+
     # Close the temporary NetCDF file and remove it.
     if mpi_config.rank == 0:
         try:
@@ -601,7 +718,8 @@ def regrid_conus_hrrr(input_forcings, config_options, wrf_hydro_geo_meta, mpi_co
             config_options.errMsg = "Unable to close NetCDF file: " + input_forcings.tmpFile
             err_handler.log_critical(config_options, mpi_config)
         try:
-            os.remove(input_forcings.tmpFile)
+            if os.path.lexists(input_forcings.tmpFile):
+                os.remove(input_forcings.tmpFile)
         except OSError:
             config_options.errMsg = "Unable to remove NetCDF file: " + input_forcings.tmpFile
             err_handler.log_critical(config_options, mpi_config)
@@ -676,146 +794,160 @@ def regrid_conus_rap(input_forcings, config_options, wrf_hydro_geo_meta, mpi_con
         cmd = f'cat {input_forcings.file_in2} {input_forcings.file_in2.replace("bgrb", "pgrb")} | ' + \
               f'$WGRIB2 -match "(' + '|'.join(fields) + f')" -netcdf {input_forcings.tmpFile} -'
         id_tmp = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFile, cmd,
-                                  config_options, mpi_config, inputVar=None)
+                                  config_options, mpi_config, inputVar=None,
+                                  open_on_all_procs=input_forcings.distributed_read, match=fields,
+                                  grib_files=[input_forcings.file_in2, input_forcings.file_in2.replace("bgrb", "pgrb")])
         err_handler.check_program_status(config_options, mpi_config)
     else:
         create_link("RAP", input_forcings.file_in2, input_forcings.tmpFile, config_options, mpi_config)
-        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config)
+        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config,
+                                           open_on_all_procs=input_forcings.distributed_read)
+
+    # LQFRAC is derived from the precipitation type fields and has no variable of its own
+    # in the file, so take the grid dimensions from the first variable that does.
+    weight_index = [grib_var != "LQFRAC" for grib_var in input_forcings.grib_vars].index(True)
+    calc_regrid_flag = check_regrid_status(id_tmp, weight_index, input_forcings,
+                                           config_options, wrf_hydro_geo_meta, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
 
-    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+    if calc_regrid_flag:
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Processing Conus RAP Variable: " + grib_var
+            config_options.statusMsg = "Calculating RAP regridding weights."
             err_handler.log_msg(config_options, mpi_config)
+        calculate_weights(id_tmp, weight_index, input_forcings, config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-        if grib_var != "LQFRAC":
-            calc_regrid_flag = check_regrid_status(id_tmp, force_count, input_forcings,
-                                                config_options, wrf_hydro_geo_meta, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-        else:
-            calc_regrid_flag = False
-
-        if calc_regrid_flag:
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Calculating RAP regridding weights."
-                err_handler.log_msg(config_options, mpi_config)
-            calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            # Read in the RAP height field, which is used for downscaling purposes.
-            # if mpi_config.rank == 0:
-            #     config_options.statusMsg = "Reading in RAP elevation data."
-            #     err_handler.log_msg(config_options, mpi_config)
-            # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
-            #       "\":(HGT):(surface):\" " + \
-            #       " -netcdf " + input_forcings.tmpFileHeight
-            # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
-            #                                  cmd, config_options, mpi_config, 'HGT_surface')
-            # err_handler.check_program_status(config_options, mpi_config)
-
-            # Regrid the height variable.
-            hgt_tmp = None
-            if mpi_config.rank == 0:
-                try:
-                    hgt_tmp = id_tmp.variables['HGT_surface'][0, :, :]
-                except (ValueError, KeyError, AttributeError) as err:
-                    config_options.errMsg = "Unable to extract HGT_surface from : " + id_tmp + \
-                                            " (" + str(err) + ")"
-                    err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            var_sub_tmp = mpi_config.scatter_array(input_forcings, hgt_tmp, config_options)
-            err_handler.check_program_status(config_options, mpi_config)
-
+        # Read in the RAP height field, which is used for downscaling purposes.
+        # if mpi_config.rank == 0:
+        #     config_options.statusMsg = "Reading in RAP elevation data."
+        #     err_handler.log_msg(config_options, mpi_config)
+        # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
+        #       "\":(HGT):(surface):\" " + \
+        #       " -netcdf " + input_forcings.tmpFileHeight
+        # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
+        #                                  cmd, config_options, mpi_config, 'HGT_surface')
+        # err_handler.check_program_status(config_options, mpi_config)
+
+        # Regrid the height variable.
+        hgt_tmp = None
+        if mpi_config.rank == 0:
             try:
-                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+                hgt_tmp = id_tmp.variables['HGT_surface'][0, :, :]
             except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to place temporary RAP elevation variable into ESMF field: " + str(err)
+                config_options.errMsg = "Unable to extract HGT_surface from : " + id_tmp + \
+                                        " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Regridding RAP surface elevation data to the WRF-Hydro domain."
-                err_handler.log_msg(config_options, mpi_config)
-            try:
-                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                         input_forcings.esmf_field_out)
-            except ValueError as ve:
-                config_options.errMsg = "Unable to regrid RAP elevation data using ESMF: " + str(ve)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        var_sub_tmp = mpi_config.scatter_array(input_forcings, hgt_tmp, config_options)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            # Set any pixel cells outside the input domain to the global missing value.
-            try:
-                input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                    config_options.globalNdv
-            except (ValueError, ArithmeticError) as npe:
-                config_options.errMsg = "Unable to perform mask search on RAP elevation data: " + str(npe)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to place temporary RAP elevation variable into ESMF field: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            try:
-                input_forcings.height[:, :] = input_forcings.esmf_field_out.data
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to place RAP ESMF elevation field into local array: " + str(err)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Regridding RAP surface elevation data to the WRF-Hydro domain."
+            err_handler.log_msg(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                     input_forcings.esmf_field_out)
+        except ValueError as ve:
+            config_options.errMsg = "Unable to regrid RAP elevation data using ESMF: " + str(ve)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
+
+        # Set any pixel cells outside the input domain to the global missing value.
+        try:
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
+        except (ValueError, ArithmeticError) as npe:
+            config_options.errMsg = "Unable to perform mask search on RAP elevation data: " + str(npe)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            # Close the temporary NetCDF file and remove it.
-            # if mpi_config.rank == 0:
-            #     try:
-            #         id_tmp_height.close()
-            #     except OSError:
-            #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
-            #
-            #     try:
-            #         os.remove(input_forcings.tmpFileHeight)
-            #     except OSError:
-            #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
-            # err_handler.check_program_status(config_options, mpi_config)
+        try:
+            input_forcings.height[:, :] = input_forcings.esmf_field_out.data
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to place RAP ESMF elevation field into local array: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-        # Regrid the input variables.
-        var_tmp = None
-        if mpi_config.rank == 0:
+        # Close the temporary NetCDF file and remove it.
+        # if mpi_config.rank == 0:
+        #     try:
+        #         id_tmp_height.close()
+        #     except OSError:
+        #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+        #
+        #     try:
+        #         os.remove(input_forcings.tmpFileHeight)
+        #     except OSError:
+        #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+        # err_handler.check_program_status(config_options, mpi_config)
+
+    # Read all of the input variables. Either rank 0 reads the full grids and scatters them
+    # to the local processors in a single collective, or, for a distributed read, every
+    # processor reads its own patch of the input grid directly from the file.
+    window = get_read_window(input_forcings, mpi_config)
+    var_stack = None
+    if window is not None:
+        var_stack = new_read_stack(window, len(input_forcings.grib_vars))
+        for force_count, grib_var in enumerate(input_forcings.grib_vars):
             try:
                 if grib_var == "LQFRAC":
-                    var_tmp_CFRZR = id_tmp.variables['CFRZR_surface'][0, :, :]
-                    var_tmp_CICEP = id_tmp.variables['CICEP_surface'][0, :, :]
-                    var_tmp_CSNOW = id_tmp.variables['CSNOW_surface'][0, :, :]
-                    var_tmp_CRAIN = id_tmp.variables['CRAIN_surface'][0, :, :]
+                    var_tmp_CFRZR = id_tmp.variables['CFRZR_surface'][0, window[0], window[1]]
+                    var_tmp_CICEP = id_tmp.variables['CICEP_surface'][0, window[0], window[1]]
+                    var_tmp_CSNOW = id_tmp.variables['CSNOW_surface'][0, window[0], window[1]]
+                    var_tmp_CRAIN = id_tmp.variables['CRAIN_surface'][0, window[0], window[1]]
 
                     var_tmp = var_tmp_CRAIN / (var_tmp_CFRZR+var_tmp_CSNOW+var_tmp_CICEP+1)
                     var_tmp = np.where(var_tmp_CFRZR+var_tmp_CSNOW+var_tmp_CICEP+var_tmp_CRAIN == 0, -1, var_tmp)       # flag for temperature partitioning
                 else:
-                    var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, :, :]
+                    var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, window[0], window[1]]
                     if grib_var in ("APCP",):
                         var_tmp /= 3600     # convert hourly accumulated precip to instantaneous rate
+                var_stack[force_count, :, :] = var_tmp
             except (ValueError, KeyError, AttributeError) as err:
                 config_options.errMsg = "Unable to extract: " + input_forcings.netcdf_var_names[force_count] + \
                                         " from: " + input_forcings.tmpFile + \
                                         " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
+                break
+    err_handler.check_program_status(config_options, mpi_config)
 
-        err_handler.check_program_status(config_options, mpi_config)
+    var_sub_stack = scatter_input_stack(input_forcings, var_stack, len(input_forcings.grib_vars),
+                                        config_options, mpi_config, dtype=np.float32)
+    err_handler.check_program_status(config_options, mpi_config)
 
-        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-        err_handler.check_program_status(config_options, mpi_config)
+    # Regrid all variables at once.
+    regridded_stack = regrid_input_stack(input_forcings, var_sub_stack, config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Processing Conus RAP Variable: " + grib_var
+            err_handler.log_msg(config_options, mpi_config)
+        var_sub_tmp = var_sub_stack[force_count, :, :]
 
         if grib_var == 'TMP' and input_forcings.t2dDownscaleOpt == 3:         # dynamic lapse rate
             dyn_lapse = None
             if input_forcings.lapseGrid is None:
                 input_forcings.lapseGrid = np.empty([wrf_hydro_geo_meta.ny_local, wrf_hydro_geo_meta.nx_local],np.float32)
-            if mpi_config.rank == 0:
+            if window is not None:
                 # read HGT,0,12 and TMP,12
                 # TODO: parameterize the level
                 try:
-                    hgt_top = id_tmp.variables['HGT_12hybridlevel'][0, :, :]
-                    hgt_bot = id_tmp.variables['HGT_surface'][0, :, :]
-                    tmp_top = id_tmp.variables['TMP_12hybridlevel'][0, :, :]
+                    hgt_top = id_tmp.variables['HGT_12hybridlevel'][0, window[0], window[1]]
+                    hgt_bot = id_tmp.variables['HGT_surface'][0, window[0], window[1]]
+                    tmp_top = id_tmp.variables['TMP_12hybridlevel'][0, window[0], window[1]]
 
                     hgt_delta = hgt_top - hgt_bot
-                    tmp_delta = tmp_top - var_tmp
+                    tmp_delta = tmp_top - var_stack[force_count, :, :]
                     dyn_lapse = -1000 * (tmp_delta / hgt_delta)
 
                     # limit the dyn_lapse to the range (-10,10) TODO: this could be parameterized
@@ -827,7 +959,12 @@ def regrid_conus_rap(input_forcings, config_options, wrf_hydro_geo_meta, mpi_con
                     err_handler.log_critical(config_options, mpi_config)
             err_handler.check_program_status(config_options, mpi_config)
 
-            dyn_sub_tmp = mpi_config.scatter_array(input_forcings, dyn_lapse, config_options)
+            if input_forcings.distributed_read:
+                if config_options.errFlag:
+                    mpi_config.comm.Abort()
+                dyn_sub_tmp = dyn_lapse
+            else:
+                dyn_sub_tmp = mpi_config.scatter_array(input_forcings, dyn_lapse, config_options)
             try:
                 input_forcings.esmf_field_in.data[:, :] = dyn_sub_tmp
             except (ValueError, KeyError, AttributeError) as err:
@@ -848,8 +985,7 @@ def regrid_conus_rap(input_forcings, config_options, wrf_hydro_geo_meta, mpi_con
 
             # Set any pixel cells outside the input domain to the global missing value.
             try:
-                input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                    config_options.globalNdv
+                input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
             except (ValueError, ArithmeticError) as npe:
                 config_options.errMsg = "Unable to perform mask search on RAP lapse rate: " + str(npe)
                 err_handler.log_critical(config_options, mpi_config)
@@ -874,29 +1010,31 @@ def regrid_conus_rap(input_forcings, config_options, wrf_hydro_geo_meta, mpi_con
             dyn_lapse = None
             dyn_sub_tmp = None
 
-        try:
-            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
-        except (ValueError, KeyError, AttributeError) as err:
-            config_options.errMsg = "Unable to place local RAP array into ESMF field: " + str(err)
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+        if regridded_stack is None:
+            try:
+                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+            except (ValueError, KeyError, AttributeError) as err:
+                config_options.errMsg = "Unable to place local RAP array into ESMF field: " + str(err)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
 
-        if mpi_config.rank == 0:
-            config_options.statusMsg = "Regridding Input RAP Field: " + input_forcings.netcdf_var_names[force_count]
-            err_handler.log_msg(config_options, mpi_config)
-        try:
-            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                     input_forcings.esmf_field_out)
-        except ValueError as ve:
-            config_options.errMsg = "Unable to regrid RAP variable: " + input_forcings.netcdf_var_names[force_count] \
-                                    + str(ve)
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Regridding Input RAP Field: " + input_forcings.netcdf_var_names[force_count]
+                err_handler.log_msg(config_options, mpi_config)
+            try:
+                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                         input_forcings.esmf_field_out)
+            except ValueError as ve:
+                config_options.errMsg = "Unable to regrid RAP variable: " + input_forcings.netcdf_var_names[force_count] \
+                                        + str(ve)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+        else:
+            input_forcings.esmf_field_out.data[:, :] = regridded_stack[force_count, :, :]
 
         # Set any pixel cells outside the input domain to the global missing value.
         try:
-            input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                config_options.globalNdv
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
         except (ValueError, ArithmeticError) as npe:
             config_options.errMsg = "Unable to run mask calculation on RAP variable: " + \
                                     input_forcings.netcdf_var_names[force_count] + " (" + str(npe) + ")"
@@ -925,6 +1063,8 @@ def regrid_conus_rap(input_forcings, config_options, wrf_hydro_geo_meta, mpi_con
                 input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :]
         err_handler.check_program_status(config_options, mpi_config)
 
+    release_input_file(id_tmp, input_forcings, config_options, mpi_config)
+
     # Close the temporary NetCDF file and remove it.
     if mpi_config.rank == 0:
         try:
@@ -933,7 +1073,8 @@ def regrid_conus_rap(input_forcings, config_options, wrf_hydro_geo_meta, mpi_con
             config_options.errMsg = "Unable to close NetCDF file: " + input_forcings.tmpFile
             err_handler.log_critical(config_options, mpi_config)
         try:
-            os.remove(input_forcings.tmpFile)
+            if os.path.lexists(input_forcings.tmpFile):
+                os.remove(input_forcings.tmpFile)
         except OSError:
             config_options.errMsg = "Unable to remove NetCDF file: " + input_forcings.tmpFile
             err_handler.log_critical(config_options, mpi_config)
@@ -1001,125 +1142,143 @@ def regrid_cfsv2(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config)
         cmd = '$WGRIB2 -match "(' + '|'.join(fields) + ')" ' + input_forcings.file_in2 + \
               " -netcdf " + input_forcings.tmpFile
         id_tmp = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFile, cmd,
-                                  config_options, mpi_config, inputVar=None)
+                                  config_options, mpi_config, inputVar=None,
+                                  open_on_all_procs=input_forcings.distributed_read, match=fields)
         err_handler.check_program_status(config_options, mpi_config)
     else:
         create_link("CFSv2", input_forcings.file_in2, input_forcings.tmpFile, config_options, mpi_config)
-        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config)
+        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config,
+                                           open_on_all_procs=input_forcings.distributed_read)
 
-    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+    calc_regrid_flag = check_regrid_status(id_tmp, 0, input_forcings,
+                                           config_options, wrf_hydro_geo_meta, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    if calc_regrid_flag:
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Processing CFSv2 Variable: " + grib_var
+            config_options.statusMsg = "Calculate CFSv2 regridding weights."
             err_handler.log_msg(config_options, mpi_config)
 
-        calc_regrid_flag = check_regrid_status(id_tmp, force_count, input_forcings,
-                                               config_options, wrf_hydro_geo_meta, mpi_config)
+        calculate_weights(id_tmp, 0, input_forcings, config_options, mpi_config,
+                          wrf_hydro_geo_meta=wrf_hydro_geo_meta)
         err_handler.check_program_status(config_options, mpi_config)
 
-        if calc_regrid_flag:
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Calculate CFSv2 regridding weights."
-                err_handler.log_msg(config_options, mpi_config)
-
-            calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            # Read in the RAP height field, which is used for downscaling purposes.
-            # if mpi_config.rank == 0:
-            #     config_options.statusMsg = "Reading in CFSv2 elevation data."
-            #     err_handler.log_msg(config_options, mpi_config)
-            #
-            # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
-            #       "\":(HGT):(surface):\" " + \
-            #       " -netcdf " + input_forcings.tmpFileHeight
-            # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
-            #                                  cmd, config_options, mpi_config, 'HGT_surface')
-            # err_handler.check_program_status(config_options, mpi_config)
-
-            # Regrid the height variable.
-            var_tmp = None
-            if mpi_config.rank == 0:
-                try:
-                    var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
-                except (ValueError, KeyError, AttributeError) as err:
-                    config_options.errMsg = "Unable to extract HGT_surface from file: " \
-                                            + input_forcings.file_in2 + " (" + str(err) + ")"
-                    err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-            err_handler.check_program_status(config_options, mpi_config)
-
+        # Read in the RAP height field, which is used for downscaling purposes.
+        # if mpi_config.rank == 0:
+        #     config_options.statusMsg = "Reading in CFSv2 elevation data."
+        #     err_handler.log_msg(config_options, mpi_config)
+        #
+        # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
+        #       "\":(HGT):(surface):\" " + \
+        #       " -netcdf " + input_forcings.tmpFileHeight
+        # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
+        #                                  cmd, config_options, mpi_config, 'HGT_surface')
+        # err_handler.check_program_status(config_options, mpi_config)
+
+        # Regrid the height variable.
+        var_tmp = None
+        if mpi_config.rank == 0:
             try:
-                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+                var_tmp = id_tmp.variables['HGT_surface'][0, input_forcings.src_window[0],
+                                                           input_forcings.src_window[1]]
             except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to place CFSv2 elevation data into the ESMF field object: " + str(err)
+                config_options.errMsg = "Unable to extract HGT_surface from file: " \
+                                        + input_forcings.file_in2 + " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Regridding CFSv2 elevation data to the WRF-Hydro domain."
-                err_handler.log_msg(config_options, mpi_config)
+        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            try:
-                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                         input_forcings.esmf_field_out)
-            except ValueError as ve:
-                config_options.errMsg = "Unable to regrid CFSv2 elevation data to the WRF-Hydro domain: " + str(ve)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to place CFSv2 elevation data into the ESMF field object: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            # Set any pixel cells outside the input domain to the global missing value.
-            try:
-                input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                    config_options.globalNdv
-            except (ValueError, ArithmeticError) as npe:
-                config_options.errMsg = "Unable to run mask calculation on CFSv2 elevation data: " + str(npe)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Regridding CFSv2 elevation data to the WRF-Hydro domain."
+            err_handler.log_msg(config_options, mpi_config)
 
-            try:
-                input_forcings.height[:, :] = input_forcings.esmf_field_out.data
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to extract CFSv2 regridded elevation data from ESMF field: " + str(err)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                     input_forcings.esmf_field_out)
+        except ValueError as ve:
+            config_options.errMsg = "Unable to regrid CFSv2 elevation data to the WRF-Hydro domain: " + str(ve)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            # Close the temporary NetCDF file and remove it.
-            # if mpi_config.rank == 0:
-            #     try:
-            #         id_tmp_height.close()
-            #     except OSError:
-            #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
-            # err_handler.check_program_status(config_options, mpi_config)
-            #
-            # if mpi_config.rank == 0:
-            #     try:
-            #         os.remove(input_forcings.tmpFileHeight)
-            #     except OSError:
-            #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
-            # err_handler.check_program_status(config_options, mpi_config)
+        # Set any pixel cells outside the input domain to the global missing value.
+        try:
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
+        except (ValueError, ArithmeticError) as npe:
+            config_options.errMsg = "Unable to run mask calculation on CFSv2 elevation data: " + str(npe)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-        # Regrid the input variables.
-        var_tmp = None
-        if mpi_config.rank == 0:
-            if not config_options.runCfsNldasBiasCorrect:
+        try:
+            input_forcings.height[:, :] = input_forcings.esmf_field_out.data
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to extract CFSv2 regridded elevation data from ESMF field: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
+
+        # Close the temporary NetCDF file and remove it.
+        # if mpi_config.rank == 0:
+        #     try:
+        #         id_tmp_height.close()
+        #     except OSError:
+        #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+        # err_handler.check_program_status(config_options, mpi_config)
+        #
+        # if mpi_config.rank == 0:
+        #     try:
+        #         os.remove(input_forcings.tmpFileHeight)
+        #     except OSError:
+        #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+        # err_handler.check_program_status(config_options, mpi_config)
+
+    # Read all of the input variables. Either rank 0 reads the full grids and scatters them
+    # to the local processors in a single collective, or, for a distributed read, every
+    # processor reads its own patch of the input grid directly from the file.
+    window = get_read_window(input_forcings, mpi_config)
+    var_stack = None
+    if window is not None:
+        var_stack = new_read_stack(window, len(input_forcings.grib_vars))
+        for force_count, grib_var in enumerate(input_forcings.grib_vars):
+            if mpi_config.rank == 0 and not config_options.runCfsNldasBiasCorrect:
                 config_options.statusMsg = "Regridding CFSv2 variable: " + \
                                            input_forcings.netcdf_var_names[force_count]
                 err_handler.log_msg(config_options, mpi_config)
             try:
-                var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, :, :]
+                var_stack[force_count, :, :] = \
+                    id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, window[0], window[1]]
             except (ValueError, KeyError, AttributeError) as err:
                 config_options.errMsg = "Unable to extract: " + input_forcings.netcdf_var_names[force_count] + \
                                         " from file: " + input_forcings.tmpFile + " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+                break
+    err_handler.check_program_status(config_options, mpi_config)
 
-        # Scatter the global CFSv2 data to the local processors.
-        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-        err_handler.check_program_status(config_options, mpi_config)
+    # Scatter the global CFSv2 data to the local processors.
+    var_sub_stack = scatter_input_stack(input_forcings, var_stack, len(input_forcings.grib_vars),
+                                        config_options, mpi_config, dtype=np.float32)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    # Regrid all variables at once, unless the NLDAS2 bias correction needs to take place first.
+    regridded_stack = None
+    if not config_options.runCfsNldasBiasCorrect:
+        regridded_stack = regrid_input_stack(input_forcings, var_sub_stack, config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Processing CFSv2 Variable: " + grib_var
+            err_handler.log_msg(config_options, mpi_config)
+        var_sub_tmp = var_sub_stack[force_count, :, :]
 
         # Assign local CFSv2 data to the input forcing object.. IF..... we are running the
         # bias correction. These grids are interpolated in a separate routine, AFTER bias
@@ -1161,26 +1320,28 @@ def regrid_cfsv2(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config)
         # Only regrid the current files if we did not specify the NLDAS2 NWM bias correction, which needs to take place
         # first before any regridding can take place. That takes place in the bias-correction routine.
         if not config_options.runCfsNldasBiasCorrect:
-            try:
-                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to place CFSv2 forcing data into temporary ESMF field: " + str(err)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+            if regridded_stack is None:
+                try:
+                    input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+                except (ValueError, KeyError, AttributeError) as err:
+                    config_options.errMsg = "Unable to place CFSv2 forcing data into temporary ESMF field: " + str(err)
+                    err_handler.log_critical(config_options, mpi_config)
+                err_handler.check_program_status(config_options, mpi_config)
 
-            try:
-                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                         input_forcings.esmf_field_out)
-            except ValueError as ve:
-                config_options.errMsg = "Unable to regrid CFSv2 variable: " + \
-                                        input_forcings.netcdf_var_names[force_count] + " (" + str(ve) + ")"
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+                try:
+                    input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                             input_forcings.esmf_field_out)
+                except ValueError as ve:
+                    config_options.errMsg = "Unable to regrid CFSv2 variable: " + \
+                                            input_forcings.netcdf_var_names[force_count] + " (" + str(ve) + ")"
+                    err_handler.log_critical(config_options, mpi_config)
+                err_handler.check_program_status(config_options, mpi_config)
+            else:
+                input_forcings.esmf_field_out.data[:, :] = regridded_stack[force_count, :, :]
 
             # Set any pixel cells outside the input domain to the global missing value.
             try:
-                input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                    config_options.globalNdv
+                input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
             except (ValueError, ArithmeticError) as npe:
                 config_options.errMsg = "Unable to run mask calculation on CFSv2 variable: " + \
                                         input_forcings.netcdf_var_names[force_count] + " (" + str(npe) + ")"
@@ -1208,6 +1369,8 @@ def regrid_cfsv2(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config)
             input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :] = \
                 config_options.globalNdv
 
+    release_input_file(id_tmp, input_forcings, config_options, mpi_config)
+
     # Close the temporary NetCDF file and remove it.
     if mpi_config.rank == 0:
         try:
@@ -1219,7 +1382,8 @@ def regrid_cfsv2(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config)
 
     if mpi_config.rank == 0:
         try:
-            os.remove(input_forcings.tmpFile)
+            if os.path.lexists(input_forcings.tmpFile):
+                os.remove(input_forcings.tmpFile)
         except OSError:
             config_options.errMsg = "Unable to remove NetCDF file: " + input_forcings.tmpFile
             err_handler.log_critical(config_options, mpi_config)
@@ -1255,112 +1419,131 @@ def regrid_custom_hourly_netcdf(input_forcings, config_options, wrf_hydro_geo_me
     fill_values = {'TMP': 288.0, 'SPFH': 0.005, 'PRES': 101300.0, 'APCP': 0,
                    'UGRD': 1.0, 'VGRD': 1.0, 'DSWRF': 80.0, 'DLWRF': 310.0}
 
-    for force_count, nc_var in enumerate(input_forcings.netcdf_var_names):
-        if mpi_config.rank == 0:
-            config_options.statusMsg = "Processing Custom NetCDF Forcing Variable: " + nc_var
-            err_handler.log_msg(config_options, mpi_config)
-        calc_regrid_flag = check_regrid_status(id_tmp, force_count, input_forcings,
-                                               config_options, wrf_hydro_geo_meta, mpi_config)
+    calc_regrid_flag = check_regrid_status(id_tmp, 0, input_forcings,
+                                           config_options, wrf_hydro_geo_meta, mpi_config)
 
-        if calc_regrid_flag:
-            calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_config)
+    if calc_regrid_flag:
+        calculate_weights(id_tmp, 0, input_forcings, config_options, mpi_config)
 
-            # Read in the RAP height field, which is used for downscaling purposes.
-            if 'HGT_surface' in id_tmp.variables.keys():
-                # Regrid the height variable.
-                if mpi_config.rank == 0:
-                    var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
-                else:
-                    var_tmp = None
-                err_handler.check_program_status(config_options, mpi_config)
+        # Read in the RAP height field, which is used for downscaling purposes.
+        if 'HGT_surface' in id_tmp.variables.keys():
+            # Regrid the height variable.
+            if mpi_config.rank == 0:
+                var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
+            else:
+                var_tmp = None
+            err_handler.check_program_status(config_options, mpi_config)
 
-                var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-                err_handler.check_program_status(config_options, mpi_config)
+            var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
+            err_handler.check_program_status(config_options, mpi_config)
 
-                try:
-                    input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
-                except (ValueError, KeyError, AttributeError) as err:
-                    config_options.errMsg = "Unable to place NetCDF elevation data into the ESMF field object: " \
-                                            + str(err)
-                    err_handler.log_critical(config_options, mpi_config)
-                err_handler.check_program_status(config_options, mpi_config)
+            try:
+                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+            except (ValueError, KeyError, AttributeError) as err:
+                config_options.errMsg = "Unable to place NetCDF elevation data into the ESMF field object: " \
+                                        + str(err)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
 
-                if mpi_config.rank == 0:
-                    config_options.statusMsg = "Regridding elevation data to the WRF-Hydro domain."
-                    err_handler.log_msg(config_options, mpi_config)
-                try:
-                    input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                             input_forcings.esmf_field_out)
-                except ValueError as ve:
-                    config_options.errMsg = "Unable to regrid elevation data to the WRF-Hydro domain " \
-                                            "using ESMF: " + str(ve)
-                    err_handler.log_critical(config_options, mpi_config)
-                err_handler.check_program_status(config_options, mpi_config)
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Regridding elevation data to the WRF-Hydro domain."
+                err_handler.log_msg(config_options, mpi_config)
+            try:
+                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                         input_forcings.esmf_field_out)
+            except ValueError as ve:
+                config_options.errMsg = "Unable to regrid elevation data to the WRF-Hydro domain " \
+                                        "using ESMF: " + str(ve)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
 
-                # Set any pixel cells outside the input domain to the global missing value.
-                try:
-                    input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                        config_options.globalNdv
-                except (ValueError, ArithmeticError) as npe:
-                    config_options.errMsg = "Unable to compute mask on elevation data: " + str(npe)
-                    err_handler.log_critical(config_options, mpi_config)
-                err_handler.check_program_status(config_options, mpi_config)
+            # Set any pixel cells outside the input domain to the global missing value.
+            try:
+                input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
+            except (ValueError, ArithmeticError) as npe:
+                config_options.errMsg = "Unable to compute mask on elevation data: " + str(npe)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
 
-                try:
-                    input_forcings.height[:, :] = input_forcings.esmf_field_out.data
-                except (ValueError, KeyError, AttributeError) as err:
-                    config_options.errMsg = "Unable to extract ESMF regridded elevation data to a local " \
-                                            "array: " + str(err)
-                    err_handler.log_critical(config_options, mpi_config)
-                err_handler.check_program_status(config_options, mpi_config)
-            else:
-                input_forcings.height = None
-                if mpi_config.rank == 0:
-                    config_options.statusMsg = f"Unable to locate HGT_surface in: {input_forcings.file_in2}. " \
-                                               f"Downscaling will not be available."
-                    err_handler.log_msg(config_options, mpi_config)
+            try:
+                input_forcings.height[:, :] = input_forcings.esmf_field_out.data
+            except (ValueError, KeyError, AttributeError) as err:
+                config_options.errMsg = "Unable to extract ESMF regridded elevation data to a local " \
+                                        "array: " + str(err)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+        else:
+            input_forcings.height = None
+            if mpi_config.rank == 0:
+                config_options.statusMsg = f"Unable to locate HGT_surface in: {input_forcings.file_in2}. " \
+                                           f"Downscaling will not be available."
+                err_handler.log_msg(config_options, mpi_config)
 
-            # close netCDF file on non-root ranks
-            if mpi_config.rank != 0:
-                id_tmp.close()
+        # close netCDF file on non-root ranks, unless they read their own patches from it
+        if mpi_config.rank != 0 and not input_forcings.distributed_read:
+            id_tmp.close()
 
-        # Regrid the input variables.
-        var_tmp = None
-        fill = fill_values.get(input_forcings.grib_vars[force_count], config_options.globalNdv)
-        if mpi_config.rank == 0:
-            config_options.statusMsg = "Regridding Custom netCDF input variable: " + nc_var
-            err_handler.log_msg(config_options, mpi_config)
-            try:
+    # Read all of the input variables. Either rank 0 reads the full grids and scatters them
+    # to the local processors in a single collective, or, for a distributed read, every
+    # processor reads its own patch of the input grid directly from the file.
+    window = get_read_window(input_forcings, mpi_config)
+    var_stack = None
+    if window is not None:
+        for force_count, nc_var in enumerate(input_forcings.netcdf_var_names):
+            fill = fill_values.get(input_forcings.grib_vars[force_count], config_options.globalNdv)
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Regridding Custom netCDF input variable: " + nc_var
+                err_handler.log_msg(config_options, mpi_config)
                 config_options.statusMsg = f"Using {fill} to replace missing values in input"
                 err_handler.log_msg(config_options, mpi_config)
-                var_tmp = id_tmp.variables[nc_var][:].filled(fill)[0, :, :]
+            try:
+                var_tmp = np.ma.filled(id_tmp.variables[nc_var][0, window[0], window[1]], fill)
+                if var_stack is None:
+                    var_stack = new_read_stack(window, len(input_forcings.netcdf_var_names), var_tmp.dtype)
+                var_stack[force_count, :, :] = var_tmp
             except Exception as err:
                 config_options.errMsg = "Unable to extract " + nc_var + \
                                         " from: " + input_forcings.file_in2 + " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
-
-        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-        err_handler.check_program_status(config_options, mpi_config)
+                break
+    err_handler.check_program_status(config_options, mpi_config)
 
-        try:
-            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
-        except (ValueError, KeyError, AttributeError) as err:
-            config_options.errMsg = "Unable to place local array into local ESMF field: " + str(err)
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+    var_sub_stack = scatter_input_stack(input_forcings, var_stack, len(input_forcings.netcdf_var_names),
+                                        config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
 
-        try:
-            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                     input_forcings.esmf_field_out)
-        except ValueError as ve:
-            config_options.errMsg = "Unable to regrid input Custom netCDF forcing variables using ESMF: " + str(ve)
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+    # Regrid all variables at once.
+    regridded_stack = regrid_input_stack(input_forcings, var_sub_stack, config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
 
-        # Set any pixel cells outside the input domain to the global missing value.
+    for force_count, nc_var in enumerate(input_forcings.netcdf_var_names):
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Processing Custom NetCDF Forcing Variable: " + nc_var
+            err_handler.log_msg(config_options, mpi_config)
+        fill = fill_values.get(input_forcings.grib_vars[force_count], config_options.globalNdv)
+        var_sub_tmp = var_sub_stack[force_count, :, :]
+
+        if regridded_stack is None:
+            try:
+                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+            except (ValueError, KeyError, AttributeError) as err:
+                config_options.errMsg = "Unable to place local array into local ESMF field: " + str(err)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+
+            try:
+                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                         input_forcings.esmf_field_out)
+            except ValueError as ve:
+                config_options.errMsg = "Unable to regrid input Custom netCDF forcing variables using ESMF: " + str(ve)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+        else:
+            input_forcings.esmf_field_out.data[:, :] = regridded_stack[force_count, :, :]
+
+        # Set any pixel cells outside the input domain to the global missing value.
         try:
-            input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = fill
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, fill)
         except (ValueError, ArithmeticError) as npe:
             config_options.errMsg = "Unable to calculate mask from input Custom netCDF regridded forcings: " + str(
                 npe)
@@ -1394,6 +1577,8 @@ def regrid_custom_hourly_netcdf(input_forcings, config_options, wrf_hydro_geo_me
                 input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :]
         err_handler.check_program_status(config_options, mpi_config)
 
+    release_input_file(id_tmp, input_forcings, config_options, mpi_config)
+
     # Close the NetCDF file
     if mpi_config.rank == 0:
         try:
@@ -1432,8 +1617,10 @@ def regrid_gfs(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config):
     input_forcings.tmpFile = config_options.scratch_dir + "/" + "GFS_TMP.nc"
     err_handler.check_program_status(config_options, mpi_config)
 
-    # check / set previous file to see if we're going to reuse
-    reuse_prev_file = (input_forcings.file_in2 == regrid_gfs.last_file)
+    # check / set previous file to see if we're going to reuse (GRIB2 messages decoded
+    # in memory are not kept in the temporary file, so they can not be reused)
+    reuse_prev_file = (input_forcings.file_in2 == regrid_gfs.last_file) and \
+        (input_forcings.fileType == NETCDF or config_options.grib2_decoder == ioMod.WGRIB2_DECODER)
     regrid_gfs.last_file = input_forcings.file_in2
 
     # This file may exist. If it does, and we don't need it again, remove it.....
@@ -1462,7 +1649,8 @@ def regrid_gfs(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config):
         if mpi_config.rank == 0:
             config_options.statusMsg = "Reusing previous input file: " + input_forcings.file_in2
             err_handler.log_msg(config_options, mpi_config)
-        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config)
+        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config,
+                                           open_on_all_procs=input_forcings.distributed_read)
         err_handler.check_program_status(config_options, mpi_config)
     else:
         if input_forcings.fileType != NETCDF:
@@ -1497,161 +1685,188 @@ def regrid_gfs(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config):
             cmd = '$WGRIB2 -match "(' + '|'.join(fields) + ')" ' + input_forcings.file_in2 + \
                   " -netcdf " + input_forcings.tmpFile
             id_tmp = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFile, cmd,
-                                      config_options, mpi_config, inputVar=None)
+                                      config_options, mpi_config, inputVar=None,
+                                      open_on_all_procs=input_forcings.distributed_read, match=fields)
             err_handler.check_program_status(config_options, mpi_config)
         else:
             create_link("GFS", input_forcings.file_in2, input_forcings.tmpFile, config_options, mpi_config)
-            id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config)
+            id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config,
+                                               open_on_all_procs=input_forcings.distributed_read)
 
-    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+    calc_regrid_flag = check_regrid_status(id_tmp, 0, input_forcings,
+                                           config_options, wrf_hydro_geo_meta, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    if calc_regrid_flag:
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Processing 13km GFS Variable: " + grib_var
+            config_options.statusMsg = "Calculating 13km GFS regridding weights."
             err_handler.log_msg(config_options, mpi_config)
-        calc_regrid_flag = check_regrid_status(id_tmp, force_count, input_forcings,
-                                               config_options, wrf_hydro_geo_meta, mpi_config)
+        calculate_weights(id_tmp, 0, input_forcings, config_options, mpi_config,
+                          wrf_hydro_geo_meta=wrf_hydro_geo_meta)
         err_handler.check_program_status(config_options, mpi_config)
 
-        if calc_regrid_flag:
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Calculating 13km GFS regridding weights."
-                err_handler.log_msg(config_options, mpi_config)
-            calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            # Read in the GFS height field, which is used for downscaling purposes.
-            # if mpi_config.rank == 0:
-            #    config_options.statusMsg = "Reading in 13km GFS elevation data."
-            #    err_handler.log_msg(config_options, mpi_config)
-            # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
-            #    "\":(HGT):(surface):\" " + \
-            #    " -netcdf " + input_forcings.tmpFileHeight
-            # time.sleep(1)
-            # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
-            #                                 cmd, config_options, mpi_config, 'HGT_surface')
-            # err_handler.check_program_status(config_options, mpi_config)
-
-            # Regrid the height variable.
-            var_tmp = None
-            if mpi_config.rank == 0:
-                try:
-                    var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
-                except (ValueError, KeyError, AttributeError) as err:
-                    config_options.errMsg = "Unable to extract GFS elevation from: " + input_forcings.tmpFile + \
-                                            " (" + str(err) + ")"
-                    err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-            err_handler.check_program_status(config_options, mpi_config)
-
+        # Read in the GFS height field, which is used for downscaling purposes.
+        # if mpi_config.rank == 0:
+        #    config_options.statusMsg = "Reading in 13km GFS elevation data."
+        #    err_handler.log_msg(config_options, mpi_config)
+        # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
+        #    "\":(HGT):(surface):\" " + \
+        #    " -netcdf " + input_forcings.tmpFileHeight
+        # time.sleep(1)
+        # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
+        #                                 cmd, config_options, mpi_config, 'HGT_surface')
+        # err_handler.check_program_status(config_options, mpi_config)
+
+        # Regrid the height variable.
+        var_tmp = None
+        if mpi_config.rank == 0:
             try:
-                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+                var_tmp = id_tmp.variables['HGT_surface'][0, input_forcings.src_window[0],
+                                                           input_forcings.src_window[1]]
             except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to place local GFS array into an ESMF field: " + str(err)
+                config_options.errMsg = "Unable to extract GFS elevation from: " + input_forcings.tmpFile + \
+                                        " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Regridding 13km GFS surface elevation data to the WRF-Hydro domain."
-                err_handler.log_msg(config_options, mpi_config)
-            try:
-                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                         input_forcings.esmf_field_out)
-            except ValueError as ve:
-                config_options.errMsg = "Unable to regrid GFS elevation data: " + str(ve)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            # Set any pixel cells outside the input domain to the global missing value.
-            try:
-                input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                    config_options.globalNdv
-            except (ValueError, ArithmeticError) as npe:
-                config_options.errMsg = "Unable to perform mask search on GFS elevation data: " + str(npe)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to place local GFS array into an ESMF field: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            try:
-                input_forcings.height[:, :] = input_forcings.esmf_field_out.data
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to extract GFS elevation array from ESMF field: " + str(err)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Regridding 13km GFS surface elevation data to the WRF-Hydro domain."
+            err_handler.log_msg(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                     input_forcings.esmf_field_out)
+        except ValueError as ve:
+            config_options.errMsg = "Unable to regrid GFS elevation data: " + str(ve)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            # Close the temporary NetCDF file and remove it.
-            # if mpi_config.rank == 0:
-            #    try:
-            #        id_tmp_height.close()
-            #    except OSError:
-            #        config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
-            #        err_handler.log_critical(config_options, mpi_config)
-
-            #    try:
-            #        os.remove(input_forcings.tmpFileHeight)
-            #    except OSError:
-            #        config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
-            #        err_handler.log_critical(config_options, mpi_config)
-            # err_handler.check_program_status(config_options, mpi_config)
+        # Set any pixel cells outside the input domain to the global missing value.
+        try:
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
+        except (ValueError, ArithmeticError) as npe:
+            config_options.errMsg = "Unable to perform mask search on GFS elevation data: " + str(npe)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-        # Regrid the input variables.
-        var_tmp = None
-        if mpi_config.rank == 0:
+        try:
+            input_forcings.height[:, :] = input_forcings.esmf_field_out.data
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to extract GFS elevation array from ESMF field: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
+
+        # Close the temporary NetCDF file and remove it.
+        # if mpi_config.rank == 0:
+        #    try:
+        #        id_tmp_height.close()
+        #    except OSError:
+        #        config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
+        #        err_handler.log_critical(config_options, mpi_config)
+
+        #    try:
+        #        os.remove(input_forcings.tmpFileHeight)
+        #    except OSError:
+        #        config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
+        #        err_handler.log_critical(config_options, mpi_config)
+        # err_handler.check_program_status(config_options, mpi_config)
+
+    # Read all of the input variables. Either rank 0 reads the full grids and scatters them
+    # to the local processors in a single collective, or, for a distributed read, every
+    # processor reads its own patch of the input grid directly from the file.
+    # The variables are kept in the precision they are stored in, so the de-accumulated
+    # precipitation rates are not truncated.
+    window = get_read_window(input_forcings, mpi_config)
+    var_stack = None
+    if window is not None:
+        try:
+            stack_dtype = np.result_type(*[id_tmp.variables[var_name].dtype
+                                           for var_name in input_forcings.netcdf_var_names])
+        except (KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to find the GFS input variables in: " + input_forcings.tmpFile + \
+                                    " (" + str(err) + ")"
+            err_handler.log_critical(config_options, mpi_config)
+        else:
+            var_stack = new_read_stack(window, len(input_forcings.grib_vars), stack_dtype)
+    if var_stack is not None:
+        for force_count, grib_var in enumerate(input_forcings.grib_vars):
             try:
-                var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, :, :]
+                var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, window[0], window[1]]
             except (ValueError, KeyError, AttributeError) as err:
                 config_options.errMsg = "Unable to extract: " + input_forcings.netcdf_var_names[force_count] + \
                                         " from: " + input_forcings.tmpFile + " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+                break
 
-        # If we are regridding GFS data, and this is precipitation, we need to run calculations
-        # on the global precipitation average rates to calculate instantaneous global rates.
-        # This is due to GFS's weird nature of doing average rates over different periods.
-        if input_forcings.productName == "GFS_Production_GRIB2":
-            if grib_var == "PRATE":
-                if mpi_config.rank == 0:
+            # If we are regridding GFS data, and this is precipitation, we need to run calculations
+            # on the global precipitation average rates to calculate instantaneous global rates.
+            # This is due to GFS's weird nature of doing average rates over different periods.
+            if input_forcings.productName == "GFS_Production_GRIB2":
+                if grib_var == "PRATE":
                     input_forcings.globalPcpRate2 = var_tmp
                     var_tmp = timeInterpMod.gfs_pcp_time_interp(input_forcings, config_options, mpi_config)
 
-        if grib_var == 'CPOFP':
-            if mpi_config.rank == 0:
-                # print(f"DEBUG: CPOFP stats, min={var_tmp[var_tmp > 0].min()} mean={var_tmp[var_tmp > 0].mean()} max={var_tmp[var_tmp > 0].max()}", flush=True)
+            if grib_var == 'CPOFP':
                 var_tmp[var_tmp >=0] = (100 - var_tmp[var_tmp >=0]) / 100  # convert frozen fraction to liquid fraction
                 var_tmp[var_tmp < 0] = -1.0                                # flag as missing so we use temperature partitioning
 
-        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-        mpi_config.comm.barrier()
-        err_handler.check_program_status(config_options, mpi_config)
+            var_stack[force_count, :, :] = var_tmp
+    err_handler.check_program_status(config_options, mpi_config)
 
-        try:
-            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
-        except (ValueError, KeyError, AttributeError) as err:
-            config_options.errMsg = "Unable to place GFS local array into ESMF field object: " + str(err)
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+    var_sub_stack = scatter_input_stack(input_forcings, var_stack, len(input_forcings.grib_vars),
+                                        config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    # Regrid all variables at once.
+    regridded_stack = regrid_input_stack(input_forcings, var_sub_stack, config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
 
+    for force_count, grib_var in enumerate(input_forcings.grib_vars):
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Regridding Input 13km GFS Field: " + \
-                                       input_forcings.netcdf_var_names[force_count]
+            config_options.statusMsg = "Processing 13km GFS Variable: " + grib_var
             err_handler.log_msg(config_options, mpi_config)
-        try:
-            begin = time.monotonic()
-            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                     input_forcings.esmf_field_out)
-            end = time.monotonic()
+        var_sub_tmp = var_sub_stack[force_count, :, :]
+
+        if regridded_stack is None:
+            try:
+                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+            except (ValueError, KeyError, AttributeError) as err:
+                config_options.errMsg = "Unable to place GFS local array into ESMF field object: " + str(err)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+
             if mpi_config.rank == 0:
-                config_options.statusMsg = "Regridding took {} seconds".format(end-begin)
+                config_options.statusMsg = "Regridding Input 13km GFS Field: " + \
+                                           input_forcings.netcdf_var_names[force_count]
                 err_handler.log_msg(config_options, mpi_config)
-        except ValueError as ve:
-            config_options.errMsg = "Unable to regrid GFS variable: " + input_forcings.netcdf_var_names[force_count] \
-                                    + " (" + str(ve) + ")"
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+            try:
+                begin = time.monotonic()
+                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                         input_forcings.esmf_field_out)
+                end = time.monotonic()
+                if mpi_config.rank == 0:
+                    config_options.statusMsg = "Regridding took {} seconds".format(end-begin)
+                    err_handler.log_msg(config_options, mpi_config)
+            except ValueError as ve:
+                config_options.errMsg = "Unable to regrid GFS variable: " + input_forcings.netcdf_var_names[force_count] \
+                                        + " (" + str(ve) + ")"
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+        else:
+            input_forcings.esmf_field_out.data[:, :] = regridded_stack[force_count, :, :]
 
         # Set any pixel cells outside the input domain to the global missing value.
         try:
-            input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                config_options.globalNdv
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
         except (ValueError, ArithmeticError) as npe:
             config_options.errMsg = "Unable to run mask search on GFS variable: " + \
                                     input_forcings.netcdf_var_names[force_count] + " (" + str(npe) + ")"
@@ -1673,6 +1888,8 @@ def regrid_gfs(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config):
                 input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :]
         err_handler.check_program_status(config_options, mpi_config)
 
+    release_input_file(id_tmp, input_forcings, config_options, mpi_config)
+
     # Close the temporary NetCDF file and remove it.
     if mpi_config.rank == 0:
         try:
@@ -1745,118 +1962,44 @@ def regrid_nam_nest(input_forcings, config_options, wrf_hydro_geo_meta, mpi_conf
         cmd = '$WGRIB2 -match "(' + '|'.join(fields) + ')" ' + input_forcings.file_in2 + \
               " -netcdf " + input_forcings.tmpFile
         id_tmp = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFile, cmd,
-                                  config_options, mpi_config, inputVar=None)
+                                  config_options, mpi_config, inputVar=None,
+                                  open_on_all_procs=input_forcings.distributed_read, match=fields)
         err_handler.check_program_status(config_options, mpi_config)
     else:
         create_link("NAM-Nest", input_forcings.file_in2, input_forcings.tmpFile, config_options, mpi_config)
-        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config)
+        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config,
+                                           open_on_all_procs=input_forcings.distributed_read)
 
     # Loop through all of the input forcings in NAM nest data. Convert the GRIB2 files
     # to NetCDF, read in the data, regrid it, then map it to the appropriate
     # array slice in the output arrays.
-    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+    calc_regrid_flag = check_regrid_status(id_tmp, 0, input_forcings,
+                                           config_options, wrf_hydro_geo_meta, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    if calc_regrid_flag:
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Processing NAM Nest Variable: " + grib_var
+            config_options.statusMsg = "Calculating NAM nest regridding weights...."
             err_handler.log_msg(config_options, mpi_config)
-
-        calc_regrid_flag = check_regrid_status(id_tmp, force_count, input_forcings,
-                                               config_options, wrf_hydro_geo_meta, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
-
-        if calc_regrid_flag:
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Calculating NAM nest regridding weights...."
-                err_handler.log_msg(config_options, mpi_config)
-            calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            # Read in the RAP height field, which is used for downscaling purposes.
-            # if mpi_config.rank == 0:
-            #     config_options.statusMsg = "Reading in NAM nest elevation data from GRIB2."
-            #     err_handler.log_msg(config_options, mpi_config)
-            # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
-            #       "\":(HGT):(surface):\" " + \
-            #       " -netcdf " + input_forcings.tmpFileHeight
-            # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
-            #                                  cmd, config_options, mpi_config, 'HGT_surface')
-            # err_handler.check_program_status(config_options, mpi_config)
-
-            # Regrid the height variable.
-            if mpi_config.rank == 0:
-                var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
-            else:
-                var_tmp = None
-            err_handler.check_program_status(config_options, mpi_config)
-
-            var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            try:
-                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to place NetCDF NAM nest elevation data into the ESMF field object: " \
-                                        + str(err)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Regridding NAM nest elevation data to the WRF-Hydro domain."
-                err_handler.log_msg(config_options, mpi_config)
-            try:
-                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                         input_forcings.esmf_field_out)
-            except ValueError as ve:
-                config_options.errMsg = "Unable to regrid NAM nest elevation data to the WRF-Hydro domain " \
-                                        "using ESMF: " + str(ve)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            # Set any pixel cells outside the input domain to the global missing value.
-            try:
-                input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                    config_options.globalNdv
-            except (ValueError, ArithmeticError) as npe:
-                config_options.errMsg = "Unable to compute mask on NAM nest elevation data: " + str(npe)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            try:
-                input_forcings.height[:, :] = input_forcings.esmf_field_out.data
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to extract ESMF regridded NAM nest elevation data to a local " \
-                                        "array: " + str(err)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
-
-            # Close the temporary NetCDF file and remove it.
-            # if mpi_config.rank == 0:
-            #     try:
-            #         id_tmp_height.close()
-            #     except OSError:
-            #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
-            #
-            #     try:
-            #         os.remove(input_forcings.tmpFileHeight)
-            #     except OSError:
-            #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
-            # err_handler.check_program_status(config_options, mpi_config)
-
+        calculate_weights(id_tmp, 0, input_forcings, config_options, mpi_config)
         err_handler.check_program_status(config_options, mpi_config)
 
-        # Regrid the input variables.
-        var_tmp = None
+        # Read in the RAP height field, which is used for downscaling purposes.
+        # if mpi_config.rank == 0:
+        #     config_options.statusMsg = "Reading in NAM nest elevation data from GRIB2."
+        #     err_handler.log_msg(config_options, mpi_config)
+        # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
+        #       "\":(HGT):(surface):\" " + \
+        #       " -netcdf " + input_forcings.tmpFileHeight
+        # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
+        #                                  cmd, config_options, mpi_config, 'HGT_surface')
+        # err_handler.check_program_status(config_options, mpi_config)
+
+        # Regrid the height variable.
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Regridding NAM nest input variable: " + \
-                                       input_forcings.netcdf_var_names[force_count]
-            err_handler.log_msg(config_options, mpi_config)
-            try:
-                var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, :, :]
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to extract " + input_forcings.netcdf_var_names[force_count] + \
-                                        " from: " + input_forcings.tmpFile + " (" + str(err) + ")"
-                err_handler.log_critical(config_options, mpi_config)
+            var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
+        else:
+            var_tmp = None
         err_handler.check_program_status(config_options, mpi_config)
 
         var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
@@ -1865,58 +2008,152 @@ def regrid_nam_nest(input_forcings, config_options, wrf_hydro_geo_meta, mpi_conf
         try:
             input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
         except (ValueError, KeyError, AttributeError) as err:
-            config_options.errMsg = "Unable to place local array into local ESMF field: " + str(err)
+            config_options.errMsg = "Unable to place NetCDF NAM nest elevation data into the ESMF field object: " \
+                                    + str(err)
             err_handler.log_critical(config_options, mpi_config)
         err_handler.check_program_status(config_options, mpi_config)
 
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Regridding NAM nest elevation data to the WRF-Hydro domain."
+            err_handler.log_msg(config_options, mpi_config)
         try:
             input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
                                                                      input_forcings.esmf_field_out)
         except ValueError as ve:
-            config_options.errMsg = "Unable to regrid input NAM nest forcing variables using ESMF: " + str(ve)
+            config_options.errMsg = "Unable to regrid NAM nest elevation data to the WRF-Hydro domain " \
+                                    "using ESMF: " + str(ve)
             err_handler.log_critical(config_options, mpi_config)
         err_handler.check_program_status(config_options, mpi_config)
 
         # Set any pixel cells outside the input domain to the global missing value.
         try:
-            input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                config_options.globalNdv
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
         except (ValueError, ArithmeticError) as npe:
-            config_options.errMsg = "Unable to calculate mask from input NAM nest regridded forcings: " + str(npe)
+            config_options.errMsg = "Unable to compute mask on NAM nest elevation data: " + str(npe)
             err_handler.log_critical(config_options, mpi_config)
         err_handler.check_program_status(config_options, mpi_config)
 
         try:
-            input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :] = \
-                input_forcings.esmf_field_out.data
+            input_forcings.height[:, :] = input_forcings.esmf_field_out.data
         except (ValueError, KeyError, AttributeError) as err:
-            config_options.errMsg = "Unable to place local ESMF regridded data into local array: " + str(err)
+            config_options.errMsg = "Unable to extract ESMF regridded NAM nest elevation data to a local " \
+                                    "array: " + str(err)
             err_handler.log_critical(config_options, mpi_config)
         err_handler.check_program_status(config_options, mpi_config)
 
-        # If we are on the first timestep, set the previous regridded field to be
-        # the latest as there are no states for time 0.
-        if config_options.current_output_step == 1:
-            input_forcings.regridded_forcings1[input_forcings.input_map_output[force_count], :, :] = \
-                input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :]
-        err_handler.check_program_status(config_options, mpi_config)
+        # Close the temporary NetCDF file and remove it.
+        # if mpi_config.rank == 0:
+        #     try:
+        #         id_tmp_height.close()
+        #     except OSError:
+        #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+        #
+        #     try:
+        #         os.remove(input_forcings.tmpFileHeight)
+        #     except OSError:
+        #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+        # err_handler.check_program_status(config_options, mpi_config)
 
-    # Close the temporary NetCDF file and remove it.
-    if mpi_config.rank == 0:
-        try:
-            id_tmp.close()
-        except OSError:
-            config_options.errMsg = "Unable to close NetCDF file: " + input_forcings.tmpFile
-            err_handler.log_critical(config_options, mpi_config)
-        try:
-            os.remove(input_forcings.tmpFile)
-        except OSError:
-            config_options.errMsg = "Unable to remove NetCDF file: " + input_forcings.tmpFile
-            err_handler.log_critical(config_options, mpi_config)
     err_handler.check_program_status(config_options, mpi_config)
 
+    # Read all of the input variables. Either rank 0 reads the full grids and scatters them
+    # to the local processors in a single collective, or, for a distributed read, every
+    # processor reads its own patch of the input grid directly from the file.
+    window = get_read_window(input_forcings, mpi_config)
+    var_stack = None
+    if window is not None:
+        var_stack = new_read_stack(window, len(input_forcings.grib_vars))
+        for force_count, grib_var in enumerate(input_forcings.grib_vars):
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Regridding NAM nest input variable: " + \
+                                           input_forcings.netcdf_var_names[force_count]
+                err_handler.log_msg(config_options, mpi_config)
+            try:
+                var_stack[force_count, :, :] = \
+                    id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, window[0], window[1]]
+            except (ValueError, KeyError, AttributeError) as err:
+                config_options.errMsg = "Unable to extract " + input_forcings.netcdf_var_names[force_count] + \
+                                        " from: " + input_forcings.tmpFile + " (" + str(err) + ")"
+                err_handler.log_critical(config_options, mpi_config)
+                break
+    err_handler.check_program_status(config_options, mpi_config)
 
-def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta, mpi_config):
+    var_sub_stack = scatter_input_stack(input_forcings, var_stack, len(input_forcings.grib_vars),
+                                        config_options, mpi_config, dtype=np.float32)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    # Regrid all variables at once.
+    regridded_stack = regrid_input_stack(input_forcings, var_sub_stack, config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Processing NAM Nest Variable: " + grib_var
+            err_handler.log_msg(config_options, mpi_config)
+        var_sub_tmp = var_sub_stack[force_count, :, :]
+
+        if regridded_stack is None:
+            try:
+                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+            except (ValueError, KeyError, AttributeError) as err:
+                config_options.errMsg = "Unable to place local array into local ESMF field: " + str(err)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+
+            try:
+                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                         input_forcings.esmf_field_out)
+            except ValueError as ve:
+                config_options.errMsg = "Unable to regrid input NAM nest forcing variables using ESMF: " + str(ve)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+        else:
+            input_forcings.esmf_field_out.data[:, :] = regridded_stack[force_count, :, :]
+
+        # Set any pixel cells outside the input domain to the global missing value.
+        try:
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
+        except (ValueError, ArithmeticError) as npe:
+            config_options.errMsg = "Unable to calculate mask from input NAM nest regridded forcings: " + str(npe)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
+
+        try:
+            input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :] = \
+                input_forcings.esmf_field_out.data
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to place local ESMF regridded data into local array: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
+
+        # If we are on the first timestep, set the previous regridded field to be
+        # the latest as there are no states for time 0.
+        if config_options.current_output_step == 1:
+            input_forcings.regridded_forcings1[input_forcings.input_map_output[force_count], :, :] = \
+                input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :]
+        err_handler.check_program_status(config_options, mpi_config)
+
+    release_input_file(id_tmp, input_forcings, config_options, mpi_config)
+
+    # Close the temporary NetCDF file and remove it.
+    if mpi_config.rank == 0:
+        try:
+            id_tmp.close()
+        except OSError:
+            config_options.errMsg = "Unable to close NetCDF file: " + input_forcings.tmpFile
+            err_handler.log_critical(config_options, mpi_config)
+        try:
+            if os.path.lexists(input_forcings.tmpFile):
+                os.remove(input_forcings.tmpFile)
+        except OSError:
+            config_options.errMsg = "Unable to remove NetCDF file: " + input_forcings.tmpFile
+            err_handler.log_critical(config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+
+def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta, mpi_config):
     """
     Function for handling regridding hourly MRMS precipitation. An RQI mask file
     Is necessary to filter out poor precipitation estimates.
@@ -1951,17 +2188,13 @@ def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta,
             config_options.statusMsg = "No MRMS regridding required for this timestep."
             err_handler.log_msg(config_options, mpi_config)
         return
-    # MRMS data originally is stored as .gz files. We need to compose a series
-    # of temporary paths.
-    # 1.) The unzipped GRIB2 precipitation file.
-    # 2.) The unzipped GRIB2 RQI file.
-    # 3.) A temporary NetCDF file that stores the precipitation grid.
-    # 4.) A temporary NetCDF file that stores the RQI grid.
+    # MRMS data originally is stored as .gz files, which are decompressed in memory.
+    # We need to compose a series of temporary paths.
+    # 1.) A temporary NetCDF file that stores the precipitation grid.
+    # 2.) A temporary NetCDF file that stores the RQI grid.
     # Create a path for a temporary NetCDF files that will
     # be created through the wgrib2 process.
-    mrms_tmp_grib2 = config_options.scratch_dir + "/MRMS_PCP_TMP-{}.grib2".format(mkfilename())
     mrms_tmp_nc = config_options.scratch_dir + "/MRMS_PCP_TMP-{}.nc".format(mkfilename())
-    mrms_tmp_rqi_grib2 = config_options.scratch_dir + "/MRMS_RQI_TMP-{}.grib2".format(mkfilename())
     mrms_tmp_rqi_nc = config_options.scratch_dir + "/MRMS_RQI_TMP-{}.nc".format(mkfilename())
     # mpi_config.comm.barrier()
 
@@ -1978,15 +2211,6 @@ def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta,
 
     # These files shouldn't exist. If they do, remove them.
     if mpi_config.rank == 0:
-        if os.path.isfile(mrms_tmp_grib2):
-            config_options.statusMsg = "Found old temporary file: " + \
-                                       mrms_tmp_grib2 + ", removing."
-            err_handler.log_warning(config_options, mpi_config)
-            try:
-                os.remove(mrms_tmp_grib2)
-            except OSError:
-                config_options.errMsg = "Unable to remove file: " + mrms_tmp_grib2
-                err_handler.log_critical(config_options, mpi_config)
         if os.path.isfile(mrms_tmp_nc):
             config_options.statusMsg = "Found old temporary file: " + \
                                        mrms_tmp_nc + ", removing."
@@ -1996,15 +2220,6 @@ def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta,
             except OSError:
                 config_options.errMsg = "Unable to remove file: " + mrms_tmp_nc
                 err_handler.log_critical(config_options, mpi_config)
-        if os.path.isfile(mrms_tmp_rqi_grib2):
-            config_options.statusMsg = "Found old temporary file: " + \
-                                       mrms_tmp_rqi_grib2 + ", removing."
-            err_handler.log_warning(config_options, mpi_config)
-            try:
-                os.remove(mrms_tmp_rqi_grib2)
-            except OSError:
-                config_options.errMsg = "Unable to remove file: " + mrms_tmp_rqi_grib2
-                err_handler.log_critical(config_options, mpi_config)
         if os.path.isfile(mrms_tmp_rqi_nc):
             config_options.statusMsg = "Found old temporary file: " + \
                                        mrms_tmp_rqi_nc + ", removing."
@@ -2029,43 +2244,26 @@ def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta,
     #    return
 
     if supplemental_precip.fileType != NETCDF:
-        # Unzip MRMS files to temporary locations.
-        ioMod.unzip_file(supplemental_precip.file_in2, mrms_tmp_grib2, config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
-
+        # Unzip the MRMS precip and RQI files into memory, in parallel.
+        gz_files = [supplemental_precip.file_in2]
         if supplemental_precip.rqiMethod == 1:
-            ioMod.unzip_file(supplemental_precip.rqi_file_in2, mrms_tmp_rqi_grib2, config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+            gz_files.append(supplemental_precip.rqi_file_in2)
+        grib_data = ioMod.unzip_files(gz_files, config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-        # Perform a GRIB dump to NetCDF for the MRMS precip and RQI data.
-        cmd1 = "$WGRIB2 " + mrms_tmp_grib2 + " -netcdf " + mrms_tmp_nc
-        id_mrms = ioMod.open_grib2(mrms_tmp_grib2, mrms_tmp_nc, cmd1, config_options,
-                                   mpi_config, supplemental_precip.netcdf_var_names[0])
+        # Decode the MRMS precip and RQI data, or pipe them into a GRIB dump to NetCDF.
+        id_mrms = ioMod.open_grib2_data(supplemental_precip.file_in2, grib_data[0], mrms_tmp_nc, config_options,
+                                        mpi_config, supplemental_precip.netcdf_var_names[0])
         err_handler.check_program_status(config_options, mpi_config)
 
         if supplemental_precip.rqiMethod == 1:
-            cmd2 = "$WGRIB2 " + mrms_tmp_rqi_grib2 + " -netcdf " + mrms_tmp_rqi_nc
-            id_mrms_rqi = ioMod.open_grib2(mrms_tmp_rqi_grib2, mrms_tmp_rqi_nc, cmd2, config_options,
-                                           mpi_config, supplemental_precip.rqi_netcdf_var_names[0])
+            id_mrms_rqi = ioMod.open_grib2_data(supplemental_precip.rqi_file_in2, grib_data[1], mrms_tmp_rqi_nc,
+                                                config_options, mpi_config,
+                                                supplemental_precip.rqi_netcdf_var_names[0])
             err_handler.check_program_status(config_options, mpi_config)
         else:
             id_mrms_rqi = None
-
-        # Remove temporary GRIB2 files
-        if mpi_config.rank == 0:
-            try:
-                os.remove(mrms_tmp_grib2)
-            except OSError:
-                config_options.errMsg = "Unable to remove GRIB2 file: " + mrms_tmp_grib2
-                err_handler.log_critical(config_options, mpi_config)
-
-            if supplemental_precip.rqiMethod == 1:
-                try:
-                    os.remove(mrms_tmp_rqi_grib2)
-                except OSError:
-                    config_options.errMsg = "Unable to remove GRIB2 file: " + mrms_tmp_rqi_grib2
-                    err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+        grib_data = None
     else:
         create_link("MRMS", supplemental_precip.file_in2, mrms_tmp_nc, config_options, mpi_config)
         id_mrms = ioMod.open_netcdf_forcing(mrms_tmp_nc, config_options, mpi_config)
@@ -2095,7 +2293,7 @@ def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta,
                 var_tmp = id_mrms_rqi.variables[supplemental_precip.rqi_netcdf_var_names[0]][0, :, :]
             except (ValueError, KeyError, AttributeError) as err:
                 config_options.errMsg = "Unable to extract: " + supplemental_precip.rqi_netcdf_var_names[0] + \
-                                        " from: " + mrms_tmp_rqi_grib2 + " (" + str(err) + ")"
+                                        " from: " + supplemental_precip.rqi_file_in2 + " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
         err_handler.check_program_status(config_options, mpi_config)
 
@@ -2122,14 +2320,13 @@ def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta,
 
         # Set any pixel cells outside the input domain to the global missing value.
         try:
-            n_masked = len((supplemental_precip.regridded_mask == 0))
+            n_masked = supplemental_precip.mask_plan.n_masked
             if n_masked > 0:
                 if mpi_config == 0:
                     config_options.statusMsg = f"{n_masked} masked cells in RQI field, will remove"
                     err_handler.log_msg(config_options, mpi_config)
 
-            supplemental_precip.esmf_field_out.data[np.where(supplemental_precip.regridded_mask == 0)] = \
-                config_options.globalNdv
+            supplemental_precip.mask_plan.fill(supplemental_precip.esmf_field_out.data, config_options.globalNdv)
         except (ValueError, ArithmeticError) as npe:
             config_options.errMsg = "Unable to run mask calculation for MRMS RQI data: " + str(npe)
             err_handler.log_critical(config_options, mpi_config)
@@ -2160,7 +2357,8 @@ def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta,
                 config_options.errMsg = "Unable to close NetCDF file: " + mrms_tmp_rqi_nc
                 err_handler.log_critical(config_options, mpi_config)
             try:
-                os.remove(mrms_tmp_rqi_nc)
+                if os.path.lexists(mrms_tmp_rqi_nc):
+                    os.remove(mrms_tmp_rqi_nc)
             except OSError:
                 config_options.errMsg = "Unable to remove NetCDF file: " + mrms_tmp_rqi_nc
                 err_handler.log_critical(config_options, mpi_config)
@@ -2200,8 +2398,7 @@ def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta,
             # config_options.statusMsg = "WARNING: Found negative precipitation values in MRMS data, setting to missing_value"
             # err_handler.log_warning(config_options, mpi_config)
 
-        supplemental_precip.esmf_field_out.data[np.where(supplemental_precip.regridded_mask == 0)] = \
-            config_options.globalNdv
+        supplemental_precip.mask_plan.fill(supplemental_precip.esmf_field_out.data, config_options.globalNdv)
 
     except (ValueError, ArithmeticError) as npe:
         config_options.errMsg = "Unable to run mask search on MRMS supplemental precip: " + str(npe)
@@ -2258,7 +2455,8 @@ def regrid_mrms_hourly(supplemental_precip, config_options, wrf_hydro_geo_meta,
             err_handler.log_critical(config_options, mpi_config)
 
         try:
-            os.remove(mrms_tmp_nc)
+            if os.path.lexists(mrms_tmp_nc):
+                os.remove(mrms_tmp_nc)
         except OSError:
             config_options.errMsg = "Unable to remove NetCDF file: " + mrms_tmp_nc
             err_handler.log_critical(config_options, mpi_config)
@@ -2284,25 +2482,17 @@ def regrid_mrms_precip_flag(supplemental_precip, config_options, wrf_hydro_geo_m
     if supplemental_precip.regridComplete:
         return
 
-    # Unzip MRMS precip flag file to temporary location.
+    # Unzip MRMS precip flag file into memory.
     fileno = mkfilename()
-    mrms_tmp_grib2 = config_options.scratch_dir + f"/MRMS_PCP_FLAG_TMP_{fileno}.grib2"
     mrms_tmp_nc    = config_options.scratch_dir + f"/MRMS_PCP_FLAG_TMP_{fileno}.nc"
-    ioMod.unzip_file(supplemental_precip.file_in2, mrms_tmp_grib2, config_options, mpi_config)
+    grib_data = ioMod.unzip_files([supplemental_precip.file_in2], config_options, mpi_config)
     err_handler.check_program_status(config_options, mpi_config)
 
-    # Perform a GRIB dump to NetCDF for the MRMS precip and RQI data.
-    cmd1 = "$WGRIB2 " + mrms_tmp_grib2 + " -netcdf " + mrms_tmp_nc
-    id_tmp = ioMod.open_grib2(mrms_tmp_grib2, mrms_tmp_nc, cmd1, config_options,
-                                mpi_config, supplemental_precip.netcdf_var_names[0])
+    # Decode the MRMS precip flag data, or pipe them into a GRIB dump to NetCDF.
+    id_tmp = ioMod.open_grib2_data(supplemental_precip.file_in2, grib_data[0], mrms_tmp_nc, config_options,
+                                   mpi_config, supplemental_precip.netcdf_var_names[0])
     err_handler.check_program_status(config_options, mpi_config)
-    # Remove temporary GRIB2 files
-    if mpi_config.rank == 0:
-        try:
-            os.remove(mrms_tmp_grib2)
-        except OSError:
-            config_options.errMsg = "Unable to remove GRIB2 file: " + mrms_tmp_grib2
-            err_handler.log_critical(config_options, mpi_config)
+    grib_data = None
 
     # Check to see if we need to calculate regridding weights.
     calc_regrid_flag = check_supp_pcp_regrid_status(id_tmp, supplemental_precip, config_options,
@@ -2356,7 +2546,7 @@ def regrid_mrms_precip_flag(supplemental_precip, config_options, wrf_hydro_geo_m
 
     # Set any missing data or pixel cells outside the input domain to use temperature partitioning
     try:
-        supplemental_precip.esmf_field_out.data[np.where(supplemental_precip.regridded_mask == 0)] = config_options.globalNdv
+        supplemental_precip.mask_plan.fill(supplemental_precip.esmf_field_out.data, config_options.globalNdv)
         supplemental_precip.esmf_field_out.data[np.where(supplemental_precip.esmf_field_out.data < 0)] = config_options.globalNdv
     except (ValueError, ArithmeticError) as npe:
         config_options.errMsg = "Unable to run mask search on MRMS PrecipFlag: " + str(npe)
@@ -2381,7 +2571,8 @@ def regrid_mrms_precip_flag(supplemental_precip, config_options, wrf_hydro_geo_m
             config_options.errMsg = "Unable to close NetCDF file: " + supplemental_precip.file_in2
             err_handler.log_critical(config_options, mpi_config)
         try:
-            os.remove(mrms_tmp_nc)
+            if os.path.lexists(mrms_tmp_nc):
+                os.remove(mrms_tmp_nc)
         except OSError:
             config_options.errMsg = "Unable to remove NetCDF file: " + mrms_tmp_nc
             err_handler.log_critical(config_options, mpi_config)
@@ -2444,142 +2635,159 @@ def regrid_hourly_wrf_arw(input_forcings, config_options, wrf_hydro_geo_meta, mp
         cmd = '$WGRIB2 -match "(' + '|'.join(fields) + ')" ' + input_forcings.file_in2 + \
               " -netcdf " + input_forcings.tmpFile
         id_tmp = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFile, cmd,
-                                  config_options, mpi_config, inputVar=None)
+                                  config_options, mpi_config, inputVar=None,
+                                  open_on_all_procs=input_forcings.distributed_read, match=fields)
         err_handler.check_program_status(config_options, mpi_config)
     else:
         create_link("WRF-ARW", input_forcings.file_in2, input_forcings.tmpFile, config_options, mpi_config)
-        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config)
+        id_tmp = ioMod.open_netcdf_forcing(input_forcings.tmpFile, config_options, mpi_config,
+                                           open_on_all_procs=input_forcings.distributed_read)
 
     # Loop through all of the input forcings in NAM nest data. Convert the GRIB2 files
     # to NetCDF, read in the data, regrid it, then map it to the appropriate
     # array slice in the output arrays.
-    for force_count, grib_var in enumerate(input_forcings.grib_vars):
+    calc_regrid_flag = check_regrid_status(id_tmp, 0, input_forcings,
+                                           config_options, wrf_hydro_geo_meta, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    if calc_regrid_flag:
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Processing WRF-ARW Variable: " + grib_var
+            config_options.statusMsg = "Calculating WRF-ARW regridding weights...."
             err_handler.log_msg(config_options, mpi_config)
+        calculate_weights(id_tmp, 0, input_forcings, config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-        calc_regrid_flag = check_regrid_status(id_tmp, force_count, input_forcings,
-                                               config_options, wrf_hydro_geo_meta, mpi_config)
+        # Read in the RAP height field, which is used for downscaling purposes.
+        # if mpi_config.rank == 0:
+        #     config_options.statusMsg = "Reading in WRF-ARW elevation data from GRIB2."
+        #     err_handler.log_msg(config_options, mpi_config)
+        # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
+        #       "\":(HGT):(surface):\" " + \
+        #       " -netcdf " + input_forcings.tmpFileHeight
+        # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
+        #                                  cmd, config_options, mpi_config, 'HGT_surface')
+        # err_handler.check_program_status(config_options, mpi_config)
+
+        # Regrid the height variable.
+        if mpi_config.rank == 0:
+            var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
+        else:
+            var_tmp = None
         err_handler.check_program_status(config_options, mpi_config)
 
-        if calc_regrid_flag:
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Calculating WRF-ARW regridding weights...."
-                err_handler.log_msg(config_options, mpi_config)
-            calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            # Read in the RAP height field, which is used for downscaling purposes.
-            # if mpi_config.rank == 0:
-            #     config_options.statusMsg = "Reading in WRF-ARW elevation data from GRIB2."
-            #     err_handler.log_msg(config_options, mpi_config)
-            # cmd = "$WGRIB2 " + input_forcings.file_in2 + " -match " + \
-            #       "\":(HGT):(surface):\" " + \
-            #       " -netcdf " + input_forcings.tmpFileHeight
-            # id_tmp_height = ioMod.open_grib2(input_forcings.file_in2, input_forcings.tmpFileHeight,
-            #                                  cmd, config_options, mpi_config, 'HGT_surface')
-            # err_handler.check_program_status(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to place NetCDF WRF-ARW elevation data into the ESMF field object: " \
+                                    + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            # Regrid the height variable.
-            if mpi_config.rank == 0:
-                var_tmp = id_tmp.variables['HGT_surface'][0, :, :]
-            else:
-                var_tmp = None
-            err_handler.check_program_status(config_options, mpi_config)
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "Regridding WRF-ARW elevation data to the WRF-Hydro domain."
+            err_handler.log_msg(config_options, mpi_config)
+        try:
+            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                     input_forcings.esmf_field_out)
+        except ValueError as ve:
+            config_options.errMsg = "Unable to regrid WRF-ARW elevation data to the WRF-Hydro domain " \
+                                    "using ESMF: " + str(ve)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-            err_handler.check_program_status(config_options, mpi_config)
+        # Set any pixel cells outside the input domain to the global missing value.
+        try:
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
+        except (ValueError, ArithmeticError) as npe:
+            config_options.errMsg = "Unable to compute mask on WRF-ARW elevation data: " + str(npe)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            try:
-                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
-            except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to place NetCDF WRF-ARW elevation data into the ESMF field object: " \
-                                        + str(err)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        try:
+            input_forcings.height[:, :] = input_forcings.esmf_field_out.data
+        except (ValueError, KeyError, AttributeError) as err:
+            config_options.errMsg = "Unable to extract ESMF regridded WRF-ARW elevation data to a local " \
+                                    "array: " + str(err)
+            err_handler.log_critical(config_options, mpi_config)
+        err_handler.check_program_status(config_options, mpi_config)
 
-            if mpi_config.rank == 0:
-                config_options.statusMsg = "Regridding WRF-ARW elevation data to the WRF-Hydro domain."
-                err_handler.log_msg(config_options, mpi_config)
-            try:
-                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                         input_forcings.esmf_field_out)
-            except ValueError as ve:
-                config_options.errMsg = "Unable to regrid WRF-ARW elevation data to the WRF-Hydro domain " \
-                                        "using ESMF: " + str(ve)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+        # Close the temporary NetCDF file and remove it.
+        # if mpi_config.rank == 0:
+        #     try:
+        #         id_tmp_height.close()
+        #     except OSError:
+        #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+        #
+        #     try:
+        #         os.remove(input_forcings.tmpFileHeight)
+        #     except OSError:
+        #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
+        #         err_handler.log_critical(config_options, mpi_config)
+        # err_handler.check_program_status(config_options, mpi_config)
 
-            # Set any pixel cells outside the input domain to the global missing value.
-            try:
-                input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                    config_options.globalNdv
-            except (ValueError, ArithmeticError) as npe:
-                config_options.errMsg = "Unable to compute mask on WRF-ARW elevation data: " + str(npe)
-                err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
 
+    # Read all of the input variables. Either rank 0 reads the full grids and scatters them
+    # to the local processors in a single collective, or, for a distributed read, every
+    # processor reads its own patch of the input grid directly from the file.
+    window = get_read_window(input_forcings, mpi_config)
+    var_stack = None
+    if window is not None:
+        var_stack = new_read_stack(window, len(input_forcings.grib_vars))
+        for force_count, grib_var in enumerate(input_forcings.grib_vars):
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Regridding WRF-ARW input variable: " + \
+                                           input_forcings.netcdf_var_names[force_count]
+                err_handler.log_msg(config_options, mpi_config)
             try:
-                input_forcings.height[:, :] = input_forcings.esmf_field_out.data
+                var_stack[force_count, :, :] = \
+                    id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, window[0], window[1]]
             except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to extract ESMF regridded WRF-ARW elevation data to a local " \
-                                        "array: " + str(err)
+                config_options.errMsg = "Unable to extract " + input_forcings.netcdf_var_names[force_count] + \
+                                        " from: " + input_forcings.tmpFile + " (" + str(err) + ")"
                 err_handler.log_critical(config_options, mpi_config)
-            err_handler.check_program_status(config_options, mpi_config)
+                break
+    err_handler.check_program_status(config_options, mpi_config)
 
-            # Close the temporary NetCDF file and remove it.
-            # if mpi_config.rank == 0:
-            #     try:
-            #         id_tmp_height.close()
-            #     except OSError:
-            #         config_options.errMsg = "Unable to close temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
-            #
-            #     try:
-            #         os.remove(input_forcings.tmpFileHeight)
-            #     except OSError:
-            #         config_options.errMsg = "Unable to remove temporary file: " + input_forcings.tmpFileHeight
-            #         err_handler.log_critical(config_options, mpi_config)
-            # err_handler.check_program_status(config_options, mpi_config)
+    var_sub_stack = scatter_input_stack(input_forcings, var_stack, len(input_forcings.grib_vars),
+                                        config_options, mpi_config, dtype=np.float32)
+    err_handler.check_program_status(config_options, mpi_config)
 
-        err_handler.check_program_status(config_options, mpi_config)
+    # Regrid all variables at once.
+    regridded_stack = regrid_input_stack(input_forcings, var_sub_stack, config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
 
-        # Regrid the input variables.
-        var_tmp = None
+    for force_count, grib_var in enumerate(input_forcings.grib_vars):
         if mpi_config.rank == 0:
-            config_options.statusMsg = "Regridding WRF-ARW input variable: " + \
-                                       input_forcings.netcdf_var_names[force_count]
+            config_options.statusMsg = "Processing WRF-ARW Variable: " + grib_var
             err_handler.log_msg(config_options, mpi_config)
+        var_sub_tmp = var_sub_stack[force_count, :, :]
+
+        if regridded_stack is None:
             try:
-                var_tmp = id_tmp.variables[input_forcings.netcdf_var_names[force_count]][0, :, :]
+                input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
             except (ValueError, KeyError, AttributeError) as err:
-                config_options.errMsg = "Unable to extract " + input_forcings.netcdf_var_names[force_count] + \
-                                        " from: " + input_forcings.tmpFile + " (" + str(err) + ")"
+                config_options.errMsg = "Unable to place local array into local ESMF field: " + str(err)
                 err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
-
-        var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
-        err_handler.check_program_status(config_options, mpi_config)
-
-        try:
-            input_forcings.esmf_field_in.data[:, :] = var_sub_tmp
-        except (ValueError, KeyError, AttributeError) as err:
-            config_options.errMsg = "Unable to place local array into local ESMF field: " + str(err)
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
 
-        try:
-            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                     input_forcings.esmf_field_out)
-        except ValueError as ve:
-            config_options.errMsg = "Unable to regrid input WRF-ARW forcing variables using ESMF: " + str(ve)
-            err_handler.log_critical(config_options, mpi_config)
-        err_handler.check_program_status(config_options, mpi_config)
+            try:
+                input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                         input_forcings.esmf_field_out)
+            except ValueError as ve:
+                config_options.errMsg = "Unable to regrid input WRF-ARW forcing variables using ESMF: " + str(ve)
+                err_handler.log_critical(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
+        else:
+            input_forcings.esmf_field_out.data[:, :] = regridded_stack[force_count, :, :]
 
         # Set any pixel cells outside the input domain to the global missing value.
         try:
-            input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                config_options.globalNdv
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
         except (ValueError, ArithmeticError) as npe:
             config_options.errMsg = "Unable to calculate mask from input WRF-ARW regridded forcings: " + str(npe)
             err_handler.log_critical(config_options, mpi_config)
@@ -2611,6 +2819,8 @@ def regrid_hourly_wrf_arw(input_forcings, config_options, wrf_hydro_geo_meta, mp
                 input_forcings.regridded_forcings2[input_forcings.input_map_output[force_count], :, :]
         err_handler.check_program_status(config_options, mpi_config)
 
+    release_input_file(id_tmp, input_forcings, config_options, mpi_config)
+
     # Close the temporary NetCDF file and remove it.
     if mpi_config.rank == 0:
         try:
@@ -2619,7 +2829,8 @@ def regrid_hourly_wrf_arw(input_forcings, config_options, wrf_hydro_geo_meta, mp
             config_options.errMsg = "Unable to close NetCDF file: " + input_forcings.tmpFile
             err_handler.log_critical(config_options, mpi_config)
         try:
-            os.remove(input_forcings.tmpFile)
+            if os.path.lexists(input_forcings.tmpFile):
+                os.remove(input_forcings.tmpFile)
         except OSError:
             config_options.errMsg = "Unable to remove NetCDF file: " + input_forcings.tmpFile
             err_handler.log_critical(config_options, mpi_config)
@@ -2735,8 +2946,7 @@ def regrid_hourly_wrf_arw_hi_res_pcp(supplemental_precip, config_options, wrf_hy
 
     # Set any pixel cells outside the input domain to the global missing value.
     try:
-        supplemental_precip.esmf_field_out.data[np.where(supplemental_precip.regridded_mask == 0)] = \
-            config_options.globalNdv
+        supplemental_precip.mask_plan.fill(supplemental_precip.esmf_field_out.data, config_options.globalNdv)
     except (ValueError, ArithmeticError) as npe:
         config_options.errMsg = "Unable to run mask search on WRF ARW supplemental precipitation: " + str(npe)
         err_handler.log_critical(config_options, mpi_config)
@@ -2846,7 +3056,7 @@ def regrid_sbcv2_liquid_water_fraction(supplemental_forcings, config_options, wr
 
     # Set any missing data or pixel cells outside the input domain to a default of 100%
     try:
-        supplemental_forcings.esmf_field_out.data[np.where(supplemental_forcings.regridded_mask == 0)] = 1.0
+        supplemental_forcings.mask_plan.fill(supplemental_forcings.esmf_field_out.data, 1.0)
         supplemental_forcings.esmf_field_out.data[np.where(supplemental_forcings.esmf_field_out.data < 0)] = 1.0
     except (ValueError, ArithmeticError) as npe:
         config_options.errMsg = "Unable to run mask search on SBCv2 Liquid Water Fraction: " + str(npe)
@@ -3020,8 +3230,7 @@ def regrid_hourly_nbm(forcings_or_precip, config_options, wrf_hydro_geo_meta, mp
 
                     # Set any pixel cells outside the input domain to the global missing value.
                     try:
-                        forcings_or_precip.esmf_field_out.data[np.where(forcings_or_precip.regridded_mask == 0)] = \
-                            config_options.globalNdv
+                        forcings_or_precip.mask_plan.fill(forcings_or_precip.esmf_field_out.data, config_options.globalNdv)
                     except (ValueError, ArithmeticError) as npe:
                         config_options.errMsg = "Unable to compute mask on NBM elevation data: " + str(npe)
                         err_handler.log_critical(config_options, mpi_config)
@@ -3072,8 +3281,7 @@ def regrid_hourly_nbm(forcings_or_precip, config_options, wrf_hydro_geo_meta, mp
 
         # Set any pixel cells outside the input domain to the global missing value.
         try:
-            forcings_or_precip.esmf_field_out.data[np.where(forcings_or_precip.regridded_mask == 0)] = \
-                config_options.globalNdv
+            forcings_or_precip.mask_plan.fill(forcings_or_precip.esmf_field_out.data, config_options.globalNdv)
         except (ValueError, ArithmeticError) as npe:
             config_options.errMsg = "Unable to run mask search on NBM supplemental precipitation: " + str(npe)
             err_handler.log_critical(config_options, mpi_config)
@@ -3258,8 +3466,7 @@ def regrid_ndfd(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config):
 
         # Set any pixel cells outside the input domain to the global missing value, and fix missings that were interpolated
         try:
-            input_forcings.esmf_field_out.data[np.where(input_forcings.regridded_mask == 0)] = \
-                config_options.globalNdv
+            input_forcings.mask_plan.fill(input_forcings.esmf_field_out.data, config_options.globalNdv)
             # input_forcings.esmf_field_out.data[np.where((input_forcings.esmf_field_out.data/config_options.globalNdv) > 0.75)] = \
             #     config_options.globalNdv
         except (ValueError, ArithmeticError) as npe:
@@ -3347,23 +3554,22 @@ def check_regrid_status(id_tmp, force_count, input_forcings, config_options, wrf
 
     if input_forcings.nx_global is None or input_forcings.ny_global is None:
         # This is the first timestep.
-        # Create out regridded numpy arrays to hold the regridded data.
-        force_count = 9 if config_options.include_lqfrac else 8
-        input_forcings.regridded_forcings1 = np.empty([force_count, wrf_hydro_geo_meta.ny_local, wrf_hydro_geo_meta.nx_local],
-                                                      np.float32)
-        input_forcings.regridded_forcings2 = np.empty([force_count, wrf_hydro_geo_meta.ny_local, wrf_hydro_geo_meta.nx_local],
-                                                      np.float32)
+        allocate_regridded_forcings(input_forcings, config_options, wrf_hydro_geo_meta)
 
     if mpi_config.rank == 0:
         if input_forcings.nx_global is None or input_forcings.ny_global is None:
             # This is the first timestep.
             calc_regrid_flag = True
         else:
+            # Compare against the full source grid, before any cropping.
+            src_shape = input_forcings.src_shape
+            if src_shape is None:
+                src_shape = (input_forcings.ny_global, input_forcings.nx_global)
             if mpi_config.rank == 0:
                 if id_tmp.variables[input_forcings.netcdf_var_names[force_count]].shape[1] \
-                        != input_forcings.ny_global and \
+                        != src_shape[0] and \
                         id_tmp.variables[input_forcings.netcdf_var_names[force_count]].shape[2] \
-                        != input_forcings.nx_global:
+                        != src_shape[1]:
                     calc_regrid_flag = True
     # mpi_config.comm.barrier()
 
@@ -3453,8 +3659,116 @@ def check_supp_pcp_regrid_status(id_tmp, supplemental_precip, config_options, wr
     return calc_regrid_flag
 
 
+def allocate_regridded_forcings(input_forcings, config_options, wrf_hydro_geo_meta):
+    """
+    Function to create the numpy arrays holding the regridded data, unless
+    they already hold fields read from the regridded field cache.
+    :param input_forcings:
+    :param config_options:
+    :param wrf_hydro_geo_meta:
+    :return:
+    """
+    if input_forcings.regridded_forcings1 is not None and input_forcings.regridded_forcings2 is not None:
+        return
+    force_count = 9 if config_options.include_lqfrac else 8
+    input_forcings.regridded_forcings1 = np.empty([force_count, wrf_hydro_geo_meta.ny_local, wrf_hydro_geo_meta.nx_local],
+                                                  np.float32)
+    input_forcings.regridded_forcings2 = np.empty([force_count, wrf_hydro_geo_meta.ny_local, wrf_hydro_geo_meta.nx_local],
+                                                  np.float32)
+
+
+def get_source_window(input_forcings, lat_tmp, lon_tmp, wrf_hydro_geo_meta, config_options, mpi_config):
+    """
+    Function to find the index window of a global source grid that covers the
+    WRF-Hydro domain, plus a halo of CROP_HALO source cells. Domains that
+    wrap around the edge of the source grid keep its full longitude range.
+    The window holds at least two rows per processor, as ESMF decomposes
+    the source grid along its first dimension.
+    :param input_forcings:
+    :param lat_tmp: Global source latitude grid, on rank 0
+    :param lon_tmp: Global source longitude grid, on rank 0
+    :param wrf_hydro_geo_meta:
+    :param config_options:
+    :param mpi_config:
+    :return: Tuple of (y, x) slices into the global source grid
+    """
+    # Latitude and longitude range of the domain. Longitudes are taken in [0, 360) or
+    # [-180, 180), whichever gives the smaller range, for domains crossing either edge.
+    lons = wrf_hydro_geo_meta.longitude_grid % 360.0
+    lons_180 = (lons + 180.0) % 360.0
+    local_bounds = np.array([wrf_hydro_geo_meta.latitude_grid.min(), -wrf_hydro_geo_meta.latitude_grid.max(),
+                             lons.min(), -lons.max(), lons_180.min(), -lons_180.max()], np.float64)
+    bounds = np.empty_like(local_bounds)
+    mpi_config.comm.Allreduce(local_bounds, bounds, op=MPI.MIN)
+    lat_min, lat_max = bounds[0], -bounds[1]
+    if -bounds[3] - bounds[2] <= -bounds[5] - bounds[4]:
+        lon_west, lon_span = bounds[2], -bounds[3] - bounds[2]
+    else:
+        lon_west, lon_span = bounds[4] - 180.0, -bounds[5] - bounds[4]
+
+    window = None
+    if mpi_config.rank == 0:
+        ny, nx = input_forcings.src_shape
+        lat_grid = np.ma.filled(lat_tmp, np.nan).astype(np.float64)
+        lon_grid = np.ma.filled(lon_tmp, np.nan).astype(np.float64)
+
+        # Source cells within one grid spacing of the domain.
+        with np.errstate(invalid='ignore'):
+            spacing = max(np.nanmax(np.abs(np.diff(lat_grid, axis=0))) if ny > 1 else 0.0,
+                          np.nanmax(np.abs((np.diff(lon_grid, axis=1) + 180.0) % 360.0 - 180.0)) if nx > 1 else 0.0)
+            inside = (lat_grid >= lat_min - spacing) & (lat_grid <= lat_max + spacing) & \
+                     ((lon_grid - lon_west + spacing) % 360.0 <= lon_span + 2.0 * spacing)
+        rows = np.flatnonzero(inside.any(axis=1))
+        cols = np.flatnonzero(inside.any(axis=0))
+
+        if rows.size == 0:
+            config_options.statusMsg = "Unable to locate the WRF-Hydro domain within the " + \
+                                       input_forcings.productName + " source grid, it will not be cropped."
+            err_handler.log_warning(config_options, mpi_config)
+            window = (0, ny, 0, nx)
+        else:
+            y_lower = max(int(rows[0]) - CROP_HALO, 0)
+            y_upper = min(int(rows[-1]) + 1 + CROP_HALO, ny)
+            if cols[-1] - cols[0] + 1 > cols.size:
+                x_lower, x_upper = 0, nx
+            else:
+                x_lower = max(int(cols[0]) - CROP_HALO, 0)
+                x_upper = min(int(cols[-1]) + 1 + CROP_HALO, nx)
+
+            # Grow the window to the minimum size ESMF can decompose.
+            min_rows = min(2 * mpi_config.size, ny)
+            if y_upper - y_lower < min_rows:
+                y_lower = max(min(y_lower, ny - min_rows), 0)
+                y_upper = y_lower + min_rows
+            if x_upper - x_lower < 2:
+                x_lower = max(min(x_lower, nx - 2), 0)
+                x_upper = min(x_lower + 2, nx)
+            window = (y_lower, y_upper, x_lower, x_upper)
+
+    window = mpi_config.comm.bcast(window, root=0)
+    return slice(window[0], window[1]), slice(window[2], window[3])
+
+
+def border_mask(input_forcings, border):
+    """
+    Function to build the global mask of the source cells kept when trimming
+    a border of the given width off the full source grid, limited to the
+    source window.
+    :param input_forcings:
+    :param border: Border width in grid cells
+    :return: Mask of 1 (kept) and 0 (trimmed) values
+    """
+    gmask = np.ones(input_forcings.src_shape)
+    if border > 0:
+        gmask[:+border, :] = 0.  # top edge
+        gmask[-border:, :] = 0.  # bottom edge
+        gmask[:, :+border] = 0.  # left edge
+        gmask[:, -border:] = 0.  # right edge
+    return gmask[input_forcings.src_window]
+
+
 def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_config,
-                      lat_var="latitude", lon_var="longitude", fill=False):
+                      lat_var="latitude", lon_var="longitude", fill=False, wrf_hydro_geo_meta=None):
     """
     Function to calculate ESMF weights based on the output ESMF
     field previously calculated, along with input lat/lon grids,
@@ -3464,6 +3778,8 @@ def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_c
     :param mpi_config:
     :param config_options:
     :param force_count:
+    :param wrf_hydro_geo_meta: If given, the source grid is cropped to the window
+                               covering the WRF-Hydro domain (for global input grids).
     :return:
     """
 
@@ -3492,9 +3808,72 @@ def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_c
                                                               config_options, param_type=int)
     err_handler.check_program_status(config_options, mpi_config)
 
-    try:
-        # noinspection PyTypeChecker
-        input_forcings.esmf_grid_in = ESMF.Grid(np.array([input_forcings.ny_global, input_forcings.nx_global]),
+    lat_tmp = None
+    lon_tmp = None
+    if mpi_config.rank == 0:
+        # Process lat/lon values from the GFS grid.
+        if len(id_tmp.variables[lat_var].shape) == 3:
+            # We have 2D grids already in place.
+            lat_tmp = id_tmp.variables[lat_var][0, :, :]
+            lon_tmp = id_tmp.variables[lon_var][0, :, :]
+        elif len(id_tmp.variables[lon_var].shape) == 2:
+            # We have 2D grids already in place.
+            lat_tmp = id_tmp.variables[lat_var][:, :]
+            lon_tmp = id_tmp.variables[lon_var][:, :]
+        elif len(id_tmp.variables[lat_var].shape) == 1:
+            # We have 1D lat/lons we need to translate into
+            # 2D grids.
+            lat_tmp = np.repeat(id_tmp.variables[lat_var][:][:, np.newaxis], input_forcings.nx_global, axis=1)
+            lon_tmp = np.tile(id_tmp.variables[lon_var][:], (input_forcings.ny_global, 1))
+    err_handler.check_program_status(config_options, mpi_config)
+
+    # Limit the source grid to the window covering the WRF-Hydro domain. Input grids are
+    # then only read, scattered and regridded over that window.
+    input_forcings.src_shape = (input_forcings.ny_global, input_forcings.nx_global)
+    input_forcings.src_window = (slice(0, input_forcings.ny_global), slice(0, input_forcings.nx_global))
+    if wrf_hydro_geo_meta is not None:
+        input_forcings.src_window = get_source_window(input_forcings, lat_tmp, lon_tmp, wrf_hydro_geo_meta,
+                                                      config_options, mpi_config)
+        input_forcings.ny_global = input_forcings.src_window[0].stop - input_forcings.src_window[0].start
+        input_forcings.nx_global = input_forcings.src_window[1].stop - input_forcings.src_window[1].start
+        if mpi_config.rank == 0:
+            lat_tmp = lat_tmp[input_forcings.src_window]
+            lon_tmp = lon_tmp[input_forcings.src_window]
+            config_options.statusMsg = "Cropping the {} source grid of shape {} to the window {}".format(
+                input_forcings.productName, input_forcings.src_shape,
+                [(window.start, window.stop) for window in input_forcings.src_window])
+            err_handler.log_msg(config_options, mpi_config)
+
+    # Regrid method, extrapolation method and source masking of this product.
+    border = input_forcings.border  # // 5  # HRRR is a 3 km product
+    extrap_method = ESMF.ExtrapMethod.CREEP_FILL if fill else ESMF.ExtrapMethod.NONE
+    regrid_method = (ESMF.RegridMethod.BILINEAR, ESMF.RegridMethod.NEAREST_STOD)[input_forcings.regridOpt - 1]
+    src_mask_values = np.array([0, config_options.globalNdv])
+    mask_policy = "border={};src_mask_values={}".format(border, src_mask_values.tolist())
+
+    mask_tmp = None
+    if mpi_config.rank == 0:
+        mask_tmp = id_tmp[input_forcings.netcdf_var_names[force_count]][0, input_forcings.src_window[0],
+                                                                         input_forcings.src_window[1]]
+        # Set all valid values to 1, and all missing values to 0. This will
+        # be used to generate an output mask that is used later on in downscaling, layering, etc.
+        mask_tmp.fill(1)
+        mask_tmp = mask_tmp.filled(0)
+
+    # Fields holding all variables are recreated on the new source grid when first needed.
+    input_forcings.esmf_stack_in = None
+    input_forcings.esmf_stack_out = None
+
+    # Use the regridding objects of another product with the same source grid, if there is one.
+    registry_key, shared = lookup_shared_regrid(input_forcings, lat_tmp, lon_tmp, mask_tmp, regrid_method,
+                                                extrap_method, mask_policy, input_forcings.regrid_engine,
+                                                config_options, mpi_config)
+    if shared:
+        return
+
+    try:
+        # noinspection PyTypeChecker
+        input_forcings.esmf_grid_in = ESMF.Grid(np.array([input_forcings.ny_global, input_forcings.nx_global]),
                                                 staggerloc=ESMF.StaggerLoc.CENTER,
                                                 coord_sys=ESMF.CoordSys.SPH_DEG)
     except ESMF.ESMPyException as esmf_error:
@@ -3526,7 +3905,6 @@ def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_c
     err_handler.check_program_status(config_options, mpi_config)
 
     # check if we're doing border trimming and set up mask
-    border = input_forcings.border  # // 5  # HRRR is a 3 km product
     if border > 0:
         try:
             mask = input_forcings.esmf_grid_in.add_item(ESMF.GridItem.MASK, ESMF.StaggerLoc.CENTER)
@@ -3536,36 +3914,12 @@ def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_c
                         border)
                 err_handler.log_msg(config_options, mpi_config)
 
-            gmask = np.ones([input_forcings.ny_global, input_forcings.nx_global])
-            gmask[:+border, :] = 0.  # top edge
-            gmask[-border:, :] = 0.  # bottom edge
-            gmask[:, :+border] = 0.  # left edge
-            gmask[:, -border:] = 0.  # right edge
-
+            gmask = border_mask(input_forcings, border)
             mask[:, :] = mpi_config.scatter_array(input_forcings, gmask, config_options)
             err_handler.check_program_status(config_options, mpi_config)
         except Exception as e:
             print(e, flush=True)
 
-    lat_tmp = None
-    lon_tmp = None
-    if mpi_config.rank == 0:
-        # Process lat/lon values from the GFS grid.
-        if len(id_tmp.variables[lat_var].shape) == 3:
-            # We have 2D grids already in place.
-            lat_tmp = id_tmp.variables[lat_var][0, :, :]
-            lon_tmp = id_tmp.variables[lon_var][0, :, :]
-        elif len(id_tmp.variables[lon_var].shape) == 2:
-            # We have 2D grids already in place.
-            lat_tmp = id_tmp.variables[lat_var][:, :]
-            lon_tmp = id_tmp.variables[lon_var][:, :]
-        elif len(id_tmp.variables[lat_var].shape) == 1:
-            # We have 1D lat/lons we need to translate into
-            # 2D grids.
-            lat_tmp = np.repeat(id_tmp.variables[lat_var][:][:, np.newaxis], input_forcings.nx_global, axis=1)
-            lon_tmp = np.tile(id_tmp.variables[lon_var][:], (input_forcings.ny_global, 1))
-    err_handler.check_program_status(config_options, mpi_config)
-
     # Scatter global GFS latitude grid to processors..
     if mpi_config.rank == 0:
         var_tmp = lat_tmp
@@ -3597,10 +3951,15 @@ def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_c
 
     input_forcings.esmf_lats[:, :] = var_sub_lat_tmp
     input_forcings.esmf_lons[:, :] = var_sub_lon_tmp
+
+    # Look up cached weights for this source grid, destination domain, method and mask.
+    weight_builder = weight_generator(regrid_method, extrap_method, config_options)
+    weight_key, weight_file, new_weight_file = lookup_weight_file(
+        input_forcings, lat_tmp, lon_tmp, regrid_method, extrap_method, mask_policy, weight_builder,
+        config_options, mpi_config)
+
     del var_sub_lat_tmp
     del var_sub_lon_tmp
-    del lat_tmp
-    del lon_tmp
 
     # Create a ESMF field to hold the incoming data.
     try:
@@ -3611,16 +3970,8 @@ def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_c
         err_handler.log_critical(config_options, mpi_config)
     err_handler.check_program_status(config_options, mpi_config)
 
-    # Scatter global grid to processors..
-    if mpi_config.rank == 0:
-        var_tmp = id_tmp[input_forcings.netcdf_var_names[force_count]][0, :, :]
-        # Set all valid values to 1, and all missing values to 0. This will
-        # be used to generate an output mask that is used later on in downscaling, layering, etc.
-        var_tmp.fill(1)
-        var_tmp = var_tmp.filled(0)
-    else:
-        var_tmp = None
-    var_sub_tmp = mpi_config.scatter_array(input_forcings, var_tmp, config_options)
+    # Scatter the sample mask to processors..
+    var_sub_tmp = mpi_config.scatter_array(input_forcings, mask_tmp, config_options)
     err_handler.check_program_status(config_options, mpi_config)
 
     # Place temporary data into the field array for generating the regridding object.
@@ -3630,34 +3981,49 @@ def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_c
     # ## CALCULATE WEIGHT ## #
     # Try to find a pre-existing weight file, if available
 
-    weight_file = None
-    if config_options.weightsDir is not None:
-        grid_key = input_forcings.productName
-        weight_file = os.path.join(config_options.weightsDir, "ESMF_weight_{}_b{}.nc4".format(grid_key, border))
-        # check if file exists:
-        if os.path.exists(weight_file):
-            # read the data
-            try:
-                if mpi_config.rank == 0:
-                    config_options.statusMsg = "Loading cached ESMF weight object for " + input_forcings.productName + \
-                                               " from " + weight_file
-                    err_handler.log_msg(config_options, mpi_config)
-                err_handler.check_program_status(config_options, mpi_config)
+    if weight_file is not None:
+        # read the data
+        try:
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Loading cached ESMF weight object for " + input_forcings.productName + \
+                                           " from " + weight_file
+                err_handler.log_msg(config_options, mpi_config)
+            err_handler.check_program_status(config_options, mpi_config)
 
-                begin = time.monotonic()
-                input_forcings.regridObj = ESMF.RegridFromFile(input_forcings.esmf_field_in,
-                                                               input_forcings.esmf_field_out,
-                                                               weight_file)
-                end = time.monotonic()
+            begin = time.monotonic()
+            input_forcings.regridObj = ESMF.RegridFromFile(input_forcings.esmf_field_in,
+                                                           input_forcings.esmf_field_out,
+                                                           weight_file)
+            end = time.monotonic()
 
-                if mpi_config.rank == 0:
-                    config_options.statusMsg = "Finished loading weight object with ESMF, took {} seconds".format(
-                        end - begin)
-                    err_handler.log_msg(config_options, mpi_config)
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Finished loading weight object with ESMF, took {} seconds".format(
+                    end - begin)
+                err_handler.log_msg(config_options, mpi_config)
 
-            except (IOError, ValueError, ESMF.ESMPyException) as esmf_error:
-                config_options.errMsg = "Unable to load cached ESMF weight file: " + str(esmf_error)
-                err_handler.log_warning(config_options, mpi_config)
+        except (IOError, ValueError, ESMF.ESMPyException) as esmf_error:
+            config_options.statusMsg = "Unable to load cached ESMF weight file: " + str(esmf_error)
+            err_handler.log_warning(config_options, mpi_config)
+            input_forcings.regridObj = None
+            drop_weight_file(weight_key, config_options, mpi_config)
+
+    new_weights = input_forcings.regridObj is None
+    if new_weights and weight_builder == NUMPY_WEIGHT_BUILDER:
+        src_valid = None
+        if mpi_config.rank == 0:
+            src_valid = (mask_tmp != 0) & (border_mask(input_forcings, border) != 0)
+        built_weight_file = build_weight_file(input_forcings, lat_tmp, lon_tmp, src_valid, regrid_method,
+                                              new_weight_file, config_options, mpi_config)
+        input_forcings.regridObj = load_built_weights(input_forcings, built_weight_file, new_weight_file,
+                                                      config_options, mpi_config)
+        if input_forcings.regridObj is None:
+            # The weights are generated with ESMF after all, so they are stored under the ESMF key.
+            discard_weight_file(new_weight_file, mpi_config)
+            weight_key, weight_file, new_weight_file = lookup_weight_file(
+                input_forcings, lat_tmp, lon_tmp, regrid_method, extrap_method, mask_policy, ESMF_WEIGHT_BUILDER,
+                config_options, mpi_config)
+    del lat_tmp
+    del lon_tmp
 
     if input_forcings.regridObj is None:
         if mpi_config.rank == 0:
@@ -3665,16 +4031,14 @@ def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_c
             err_handler.log_msg(config_options, mpi_config)
         err_handler.check_program_status(config_options, mpi_config)
         try:
-            extrap_method = ESMF.ExtrapMethod.CREEP_FILL if fill else ESMF.ExtrapMethod.NONE
-            regrid_method = (ESMF.RegridMethod.BILINEAR, ESMF.RegridMethod.NEAREST_STOD)[input_forcings.regridOpt - 1]
             begin = time.monotonic()
             input_forcings.regridObj = ESMF.Regrid(input_forcings.esmf_field_in,
                                                    input_forcings.esmf_field_out,
-                                                   src_mask_values=np.array([0, config_options.globalNdv]),
+                                                   src_mask_values=src_mask_values,
                                                    regrid_method=regrid_method,
                                                    unmapped_action=ESMF.UnmappedAction.IGNORE,
                                                    extrap_method=extrap_method,
-                                                   filename=weight_file)
+                                                   filename=new_weight_file)
             end = time.monotonic()
 
             if mpi_config.rank == 0:
@@ -3689,21 +4053,515 @@ def calculate_weights(id_tmp, force_count, input_forcings, config_options, mpi_c
 
         err_handler.check_program_status(config_options, mpi_config)
 
-        # Run the regridding object on this test dataset. Check the output grid for
-        # any 0 values.
-        try:
-            input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
-                                                                     input_forcings.esmf_field_out)
-        except ValueError as ve:
-            config_options.errMsg = "Unable to extract regridded data from ESMF regridded field: " + str(ve)
-            err_handler.log_critical(config_options, mpi_config)
-            # delete bad cached file if it exists
-            if weight_file is not None:
-                if os.path.exists(weight_file):
-                    os.remove(weight_file)
-        err_handler.check_program_status(config_options, mpi_config)
+    # Run the regridding object on this test dataset. Check the output grid for
+    # any 0 values.
+    try:
+        input_forcings.esmf_field_out = input_forcings.regridObj(input_forcings.esmf_field_in,
+                                                                 input_forcings.esmf_field_out)
+    except ValueError as ve:
+        config_options.errMsg = "Unable to extract regridded data from ESMF regridded field: " + str(ve)
+        err_handler.log_critical(config_options, mpi_config)
+        # delete bad weight file
+        if new_weights:
+            discard_weight_file(new_weight_file, mpi_config)
+        else:
+            drop_weight_file(weight_key, config_options, mpi_config)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    if new_weights:
+        weight_file = store_weight_file(input_forcings, weight_key, new_weight_file, config_options, mpi_config)
 
     input_forcings.regridded_mask[:, :] = np.round(input_forcings.esmf_field_out.data[:, :])
+    input_forcings.mask_plan = maskPlan.MaskPlan(input_forcings.regridded_mask)
+
+    if input_forcings.regrid_engine == SPARSE_REGRID_ENGINE:
+        load_sparse_regrid(input_forcings, weight_file, config_options, mpi_config)
+
+    config_options.regrid_registry.add(registry_key, input_forcings)
+
+
+def load_sparse_regrid(input_forcings, weight_file, config_options, mpi_config):
+    """
+    Function to build the sparse matrix regrid engine for an input forcing
+    product from its stored ESMF weight file. If that fails, the product
+    keeps being regridded with the ESMF regrid object.
+    :param input_forcings:
+    :param weight_file: ESMF weight file in the weight store
+    :param config_options:
+    :param mpi_config:
+    :return:
+    """
+    input_forcings.sparse_regrid = None
+    if weight_file is None:
+        if mpi_config.rank == 0:
+            config_options.statusMsg = "No stored ESMF weight file for " + input_forcings.productName + \
+                                       ", regridding with ESMF instead of the sparse matrix engine"
+            err_handler.log_warning(config_options, mpi_config)
+        return
+
+    src_plan = mpi_config.get_scatter_plan(input_forcings, config_options)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    dst_grid = input_forcings.esmf_field_out.grid
+    dst_bounds = (dst_grid.lower_bounds[ESMF.StaggerLoc.CENTER][0], dst_grid.upper_bounds[ESMF.StaggerLoc.CENTER][0],
+                  dst_grid.lower_bounds[ESMF.StaggerLoc.CENTER][1], dst_grid.upper_bounds[ESMF.StaggerLoc.CENTER][1])
+    sparse_regrid = None
+    begin = time.monotonic()
+    try:
+        sparse_regrid = sparseRegrid.SparseRegrid(weight_file, src_plan, tuple(dst_grid.max_index), dst_bounds)
+    except (IOError, ValueError, KeyError, RuntimeError) as err:
+        config_options.statusMsg = "Unable to load sparse regrid matrix for " + input_forcings.productName + \
+                                   " from " + weight_file + ", regridding with ESMF instead (" + str(err) + ")"
+        err_handler.log_warning(config_options, mpi_config)
+
+    # Only use the sparse engine if it could be built everywhere. The source cell exchange
+    # is collective, so it is only set up once all processors have loaded their weights.
+    if not mpi_config.comm.allreduce(sparse_regrid is not None, op=MPI.LAND):
+        return
+    sparse_regrid.exchange(mpi_config.comm)
+    input_forcings.sparse_regrid = sparse_regrid
+    end = time.monotonic()
+    if mpi_config.rank == 0:
+        config_options.statusMsg = "Finished loading sparse regrid matrix for " + input_forcings.productName + \
+                                   ", took {} seconds".format(end - begin)
+        err_handler.log_msg(config_options, mpi_config)
+
+
+def regrid_input_stack(input_forcings, var_sub_stack, config_options, mpi_config):
+    """
+    Function to regrid all variables of the local input stack at once, either with
+    the sparse matrix regrid engine, or with a single call of the ESMF regrid object
+    on fields with an ungridded dimension over the variables.
+    :param input_forcings:
+    :param var_sub_stack: Local [nvar, ny, nx] stack on the input forcing grid
+    :param config_options:
+    :param mpi_config:
+    :return: Local [nvar, ny, nx] stack on the WRF-Hydro grid, or None if the variables
+             need to be regridded one at a time.
+    """
+    if input_forcings.sparse_regrid is not None:
+        return regrid_stack_sparse(input_forcings, var_sub_stack, config_options, mpi_config)
+    return regrid_stack_esmf(input_forcings, var_sub_stack, config_options, mpi_config)
+
+
+def regrid_stack_esmf(input_forcings, var_sub_stack, config_options, mpi_config):
+    """
+    Function to regrid all variables of the local input stack in a single ESMF regrid
+    call, so the halo exchange and sparse matrix multiply are set up once per step
+    instead of once per variable. The regrid object computed on single fields is
+    applied to fields with a trailing ungridded dimension over the variables.
+    :param input_forcings:
+    :param var_sub_stack: Local [nvar, ny, nx] stack on the input forcing grid
+    :param config_options:
+    :param mpi_config:
+    :return: Local [nvar, ny, nx] stack on the WRF-Hydro grid, or None if ESMF
+             fields with an ungridded dimension could not be created.
+    """
+    nvar = var_sub_stack.shape[0]
+    if input_forcings.esmf_stack_in is None or input_forcings.esmf_stack_in.data.shape[-1] != nvar:
+        try:
+            input_forcings.esmf_stack_in = ESMF.Field(input_forcings.esmf_grid_in,
+                                                      name=input_forcings.productName + "_NATIVE_STACK",
+                                                      ndbounds=[nvar])
+            input_forcings.esmf_stack_out = ESMF.Field(input_forcings.esmf_field_out.grid,
+                                                       name=input_forcings.productName + "_REGRIDDED_STACK",
+                                                       ndbounds=[nvar])
+        except (ValueError, ESMF.ESMPyException) as esmf_error:
+            config_options.statusMsg = "Unable to create ESMF fields holding all " + input_forcings.productName + \
+                                       " variables, regridding one variable at a time (" + str(esmf_error) + ")"
+            err_handler.log_warning(config_options, mpi_config)
+            input_forcings.esmf_stack_in = None
+            input_forcings.esmf_stack_out = None
+            return None
+
+    if mpi_config.rank == 0:
+        config_options.statusMsg = "Regridding all input " + input_forcings.productName + " fields"
+        err_handler.log_msg(config_options, mpi_config)
+    try:
+        input_forcings.esmf_stack_in.data[...] = np.moveaxis(var_sub_stack, 0, -1)
+        input_forcings.esmf_stack_out = input_forcings.regridObj(input_forcings.esmf_stack_in,
+                                                                 input_forcings.esmf_stack_out)
+    except (ValueError, ESMF.ESMPyException) as esmf_error:
+        config_options.errMsg = "Unable to regrid input " + input_forcings.productName + " forcing data: " + \
+                                str(esmf_error)
+        err_handler.log_critical(config_options, mpi_config)
+        return None
+    return np.moveaxis(input_forcings.esmf_stack_out.data, -1, 0)
+
+
+def regrid_stack_sparse(input_forcings, var_sub_stack, config_options, mpi_config):
+    """
+    Function to regrid all variables of the local input stack at once with the
+    sparse matrix regrid engine, if it is used for this input forcing product.
+    :param input_forcings:
+    :param var_sub_stack: Local [nvar, ny, nx] stack on the input forcing grid
+    :param config_options:
+    :param mpi_config:
+    :return: Local [nvar, ny, nx] stack on the WRF-Hydro grid, or None if the product is regridded with ESMF.
+    """
+    if input_forcings.sparse_regrid is None:
+        return None
+
+    try:
+        regridded_stack = input_forcings.sparse_regrid.apply(var_sub_stack, config_options.working_dtype)
+    except (ValueError, MPI.Exception) as err:
+        config_options.errMsg = "Unable to regrid " + input_forcings.productName + \
+                                " with the sparse matrix regrid engine: " + str(err)
+        err_handler.log_critical(config_options, mpi_config)
+        return None
+    return regridded_stack
+
+
+def lookup_shared_regrid(grid_obj, lat_tmp, lon_tmp, mask_tmp, regrid_method, extrap_method, mask_policy,
+                         regrid_engine, config_options, mpi_config):
+    """
+    Function to look up the regridding objects of another product with the same
+    source grid, regrid method, extrapolation method, regrid engine and source mask
+    in the process-wide regrid registry, and hand them to this product. The registry key
+    is computed from the source grids (only present on the master processor).
+    :param grid_obj: Input forcing or supplemental precip object
+    :param lat_tmp: Global source latitude grid
+    :param lon_tmp: Global source longitude grid
+    :param mask_tmp: Global sample mask (None if the source is not masked)
+    :param regrid_method:
+    :param extrap_method:
+    :param mask_policy: Description of the source masking
+    :param regrid_engine:
+    :param config_options:
+    :param mpi_config:
+    :return: Registry key, and whether shared regridding objects were handed to the product, on all processors.
+    """
+    if config_options.regrid_registry is None:
+        config_options.regrid_registry = regridRegistry.RegridRegistry()
+
+    registry_key = None
+    if mpi_config.rank == 0:
+        registry_key = regridRegistry.RegridRegistry.registry_key(lat_tmp, lon_tmp, mask_tmp, regrid_method,
+                                                                  extrap_method, mask_policy, regrid_engine)
+    registry_key = mpi_config.comm.bcast(registry_key, root=0)
+
+    # Products are registered on all processors at once, so the lookup agrees everywhere.
+    owner = config_options.regrid_registry.owner(registry_key)
+    if owner is None:
+        return registry_key, False
+
+    config_options.regrid_registry.attach(registry_key, grid_obj)
+    if mpi_config.rank == 0:
+        config_options.statusMsg = "Sharing the regridding objects of " + owner + " with " + grid_obj.productName
+        err_handler.log_msg(config_options, mpi_config)
+    return registry_key, True
+
+
+def weight_generator(regrid_method, extrap_method, config_options):
+    """
+    Function to determine if new weights are generated with the NumPy weight
+    builder instead of ESMF. The builder supports bilinear and nearest neighbor
+    weights, without extrapolation.
+    :param regrid_method:
+    :param extrap_method:
+    :param config_options:
+    :return: NUMPY_WEIGHT_BUILDER or ESMF_WEIGHT_BUILDER
+    """
+    if config_options.weight_builder == NUMPY_WEIGHT_BUILDER and \
+            regrid_method in (ESMF.RegridMethod.BILINEAR, ESMF.RegridMethod.NEAREST_STOD) and \
+            extrap_method == ESMF.ExtrapMethod.NONE:
+        return NUMPY_WEIGHT_BUILDER
+    return ESMF_WEIGHT_BUILDER
+
+
+def build_weight_file(grid_obj, lat_tmp, lon_tmp, src_valid, regrid_method, new_weight_file,
+                      config_options, mpi_config):
+    """
+    Function to generate the regridding weights of a source grid and the
+    WRF-Hydro domain with the NumPy weight builder on the master processor,
+    and write them in the ESMF weight file format.
+    :param grid_obj: Input forcing or supplemental precip object
+    :param lat_tmp: Global source latitude grid
+    :param lon_tmp: Global source longitude grid
+    :param src_valid: Global grid of the unmasked source cells
+    :param regrid_method:
+    :param new_weight_file: Temporary path of the new weight file in the weight store (None if there is no store)
+    :param config_options:
+    :param mpi_config:
+    :return: Path of the written weight file (None if the weights could not be generated), on all processors.
+    """
+    weight_file = None
+    if mpi_config.rank == 0:
+        path = new_weight_file
+        if path is None:
+            path = os.path.join(config_options.scratch_dir, ".ESMF_weight_{}_{}.nc4".format(grid_obj.productName,
+                                                                                          uuid.uuid4().hex))
+        try:
+            begin = time.monotonic()
+            with Dataset(config_options.geogrid, 'r') as id_geo:
+                dst_lat = id_geo.variables['XLAT_M'][0, :, :]
+                dst_lon = id_geo.variables['XLONG_M'][0, :, :]
+            if regrid_method == ESMF.RegridMethod.BILINEAR:
+                rows, cols, weights = weightBuilder.bilinear_weights(lat_tmp, lon_tmp, src_valid, dst_lat, dst_lon)
+            else:
+                rows, cols, weights = weightBuilder.nearest_weights(lat_tmp, lon_tmp, src_valid, dst_lat, dst_lon)
+            weightBuilder.write_weight_file(path, rows, cols, weights, np.shape(lat_tmp), np.shape(dst_lat))
+            end = time.monotonic()
+            weight_file = path
+            config_options.statusMsg = "Finished generating weights for " + grid_obj.productName + \
+                                       " without ESMF, took {} seconds".format(end - begin)
+            err_handler.log_msg(config_options, mpi_config)
+        except (IOError, ValueError, KeyError, RuntimeError, MemoryError) as err:
+            config_options.statusMsg = "Unable to generate weights for " + grid_obj.productName + \
+                                       " without ESMF, generating them with ESMF instead (" + str(err) + ")"
+            err_handler.log_warning(config_options, mpi_config)
+            discard_weight_file(path, mpi_config)
+
+    return mpi_config.comm.bcast(weight_file, root=0)
+
+
+def load_built_weights(grid_obj, weight_file, new_weight_file, config_options, mpi_config):
+    """
+    Function to create the ESMF regrid object of weights generated with the
+    NumPy weight builder. Weights written outside of the weight store are
+    removed once they are loaded.
+    :param grid_obj: Input forcing or supplemental precip object
+    :param weight_file: Path from build_weight_file()
+    :param new_weight_file: Temporary path of the new weight file in the weight store
+    :param config_options:
+    :param mpi_config:
+    :return: ESMF regrid object, or None if the weights could not be loaded on all processors.
+    """
+    if weight_file is None:
+        return None
+
+    regrid_obj = None
+    try:
+        regrid_obj = ESMF.RegridFromFile(grid_obj.esmf_field_in, grid_obj.esmf_field_out, weight_file)
+    except (IOError, ValueError, ESMF.ESMPyException) as esmf_error:
+        config_options.statusMsg = "Unable to load the weights generated for " + grid_obj.productName + \
+                                   " without ESMF, generating them with ESMF instead (" + str(esmf_error) + ")"
+        err_handler.log_warning(config_options, mpi_config)
+    if not mpi_config.comm.allreduce(regrid_obj is not None, op=MPI.LAND):
+        regrid_obj = None
+
+    if weight_file != new_weight_file:
+        mpi_config.comm.barrier()
+        discard_weight_file(weight_file, mpi_config)
+    return regrid_obj
+
+
+def lookup_weight_file(grid_obj, lat_tmp, lon_tmp, regrid_method, extrap_method, mask_policy, weight_builder,
+                       config_options, mpi_config):
+    """
+    Function to look up ESMF weights for a source grid in the weight store of the
+    weights directory (if one was specified). The store is keyed by the source
+    lat/lon grids (only present on the master processor), the destination domain,
+    the regrid method, the extrapolation method, the mask policy, the ESMF version
+    and the generator of the weights.
+    :param grid_obj: Input forcing or supplemental precip object
+    :param lat_tmp: Global source latitude grid
+    :param lon_tmp: Global source longitude grid
+    :param regrid_method:
+    :param extrap_method:
+    :param mask_policy: Description of the source masking
+    :param weight_builder: Generator of new weights, from weight_generator()
+    :param config_options:
+    :param mpi_config:
+    :return: Weight key, stored weight file (None if not cached) and temporary path to
+             write new weights to, on all processors.
+    """
+    if config_options.weightsDir is None:
+        return None, None, None
+
+    weight_lookup = (None, None, None)
+    if mpi_config.rank == 0:
+        try:
+            if config_options.weight_store is None:
+                config_options.weight_store = weightStore.WeightStore(config_options.weightsDir,
+                                                                      config_options.weightsMaxSize)
+            weight_store = config_options.weight_store
+            weight_key = weight_store.weight_key(lat_tmp, lon_tmp, config_options.geogrid, regrid_method,
+                                                 extrap_method, mask_policy, getattr(ESMF, '__version__', ''),
+                                                 weight_builder)
+            weight_file = weight_store.lookup(weight_key)
+            weight_lookup = (weight_key, weight_file, weight_store.new_file(grid_obj.productName, weight_key))
+            config_options.statusMsg = weight_store.stats()
+            err_handler.log_msg(config_options, mpi_config)
+        except (OSError, ValueError, KeyError) as err:
+            config_options.statusMsg = "Unable to use ESMF weight store in " + config_options.weightsDir + \
+                                       " for " + grid_obj.productName + " (" + str(err) + ")"
+            err_handler.log_warning(config_options, mpi_config)
+
+    return mpi_config.comm.bcast(weight_lookup, root=0)
+
+
+def store_weight_file(grid_obj, weight_key, new_weight_file, config_options, mpi_config):
+    """
+    Function to add newly generated ESMF weights to the weight store.
+    :param grid_obj: Input forcing or supplemental precip object
+    :param weight_key:
+    :param new_weight_file: File the weights were written to by ESMF
+    :param config_options:
+    :param mpi_config:
+    :return: Path of the weight file in the store (None if it could not be stored), on all processors.
+    """
+    if new_weight_file is None:
+        return None
+
+    # Make sure ESMF has finished writing the weights on all processors.
+    mpi_config.comm.barrier()
+    weight_file = None
+    if mpi_config.rank == 0:
+        try:
+            weight_file = config_options.weight_store.add(weight_key, new_weight_file, grid_obj.productName)
+        except (OSError, ValueError) as err:
+            config_options.statusMsg = "Unable to add ESMF weight file to the weight store: " + str(err)
+            err_handler.log_warning(config_options, mpi_config)
+            discard_weight_file(new_weight_file, mpi_config)
+
+    return mpi_config.comm.bcast(weight_file, root=0)
+
+
+def drop_weight_file(weight_key, config_options, mpi_config):
+    """
+    Function to remove a bad weight file from the weight store.
+    :param weight_key:
+    :param config_options:
+    :param mpi_config:
+    :return:
+    """
+    if mpi_config.rank == 0 and weight_key is not None:
+        try:
+            config_options.weight_store.remove(weight_key)
+        except OSError as err:
+            config_options.statusMsg = "Unable to remove ESMF weight file from the weight store: " + str(err)
+            err_handler.log_warning(config_options, mpi_config)
+
+
+def discard_weight_file(new_weight_file, mpi_config):
+    """
+    Function to remove a newly written weight file that is not added to the weight store.
+    :param new_weight_file:
+    :param mpi_config:
+    :return:
+    """
+    if mpi_config.rank == 0 and new_weight_file is not None:
+        try:
+            os.remove(new_weight_file)
+        except OSError:
+            pass
+
+
+def load_cached_fields(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config):
+    """
+    Function to look up the regridded fields of the current input file in the
+    regridded field cache (if one was specified), and place them into the
+    regridded forcing arrays, along with the regridded mask and elevation.
+    :param input_forcings:
+    :param config_options:
+    :param wrf_hydro_geo_meta:
+    :param mpi_config:
+    :return: True if the fields were read from the cache, on all processors.
+    """
+    input_forcings.field_cache_key = None
+    if config_options.fieldCacheDir is None:
+        return False
+
+    cache_file = None
+    if mpi_config.rank == 0 and os.path.isfile(input_forcings.file_in2):
+        try:
+            if config_options.field_cache is None:
+                config_options.field_cache = fieldCache.FieldCache(config_options.fieldCacheDir,
+                                                                   config_options.fieldCacheMaxSize)
+            input_files = [input_forcings.file_in2]
+            if input_forcings.keyValue in (1, 6):
+                # RAP reads the pgrb file along with the bgrb file.
+                pgrb_file = input_forcings.file_in2.replace("bgrb", "pgrb")
+                if pgrb_file != input_forcings.file_in2 and os.path.isfile(pgrb_file):
+                    input_files.append(pgrb_file)
+            product_options = (input_forcings.keyValue, input_forcings.fileType, input_forcings.grib_vars,
+                               input_forcings.netcdf_var_names, input_forcings.input_map_output,
+                               input_forcings.regridOpt, input_forcings.border, input_forcings.cycleFreq,
+                               input_forcings.fcst_hour1, input_forcings.fcst_hour2,
+                               getattr(input_forcings, 'fcst_min1', None), getattr(input_forcings, 'fcst_min2', None),
+                               config_options.globalNdv, input_forcings.regrid_engine, config_options.weight_builder)
+            input_forcings.field_cache_key = config_options.field_cache.field_key(input_files, config_options.geogrid,
+                                                                                  product_options)
+            cache_file = config_options.field_cache.lookup(input_forcings.field_cache_key)
+        except (OSError, ValueError, KeyError) as err:
+            config_options.statusMsg = "Unable to use the regridded field cache in " + config_options.fieldCacheDir + \
+                                       " for " + input_forcings.productName + " (" + str(err) + ")"
+            err_handler.log_warning(config_options, mpi_config)
+            input_forcings.field_cache_key = None
+
+    nvar = len(input_forcings.input_map_output)
+    field_stack = None
+    if cache_file is not None:
+        try:
+            field_stack = config_options.field_cache.read(cache_file)
+            if field_stack.shape != (nvar + 2, wrf_hydro_geo_meta.ny_global, wrf_hydro_geo_meta.nx_global):
+                raise ValueError("unexpected shape " + str(field_stack.shape))
+            config_options.statusMsg = "Reading regridded " + input_forcings.productName + " fields for " + \
+                                       input_forcings.file_in2 + " from " + cache_file
+            err_handler.log_msg(config_options, mpi_config)
+        except (OSError, ValueError) as err:
+            config_options.statusMsg = "Unable to read cached regridded fields " + cache_file + " (" + str(err) + ")"
+            err_handler.log_warning(config_options, mpi_config)
+            config_options.field_cache.remove(input_forcings.field_cache_key)
+            field_stack = None
+
+    if not mpi_config.broadcast_parameter(field_stack is not None, config_options, param_type=bool):
+        return False
+
+    # The regridded fields are followed by the regridded mask and elevation.
+    local_stack = mpi_config.scatter_stack(wrf_hydro_geo_meta, field_stack, nvar + 2, config_options,
+                                           dtype=np.float32)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    allocate_regridded_forcings(input_forcings, config_options, wrf_hydro_geo_meta)
+    input_forcings.regridded_forcings2[input_forcings.input_map_output, :, :] = local_stack[:nvar]
+    input_forcings.regridded_mask[:, :] = local_stack[nvar]
+    input_forcings.mask_plan = maskPlan.MaskPlan(input_forcings.regridded_mask)
+    input_forcings.height[:, :] = local_stack[nvar + 1]
+
+    # If we are on the first timestep, set the previous regridded field to be
+    # the latest as there are no states for time 0.
+    if config_options.current_output_step == 1:
+        input_forcings.regridded_forcings1[input_forcings.input_map_output, :, :] = local_stack[:nvar]
+    return True
+
+
+def store_cached_fields(input_forcings, config_options, wrf_hydro_geo_meta, mpi_config):
+    """
+    Function to add the regridded fields of the current input file, along with the
+    regridded mask and elevation, to the regridded field cache.
+    :param input_forcings:
+    :param config_options:
+    :param wrf_hydro_geo_meta:
+    :param mpi_config:
+    :return:
+    """
+    if config_options.fieldCacheDir is None:
+        return
+    if not mpi_config.broadcast_parameter(input_forcings.field_cache_key is not None, config_options,
+                                          param_type=bool):
+        return
+
+    local_stack = np.concatenate((input_forcings.regridded_forcings2[input_forcings.input_map_output, :, :],
+                                  input_forcings.regridded_mask[np.newaxis, :, :],
+                                  input_forcings.height[np.newaxis, :, :])).astype(np.float32)
+    field_stack = mpi_config.gather_stack(wrf_hydro_geo_meta, local_stack, config_options)
+    err_handler.check_program_status(config_options, mpi_config)
+
+    if mpi_config.rank == 0:
+        field_cache = config_options.field_cache
+        tmp_file = field_cache.new_file(input_forcings.productName, input_forcings.field_cache_key)
+        try:
+            field_cache.write(tmp_file, field_stack)
+            field_cache.add(input_forcings.field_cache_key, tmp_file, input_forcings.productName)
+        except (OSError, ValueError) as err:
+            config_options.statusMsg = "Unable to add regridded " + input_forcings.productName + \
+                                       " fields to the regridded field cache: " + str(err)
+            err_handler.log_warning(config_options, mpi_config)
+            discard_weight_file(tmp_file, mpi_config)
+    input_forcings.field_cache_key = None
+
 
 def calculate_supp_pcp_weights(supplemental_precip, id_tmp, tmp_file, config_options, mpi_config,
                                lat_var="latitude", lon_var="longitude"):
@@ -3757,6 +4615,33 @@ def calculate_supp_pcp_weights(supplemental_precip, id_tmp, tmp_file, config_opt
                                                                    config_options, param_type=int)
     # mpi_config.comm.barrier()
 
+    lat_tmp = lon_tmp = None
+    if mpi_config.rank == 0:
+        # Process lat/lon values from the GFS grid.
+        if len(id_tmp.variables[lat_var].shape) == 3:
+            # We have 2D grids already in place.
+            lat_tmp = id_tmp.variables[lat_var][0, :]
+            lon_tmp = id_tmp.variables[lon_var][0, :]
+        elif len(id_tmp.variables[lon_var].shape) == 2:
+            # We have 2D grids already in place.
+            lat_tmp = id_tmp.variables[lat_var][:]
+            lon_tmp = id_tmp.variables[lon_var][:]
+        elif len(id_tmp.variables[lat_var].shape) == 1:
+            # We have 1D lat/lons we need to translate into
+            # 2D grids.
+            lat_tmp = np.repeat(id_tmp.variables[lat_var][:][:, np.newaxis], supplemental_precip.nx_global, axis=1)
+            lon_tmp = np.tile(id_tmp.variables[lon_var][:], (supplemental_precip.ny_global, 1))
+    # mpi_config.comm.barrier()
+
+    # Use the regridding objects of another product with the same source grid, if there is one.
+    src_mask_values = np.array([0])
+    mask_policy = "src_mask_values={}".format(src_mask_values.tolist())
+    registry_key, shared = lookup_shared_regrid(supplemental_precip, lat_tmp, lon_tmp, None,
+                                                ESMF.RegridMethod.BILINEAR, ESMF.ExtrapMethod.NONE, mask_policy,
+                                                ESMF_REGRID_ENGINE, config_options, mpi_config)
+    if shared:
+        return
+
     try:
         # noinspection PyTypeChecker
         supplemental_precip.esmf_grid_in = ESMF.Grid(np.array([supplemental_precip.ny_global,
@@ -3791,24 +4676,6 @@ def calculate_supp_pcp_weights(supplemental_precip, id_tmp, tmp_file, config_opt
         err_handler.log_critical(config_options, mpi_config)
     err_handler.check_program_status(config_options, mpi_config)
 
-    lat_tmp = lon_tmp = None
-    if mpi_config.rank == 0:
-        # Process lat/lon values from the GFS grid.
-        if len(id_tmp.variables[lat_var].shape) == 3:
-            # We have 2D grids already in place.
-            lat_tmp = id_tmp.variables[lat_var][0, :]
-            lon_tmp = id_tmp.variables[lon_var][0, :]
-        elif len(id_tmp.variables[lon_var].shape) == 2:
-            # We have 2D grids already in place.
-            lat_tmp = id_tmp.variables[lat_var][:]
-            lon_tmp = id_tmp.variables[lon_var][:]
-        elif len(id_tmp.variables[lat_var].shape) == 1:
-            # We have 1D lat/lons we need to translate into
-            # 2D grids.
-            lat_tmp = np.repeat(id_tmp.variables[lat_var][:][:, np.newaxis], supplemental_precip.nx_global, axis=1)
-            lon_tmp = np.tile(id_tmp.variables[lon_var][:], (supplemental_precip.ny_global, 1))
-    # mpi_config.comm.barrier()
-
     # Scatter global GFS latitude grid to processors..
     if mpi_config.rank == 0:
         var_tmp = lat_tmp
@@ -3842,10 +4709,15 @@ def calculate_supp_pcp_weights(supplemental_precip, id_tmp, tmp_file, config_opt
 
     supplemental_precip.esmf_lats[:, :] = var_sub_lat_tmp
     supplemental_precip.esmf_lons[:, :] = var_sub_lon_tmp
+
+    # Look up cached weights for this source grid and destination domain.
+    weight_builder = weight_generator(ESMF.RegridMethod.BILINEAR, ESMF.ExtrapMethod.NONE, config_options)
+    weight_key, weight_file, new_weight_file = lookup_weight_file(
+        supplemental_precip, lat_tmp, lon_tmp, ESMF.RegridMethod.BILINEAR, ESMF.ExtrapMethod.NONE,
+        mask_policy, weight_builder, config_options, mpi_config)
+
     del var_sub_lat_tmp
     del var_sub_lon_tmp
-    del lat_tmp
-    del lon_tmp
 
     # Create a ESMF field to hold the incoming data.
     supplemental_precip.esmf_field_in = ESMF.Field(supplemental_precip.esmf_grid_in,
@@ -3874,14 +4746,55 @@ def calculate_supp_pcp_weights(supplemental_precip, id_tmp, tmp_file, config_opt
     supplemental_precip.esmf_field_in.data[:] = var_sub_tmp
     # mpi_config.comm.barrier()
 
-    supplemental_precip.regridObj = ESMF.Regrid(supplemental_precip.esmf_field_in,
-                                                supplemental_precip.esmf_field_out,
-                                                src_mask_values=np.array([0]),
-                                                regrid_method=ESMF.RegridMethod.BILINEAR,
-                                                unmapped_action=ESMF.UnmappedAction.IGNORE)
+    supplemental_precip.regridObj = None
+    if weight_file is not None:
+        try:
+            if mpi_config.rank == 0:
+                config_options.statusMsg = "Loading cached ESMF weight object for " + \
+                                           supplemental_precip.productName + " from " + weight_file
+                err_handler.log_msg(config_options, mpi_config)
+            supplemental_precip.regridObj = ESMF.RegridFromFile(supplemental_precip.esmf_field_in,
+                                                                supplemental_precip.esmf_field_out,
+                                                                weight_file)
+        except (IOError, ValueError, ESMF.ESMPyException) as esmf_error:
+            config_options.statusMsg = "Unable to load cached ESMF weight file: " + str(esmf_error)
+            err_handler.log_warning(config_options, mpi_config)
+            supplemental_precip.regridObj = None
+            drop_weight_file(weight_key, config_options, mpi_config)
+
+    new_weights = supplemental_precip.regridObj is None
+    if new_weights and weight_builder == NUMPY_WEIGHT_BUILDER:
+        src_valid = None
+        if mpi_config.rank == 0:
+            src_valid = np.ones(np.shape(lat_tmp), dtype=bool)
+        built_weight_file = build_weight_file(supplemental_precip, lat_tmp, lon_tmp, src_valid,
+                                              ESMF.RegridMethod.BILINEAR, new_weight_file, config_options, mpi_config)
+        supplemental_precip.regridObj = load_built_weights(supplemental_precip, built_weight_file, new_weight_file,
+                                                           config_options, mpi_config)
+        if supplemental_precip.regridObj is None:
+            # The weights are generated with ESMF after all, so they are stored under the ESMF key.
+            discard_weight_file(new_weight_file, mpi_config)
+            weight_key, weight_file, new_weight_file = lookup_weight_file(
+                supplemental_precip, lat_tmp, lon_tmp, ESMF.RegridMethod.BILINEAR, ESMF.ExtrapMethod.NONE,
+                mask_policy, ESMF_WEIGHT_BUILDER, config_options, mpi_config)
+    del lat_tmp
+    del lon_tmp
+
+    if supplemental_precip.regridObj is None:
+        supplemental_precip.regridObj = ESMF.Regrid(supplemental_precip.esmf_field_in,
+                                                    supplemental_precip.esmf_field_out,
+                                                    src_mask_values=src_mask_values,
+                                                    regrid_method=ESMF.RegridMethod.BILINEAR,
+                                                    unmapped_action=ESMF.UnmappedAction.IGNORE,
+                                                    filename=new_weight_file)
 
     # Run the regridding object on this test dataset. Check the output grid for
     # any 0 values.
     supplemental_precip.esmf_field_out = supplemental_precip.regridObj(supplemental_precip.esmf_field_in,
                                                                        supplemental_precip.esmf_field_out)
+    if new_weights:
+        store_weight_file(supplemental_precip, weight_key, new_weight_file, config_options, mpi_config)
     supplemental_precip.regridded_mask[:] = supplemental_precip.esmf_field_out.data[:]
+    supplemental_precip.mask_plan = maskPlan.MaskPlan(supplemental_precip.regridded_mask)
+
+    config_options.regrid_registry.add(registry_key, supplemental_precip)
@@ -0,0 +1,86 @@
+"""
+Process-wide registry of the regridding objects of the input forcing and
+supplemental precipitation products. Products reading the same source grid
+(e.g. the same model configured as several products, or MRMS products) with
+the same regrid method, extrapolation method, regrid engine and source mask
+share one source ESMF grid and field, one regrid object (and sparse regrid
+matrix) and the regridded mask, instead of each building or loading their own.
+Entries are keyed by a hash of the source lat/lon grids and the sample mask,
+computed on the master processor, and hold the local objects of each processor.
+"""
+import hashlib
+
+import numpy as np
+
+from core.weightStore import hash_grid
+
+# Attributes of an input forcing or supplemental precip object shared through the registry.
+SHARED_ATTRIBUTES = ('esmf_grid_in', 'x_lower_bound', 'x_upper_bound', 'y_lower_bound', 'y_upper_bound',
+                     'nx_local', 'ny_local', 'esmf_lats', 'esmf_lons', 'esmf_field_in', 'regridObj',
+                     'sparse_regrid', 'mask_plan')
+
+
+class RegridRegistry:
+    """
+    Shared regridding objects of the products, by source grid signature.
+    """
+    def __init__(self):
+        self.entries = {}
+
+    @staticmethod
+    def registry_key(lat_grid, lon_grid, mask_grid, regrid_method, extrap_method, mask_policy, regrid_engine):
+        """
+        Compute the signature of a source grid and regridding options.
+        :param lat_grid: Global (cropped) source latitude grid
+        :param lon_grid: Global (cropped) source longitude grid
+        :param mask_grid: Sample mask the regrid object is computed with (None if not masked)
+        :param regrid_method: ESMF regrid method
+        :param extrap_method: ESMF extrapolation method
+        :param mask_policy: Description of the source masking (border width, masked values)
+        :param regrid_engine: Regrid engine applying the weights (ESMF or sparse matrix)
+        :return:
+        """
+        hasher = hashlib.sha256()
+        hash_grid(hasher, lat_grid)
+        hash_grid(hasher, lon_grid)
+        if mask_grid is not None:
+            hash_grid(hasher, mask_grid)
+        for item in (regrid_method, extrap_method, mask_policy, regrid_engine):
+            hasher.update(b'\0' + str(item).encode())
+        return hasher.hexdigest()
+
+    def owner(self, key):
+        """
+        Name of the product that registered the objects of a key.
+        :param key:
+        :return: Product name, or None if the key is not registered
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return entry['productName']
+
+    def add(self, key, grid_obj):
+        """
+        Register the regridding objects of a product.
+        :param key:
+        :param grid_obj: Input forcing or supplemental precip object
+        :return:
+        """
+        entry = {name: getattr(grid_obj, name) for name in SHARED_ATTRIBUTES if hasattr(grid_obj, name)}
+        entry['productName'] = grid_obj.productName
+        entry['regridded_mask'] = np.copy(grid_obj.regridded_mask)
+        self.entries[key] = entry
+
+    def attach(self, key, grid_obj):
+        """
+        Hand the registered regridding objects of a key to a product.
+        :param key:
+        :param grid_obj: Input forcing or supplemental precip object
+        :return:
+        """
+        entry = self.entries[key]
+        for name in SHARED_ATTRIBUTES:
+            if name in entry:
+                setattr(grid_obj, name, entry[name])
+        grid_obj.regridded_mask[...] = entry['regridded_mask']
@@ -0,0 +1,136 @@
+"""
+ESMF-free regridding engine applying precomputed ESMF weights. Once weights
+exist, regridding is a sparse matrix product: the weight file (row, col, S)
+is loaded into a CSR matrix holding only the rows of the local destination
+slab, the source cells those rows need are exchanged between processors in
+a single Alltoallv, and all variables of an input product are regridded in
+one sparse matrix - dense matrix product.
+"""
+import numpy as np
+from mpi4py import MPI
+from netCDF4 import Dataset
+
+from core.parallel import mpi_datatype
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+# Number of weights read from the weight file at a time.
+WEIGHT_CHUNK = 4000000
+
+
+class SparseRegrid:
+    """
+    Sparse matrix form of an ESMF regridding operation, partitioned by
+    destination processor. Masked source cells have no weights in the
+    weight file, and destination cells without weights are set to zero,
+    matching the results of the ESMF regrid object. Building one takes two
+    stages: the weights are loaded and checked locally (no communication),
+    then, once all processors have loaded their weights, exchange() sets up
+    the source cell exchange collectively.
+    """
+    def __init__(self, weight_file, src_plan, dst_shape, dst_bounds):
+        """
+        :param weight_file: ESMF weight file
+        :param src_plan: ScatterPlan of the source grid decomposition
+        :param dst_shape: Global (ny, nx) of the destination grid
+        :param dst_bounds: Local (y_lower, y_upper, x_lower, x_upper) of the destination grid
+        """
+        if sparse is None:
+            raise RuntimeError("The sparse matrix regrid engine requires scipy")
+
+        nproc = src_plan.rows.size
+        ny_dst, nx_dst = dst_shape
+        y_lower, y_upper, x_lower, x_upper = dst_bounds
+        self.dst_local_shape = (y_upper - y_lower, x_upper - x_lower)
+
+        # Read the weights of the local destination cells. ESMF sequence indices
+        # are 1-based and run over the first (y) grid dimension fastest.
+        rows = []
+        cols = []
+        weights = []
+        with Dataset(weight_file, 'r') as id_weights:
+            n_s = id_weights.variables['S'].shape[0]
+            for start in range(0, n_s, WEIGHT_CHUNK):
+                stop = min(start + WEIGHT_CHUNK, n_s)
+                dst_seq = id_weights.variables['row'][start:stop].astype(np.int64) - 1
+                y_dst = dst_seq % ny_dst
+                x_dst = dst_seq // ny_dst
+                local = (y_dst >= y_lower) & (y_dst < y_upper) & (x_dst >= x_lower) & (x_dst < x_upper)
+                rows.append((y_dst[local] - y_lower) * self.dst_local_shape[1] + (x_dst[local] - x_lower))
+                cols.append(id_weights.variables['col'][start:stop].astype(np.int64)[local] - 1)
+                weights.append(id_weights.variables['S'][start:stop].astype(np.float64)[local])
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        weights = np.concatenate(weights)
+
+        # Global (row-major) index of the source cells needed on this processor, and their owners.
+        y_src = cols % src_plan.ny_global
+        x_src = cols // src_plan.ny_global
+        needed, col_index = np.unique(y_src * src_plan.nx_global + x_src, return_inverse=True)
+        y_needed = needed // src_plan.nx_global
+        x_needed = needed % src_plan.nx_global
+        owner = np.full(needed.shape, -1, np.int64)
+        for src_rank in range(nproc):
+            owned = ((y_needed >= src_plan.y_lower[src_rank]) & (y_needed < src_plan.y_upper[src_rank]) &
+                     (x_needed >= src_plan.x_lower[src_rank]) & (x_needed < src_plan.x_upper[src_rank]))
+            owner[owned] = src_rank
+        if np.any(owner < 0):
+            raise ValueError("Weight file " + weight_file + " does not match the source grid decomposition")
+
+        # Order the needed cells by owner, so they arrive grouped by processor.
+        order = np.argsort(owner, kind='stable')
+        position = np.empty_like(order)
+        position[order] = np.arange(order.size)
+        self.needed = needed[order]
+        self.recv_counts = np.bincount(owner, minlength=nproc).astype(np.int64)
+        self.recv_displs = np.concatenate(([0], np.cumsum(self.recv_counts)[:-1]))
+
+        self.matrix = sparse.csr_matrix((weights, (rows, position[col_index])),
+                                        shape=(self.dst_local_shape[0] * self.dst_local_shape[1], self.needed.size))
+        self.src_plan = src_plan
+        self.send_counts = None
+        self.send_displs = None
+        self.send_index = None
+        self.comm = None
+
+    def exchange(self, comm):
+        """
+        Tell the owners of the source cells which of their cells are needed here. Collective:
+        to be called on all processors, once all of them have loaded their weights.
+        :param comm: MPI communicator
+        :return:
+        """
+        rank = comm.Get_rank()
+        self.send_counts = np.empty_like(self.recv_counts)
+        comm.Alltoall(self.recv_counts, self.send_counts)
+        self.send_displs = np.concatenate(([0], np.cumsum(self.send_counts)[:-1]))
+        requested = np.empty(int(self.send_counts.sum()), np.int64)
+        comm.Alltoallv([self.needed, self.recv_counts, self.recv_displs, MPI.INT64_T],
+                       [requested, self.send_counts, self.send_displs, MPI.INT64_T])
+
+        # Local (row-major) index of the requested cells within the local source slab.
+        src_plan = self.src_plan
+        src_cols = int(src_plan.cols[rank])
+        self.send_index = ((requested // src_plan.nx_global - src_plan.y_lower[rank]) * src_cols +
+                           (requested % src_plan.nx_global - src_plan.x_lower[rank]))
+        self.comm = comm
+
+    def apply(self, src_stack, dtype=np.float64):
+        """
+        Regrid a local stack of source grids.
+        :param src_stack: Local [nvar, ny_local, nx_local] stack on the source grid
+        :param dtype: Floating-point type the source cells are exchanged in. The weighted
+                      sums are accumulated in double precision either way.
+        :return: Local [nvar, ny_local, nx_local] stack on the destination grid
+        """
+        nvar = src_stack.shape[0]
+        data_type = mpi_datatype(dtype)
+        send_buf = np.ascontiguousarray(src_stack.reshape(nvar, -1)[:, self.send_index].T, dtype=dtype)
+        recv_buf = np.empty([self.matrix.shape[1], nvar], dtype)
+        self.comm.Alltoallv([send_buf, self.send_counts * nvar, self.send_displs * nvar, data_type],
+                            [recv_buf, self.recv_counts * nvar, self.recv_displs * nvar, data_type])
+        dst_stack = self.matrix @ recv_buf.astype(np.float64, copy=False)
+        return np.ascontiguousarray(dst_stack.T).reshape((nvar,) + self.dst_local_shape)
@@ -45,6 +45,7 @@ class supplemental_precip:
         self.regridded_rqi1 = None
         self.regridded_rqi2 = None
         self.regridded_mask = None
+        self.mask_plan = None
         self.final_supp_precip = None
         self.file_in1 = None
         self.file_in2 = None
@@ -328,7 +329,7 @@ def initDict(ConfigOptions,GeoMetaWrfHydro):
         # Initialize the local final grid of values
         InputDict[supp_pcp_key].final_supp_precip = np.empty([GeoMetaWrfHydro.ny_local,
                                                               GeoMetaWrfHydro.nx_local],
-                                                             np.float64)
+                                                             ConfigOptions.working_dtype)
         InputDict[supp_pcp_key].regridded_mask = np.empty([GeoMetaWrfHydro.ny_local,
                                                            GeoMetaWrfHydro.nx_local], np.float32)
 
@@ -1123,14 +1123,17 @@ def find_gfs_neighbors(input_forcings, config_options, d_current, mpi_config):
     # if np.any(input_forcings.globalPcpRate2) and not np.any(input_forcings.globalPcpRate1):
     if input_forcings.globalPcpRate2 is not None and input_forcings.globalPcpRate1 is None:
         input_forcings.globalPcpRate1 = np.empty([input_forcings.globalPcpRate2.shape[0],
-                                                  input_forcings.globalPcpRate2.shape[1]], np.float32)
+                                                  input_forcings.globalPcpRate2.shape[1]],
+                                                  input_forcings.globalPcpRate2.dtype)
     # if np.any(input_forcings.globalPcpRate2) and np.any(input_forcings.globalPcpRate1):
     if input_forcings.globalPcpRate2 is not None and input_forcings.globalPcpRate1 is not None:
-        if input_forcings.globalPcpRate2.shape[0] != input_forcings.globalPcpRate1.shape[0]:
-            # The grid has changed, we need to re-initialize the globalPcpRate1 array.
+        if input_forcings.globalPcpRate2.shape != input_forcings.globalPcpRate1.shape:
+            # The grid (or the window it is cropped to) has changed, we need to re-initialize
+            # the globalPcpRate1 array.
             input_forcings.globalPcpRate1 = None
             input_forcings.globalPcpRate1 = np.empty([input_forcings.globalPcpRate2.shape[0],
-                                                      input_forcings.globalPcpRate2.shape[1]], np.float32)
+                                                      input_forcings.globalPcpRate2.shape[1]],
+                                                      input_forcings.globalPcpRate2.dtype)
 
     # Check to see if files are already set. If not, then reset, grids and
     # regridding objects to communicate things need to be re-established.
@@ -1154,7 +1157,8 @@ def find_gfs_neighbors(input_forcings, config_options, d_current, mpi_config):
                 input_forcings.regridded_forcings1 = input_forcings.regridded_forcings1
                 input_forcings.regridded_forcings2 = input_forcings.regridded_forcings2
                 if input_forcings.productName == "GFS_Production_GRIB2":
-                    if mpi_config.rank == 0:
+                    # With a distributed read every processor holds the precipitation rates of its own patch.
+                    if mpi_config.rank == 0 or input_forcings.distributed_read:
                         input_forcings.globalPcpRate1 = input_forcings.globalPcpRate1
                         input_forcings.globalPcpRate2 = input_forcings.globalPcpRate2
                 input_forcings.file_in2 = tmp_file1
@@ -1166,7 +1170,7 @@ def find_gfs_neighbors(input_forcings, config_options, d_current, mpi_config):
                 # be fields 1.
                 input_forcings.regridded_forcings1[:, :, :] = input_forcings.regridded_forcings2[:, :, :]
                 if input_forcings.productName == "GFS_Production_GRIB2":
-                    if mpi_config.rank == 0:
+                    if mpi_config.rank == 0 or input_forcings.distributed_read:
                         input_forcings.globalPcpRate1[:, :] = input_forcings.globalPcpRate2[:, :]
                 input_forcings.file_in1 = tmp_file1
                 input_forcings.file_in2 = tmp_file2
@@ -0,0 +1,261 @@
+"""
+ESMF-free generation of bilinear and nearest neighbor regridding weights.
+Nearest neighbor weights map each destination cell to the closest unmasked
+source cell, found with a KD-tree on unit sphere coordinates. Bilinear
+weights locate each destination cell within a quadrilateral of four
+unmasked source cell centers (searched among the quadrilaterals with the
+nearest centers), and invert the bilinear mapping of that quadrilateral in a
+gnomonic projection about the destination cell. Destination cells outside
+all unmasked quadrilaterals get no weights, like ESMF with unmapped cells
+ignored. The weights are written in the ESMF weight file format (1-based
+row, col, S, with sequence indices running over the first (y) grid dimension
+fastest), so they are loaded like weights generated by ESMF.
+"""
+import numpy as np
+from netCDF4 import Dataset
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# Number of destination cells searched at a time.
+DST_CHUNK = 1000000
+
+# Number of nearest quadrilaterals tried for each destination cell.
+BILINEAR_CANDIDATES = 8
+
+# Tolerance on the bilinear coordinates of a destination cell on a quadrilateral edge.
+BILINEAR_TOLERANCE = 1.0e-6
+
+
+def to_xyz(lat, lon):
+    """
+    Unit sphere coordinates of lat/lon points (degrees).
+    :param lat:
+    :param lon:
+    :return: [n, 3] array
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64).ravel())
+    lon = np.radians(np.asarray(lon, dtype=np.float64).ravel())
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=1)
+
+
+def sequence_index(flat_index, shape):
+    """
+    1-based ESMF sequence indices of row-major flat indices of a [ny, nx] grid.
+    :param flat_index:
+    :param shape:
+    :return:
+    """
+    ny, nx = shape
+    return (flat_index % nx) * ny + flat_index // nx + 1
+
+
+def nearest_weights(src_lat, src_lon, src_valid, dst_lat, dst_lon):
+    """
+    Nearest neighbor (source to destination) weights.
+    :param src_lat: Global [ny, nx] source latitude grid
+    :param src_lon: Global [ny, nx] source longitude grid
+    :param src_valid: Global [ny, nx] boolean grid of the unmasked source cells
+    :param dst_lat: Global [ny, nx] destination latitude grid
+    :param dst_lon: Global [ny, nx] destination longitude grid
+    :return: Row (destination) and column (source) sequence indices, and weights
+    """
+    if cKDTree is None:
+        raise RuntimeError("The NumPy weight builder requires scipy")
+
+    src_shape = np.shape(src_lat)
+    dst_shape = np.shape(dst_lat)
+    src_index = np.flatnonzero(np.asarray(src_valid).ravel())
+    if src_index.size == 0:
+        raise ValueError("All source cells are masked")
+    tree = cKDTree(to_xyz(np.ravel(src_lat)[src_index], np.ravel(src_lon)[src_index]))
+
+    dst_lat = np.ravel(dst_lat)
+    dst_lon = np.ravel(dst_lon)
+    nearest = np.empty(dst_lat.size, np.int64)
+    for start in range(0, dst_lat.size, DST_CHUNK):
+        stop = min(start + DST_CHUNK, dst_lat.size)
+        nearest[start:stop] = tree.query(to_xyz(dst_lat[start:stop], dst_lon[start:stop]))[1]
+
+    rows = sequence_index(np.arange(dst_lat.size), dst_shape)
+    cols = sequence_index(src_index[nearest], src_shape)
+    return rows, cols, np.ones(rows.size, np.float64)
+
+
+def cross2d(ax, ay, bx, by):
+    """
+    z component of the cross product of 2D vectors.
+    :param ax:
+    :param ay:
+    :param bx:
+    :param by:
+    :return:
+    """
+    return ax * by - ay * bx
+
+
+def inverse_bilinear(corners_x, corners_y):
+    """
+    Bilinear coordinates of the origin within quadrilaterals a, b, c, d (counter
+    or clockwise), such that (1-u)(1-v) a + u(1-v) b + uv c + (1-u)v d = 0.
+    :param corners_x: [4, n] x coordinates of the corners
+    :param corners_y: [4, n] y coordinates of the corners
+    :return: u, v (NaN where there is no solution)
+    """
+    ax, bx, cx, dx = corners_x
+    ay, by, cy, dy = corners_y
+    ex, ey = bx - ax, by - ay
+    fx, fy = dx - ax, dy - ay
+    gx, gy = ax - bx + cx - dx, ay - by + cy - dy
+    hx, hy = -ax, -ay
+
+    k2 = cross2d(gx, gy, fx, fy)
+    k1 = cross2d(ex, ey, fx, fy) + cross2d(hx, hy, gx, gy)
+    k0 = cross2d(hx, hy, ex, ey)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Parallelogram-like quadrilaterals: the equation in v is linear.
+        linear = np.abs(k2) <= 1.0e-12 * np.maximum(np.abs(k1), 1.0e-300)
+        v_linear = -k0 / k1
+        disc = np.sqrt(np.where(k1 * k1 - 4.0 * k0 * k2 >= 0.0, k1 * k1 - 4.0 * k0 * k2, np.nan))
+        v1 = np.where(linear, v_linear, (-k1 - disc) / (2.0 * k2))
+        v2 = np.where(linear, v_linear, (-k1 + disc) / (2.0 * k2))
+
+        def u_of(v):
+            den_x = ex + gx * v
+            den_y = ey + gy * v
+            return np.where(np.abs(den_x) >= np.abs(den_y), (hx - fx * v) / den_x, (hy - fy * v) / den_y)
+
+        u1 = u_of(v1)
+        u2 = u_of(v2)
+    inside1 = within_unit(u1) & within_unit(v1)
+    u = np.where(inside1, u1, u2)
+    v = np.where(inside1, v1, v2)
+    return u, v
+
+
+def within_unit(x):
+    """
+    Whether bilinear coordinates are within [0, 1], up to the tolerance.
+    :param x:
+    :return:
+    """
+    with np.errstate(invalid='ignore'):
+        return (x >= -BILINEAR_TOLERANCE) & (x <= 1.0 + BILINEAR_TOLERANCE)
+
+
+def bilinear_weights(src_lat, src_lon, src_valid, dst_lat, dst_lon):
+    """
+    Bilinear weights on the quadrilaterals of unmasked source cell centers.
+    :param src_lat: Global [ny, nx] source latitude grid
+    :param src_lon: Global [ny, nx] source longitude grid
+    :param src_valid: Global [ny, nx] boolean grid of the unmasked source cells
+    :param dst_lat: Global [ny, nx] destination latitude grid
+    :param dst_lon: Global [ny, nx] destination longitude grid
+    :return: Row (destination) and column (source) sequence indices, and weights
+    """
+    if cKDTree is None:
+        raise RuntimeError("The NumPy weight builder requires scipy")
+
+    src_shape = np.shape(src_lat)
+    dst_shape = np.shape(dst_lat)
+    ny, nx = src_shape
+    src_xyz = to_xyz(src_lat, src_lon)
+    src_valid = np.asarray(src_valid, dtype=bool)
+
+    # Quadrilaterals (a, b, c, d) = (j, i), (j, i + 1), (j + 1, i + 1), (j + 1, i), kept
+    # if all corners are unmasked.
+    flat = np.arange(ny * nx).reshape(src_shape)
+    quads = np.stack([flat[:-1, :-1].ravel(), flat[:-1, 1:].ravel(), flat[1:, 1:].ravel(),
+                      flat[1:, :-1].ravel()])
+    quads = quads[:, np.all(src_valid.ravel()[quads], axis=0)]
+    if quads.shape[1] == 0:
+        raise ValueError("No source quadrilateral has four unmasked corners")
+
+    centers = src_xyz[quads].sum(axis=0)
+    centers /= np.linalg.norm(centers, axis=1)[:, np.newaxis]
+    radius = max(np.linalg.norm(src_xyz[quads[corner]] - centers, axis=1).max() for corner in range(4))
+    tree = cKDTree(centers)
+    n_candidates = min(BILINEAR_CANDIDATES, quads.shape[1])
+
+    dst_lat = np.ravel(dst_lat)
+    dst_lon = np.ravel(dst_lon)
+    rows = []
+    cols = []
+    weights = []
+    for start in range(0, dst_lat.size, DST_CHUNK):
+        stop = min(start + DST_CHUNK, dst_lat.size)
+        dst_xyz = to_xyz(dst_lat[start:stop], dst_lon[start:stop])
+        candidates = tree.query(dst_xyz, k=n_candidates, distance_upper_bound=2.0 * radius)[1]
+        candidates = candidates.reshape(dst_xyz.shape[0], n_candidates)
+
+        # Local tangent plane basis at each destination cell.
+        helper = np.where(np.abs(dst_xyz[:, 2:3]) < 0.9, [[0.0, 0.0, 1.0]], [[1.0, 0.0, 0.0]])
+        east = np.cross(helper, dst_xyz)
+        east /= np.linalg.norm(east, axis=1)[:, np.newaxis]
+        north = np.cross(dst_xyz, east)
+
+        found = np.zeros(dst_xyz.shape[0], dtype=bool)
+        for candidate in range(n_candidates):
+            todo = np.flatnonzero(~found & (candidates[:, candidate] < quads.shape[1]))
+            if todo.size == 0:
+                continue
+            quad_corners = quads[:, candidates[todo, candidate]]
+            corner_xyz = src_xyz[quad_corners]
+            point = dst_xyz[todo]
+
+            # Gnomonic projection of the corners onto the tangent plane (corners on the far
+            # hemisphere cannot enclose the destination cell).
+            dot = np.einsum('cnk,nk->cn', corner_xyz, point)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                projected = corner_xyz / dot[:, :, np.newaxis]
+            corners_x = np.einsum('cnk,nk->cn', projected, east[todo])
+            corners_y = np.einsum('cnk,nk->cn', projected, north[todo])
+            u, v = inverse_bilinear(corners_x, corners_y)
+            inside = np.all(dot > 0.0, axis=0) & within_unit(u) & within_unit(v)
+            if not np.any(inside):
+                continue
+
+            u = np.clip(u[inside], 0.0, 1.0)
+            v = np.clip(v[inside], 0.0, 1.0)
+            corner_weights = np.stack([(1.0 - u) * (1.0 - v), u * (1.0 - v), u * v, (1.0 - u) * v])
+            dst_index = start + todo[inside]
+            rows.append(np.broadcast_to(dst_index, corner_weights.shape).ravel())
+            cols.append(quad_corners[:, inside].ravel())
+            weights.append(corner_weights.ravel())
+            found[todo[inside]] = True
+
+    if not rows:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.float64)
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    weights = np.concatenate(weights)
+
+    # Drop zero weights of cells on a corner or edge, as ESMF does not store them.
+    nonzero = weights != 0.0
+    return (sequence_index(rows[nonzero], dst_shape), sequence_index(cols[nonzero], src_shape),
+            weights[nonzero])
+
+
+def write_weight_file(weight_file, rows, cols, weights, src_shape, dst_shape):
+    """
+    Write weights in the ESMF weight file format.
+    :param weight_file:
+    :param rows: 1-based destination sequence indices
+    :param cols: 1-based source sequence indices
+    :param weights:
+    :param src_shape: Global (ny, nx) of the source grid
+    :param dst_shape: Global (ny, nx) of the destination grid
+    :return:
+    """
+    with Dataset(weight_file, 'w', format='NETCDF4') as id_weights:
+        id_weights.createDimension('n_s', rows.size)
+        id_weights.createDimension('n_a', int(np.prod(src_shape)))
+        id_weights.createDimension('n_b', int(np.prod(dst_shape)))
+        id_weights.createVariable('row', 'i4', ('n_s',))[:] = rows
+        id_weights.createVariable('col', 'i4', ('n_s',))[:] = cols
+        id_weights.createVariable('S', 'f8', ('n_s',))[:] = weights
+        id_weights.title = "Regridding weights generated without ESMF"
@@ -0,0 +1,135 @@
+"""
+Offline generation of the ESMF regridding weights of all configured input
+forcing and supplemental precipitation products, so a forcing engine run on a
+new domain only loads weights from the weight store. For each product, the
+output steps of the first forecast cycle are stepped through until an input
+file has been regridded, which computes (and stores) the weights of the
+configured regrid method on all processors. The time taken and the size of
+the stored weight files are reported per product.
+"""
+import datetime
+import time
+
+from core import err_handler
+
+
+def generate_weights(ConfigOptions, wrfHydroGeoMeta, inputForcingMod, suppPcpMod, MpiConfig):
+    """
+    Main calling module for generating the regridding weights of all products.
+    :param ConfigOptions:
+    :param wrfHydroGeoMeta:
+    :param inputForcingMod:
+    :param suppPcpMod:
+    :param MpiConfig:
+    :return:
+    """
+    ConfigOptions.current_fcst_cycle = ConfigOptions.b_date_proc
+    ConfigOptions.first_fcst_cycle = ConfigOptions.b_date_proc
+
+    # Fields read back from the regridded field cache would bypass the weight calculation.
+    ConfigOptions.fieldCacheDir = None
+
+    ConfigOptions.logFile = ConfigOptions.scratch_dir + "/LOG_WEIGHTS_" + \
+                            ConfigOptions.d_program_init.strftime('%Y%m%d%H%M')
+    try:
+        err_handler.init_log(ConfigOptions, MpiConfig)
+    except:
+        err_handler.err_out_screen_para(ConfigOptions.errMsg, MpiConfig)
+    err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+    # Products, with the output frequency and number of output steps they are processed at.
+    products = []
+    if not ConfigOptions.precip_only_flag:
+        for forceKey in ConfigOptions.input_forcings:
+            products.append((inputForcingMod[forceKey], ConfigOptions.output_freq, ConfigOptions.num_output_steps))
+    if ConfigOptions.number_supp_pcp > 0:
+        for suppPcpKey in ConfigOptions.supp_precip_forcings:
+            if suppPcpKey == 13:
+                products.append((suppPcpMod[suppPcpKey], ConfigOptions.customSuppPcpFreq,
+                                 ConfigOptions.num_supp_output_steps))
+            else:
+                products.append((suppPcpMod[suppPcpKey], ConfigOptions.output_freq, ConfigOptions.num_output_steps))
+
+    report = []
+    for grid_obj, output_freq, num_steps in products:
+        report.append(generate_product_weights(grid_obj, output_freq, num_steps, ConfigOptions,
+                                               wrfHydroGeoMeta, MpiConfig))
+
+    if MpiConfig.rank == 0:
+        ConfigOptions.statusMsg = '========================================='
+        err_handler.log_msg(ConfigOptions, MpiConfig)
+        for product_name, status, elapsed, num_files, size in report:
+            ConfigOptions.statusMsg = "{}: weights {} in {:.1f} seconds, {} weight file(s) of {:.1f} MB " \
+                                      "in the weight store".format(product_name, status, elapsed, num_files,
+                                                                   size / 1024.0 ** 2)
+            err_handler.log_msg(ConfigOptions, MpiConfig)
+        ConfigOptions.statusMsg = "Weights generated for {} products in {:.1f} seconds".format(
+            len(report), sum(entry[2] for entry in report))
+        err_handler.log_msg(ConfigOptions, MpiConfig)
+    err_handler.check_program_status(ConfigOptions, MpiConfig)
+
+    if MpiConfig.rank == 0:
+        # Close the log file.
+        try:
+            err_handler.close_log(ConfigOptions, MpiConfig)
+        except:
+            err_handler.err_out_screen_para(ConfigOptions.errMsg, MpiConfig)
+
+
+def generate_product_weights(grid_obj, output_freq, num_steps, ConfigOptions, wrfHydroGeoMeta, MpiConfig):
+    """
+    Function to regrid the first available input file of an input forcing or
+    supplemental precip product, which computes or loads its regridding weights.
+    :param grid_obj: Input forcing or supplemental precip object
+    :param output_freq: Output frequency (minutes) the product is processed at
+    :param num_steps: Number of output steps of a forecast cycle
+    :param ConfigOptions:
+    :param wrfHydroGeoMeta:
+    :param MpiConfig:
+    :return: Product name, how the weights were obtained, time taken (seconds), and the
+             number and total size (bytes) of its weight files in the store (on the master processor).
+    """
+    weight_store = ConfigOptions.weight_store
+    hits_before = misses_before = 0
+    if weight_store is not None:
+        hits_before, misses_before = weight_store.hits, weight_store.misses
+
+    if MpiConfig.rank == 0:
+        ConfigOptions.statusMsg = "Generating regridding weights for " + grid_obj.productName
+        err_handler.log_msg(ConfigOptions, MpiConfig)
+
+    begin = time.monotonic()
+    for outStep in range(1, num_steps + 1):
+        ConfigOptions.current_output_step = outStep
+        ConfigOptions.current_output_date = ConfigOptions.current_fcst_cycle + datetime.timedelta(
+            seconds=output_freq * 60 * outStep)
+        ConfigOptions.prev_output_date = ConfigOptions.current_output_date - datetime.timedelta(
+            seconds=output_freq * 60)
+
+        grid_obj.calc_neighbor_files(ConfigOptions, ConfigOptions.current_output_date, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
+        if getattr(grid_obj, 'skip', False):
+            break
+
+        grid_obj.regrid_inputs(ConfigOptions, wrfHydroGeoMeta, MpiConfig)
+        err_handler.check_program_status(ConfigOptions, MpiConfig)
+        if grid_obj.regridObj is not None:
+            break
+    elapsed = time.monotonic() - begin
+
+    # The weight store is created on the master processor with the first weight lookup.
+    status = "not generated (no input file found)"
+    num_files = size = 0
+    if MpiConfig.rank == 0 and grid_obj.regridObj is not None:
+        weight_store = ConfigOptions.weight_store
+        if weight_store is None:
+            status = "generated"
+        elif weight_store.misses > misses_before:
+            status = "generated"
+        elif weight_store.hits > hits_before:
+            status = "loaded"
+        else:
+            status = "shared with a product on the same grid"
+        if weight_store is not None:
+            num_files, size = weight_store.product_size(grid_obj.productName)
+    return grid_obj.productName, status, elapsed, num_files, size
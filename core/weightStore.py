@@ -0,0 +1,249 @@
+"""
+Content-addressed store of ESMF regrid weight files, shared between runs and
+configurations using the same weights directory. Weight files are keyed by a
+hash of everything that determines the weights (source lat/lon grids, destination
+domain, regrid method, extrapolation, mask policy, ESMF version and the generator
+of the weights), so a changed grid, method or generator never picks up stale
+weights. An index file in the weights directory tracks the files in the store,
+their size and last use, and is used for least-recently-used eviction once the
+store exceeds its maximum size.
+Files looked up within the last EVICTION_GRACE seconds are not evicted, as
+other runs may not have finished loading them yet (the index lock is only held
+during the lookup itself). All methods are meant to be called on the master
+processor only.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+from netCDF4 import Dataset
+
+INDEX_FILE = "ESMF_weights_index.json"
+LOCK_FILE = "ESMF_weights_index.lock"
+
+# Time in seconds after its last lookup during which a file is not evicted.
+EVICTION_GRACE = 3600.0
+
+
+def hash_grid(hasher, grid):
+    """
+    Add the shape and values of a grid to a hash.
+    :param hasher:
+    :param grid:
+    :return:
+    """
+    grid = np.ascontiguousarray(np.ma.filled(grid, np.nan), dtype=np.float64)
+    hasher.update(str(grid.shape).encode())
+    hasher.update(grid.tobytes())
+
+
+class WeightStore:
+    """
+    Store of ESMF weight files within a weights directory.
+    """
+    DESCRIPTION = "ESMF weight"
+    FILE_PREFIX = "ESMF_weight"
+    FILE_SUFFIX = ".nc4"
+    INDEX_FILE = INDEX_FILE
+    LOCK_FILE = LOCK_FILE
+    EVICTION_GRACE = EVICTION_GRACE
+
+    def __init__(self, weights_dir, max_size=0):
+        """
+        :param weights_dir: Directory holding the weight files and the index
+        :param max_size: Maximum total size of the weight files in bytes (0 for no limit)
+        """
+        self.weights_dir = weights_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.destination_hashes = {}
+
+    def destination_hash(self, geogrid):
+        """
+        Hash of the lat/lon grids of a WRF-Hydro geogrid file, read once per run.
+        :param geogrid:
+        :return:
+        """
+        dest_hash = self.destination_hashes.get(geogrid)
+        if dest_hash is None:
+            hasher = hashlib.sha256()
+            with Dataset(geogrid, 'r') as id_geo:
+                hash_grid(hasher, id_geo.variables['XLAT_M'][0, :, :])
+                hash_grid(hasher, id_geo.variables['XLONG_M'][0, :, :])
+            dest_hash = hasher.hexdigest()
+            self.destination_hashes[geogrid] = dest_hash
+        return dest_hash
+
+    def weight_key(self, lat_grid, lon_grid, geogrid, regrid_method, extrap_method, mask_policy, esmf_version,
+                   weight_builder):
+        """
+        Compute the key of a weight file.
+        :param lat_grid: Global source latitude grid
+        :param lon_grid: Global source longitude grid
+        :param geogrid: Destination WRF-Hydro geogrid file
+        :param regrid_method: ESMF regrid method
+        :param extrap_method: ESMF extrapolation method
+        :param mask_policy: Description of the source masking (border width, masked values)
+        :param esmf_version:
+        :param weight_builder: Generator of the weights (ESMF or the NumPy weight builder)
+        :return:
+        """
+        hasher = hashlib.sha256()
+        hash_grid(hasher, lat_grid)
+        hash_grid(hasher, lon_grid)
+        hasher.update(self.destination_hash(geogrid).encode())
+        for item in (regrid_method, extrap_method, mask_policy, esmf_version, weight_builder):
+            hasher.update(b'\0' + str(item).encode())
+        return hasher.hexdigest()
+
+    def lookup(self, key):
+        """
+        Return the path of the weight file for a key, or None if it is not in the store.
+        Records a hit or miss.
+        :param key:
+        :return:
+        """
+        with self.locked_index() as index:
+            entry = index.get(key)
+            if entry is not None and os.path.isfile(os.path.join(self.weights_dir, entry['file'])):
+                entry['last_used'] = time.time()
+                entry['hits'] = entry.get('hits', 0) + 1
+                self.hits += 1
+                return os.path.join(self.weights_dir, entry['file'])
+            index.pop(key, None)
+        self.misses += 1
+        return None
+
+    def new_file(self, product_name, key):
+        """
+        Return a unique temporary path for ESMF to write a new weight file to,
+        before it is added to the store with add().
+        :param product_name:
+        :param key:
+        :return:
+        """
+        return os.path.join(self.weights_dir, ".{}_{}_{}.{}.tmp".format(self.FILE_PREFIX, product_name, key[:16],
+                                                                        uuid.uuid4().hex))
+
+    def add(self, key, tmp_file, product_name):
+        """
+        Atomically move a newly written weight file into the store, then evict
+        the least recently used weight files if the store is over its size limit.
+        :param key:
+        :param tmp_file:
+        :param product_name:
+        :return: Path of the weight file in the store
+        """
+        file_name = "{}_{}_{}{}".format(self.FILE_PREFIX, product_name, key[:32], self.FILE_SUFFIX)
+        os.replace(tmp_file, os.path.join(self.weights_dir, file_name))
+        now = time.time()
+        with self.locked_index() as index:
+            index[key] = {'file': file_name, 'product': product_name,
+                          'size': os.path.getsize(os.path.join(self.weights_dir, file_name)),
+                          'created': now, 'last_used': now, 'hits': 0}
+            self.evict(index, keep=key)
+        return os.path.join(self.weights_dir, file_name)
+
+    def remove(self, key):
+        """
+        Remove a (bad) weight file from the store.
+        :param key:
+        :return:
+        """
+        with self.locked_index() as index:
+            entry = index.pop(key, None)
+            if entry is not None:
+                try:
+                    os.remove(os.path.join(self.weights_dir, entry['file']))
+                except FileNotFoundError:
+                    pass
+
+    def evict(self, index, keep=None):
+        """
+        Remove least recently used weight files until the store fits its size limit.
+        Files used within the grace period are kept, so the store may stay over
+        its limit until they have aged.
+        :param index: Index dictionary, with the index lock held
+        :param keep: Key that is never evicted
+        :return:
+        """
+        if self.max_size <= 0:
+            return
+        total_size = sum(entry['size'] for entry in index.values())
+        grace_start = time.time() - self.EVICTION_GRACE
+        for key in sorted(index, key=lambda k: index[k]['last_used']):
+            if total_size <= self.max_size or index[key]['last_used'] > grace_start:
+                break
+            if key == keep:
+                continue
+            entry = index.pop(key)
+            total_size -= entry['size']
+            try:
+                os.remove(os.path.join(self.weights_dir, entry['file']))
+            except FileNotFoundError:
+                pass
+
+    def product_size(self, product_name):
+        """
+        Number and total size of the weight files of a product in the store.
+        :param product_name:
+        :return:
+        """
+        with self.locked_index() as index:
+            sizes = [entry['size'] for entry in index.values() if entry.get('product') == product_name]
+        return len(sizes), sum(sizes)
+
+    def stats(self):
+        """
+        Summary of the store hits and misses of this run.
+        :return:
+        """
+        return "{} store: {} hits, {} misses this run".format(self.DESCRIPTION, self.hits, self.misses)
+
+    def locked_index(self):
+        """
+        Context manager holding the index lock (shared by all runs using the
+        weights directory), yielding the index dictionary and writing it back
+        atomically on exit.
+        :return:
+        """
+        return _LockedIndex(os.path.join(self.weights_dir, self.INDEX_FILE),
+                            os.path.join(self.weights_dir, self.LOCK_FILE))
+
+
+class _LockedIndex:
+    """
+    Exclusive access to the weight store index.
+    """
+    def __init__(self, index_path, lock_path):
+        self.index_path = index_path
+        self.lock_path = lock_path
+        self.lock_fd = None
+        self.index = None
+
+    def __enter__(self):
+        self.lock_fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR)
+        fcntl.flock(self.lock_fd, fcntl.LOCK_EX)
+        try:
+            with open(self.index_path, 'r') as index_file:
+                self.index = json.load(index_file)
+        except (FileNotFoundError, ValueError):
+            self.index = {}
+        return self.index
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            if exc_type is None:
+                tmp_path = self.index_path + "." + uuid.uuid4().hex
+                with open(tmp_path, 'w') as index_file:
+                    json.dump(self.index, index_file, indent=1)
+                os.replace(tmp_path, self.index_path)
+        finally:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+            os.close(self.lock_fd)
+        return False
@@ -0,0 +1,110 @@
+import argparse
+import os
+
+from core import config
+from core import err_handler
+from core import forcingInputMod
+from core import geoMod
+from core import parallel
+from core import suppPrecipMod
+from core import weightGen
+
+
+def main():
+    """ Main program to generate the ESMF regridding weights of all input forcing
+        and supplemental precipitation products of a forcing configuration ahead
+        of operations. The weights are written to the weight store of the
+        RegridWeightsDir directory of the configuration, which later forcing
+        engine runs on the same domain load them from. Only the weights of the
+        regrid method configured for each product are generated, by regridding
+        an input file of the first forecast cycle of the configuration.
+    """
+    # Parse out the path to the configuration file.
+    parser = argparse.ArgumentParser(description='Generate the regridding weights of a WRF-Hydro forcing '
+                                                 'configuration',
+                                     epilog='Only the weights of the regrid method configured for each product '
+                                            '(RegridOpt/RegridOptSuppPcp) are generated. The weights are computed '
+                                            'by regridding the input files of the first forecast cycle of the '
+                                            'configuration, so those files must exist.')
+    parser.add_argument('config_file', metavar='config_file', type=str,
+                        help='Configuration file for the forcing engine')
+    parser.add_argument('--geogrid', type=str, default=None,
+                        help='WRF-Hydro geogrid file to use instead of the GeogridIn of the configuration')
+
+    # Process the input arguments into the program.
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.config_file):
+        err_handler.err_out_screen('Specified configuration file: ' + args.config_file + ' not found.')
+
+    # Initialize the configuration object that will contain all
+    # user-specified options.
+    job_meta = config.ConfigOptions(args.config_file)
+
+    # Parse the configuration options
+    try:
+        job_meta.read_config()
+    except KeyboardInterrupt:
+        err_handler.err_out_screen('User keyboard interrupt')
+    except ImportError:
+        err_handler.err_out_screen('Missing Python packages')
+    except InterruptedError:
+        err_handler.err_out_screen('External kill signal detected')
+
+    if args.geogrid is not None:
+        if not os.path.isfile(args.geogrid):
+            err_handler.err_out_screen('Unable to locate necessary geogrid file: ' + args.geogrid)
+        job_meta.geogrid = args.geogrid
+
+    if job_meta.weightsDir is None:
+        err_handler.err_out_screen('RegridWeightsDir must be set in the configuration file to store the '
+                                   'generated weights.')
+
+    # Initialize our MPI communication
+    mpi_meta = parallel.MpiConfig()
+    try:
+        mpi_meta.initialize_comm(job_meta)
+    except:
+        err_handler.err_out_screen(job_meta.errMsg)
+
+    # Initialize our WRF-Hydro geospatial object, which contains the ESMF grid
+    # of the modeling domain the weights are generated for.
+    WrfHydroGeoMeta = geoMod.GeoMetaWrfHydro()
+    try:
+        WrfHydroGeoMeta.initialize_destination_geo(job_meta, mpi_meta)
+    except Exception:
+        err_handler.err_out_screen_para(job_meta.errMsg, mpi_meta)
+    if job_meta.spatial_meta is not None:
+        try:
+            WrfHydroGeoMeta.initialize_geospatial_metadata(job_meta, mpi_meta)
+        except Exception:
+            err_handler.err_out_screen_para(job_meta.errMsg, mpi_meta)
+    err_handler.check_program_status(job_meta, mpi_meta)
+
+    # Check to make sure we have enough dimensionality to run regridding. ESMF requires both grids
+    # to have a size of at least 2.
+    if WrfHydroGeoMeta.nx_local < 2 or WrfHydroGeoMeta.ny_local < 2:
+        job_meta.errMsg = "You have specified too many cores for your WRF-Hydro grid. " \
+                          "Local grid Must have x/y dimension size of 2."
+        err_handler.err_out_screen_para(job_meta.errMsg, mpi_meta)
+    err_handler.check_program_status(job_meta, mpi_meta)
+
+    # Initialize the input forcing and supplemental precipitation products.
+    try:
+        inputForcingMod = forcingInputMod.initDict(job_meta, WrfHydroGeoMeta)
+    except Exception:
+        err_handler.err_out_screen_para(job_meta.errMsg, mpi_meta)
+    err_handler.check_program_status(job_meta, mpi_meta)
+
+    if job_meta.number_supp_pcp > 0:
+        suppPcpMod = suppPrecipMod.initDict(job_meta, WrfHydroGeoMeta)
+    else:
+        suppPcpMod = None
+    err_handler.check_program_status(job_meta, mpi_meta)
+
+    weightGen.generate_weights(job_meta, WrfHydroGeoMeta, inputForcingMod, suppPcpMod, mpi_meta)
+    err_handler.check_program_status(job_meta, mpi_meta)
+
+
+if __name__ == "__main__":
+    main()